@@ -1,19 +1,31 @@
 """
 分析历史扫描结果
 统计哪些股票频繁出现买卖点信号
+
+扫描历史来自信号历史库（core/signal_history.py），统计全部用 SQL 聚合完成；
+旧版本留下的 summary_*.json 可用 --import-json 一次性导入库中。
+
+用法：
+    python analysis/analyze_scan_history.py
+    python analysis/analyze_scan_history.py --strategy volume_breakout --since 2026-01-01
+    python analysis/analyze_scan_history.py --import-json results/realtime_scan
 """
-import pandas as pd
-import numpy as np
-import os
+import argparse
 import glob
 import json
+import os
+import sys
 from datetime import datetime
-from collections import defaultdict
+
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.signal_history import DEFAULT_PATH, SignalHistory
+
 
 def load_scan_results(results_dir='results/realtime_scan'):
-    """加载所有历史扫描结果"""
+    """加载旧版本保存的 summary_*.json（仅用于导入信号历史库）"""
     all_results = []
     
     # 加载所有summary文件
@@ -34,255 +46,172 @@ def load_scan_results(results_dir='results/realtime_scan'):
     return all_results
 
 
-def analyze_signal_frequency(results):
-    """分析信号出现频率"""
-    buy_signals = defaultdict(list)
-    sell_signals = defaultdict(list)
-    
+def import_scan_results(history, results, strategy='chan_realtime'):
+    """
+    把旧的 summary JSON 逐个作为一轮扫描写入信号历史库
+
+    Returns:
+        导入的扫描轮数
+    """
+    imported = 0
     for result in results:
-        scan_date = result.get('file_date', 'unknown')
-        
-        # 统计买点
-        for signal in result.get('buy_signals', []):
-            symbol = signal['symbol']
-            buy_signals[symbol].append({
-                'date': scan_date,
-                'type': signal['signal_type'],
-                'price': signal['signal_price']
-            })
-        
-        # 统计卖点
-        for signal in result.get('sell_signals', []):
-            symbol = signal['symbol']
-            sell_signals[symbol].append({
-                'date': scan_date,
-                'type': signal['signal_type'],
-                'price': signal['signal_price']
-            })
-    
-    return buy_signals, sell_signals
+        date_str = result.get('file_date', '')
+        if date_str == 'latest':            # summary_latest.json 是最近一次扫描的副本
+            continue
+        try:
+            scan_time = datetime.strptime(date_str, '%Y%m%d_%H%M%S').isoformat()
+        except ValueError:
+            scan_time = result.get('scan_time')
+        signals = [dict(s, side='BUY') for s in result.get('buy_signals', [])]
+        signals += [dict(s, side='SELL') for s in result.get('sell_signals', [])]
+        stats = {k: v for k, v in result.items() if k not in ('buy_signals', 'sell_signals', 'file_date')}
+        history.record_scan(strategy, signals, scan_time=scan_time, stats=stats)
+        imported += 1
+    return imported
 
 
-def generate_statistics(buy_signals, sell_signals):
+def generate_statistics(history, strategy=None, since=None):
     """生成统计报告"""
     print("=" * 100)
     print("SCAN HISTORY ANALYSIS")
     print("=" * 100)
     print()
-    
-    # 统计出现次数最多的股票
-    print("[ BUY SIGNAL FREQUENCY ]")
-    print("-" * 80)
-    
-    buy_freq = [(symbol, len(signals)) for symbol, signals in buy_signals.items()]
-    buy_freq.sort(key=lambda x: x[1], reverse=True)
-    
-    print(f"{'Rank':<6} {'Symbol':<12} {'Count':<8} {'Avg Price':<12} {'Recent Signals'}")
-    print("-" * 80)
-    
-    for rank, (symbol, count) in enumerate(buy_freq[:20], 1):
-        prices = [s['price'] for s in buy_signals[symbol]]
-        avg_price = np.mean(prices)
-        recent = buy_signals[symbol][-3:]  # 最近3次
-        recent_str = ", ".join([f"{s['date'][-6:]}@{s['price']}" for s in recent])
-        print(f"{rank:<6} {symbol:<12} {count:<8} {avg_price:>10.2f}  {recent_str}")
-    
-    print()
-    print("[ SELL SIGNAL FREQUENCY ]")
-    print("-" * 80)
-    
-    sell_freq = [(symbol, len(signals)) for symbol, signals in sell_signals.items()]
-    sell_freq.sort(key=lambda x: x[1], reverse=True)
-    
-    print(f"{'Rank':<6} {'Symbol':<12} {'Count':<8} {'Avg Price':<12} {'Recent Signals'}")
-    print("-" * 80)
-    
-    for rank, (symbol, count) in enumerate(sell_freq[:20], 1):
-        prices = [s['price'] for s in sell_signals[symbol]]
-        avg_price = np.mean(prices)
-        recent = sell_signals[symbol][-3:]
-        recent_str = ", ".join([f"{s['date'][-6:]}@{s['price']}" for s in recent])
-        print(f"{rank:<6} {symbol:<12} {count:<8} {avg_price:>10.2f}  {recent_str}")
-    
-    print()
+
+    for side, title in (('BUY', 'BUY SIGNAL FREQUENCY'), ('SELL', 'SELL SIGNAL FREQUENCY')):
+        print(f"[ {title} ]")
+        print("-" * 80)
+        print(f"{'Rank':<6} {'Symbol':<12} {'Count':<8} {'Avg Price':<12} {'Recent Signals'}")
+        print("-" * 80)
+
+        freq = history.signal_frequency(strategy, side=side, since=since, limit=20)
+        for rank, row in enumerate(freq.itertuples(index=False), 1):
+            print(f"{rank:<6} {row.symbol:<12} {row.count:<8} {row.avg_price:>10.2f}  {row.recent}")
+        print()
+
+    overview = history.overview(strategy, since=since)
     print("[ SUMMARY ]")
     print("-" * 80)
-    print(f"Total buy signals: {sum(len(s) for s in buy_signals.values())}")
-    print(f"Unique stocks with buy signals: {len(buy_signals)}")
-    print(f"Total sell signals: {sum(len(s) for s in sell_signals.values())}")
-    print(f"Unique stocks with sell signals: {len(sell_signals)}")
+    print(f"Scan runs: {history.scan_count(strategy, since=since)}")
+    print(f"Total buy signals: {overview['buy_signals']}")
+    print(f"Unique stocks with buy signals: {overview['buy_symbols']}")
+    print(f"Total sell signals: {overview['sell_signals']}")
+    print(f"Unique stocks with sell signals: {overview['sell_symbols']}")
     print()
-    
-    # 统计买卖都出现的股票
-    both_signals = set(buy_signals.keys()) & set(sell_signals.keys())
-    print(f"Stocks with both buy and sell signals: {len(both_signals)}")
-    if both_signals:
-        print(f"Symbols: {', '.join(list(both_signals)[:10])}")
+    print(f"Stocks with both buy and sell signals: {overview['both_symbols']}")
     print()
     print("=" * 100)
+    return overview
 
 
-def generate_charts(buy_signals, sell_signals, output_dir='results/realtime_scan'):
+def generate_charts(history, strategy=None, since=None, output_dir='results/realtime_scan'):
     """生成统计图表"""
-    if not buy_signals and not sell_signals:
+    if not history.scan_count(strategy, since=since):
         print("No data to chart")
         return
-    
+
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-    
-    # 1. 买点频率Top15
-    ax = axes[0, 0]
-    if buy_signals:
-        buy_freq = [(s, len(v)) for s, v in buy_signals.items()]
-        buy_freq.sort(key=lambda x: x[1], reverse=True)
-        top15 = buy_freq[:15]
-        
-        symbols = [x[0] for x in top15]
-        counts = [x[1] for x in top15]
-        
-        ax.barh(range(len(symbols)), counts, color='green', alpha=0.7)
-        ax.set_yticks(range(len(symbols)))
-        ax.set_yticklabels(symbols)
-        ax.set_xlabel('Signal Count')
-        ax.set_title('Top 15 Stocks by Buy Signal Frequency')
-        ax.invert_yaxis()
-        ax.grid(True, alpha=0.3, axis='x')
-    
-    # 2. 卖点频率Top15
-    ax = axes[0, 1]
-    if sell_signals:
-        sell_freq = [(s, len(v)) for s, v in sell_signals.items()]
-        sell_freq.sort(key=lambda x: x[1], reverse=True)
-        top15 = sell_freq[:15]
-        
-        symbols = [x[0] for x in top15]
-        counts = [x[1] for x in top15]
-        
-        ax.barh(range(len(symbols)), counts, color='red', alpha=0.7)
-        ax.set_yticks(range(len(symbols)))
-        ax.set_yticklabels(symbols)
+
+    # 1/2. 买卖点频率Top15
+    for ax, side, color, title in ((axes[0, 0], 'BUY', 'green', 'Buy'), (axes[0, 1], 'SELL', 'red', 'Sell')):
+        top15 = history.signal_frequency(strategy, side=side, since=since, limit=15)
+        if top15.empty:
+            continue
+        ax.barh(range(len(top15)), top15['count'], color=color, alpha=0.7)
+        ax.set_yticks(range(len(top15)))
+        ax.set_yticklabels(top15['symbol'])
         ax.set_xlabel('Signal Count')
-        ax.set_title('Top 15 Stocks by Sell Signal Frequency')
+        ax.set_title(f'Top 15 Stocks by {title} Signal Frequency')
         ax.invert_yaxis()
         ax.grid(True, alpha=0.3, axis='x')
-    
+
     # 3. 信号类型分布
     ax = axes[1, 0]
-    
-    buy_type1 = sum(1 for signals in buy_signals.values() for s in signals if '1' in s['type'])
-    buy_type2 = sum(1 for signals in buy_signals.values() for s in signals if '2' in s['type'])
-    sell_type1 = sum(1 for signals in sell_signals.values() for s in signals if '1' in s['type'])
-    sell_type2 = sum(1 for signals in sell_signals.values() for s in signals if '2' in s['type'])
-    
-    categories = ['Type 1\nBuy', 'Type 2\nBuy', 'Type 1\nSell', 'Type 2\nSell']
-    values = [buy_type1, buy_type2, sell_type1, sell_type2]
-    colors = ['darkgreen', 'lightgreen', 'darkred', 'lightcoral']
-    
-    ax.bar(categories, values, color=colors, alpha=0.8, edgecolor='black')
+    types = history.type_counts(strategy, since=since)
+    if not types.empty:
+        labels = [f"{t}\n{side.title()}" for side, t in zip(types['side'], types['signal_type'])]
+        colors = ['green' if side == 'BUY' else 'red' for side in types['side']]
+        ax.bar(range(len(types)), types['count'], color=colors, alpha=0.8, edgecolor='black')
+        ax.set_xticks(range(len(types)))
+        ax.set_xticklabels(labels, fontsize=8)
     ax.set_ylabel('Count')
     ax.set_title('Signal Type Distribution')
     ax.grid(True, alpha=0.3, axis='y')
-    
+
     # 4. 每日信号数量趋势
     ax = axes[1, 1]
-    
-    daily_counts = defaultdict(lambda: {'buy': 0, 'sell': 0})
-    for symbol, signals in buy_signals.items():
-        for s in signals:
-            date = s['date'][:8]  # YYYYMMDD
-            daily_counts[date]['buy'] += 1
-    
-    for symbol, signals in sell_signals.items():
-        for s in signals:
-            date = s['date'][:8]
-            daily_counts[date]['sell'] += 1
-    
-    if daily_counts:
-        dates = sorted(daily_counts.keys())
-        buy_counts = [daily_counts[d]['buy'] for d in dates]
-        sell_counts = [daily_counts[d]['sell'] for d in dates]
-        
-        x = range(len(dates))
-        ax.plot(x, buy_counts, 'g-o', label='Buy', linewidth=2, markersize=6)
-        ax.plot(x, sell_counts, 'r-s', label='Sell', linewidth=2, markersize=6)
-        ax.set_xticks(x)
-        ax.set_xticklabels([d[-4:] for d in dates], rotation=45)
+    daily = history.daily_counts(strategy, since=since)
+    if not daily.empty:
+        x = range(len(daily))
+        ax.plot(x, daily['BUY'], 'g-o', label='Buy', linewidth=2, markersize=6)
+        ax.plot(x, daily['SELL'], 'r-s', label='Sell', linewidth=2, markersize=6)
+        step = max(1, len(daily) // 20)
+        ax.set_xticks(list(x)[::step])
+        ax.set_xticklabels([d[5:] for d in daily['date']][::step], rotation=45)
         ax.set_xlabel('Date')
         ax.set_ylabel('Signal Count')
         ax.set_title('Daily Signal Count Trend')
         ax.legend()
         ax.grid(True, alpha=0.3)
-    
+
     plt.tight_layout()
+    os.makedirs(output_dir, exist_ok=True)
     chart_file = f'{output_dir}/history_analysis_{datetime.now().strftime("%Y%m%d")}.png'
     plt.savefig(chart_file, dpi=150, bbox_inches='tight')
     plt.close()
-    
+
     print(f"Chart saved: {chart_file}")
 
 
-def export_to_csv(buy_signals, sell_signals, output_dir='results/realtime_scan'):
+def export_to_csv(history, strategy=None, since=None, output_dir='results/realtime_scan'):
     """导出详细记录到CSV"""
-    
-    # 买点记录
-    if buy_signals:
-        buy_records = []
-        for symbol, signals in buy_signals.items():
-            for s in signals:
-                buy_records.append({
-                    'symbol': symbol,
-                    'date': s['date'],
-                    'type': s['type'],
-                    'price': s['price']
-                })
-        buy_df = pd.DataFrame(buy_records)
-        buy_file = f'{output_dir}/buy_history_all.csv'
-        buy_df.to_csv(buy_file, index=False, encoding='utf-8-sig')
-        print(f"Buy history saved: {buy_file}")
-    
-    # 卖点记录
-    if sell_signals:
-        sell_records = []
-        for symbol, signals in sell_signals.items():
-            for s in signals:
-                sell_records.append({
-                    'symbol': symbol,
-                    'date': s['date'],
-                    'type': s['type'],
-                    'price': s['price']
-                })
-        sell_df = pd.DataFrame(sell_records)
-        sell_file = f'{output_dir}/sell_history_all.csv'
-        sell_df.to_csv(sell_file, index=False, encoding='utf-8-sig')
-        print(f"Sell history saved: {sell_file}")
+    os.makedirs(output_dir, exist_ok=True)
+    for side, name in (('BUY', 'buy'), ('SELL', 'sell')):
+        records = history.signals(strategy, side=side, since=since)
+        if records.empty:
+            continue
+        out = records[['symbol', 'scan_time', 'signal_date', 'signal_type', 'price']].rename(
+            columns={'scan_time': 'date', 'signal_type': 'type'})
+        out_file = f'{output_dir}/{name}_history_all.csv'
+        out.to_csv(out_file, index=False, encoding='utf-8-sig')
+        print(f"{name.title()} history saved: {out_file}")
 
 
 def main():
     """主函数"""
-    print("Loading scan history...")
-    results = load_scan_results()
-    
-    if not results:
+    parser = argparse.ArgumentParser(description='分析实时扫描的信号历史')
+    parser.add_argument('--db', default=DEFAULT_PATH, help='信号历史库路径')
+    parser.add_argument('--strategy', default='chan_realtime', help='扫描策略名，传空字符串统计全部')
+    parser.add_argument('--since', default=None, help='只统计该时间之后的扫描，如 2026-01-01')
+    parser.add_argument('--output-dir', default='results/realtime_scan')
+    parser.add_argument('--import-json', metavar='DIR', default=None,
+                        help='先把目录下旧的 summary_*.json 导入信号历史库')
+    args = parser.parse_args()
+    strategy = args.strategy or None
+
+    history = SignalHistory(args.db)
+    if args.import_json:
+        imported = import_scan_results(history, load_scan_results(args.import_json), args.strategy or 'chan_realtime')
+        print(f"Imported {imported} summary files into {args.db}")
+
+    runs = history.scan_count(strategy, since=args.since)
+    if not runs:
         print("No scan history found. Please run scan_signals_realtime.py first.")
         return
-    
-    print(f"Loaded {len(results)} scan records")
+
+    print(f"Loaded {runs} scan records from {args.db}")
     print()
-    
-    # 分析频率
-    buy_signals, sell_signals = analyze_signal_frequency(results)
-    
+
     # 生成统计
-    generate_statistics(buy_signals, sell_signals)
-    
+    generate_statistics(history, strategy, args.since)
+
     # 生成图表
     print("Generating charts...")
-    generate_charts(buy_signals, sell_signals)
-    
+    generate_charts(history, strategy, args.since, args.output_dir)
+
     # 导出CSV
     print("Exporting to CSV...")
-    export_to_csv(buy_signals, sell_signals)
-    
+    export_to_csv(history, strategy, args.since, args.output_dir)
+
     print()
     print("Analysis complete!")
 
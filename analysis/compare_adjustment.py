@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from data_fetcher import DataFetcher
+from adjustment import adjust_prices
 from backtest_engine import BacktestEngine
 from strategies import MovingAverageStrategy
 
@@ -19,7 +20,9 @@ def compare_adjustment_types(symbol: str = "AAPL", period: str = "1y"):
     
     fetcher = DataFetcher(cache_dir='data_cache', cache_days=0)
     
-    # 获取不同复权方式的数据
+    # 只下载一次原始价格 + 复权因子，各复权方式在本地计算
+    raw_data = fetcher.fetch_raw_data(symbol, period=period, use_cache=False)
+    
     adjustment_types = ['none', 'forward', 'backward']
     results = {}
     
@@ -29,12 +32,7 @@ def compare_adjustment_types(symbol: str = "AAPL", period: str = "1y"):
         print(f"{'=' * 80}")
         
         try:
-            data = fetcher.fetch_stock_data(
-                symbol,
-                period=period,
-                use_cache=False,
-                adjust=adjust_type
-            )
+            data = adjust_prices(raw_data, adjust_type)
             
             print(f"✓ 数据获取成功")
             print(f"  数据条数: {len(data)}")
@@ -10,7 +10,9 @@ from datetime import timedelta
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from indicators.boll.boll_volume_strategy import BollVolumeStrategy
-from backtests.backtest_boll_volume_strategy import run_backtest, load_stock_data
+from indicators.panel import Panel, ffill
+from backtests.backtest_boll_volume_strategy import load_stock_data
+from core.portfolio_backtest import RebalancingPortfolioEngine
 
 
 class DynamicStockSelector:
@@ -26,6 +28,7 @@ class DynamicStockSelector:
         self.top_percentile = top_percentile
         self.min_stocks = min_stocks
         self.rebalance_weeks = rebalance_weeks
+        self.scores = None  # fit() 之后：每周得分矩阵（行=周，列=股票）
         
     def calculate_trend_score(self, data, date):
         """计算单只股票的趋势得分（越高越强）"""
@@ -77,7 +80,10 @@ class DynamicStockSelector:
             return None
     
     def select_stocks(self, all_symbols, date, data_cache):
-        """在指定日期选出最强的股票"""
+        """在指定日期选出最强的股票（fit() 之后直接用预计算的得分，不再读 data_cache）"""
+        if self.scores is not None:
+            return self.select_from_scores(self.scores, date, all_symbols)
+
         scores = []
         
         for sym in all_symbols:
@@ -104,6 +110,70 @@ class DynamicStockSelector:
         
         return selected['symbol'].tolist()
 
+    def score_panel(self, panel):
+        """
+        全部股票在每个周五的趋势得分（与 calculate_trend_score 同口径，按列一次算完）
+
+        周中日期取上一个完整周的得分（再平衡日为周日时与逐只计算一致）；
+        停牌的股票沿用最近一周的得分。
+
+        Returns:
+            DataFrame，行=周，列=股票，数据不足 52 周为 NaN
+        """
+        weekly = panel.resample_last('W-FRI')
+        close = weekly['Close'].astype(np.float64)
+        volume = weekly['Volume'].astype(np.float64)
+        valid = weekly.present & ~np.isnan(close) & ~np.isnan(volume)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return_52w = (close / weekly.shift(close, 51, present=valid) - 1) * 100
+            return_20w = (close / weekly.shift(close, 19, present=valid) - 1) * 100
+            weekly_returns = close / weekly.shift(close, 1, present=valid) - 1
+            up = np.where(np.isnan(weekly_returns), np.nan, (weekly_returns > 0).astype(np.float64))
+            consistency = weekly.rolling_mean(up, 20, present=valid) * 100
+            volatility = weekly.rolling_std(weekly_returns, 20, present=valid) * np.sqrt(52) * 100
+            risk_adj_return = return_20w / (volatility + 1e-6)
+            vol_ma5 = weekly.rolling_mean(volume, 5, present=valid)
+            vol_ma20 = weekly.rolling_mean(volume, 20, present=valid)
+            volume_trend = np.where(vol_ma20 > 0, (vol_ma5 / vol_ma20 - 1) * 100, 0.0)
+
+        total_score = (
+            return_52w * 0.4 +
+            return_20w * 0.3 +
+            consistency * 0.1 +
+            risk_adj_return * 10 +
+            volume_trend * 0.1
+        )
+        total_score[~valid] = np.nan
+        return pd.DataFrame(ffill(total_score), index=weekly.dates, columns=weekly.symbols)
+
+    def fit(self, data_cache):
+        """预计算全部股票每周的得分，之后每个再平衡日只需在一行上选前 N 名"""
+        self.scores = self.score_panel(Panel.from_frames(data_cache, fields=('Close', 'Volume')))
+        return self
+
+    def select_from_scores(self, scores, date, symbols=None):
+        """
+        按 score_panel 的结果选出 date 时最强的股票（同 select_stocks）
+
+        在 date 所在行上用 argpartition 取前 N 名，再只对这 N 只排序；symbols 限定候选股票
+        """
+        row = int(scores.index.searchsorted(pd.Timestamp(date), side='right')) - 1
+        if row < 0:
+            return []
+        values = scores.to_numpy()[row]
+        candidates = ~np.isnan(values)
+        if symbols is not None:
+            candidates &= scores.columns.isin(list(symbols))
+        idx = np.flatnonzero(candidates)
+        n_select = min(len(idx), max(self.min_stocks, int(len(idx) * self.top_percentile)))
+        if n_select == 0:
+            return []
+
+        top = idx[np.argpartition(-values[idx], n_select - 1)[:n_select]]
+        top = top[np.argsort(-values[top], kind='stable')]
+        return scores.columns[top].tolist()
+
 
 def run_dynamic_backtest(
     symbols,
@@ -111,11 +181,19 @@ def run_dynamic_backtest(
     end_date,
     selector,
     strategy,
-    initial_capital=100000.0
+    initial_capital=100000.0,
+    use_panel=True,
+    workers=1
 ):
     """
     运行动态选股回测
     定期重新平衡股票池，只在选中的股票上运行BOLL策略
+
+    信号在每只股票的完整历史上只算一次，选股结果决定每期允许开仓的股票，
+    资金和持仓跨期延续（见 core.portfolio_backtest）。每期的 avg_return 为组合在该期的收益率。
+
+    use_panel: 用截面面板一次算出全部股票每周的得分，代替每次再平衡逐只重算
+    workers: 计算策略信号的进程数
     """
     # 预加载所有数据
     print("预加载股票数据...")
@@ -126,64 +204,36 @@ def run_dynamic_backtest(
             data_cache[sym] = data
     
     print(f"成功加载 {len(data_cache)} 只股票")
+
+    if use_panel:
+        selector.fit(data_cache)
     
     # 生成再平衡日期（每4周）
     rebalance_dates = pd.date_range(start=start_date, end=end_date, freq=f'{selector.rebalance_weeks}W')
-    
-    all_results = []
+    schedule = [
+        (rebalance_date, selector.select_stocks(list(data_cache.keys()), rebalance_date, data_cache))
+        for rebalance_date in rebalance_dates
+    ]
+
+    engine = RebalancingPortfolioEngine(initial_capital=initial_capital, workers=workers)
+    result = engine.run(data_cache, strategy, schedule, end_date=end_date)
+    trades = result['trades']
+
     portfolio_history = []
-    
-    for i, rebalance_date in enumerate(rebalance_dates):
+    for i, period in enumerate(result['periods']):
         print(f"\n{'='*60}")
-        print(f"再平衡 #{i+1}: {rebalance_date.strftime('%Y-%m-%d')}")
-        
-        # 选股
-        selected_symbols = selector.select_stocks(list(data_cache.keys()), rebalance_date, data_cache)
-        print(f"选中 {len(selected_symbols)} 只股票: {selected_symbols[:5]}...")
-        
-        # 计算持仓期（到下次再平衡或结束）
-        hold_end = rebalance_dates[i+1] if i+1 < len(rebalance_dates) else end_date
-        
-        # 对每只选中的股票运行策略
-        period_returns = []
-        for sym in selected_symbols:
-            try:
-                data = data_cache[sym]
-                # 提取持仓期数据
-                mask = (data.index >= rebalance_date) & (data.index <= hold_end)
-                period_data = data[mask].copy()
-                
-                if len(period_data) < 10:
-                    continue
-                    
-                # 运行BOLL策略
-                result = run_backtest(
-                    period_data,
-                    strategy,
-                    initial_capital=initial_capital / len(selected_symbols),  # 等权分配
-                    use_dynamic_stop=False,  # 用基线策略
-                    use_partial_take_profit=False
-                )
-                
-                period_returns.append({
-                    'symbol': sym,
-                    'return_pct': result['total_return_pct'],
-                    'period': f"{rebalance_date.strftime('%Y%m%d')}-{hold_end.strftime('%Y%m%d')}"
-                })
-                
-            except Exception as e:
-                print(f"  {sym} 回测失败: {e}")
-                continue
-        
-        if period_returns:
-            avg_return = np.mean([r['return_pct'] for r in period_returns])
-            print(f"本期平均收益: {avg_return:.2f}%")
-            portfolio_history.append({
-                'date': rebalance_date,
-                'symbols': selected_symbols,
-                'avg_return': avg_return,
-                'details': period_returns
-            })
+        print(f"再平衡 #{i+1}: {period['date'].strftime('%Y-%m-%d')}")
+        print(f"选中 {len(period['symbols'])} 只股票: {period['symbols'][:5]}...")
+        print(f"本期组合收益: {period['return_pct']:.2f}%")
+
+        hold_end = result['periods'][i + 1]['date'] if i + 1 < len(result['periods']) else pd.Timestamp.max
+        closed = trades[(trades['exit_date'] >= period['date']) & (trades['exit_date'] < hold_end)] if len(trades) else trades
+        portfolio_history.append({
+            'date': period['date'],
+            'symbols': period['symbols'],
+            'avg_return': period['return_pct'],
+            'details': closed.to_dict('records')
+        })
     
     return portfolio_history
 
@@ -228,7 +278,8 @@ def main():
         start_date,
         end_date,
         selector,
-        strategy
+        strategy,
+        workers=max(1, (os.cpu_count() or 2) - 1)
     )
     
     # 6. 统计结果
@@ -245,7 +296,7 @@ def main():
         print(f"最差一期: {min(avg_returns):.2f}%")
         print(f"正收益期数: {(np.array(avg_returns) > 0).sum()}/{len(avg_returns)}")
         
-        # 累计收益（简化计算，假设等权再平衡）
+        # 累计收益（各期组合收益连乘，即组合净值的总收益）
         cumulative = 1.0
         for ret in avg_returns:
             cumulative *= (1 + ret/100)
@@ -4,11 +4,16 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 from chan_theory_v5 import ChanTheory
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from datetime import datetime, timedelta
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import profiling
+from core.universe_runner import UniverseRunner, parse_shard
+
 plt.rcParams['font.sans-serif'] = ['SimHei']
 plt.rcParams['axes.unicode_minus'] = False
 
@@ -332,9 +337,41 @@ def plot_summary_charts(df, output_dir):
     
     print(f"✓ 汇总图表已保存到: {chart_path}")
 
-def backtest_all_a_stocks():
+def backtest_file(filepath):
+    """
+    回测单个数据文件
+
+    Returns:
+        回测结果字典，数据不足时返回 None
+    """
+    symbol = os.path.basename(filepath).split('_')[0]
+    
+    # 读取数据
+    data = pd.read_csv(filepath, index_col='datetime', parse_dates=True)
+    
+    if len(data) < 100:
+        print(f"  ✗ {symbol} 数据量不足（{len(data)}条），跳过")
+        return None
+    
+    # 筛选近10年数据
+    data_10y = filter_last_10_years(data)
+    
+    if len(data_10y) < 50:
+        print(f"  ✗ {symbol} 近10年数据量不足（{len(data_10y)}条），跳过")
+        return None
+    
+    # 回测
+    result = backtest_chan_theory_on_stock(data, data_10y, symbol)
+    print(f"  ✓ {symbol} 近10年数据: {len(data_10y)} 条, 交易次数: {result['trade_count']}, "
+          f"累计收益: {result['cumulative_return']:.2f}%, 胜率: {result['win_rate']:.2f}%")
+    return result
+
+def backtest_all_a_stocks(shard='', fresh=False, checkpoint_dir='results/checkpoints'):
     """
     对所有A股进行缠论回测（近10年）
+
+    每只股票完成后写入检查点日志，中断后重新运行会跳过已完成的股票；
+    shard='k/N' 时只跑第 k 片，所有分片跑完后用 merge=True 汇总。
     """
     print("=" * 100)
     print("对所有A股进行缠论回测（近10年）")
@@ -352,56 +389,54 @@ def backtest_all_a_stocks():
     print(f"✓ 找到 {len(a_stock_files)} 个A股数据文件")
     print()
     
-    # 回测所有股票
-    all_results = []
-    success_count = 0
-    fail_count = 0
-    
-    for i, filepath in enumerate(a_stock_files):
-        # 提取股票代码
-        filename = os.path.basename(filepath)
-        symbol = filename.split('_')[0]
-        
-        print(f"[{i+1}/{len(a_stock_files)}] 正在回测 {symbol}...")
-        
-        try:
-            # 读取数据
-            data = pd.read_csv(filepath, index_col='datetime', parse_dates=True)
-            
-            if len(data) < 100:
-                print(f"  ✗ 数据量不足（{len(data)}条），跳过")
-                fail_count += 1
-                continue
-            
-            # 筛选近10年数据
-            data_10y = filter_last_10_years(data)
-            
-            if len(data_10y) < 50:
-                print(f"  ✗ 近10年数据量不足（{len(data_10y)}条），跳过")
-                fail_count += 1
-                continue
-            
-            print(f"  ✓ 近10年数据: {len(data_10y)} 条")
-            
-            # 回测
-            result = backtest_chan_theory_on_stock(data, data_10y, symbol)
-            all_results.append(result)
-            success_count += 1
-            
-            print(f"  ✓ 交易次数: {result['trade_count']}, 累计收益: {result['cumulative_return']:.2f}%, 胜率: {result['win_rate']:.2f}%")
-            
-        except Exception as e:
-            print(f"  ✗ 回测失败: {e}")
-            fail_count += 1
+    # 回测所有股票（可续跑、可分片）
+    runner = UniverseRunner(
+        'chan_backtest_10y',
+        backtest_file,
+        code_files=[backtest_file, ChanTheory],
+        checkpoint_dir=checkpoint_dir,
+        shard=parse_shard(shard),
+        fresh=fresh
+    )
+    all_results = runner.run(a_stock_files)
     
     print()
     print("=" * 100)
-    print(f"回测完成！成功: {success_count}, 失败: {fail_count}")
+    print(f"回测完成！成功: {len(all_results)}, 其中从检查点恢复: {runner.stats['restored']}, "
+          f"失败: {runner.stats['failed']}, 其他分片: {runner.stats['other_shards']}")
     print("=" * 100)
     print()
     
     # 汇总结果
     summarize_results(all_results, output_dir)
 
+def merge_shards(checkpoint_dir='results/checkpoints'):
+    """汇总所有分片检查点中的结果"""
+    output_dir = 'results/chan_backtest_10y'
+    os.makedirs(output_dir, exist_ok=True)
+    runner = UniverseRunner('chan_backtest_10y', backtest_file,
+                            code_files=[backtest_file, ChanTheory], checkpoint_dir=checkpoint_dir)
+    all_results = runner.collect(get_all_a_stock_files())
+    print(f"✓ 合并 {len(all_results)} 只股票结果，未完成: {runner.stats['missing']}")
+    summarize_results(all_results, output_dir)
+
 if __name__ == '__main__':
-    backtest_all_a_stocks()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='对所有A股进行缠论回测（近10年）')
+    parser.add_argument('--shard', default='', help='只跑第k片（k/N，k从1开始），如 1/4')
+    parser.add_argument('--merge', action='store_true', help='不运行，只汇总所有分片的检查点结果')
+    parser.add_argument('--checkpoint-dir', default='results/checkpoints', help='检查点日志目录')
+    parser.add_argument('--fresh', action='store_true', help='忽略检查点，全部重跑')
+    parser.add_argument('--profile', action='store_true', help='输出分阶段耗时报告到 results/profile/（含子进程耗时）')
+    args = parser.parse_args()
+    if args.merge:
+        merge_shards(args.checkpoint_dir)
+    else:
+        if args.profile:
+            profiling.enable()
+        backtest_all_a_stocks(args.shard, args.fresh, args.checkpoint_dir)
+        if args.profile:
+            paths = profiling.write_report(name='chan_backtest_10y')
+            print(profiling.format_report())
+            print(f"\n耗时报告: {paths['json']}, {paths['text']}")
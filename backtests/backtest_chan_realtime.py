@@ -15,40 +15,25 @@ import numpy as np
 import pandas as pd
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.adjustment import discover_cached_symbols, load_adjusted_cache
 from indicators.chan.chan_theory_realtime import ChanTheoryRealtime
 
 
 def discover_cached_a_share_symbols(period='20y'):
     """Discover cached A-share symbols under data_cache."""
-    cache_dir = 'data_cache'
-    if not os.path.exists(cache_dir):
-        return []
-
-    suffix = f'_{period}_1d_forward.csv'
     valid_market_suffixes = ('.SZ', '.SS', '.SH', '.BJ')
-    symbols = []
-
-    for filename in os.listdir(cache_dir):
-        if not filename.endswith(suffix):
-            continue
-        symbol = filename[:-len(suffix)]
-        if symbol.endswith(valid_market_suffixes):
-            symbols.append(symbol)
-
-    return sorted(set(symbols))
+    return [
+        symbol for symbol in discover_cached_symbols('data_cache', period, '1d', 'forward')
+        if symbol.endswith(valid_market_suffixes)
+    ]
 
 
 def load_stock_data(symbol, period='20y'):
     """Load OHLCV data from cache."""
-    cache_file = f'data_cache/{symbol}_{period}_1d_forward.csv'
-    if not os.path.exists(cache_file):
-        return None
-
     try:
-        data = pd.read_csv(cache_file)
-        if 'datetime' in data.columns:
-            data['datetime'] = pd.to_datetime(data['datetime'], utc=True).dt.tz_localize(None)
-            data = data.set_index('datetime')
+        data = load_adjusted_cache('data_cache', symbol, period, '1d', 'forward')
+        if data is None:
+            return None
         data = data[['Open', 'High', 'Low', 'Close', 'Volume']].copy().dropna()
         return data
     except Exception:
@@ -1,6 +1,11 @@
 """
 期货分钟级数据回测
 基于 chan_theory_realtime.py 的缠论策略，对国内期货5分钟/15分钟数据进行回测
+
+单合约: python backtests/backtest_futures_minute.py I0 5min
+组合:   python backtests/backtest_futures_minute.py portfolio 5min
+        （全部合约在合并时间轴上同时交易，共享保证金）
+加 --profile 输出分阶段耗时报告
 """
 import pandas as pd
 import numpy as np
@@ -10,19 +15,31 @@ from typing import Dict, List, Tuple, Optional
 import os
 import sys
 
-# 导入绘图模块
-try:
-    from kline_plotter import KLinePlotter
-except ImportError:
-    KLinePlotter = None
-
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.calendar import futures_session_profile
+from data.bar_store import aggregate_bars
+from core import profiling
+from core.log import EventCounter, get_logger
+from core.profiling import stage, timed
+from core.results_store import ResultsStore
+from indicators.chan.signal_edges import chan_edge_prices, chan_signal_edges
+
+# 导入绘图模块（批量渲染器：多合约共用一个 figure）
+try:
+    from visualization.kline_batch import BatchKLineRenderer
+except ImportError:
+    BatchKLineRenderer = None
+
 # 导入缠论分析模块
 from chan_theory_realtime import ChanTheoryRealtime
 
 
+logger = get_logger('backtests.futures_minute')
+
+
 # ==================== 配置参数 ====================
 
 # 期货合约配置（合约乘数、保证金比例）
@@ -71,6 +88,7 @@ BACKTEST_CONFIG = {
 
 # ==================== 数据处理 ====================
 
+@timed('backtest.load_csv')
 def load_futures_data(symbol: str, data_dir: str = 'data_cache/china_futures') -> pd.DataFrame:
     """加载期货分钟数据"""
     file_path_5m = os.path.join(data_dir, f'{symbol}_5min.csv')
@@ -102,16 +120,9 @@ def load_futures_data(symbol: str, data_dir: str = 'data_cache/china_futures') -
     return df
 
 
-def resample_to_15min(df: pd.DataFrame) -> pd.DataFrame:
-    """将5分钟数据重采样为15分钟数据"""
-    resampled = df.resample('15min').agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    })
-    resampled = resampled.dropna()
+def resample_to_15min(df: pd.DataFrame, symbol: str = 'AU0') -> pd.DataFrame:
+    """将5分钟数据按该合约交易时段（含夜盘）聚合为15分钟数据，K线以结束时间标记"""
+    resampled = aggregate_bars(df[['Open', 'High', 'Low', 'Close', 'Volume']], '15m', futures_session_profile(symbol))
     resampled.index.name = 'DateTime'
     return resampled
 
@@ -157,6 +168,7 @@ class FuturesAccount:
         self.positions: Dict[str, Position] = {}
         self.trades: List[dict] = []
         self.equity_curve: List[dict] = []
+        self._current_prices: Dict[str, float] = {}
     
     @property
     def total_equity(self) -> float:
@@ -169,7 +181,7 @@ class FuturesAccount:
         return sum(pos.margin for pos in self.positions.values())
     
     def _get_current_price(self, symbol: str) -> float:
-        return getattr(self, '_current_prices', {}).get(symbol, 0)
+        return self._current_prices.get(symbol, 0)
     
     def set_current_prices(self, prices: Dict[str, float]):
         self._current_prices = prices
@@ -287,53 +299,55 @@ class ChanFuturesStrategy:
         if len(result_df) < 2:
             return {'signal': 0, 'type': 0, 'desc': ''}
         
-        current = result_df.iloc[-1]
-        previous = result_df.iloc[-2]
+        tail = result_df.iloc[-2:]
+        buy_edges, sell_edges = chan_signal_edges(tail, None)
         
-        if current['sell_point'] > 0 and previous['sell_point'] == 0:
+        if sell_edges[-1]:
             return {
                 'signal': -1,
-                'type': int(current['sell_point']),
+                'type': int(tail['sell_point'].iloc[-1]),
                 'desc': '卖点'
             }
         
-        if current['buy_point'] > 0 and previous['buy_point'] == 0:
+        if buy_edges[-1]:
             return {
                 'signal': 1,
-                'type': int(current['buy_point']),
+                'type': int(tail['buy_point'].iloc[-1]),
                 'desc': '买点'
             }
         
         return {'signal': 0, 'type': 0, 'desc': ''}
 
 
+@timed('backtest.precompute_signals')
 def precompute_signals(data: pd.DataFrame, window_size: int = 500) -> pd.DataFrame:
     """预计算所有信号 - 交易第一类和第二类买卖点"""
-    print("  预计算信号...")
+    logger.info("  预计算信号...")
     
     strategy = ChanFuturesStrategy(k_type='minute')
     result = strategy.analyze(data)
     
-    result['buy_signal'] = 0
-    result['sell_signal'] = 0
+    # 交易第一类和第二类买卖点 (buy_point / sell_point 由 0 变为 1 或 2)
+    buy_edges, sell_edges = chan_signal_edges(result, (1, 2))
+    result['buy_signal'] = buy_edges.astype(int)
+    result['sell_signal'] = sell_edges.astype(int)
     
-    for i in range(1, len(result)):
-        current = result.iloc[i]
-        previous = result.iloc[i-1]
-        
-        # 交易第一类和第二类买卖点 (buy_point == 1 或 2)
-        if current['buy_point'] in [1, 2] and previous['buy_point'] == 0:
-            result.iloc[i, result.columns.get_loc('buy_signal')] = 1
-        
-        # 交易第一类和第二类卖点 (sell_point == 1 或 2)
-        if current['sell_point'] in [1, 2] and previous['sell_point'] == 0:
-            result.iloc[i, result.columns.get_loc('sell_signal')] = 1
-    
-    print(f"  预计算完成: 买入信号 {result['buy_signal'].sum()} 个, 卖出信号 {result['sell_signal'].sum()} 个")
+    logger.info("  预计算完成: 买入信号 %d 个, 卖出信号 %d 个", result['buy_signal'].sum(), result['sell_signal'].sum())
     
     return result
 
 
+_RENDERER = None
+
+
+def _kline_renderer():
+    """进程内共享的K线渲染器（首次绘图时创建）"""
+    global _RENDERER
+    if _RENDERER is None and BatchKLineRenderer is not None:
+        _RENDERER = BatchKLineRenderer(show_boll=True, show_rsi=False, show_volume=True)
+    return _RENDERER
+
+
 # ==================== 回测引擎 ====================
 
 class FuturesBacktestEngine:
@@ -344,19 +358,23 @@ class FuturesBacktestEngine:
         commission_rate: float = 0.0001,
         slippage: float = 0.0001,
         window_size: int = 100,
+        store: Optional[ResultsStore] = None,
+        plot: bool = True,
     ):
         self.strategy = strategy
         self.account = FuturesAccount(initial_capital, commission_rate, slippage, BACKTEST_CONFIG['margin_rate'])
         self.window_size = window_size
+        self.store = store  # 传入时成交/权益写入结果库，不再单独写CSV
+        self.plot = plot    # False 时不画K线图（测试、基准）
         
         self.trades = []
         self.equity_curve = []
         self.signals = []
     
     def run(self, data: pd.DataFrame, symbol: str) -> dict:
-        print(f"\n开始回测 {symbol}...")
-        print(f"数据范围: {data.index[0]} ~ {data.index[-1]}")
-        print(f"数据条数: {len(data)}")
+        logger.info("\n开始回测 %s...", symbol)
+        logger.info("数据范围: %s ~ %s", data.index[0], data.index[-1])
+        logger.info("数据条数: %d", len(data))
         
         contract_info = CONTRACT_SPECS.get(symbol, {'multiplier': 10, 'margin_rate': 0.10})
         multiplier = contract_info['multiplier']
@@ -366,76 +384,86 @@ class FuturesBacktestEngine:
         
         buy_signal_indices = []
         sell_signal_indices = []
+        events = EventCounter(logger, f"{symbol} 交易统计")
         
-        for i in range(self.window_size, len(data)):
-            current_bar = data.iloc[i]
-            current_time = data.index[i]
-            current_price = current_bar['Close']
-            
-            self.account.set_current_prices({symbol: current_price})
+        # 预先取出逐K线要用的列，循环内只做数组下标访问
+        times = data.index
+        closes = data['Close'].to_numpy(dtype=float)
+        buy_flags = result_df['buy_signal'].to_numpy()
+        sell_flags = result_df['sell_signal'].to_numpy()
+        buy_types = result_df['buy_point'].to_numpy()
+        sell_types = result_df['sell_point'].to_numpy()
+        
+        with stage("backtest.trade_loop"):
+            for i in range(self.window_size, len(data)):
+                current_time = times[i]
+                current_price = closes[i]
             
-            signal_row = result_df.iloc[i]
-            buy_signal = signal_row['buy_signal']
-            sell_signal = signal_row['sell_signal']
+                self.account.set_current_prices({symbol: current_price})
             
-            if sell_signal == 1:
-                signal = {'signal': -1, 'type': int(signal_row['sell_point']), 'desc': '二卖'}
-            elif buy_signal == 1:
-                signal = {'signal': 1, 'type': int(signal_row['buy_point']), 'desc': '二买'}
-            else:
-                signal = {'signal': 0, 'type': 0, 'desc': ''}
+                if sell_flags[i] == 1:
+                    signal = {'signal': -1, 'type': int(sell_types[i]), 'desc': '二卖'}
+                elif buy_flags[i] == 1:
+                    signal = {'signal': 1, 'type': int(buy_types[i]), 'desc': '二买'}
+                else:
+                    signal = {'signal': 0, 'type': 0, 'desc': ''}
             
-            self.signals.append({
-                'time': current_time,
-                'price': current_price,
-                'signal': signal['signal'],
-                'type': signal['type'],
-                'desc': signal['desc']
-            })
+                self.signals.append({
+                    'time': current_time,
+                    'price': current_price,
+                    'signal': signal['signal'],
+                    'type': signal['type'],
+                    'desc': signal['desc']
+                })
             
-            if signal['signal'] == 1:
-                buy_signal_indices.append(i)
-            elif signal['signal'] == -1:
-                sell_signal_indices.append(i)
+                if signal['signal'] == 1:
+                    buy_signal_indices.append(i)
+                elif signal['signal'] == -1:
+                    sell_signal_indices.append(i)
             
-            if symbol in self.account.positions:
-                pos = self.account.positions[symbol]
+                if symbol in self.account.positions:
+                    pos = self.account.positions[symbol]
                 
-                if pos.direction == 1:
-                    pnl_pct = (current_price - pos.entry_price) / pos.entry_price
-                else:
-                    pnl_pct = (pos.entry_price - current_price) / pos.entry_price
+                    if pos.direction == 1:
+                        pnl_pct = (current_price - pos.entry_price) / pos.entry_price
+                    else:
+                        pnl_pct = (pos.entry_price - current_price) / pos.entry_price
                 
-                if pnl_pct <= -BACKTEST_CONFIG['stop_loss_pct']:
-                    self.account.close_position(symbol, current_price, current_time)
-                    print(f"  {current_time} 止损平仓, 价格: {current_price}, 盈亏: {pnl_pct*100:.2f}%")
-                    continue
+                    if pnl_pct <= -BACKTEST_CONFIG['stop_loss_pct']:
+                        self.account.close_position(symbol, current_price, current_time)
+                        events.incr('止损平仓')
+                        logger.debug("  %s 止损平仓, 价格: %s, 盈亏: %.2f%%", current_time, current_price, pnl_pct * 100)
+                        continue
                 
-                if pnl_pct >= BACKTEST_CONFIG['stop_profit_pct']:
-                    self.account.close_position(symbol, current_price, current_time)
-                    print(f"  {current_time} 止盈平仓, 价格: {current_price}, 盈亏: {pnl_pct*100:.2f}%")
-                    continue
+                    if pnl_pct >= BACKTEST_CONFIG['stop_profit_pct']:
+                        self.account.close_position(symbol, current_price, current_time)
+                        events.incr('止盈平仓')
+                        logger.debug("  %s 止盈平仓, 价格: %s, 盈亏: %.2f%%", current_time, current_price, pnl_pct * 100)
+                        continue
             
-            if signal['signal'] == 1 and symbol not in self.account.positions:
-                max_quantity = int(self.account.available_cash * BACKTEST_CONFIG['max_position_pct'] 
-                                 / (current_price * multiplier * margin_rate))
-                quantity = max(1, max_quantity)
+                if signal['signal'] == 1 and symbol not in self.account.positions:
+                    max_quantity = int(self.account.available_cash * BACKTEST_CONFIG['max_position_pct'] 
+                                     / (current_price * multiplier * margin_rate))
+                    quantity = max(1, max_quantity)
                 
-                if self.account.open_position(symbol, 1, quantity, current_price, current_time, multiplier, margin_rate):
-                    print(f"  {current_time} 开多仓, 价格: {current_price}, 手数: {quantity}")
+                    if self.account.open_position(symbol, 1, quantity, current_price, current_time, multiplier, margin_rate):
+                        events.incr('开多仓')
+                        logger.debug("  %s 开多仓, 价格: %s, 手数: %d", current_time, current_price, quantity)
             
-            elif signal['signal'] == -1 and symbol in self.account.positions:
-                if self.account.close_position(symbol, current_price, current_time):
-                    print(f"  {current_time} 平仓, 价格: {current_price}")
+                elif signal['signal'] == -1 and symbol in self.account.positions:
+                    if self.account.close_position(symbol, current_price, current_time):
+                        events.incr('信号平仓')
+                        logger.debug("  %s 平仓, 价格: %s", current_time, current_price)
             
-            self.account.record_equity(current_time, {symbol: current_price})
+                self.account.record_equity(current_time, {symbol: current_price})
         
         # 修复：在回测结束后，用最后价格记录最终权益（包含未平仓持仓的盈亏）
-        last_time = data.index[-1]
-        last_price = data.iloc[-1]['Close']
+        last_time = times[-1]
+        last_price = closes[-1]
         self.account.record_equity(last_time, {symbol: last_price})
         
-        print(f"\n信号统计: 买入信号 {len(buy_signal_indices)} 个, 卖出信号 {len(sell_signal_indices)} 个")
+        logger.info("\n信号统计: 买入信号 %d 个, 卖出信号 %d 个", len(buy_signal_indices), len(sell_signal_indices))
+        events.summary()
         
         # 计算未平仓持仓信息
         open_positions_info = []
@@ -450,75 +478,58 @@ class FuturesBacktestEngine:
                     'current_price': last_price,
                     'unrealized_pnl': unrealized_pnl
                 })
-            print(f"未平仓持仓: {len(self.account.positions)} 个, 未实现盈亏: {sum(p['unrealized_pnl'] for p in open_positions_info):.2f}")
+            logger.info("未平仓持仓: %d 个, 未实现盈亏: %.2f",
+                        len(self.account.positions), sum(p['unrealized_pnl'] for p in open_positions_info))
         else:
-            print(f"未平仓持仓: 0 个")
+            logger.info("未平仓持仓: 0 个")
         
         self.trades = self.account.trades
         self.equity_curve = self.account.equity_curve
         
         # 绘制K线图
-        try:
-            self.plot_kline(data, symbol, result_df)
-        except Exception as e:
-            print(f"  绘制K线图失败: {e}")
+        if self.plot:
+            try:
+                self.plot_kline(data, symbol, result_df)
+            except Exception as e:
+                logger.warning("  绘制K线图失败: %s", e)
         
         return self.generate_report(symbol, open_positions_info)
     
     def plot_kline(self, data: pd.DataFrame, symbol: str, result_df: pd.DataFrame):
         """绘制带BOLL指标的K线图"""
-        if KLinePlotter is None:
-            print("  KLinePlotter未安装，跳过绘图")
+        renderer = _kline_renderer()
+        if renderer is None:
+            logger.info("  绘图模块不可用，跳过绘图")
             return
         
-        # 生成买卖信号
-        buy_signals = pd.Series(0.0, index=data.index, dtype=float)
-        sell_signals = pd.Series(0.0, index=data.index, dtype=float)
-        
-        for i in range(1, len(result_df)):
-            current = result_df.iloc[i]
-            previous = result_df.iloc[i-1]
-            
-            if i < len(data):
-                idx = data.index[i]
-                
-                # 交易第一类和第二类买卖点
-                if current['buy_point'] in [1, 2] and previous['buy_point'] == 0:
-                    buy_signals.loc[idx] = float(data.loc[idx, 'Close'])
-                
-                if current['sell_point'] in [1, 2] and previous['sell_point'] == 0:
-                    sell_signals.loc[idx] = float(data.loc[idx, 'Close'])
-        
-        # 绘制K线图
-        plotter = KLinePlotter(style='charles')
+        # 生成买卖信号（交易第一类和第二类买卖点）
+        buy_signals, sell_signals = chan_edge_prices(result_df, data, (1, 2))
         
         output_dir = 'results/futures_signals'
         os.makedirs(output_dir, exist_ok=True)
         save_path = os.path.join(output_dir, f'{symbol}_kline.png')
         
-        print(f"  正在绘制K线图...")
+        logger.info("  正在绘制K线图...")
         
         contract_info = CONTRACT_SPECS.get(symbol, {'name': symbol})
         contract_name = contract_info.get('name', symbol)
         
-        plotter.plot_with_signals_and_indicators(
-            data=data,
+        elapsed = renderer.render(
+            data,
+            save_path,
+            title=f"{contract_name}({symbol}) 5分钟K线 - 缠论买卖点+布林带",
             buy_signals=buy_signals,
             sell_signals=sell_signals,
-            title=f"{contract_name}({symbol}) 5分钟K线 - 缠论买卖点+布林带",
-            show_boll=True,
-            show_rsi=False,
-            show_volume=True,
             boll_period=20,
-            boll_std=2,
-            save_path=save_path
+            boll_std=2
         )
         
-        print(f"  K线图已保存: {save_path}")
+        logger.info("  K线图已保存: %s (%.0fms)", save_path, elapsed * 1000)
     
     def generate_report(self, symbol: str, open_positions_info: List[dict] = None) -> dict:
         # 保存交易记录到CSV
-        self.save_trades_csv(symbol)
+        if self.store is None:
+            self.save_trades_csv(symbol)
         
         if not self.trades:
             return {'symbol': symbol, 'total_trades': 0, 'message': '无交易'}
@@ -566,7 +577,7 @@ class FuturesBacktestEngine:
         if open_positions_info:
             unrealized_pnl = sum(p['unrealized_pnl'] for p in open_positions_info)
         
-        return {
+        report = {
             'symbol': symbol,
             'name': CONTRACT_SPECS.get(symbol, {}).get('name', symbol),
             'total_trades': len(closed_trades),
@@ -588,7 +599,17 @@ class FuturesBacktestEngine:
             'equity_curve': self.equity_curve,
             'signals': self.signals
         }
+        if self.store is not None:
+            equity = pd.DataFrame(self.equity_curve)
+            self.store.add(
+                symbol,
+                {k: v for k, v in report.items() if not isinstance(v, list)},
+                trades=pd.DataFrame(self.trades),
+                equity=equity.set_index('time') if 'time' in equity.columns else equity,
+            )
+        return report
 
+    @timed('backtest.save_results')
     def save_trades_csv(self, symbol: str):
         """保存交易记录到CSV文件"""
         if not self.trades:
@@ -602,19 +623,353 @@ class FuturesBacktestEngine:
         if not trades_df.empty:
             trades_path = os.path.join(output_dir, f'{symbol}_trades.csv')
             trades_df.to_csv(trades_path, index=False, encoding='utf-8-sig')
-            print(f"  交易记录已保存: {trades_path}")
+            logger.info("  交易记录已保存: %s", trades_path)
         
         # 保存权益曲线
         if self.equity_curve:
             equity_df = pd.DataFrame(self.equity_curve)
             equity_path = os.path.join(output_dir, f'{symbol}_equity.csv')
             equity_df.to_csv(equity_path, index=False, encoding='utf-8-sig')
-            print(f"  权益曲线已保存: {equity_path}")
+            logger.info("  权益曲线已保存: %s", equity_path)
+
+
+# ==================== 多合约组合回测 ====================
+
+# 组合回测参数：所有合约共享一个保证金账户
+PORTFOLIO_CONFIG = {
+    'max_total_margin_pct': BACKTEST_CONFIG['max_position_pct'],  # 全部合约保证金合计不超过权益的80%
+    'max_contract_margin_pct': 0.15,                               # 单合约保证金不超过权益的15%
+    'fill_slippage': 1.0,                                          # 固定滑点1元（与单合约回测一致）
+}
+
+
+def build_portfolio_timeline(
+    data_by_symbol: Dict[str, pd.DataFrame],
+    signals_by_symbol: Dict[str, pd.DataFrame]
+) -> Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    把各合约K线合并到统一时间轴
+
+    Returns:
+        (timeline, close[T, N], tradable[T, N], buy[T, N], sell[T, N])
+        close 向前填充用于盯市；tradable 表示该合约在该时刻有K线，只有此时才能成交
+    """
+    symbols = list(data_by_symbol)
+    timeline = data_by_symbol[symbols[0]].index
+    for symbol in symbols[1:]:
+        timeline = timeline.union(data_by_symbol[symbol].index)
+    timeline = pd.DatetimeIndex(timeline).sort_values()
+
+    close = np.full((len(timeline), len(symbols)), np.nan)
+    tradable = np.zeros((len(timeline), len(symbols)), dtype=bool)
+    buy = np.zeros_like(tradable)
+    sell = np.zeros_like(tradable)
+
+    for j, symbol in enumerate(symbols):
+        data = data_by_symbol[symbol]
+        rows = timeline.get_indexer(data.index)
+        close[rows, j] = data['Close'].to_numpy(dtype=float)
+        tradable[rows, j] = True
+        signals = signals_by_symbol[symbol].reindex(data.index)
+        buy[rows, j] = signals['buy_signal'].fillna(0).to_numpy() == 1
+        sell[rows, j] = signals['sell_signal'].fillna(0).to_numpy() == 1
+
+    close = pd.DataFrame(close).ffill().to_numpy()
+    return timeline, close, tradable, buy, sell
+
+
+class FuturesPortfolioAccount:
+    """
+    多合约共享保证金账户
+
+    持仓按合约存放在定长数组中（方向、手数、开仓价、乘数、保证金比例），
+    每根K线的盯市、保证金占用和权益计算都是一次数组运算。
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        initial_capital: float,
+        commission_rate: float,
+        max_total_margin_pct: float = PORTFOLIO_CONFIG['max_total_margin_pct'],
+        max_contract_margin_pct: float = PORTFOLIO_CONFIG['max_contract_margin_pct'],
+        fill_slippage: float = PORTFOLIO_CONFIG['fill_slippage']
+    ):
+        self.symbols = list(symbols)
+        self.initial_capital = initial_capital
+        self.commission_rate = commission_rate
+        self.max_total_margin_pct = max_total_margin_pct
+        self.max_contract_margin_pct = max_contract_margin_pct
+        self.fill_slippage = fill_slippage
+
+        specs = [CONTRACT_SPECS.get(s, {'multiplier': 10, 'margin_rate': BACKTEST_CONFIG['margin_rate']}) for s in self.symbols]
+        n = len(self.symbols)
+        self.multiplier = np.array([spec['multiplier'] for spec in specs], dtype=float)
+        self.margin_rate = np.array([spec['margin_rate'] for spec in specs], dtype=float)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.quantity = np.zeros(n, dtype=float)
+        self.entry_price = np.zeros(n, dtype=float)
+        self.open_commission = np.zeros(n, dtype=float)
+        self.entry_time: List = [None] * n
+
+        self.available_cash = initial_capital
+        self.trades: List[dict] = []
+
+    @property
+    def margin(self) -> np.ndarray:
+        """各合约保证金占用（按开仓价计）"""
+        return self.entry_price * self.quantity * self.multiplier * self.margin_rate
+
+    @property
+    def total_margin(self) -> float:
+        return float(self.margin.sum())
+
+    def unrealized_pnl(self, prices: np.ndarray) -> np.ndarray:
+        """各合约浮动盈亏，无持仓为 0"""
+        held = self.quantity > 0
+        diff = np.where(held, prices - self.entry_price, 0.0)
+        return diff * self.direction * self.quantity * self.multiplier
+
+    def equity(self, prices: np.ndarray) -> float:
+        return self.available_cash + self.total_margin + float(self.unrealized_pnl(prices).sum())
+
+    def open_position(self, j: int, direction: int, quantity: int, price: float, time) -> bool:
+        """开仓（跨合约保证金上限在 quantity 计算时已约束，这里只校验可用资金）"""
+        fill_price = price + self.fill_slippage * direction
+        notional = fill_price * quantity * self.multiplier[j]
+        commission = notional * self.commission_rate
+        required_margin = notional * self.margin_rate[j]
+        if quantity <= 0 or self.available_cash < commission + required_margin:
+            return False
+
+        self.available_cash -= commission + required_margin
+        self.direction[j] = direction
+        self.quantity[j] = quantity
+        self.entry_price[j] = fill_price
+        self.open_commission[j] = commission
+        self.entry_time[j] = time
+
+        self.trades.append({
+            'time': time,
+            'symbol': self.symbols[j],
+            'direction': 'OPEN_LONG' if direction == 1 else 'OPEN_SHORT',
+            'price': fill_price,
+            'quantity': quantity,
+            'commission': commission
+        })
+        return True
+
+    def close_position(self, j: int, price: float, time, reason: str = 'signal') -> bool:
+        if self.quantity[j] <= 0:
+            return False
+
+        direction = int(self.direction[j])
+        fill_price = price - self.fill_slippage * direction
+        commission = fill_price * self.quantity[j] * self.multiplier[j] * self.commission_rate
+        pnl = (fill_price - self.entry_price[j]) * direction * self.quantity[j] * self.multiplier[j]
+
+        self.available_cash += self.margin[j] + pnl - commission
+        total_commission = self.open_commission[j] + commission
+
+        self.trades.append({
+            'time': time,
+            'symbol': self.symbols[j],
+            'direction': 'CLOSE_LONG' if direction == 1 else 'CLOSE_SHORT',
+            'price': fill_price,
+            'quantity': int(self.quantity[j]),
+            'commission': commission,
+            'open_commission': self.open_commission[j],
+            'total_commission': total_commission,
+            'pnl': pnl - total_commission,
+            'reason': reason
+        })
+
+        self.direction[j] = 0
+        self.quantity[j] = 0
+        self.entry_price[j] = 0
+        self.open_commission[j] = 0
+        self.entry_time[j] = None
+        return True
+
+    def affordable_quantity(self, j: int, price: float, equity: float) -> int:
+        """在单合约和组合保证金上限内可开手数"""
+        unit_margin = (price + self.fill_slippage) * self.multiplier[j] * self.margin_rate[j]
+        unit_cost = unit_margin + (price + self.fill_slippage) * self.multiplier[j] * self.commission_rate
+        budget = min(
+            equity * self.max_contract_margin_pct,
+            equity * self.max_total_margin_pct - self.total_margin,
+        )
+        budget = min(budget, self.available_cash * unit_margin / unit_cost)
+        if budget <= 0:
+            return 0
+        return int(budget // unit_margin)
+
+
+class FuturesPortfolioEngine:
+    """在合并的5分钟时间轴上同时交易多个合约，所有合约共享保证金"""
+
+    def __init__(
+        self,
+        initial_capital: float = BACKTEST_CONFIG['initial_capital'],
+        commission_rate: float = BACKTEST_CONFIG['commission_rate'],
+        stop_loss_pct: float = BACKTEST_CONFIG['stop_loss_pct'],
+        stop_profit_pct: float = BACKTEST_CONFIG['stop_profit_pct'],
+        max_total_margin_pct: float = PORTFOLIO_CONFIG['max_total_margin_pct'],
+        max_contract_margin_pct: float = PORTFOLIO_CONFIG['max_contract_margin_pct'],
+        window_size: int = 100
+    ):
+        self.initial_capital = initial_capital
+        self.commission_rate = commission_rate
+        self.stop_loss_pct = stop_loss_pct
+        self.stop_profit_pct = stop_profit_pct
+        self.max_total_margin_pct = max_total_margin_pct
+        self.max_contract_margin_pct = max_contract_margin_pct
+        self.window_size = window_size
+
+        self.account: Optional[FuturesPortfolioAccount] = None
+        self.equity_curve = pd.DataFrame()
+
+    def run(
+        self,
+        data_by_symbol: Dict[str, pd.DataFrame],
+        signals_by_symbol: Optional[Dict[str, pd.DataFrame]] = None
+    ) -> dict:
+        """
+        Args:
+            data_by_symbol: 合约 -> K线
+            signals_by_symbol: 合约 -> 含 buy_signal/sell_signal 的信号表，缺省时用缠论预计算
+
+        Returns:
+            组合回测结果（含分合约统计）
+        """
+        symbols = list(data_by_symbol)
+        if signals_by_symbol is None:
+            signals_by_symbol = {}
+            for symbol in symbols:
+                logger.info("\n%s (%s)", symbol, CONTRACT_SPECS.get(symbol, {}).get('name', symbol))
+                signals_by_symbol[symbol] = precompute_signals(data_by_symbol[symbol], self.window_size)
+
+        timeline, close, tradable, buy, sell = build_portfolio_timeline(data_by_symbol, signals_by_symbol)
+
+        # 每个合约自身的前 window_size 根K线不交易（与单合约回测一致）
+        warmup = np.cumsum(tradable, axis=0) <= self.window_size
+        buy &= ~warmup
+        sell &= ~warmup
+
+        account = FuturesPortfolioAccount(
+            symbols, self.initial_capital, self.commission_rate,
+            self.max_total_margin_pct, self.max_contract_margin_pct
+        )
+        self.account = account
+
+        n_bars = len(timeline)
+        equity = np.empty(n_bars)
+        cash = np.empty(n_bars)
+        margin = np.empty(n_bars)
+        positions = np.empty(n_bars, dtype=np.int64)
+
+        logger.info("\n组合回测: %d 个合约, %d 个时间点", len(symbols), n_bars)
+
+        with stage("backtest.trade_loop"):
+            for i in range(n_bars):
+                prices = close[i]
+                time = timeline[i]
+                can_trade = tradable[i]
+
+                held = (account.quantity > 0) & can_trade
+                if held.any():
+                    pnl_pct = np.zeros(len(symbols))
+                    pnl_pct[held] = (prices[held] - account.entry_price[held]) / account.entry_price[held] * account.direction[held]
+                    stop_loss = held & (pnl_pct <= -self.stop_loss_pct)
+                    stop_profit = held & ~stop_loss & (pnl_pct >= self.stop_profit_pct)
+                    for j in np.flatnonzero(stop_loss):
+                        account.close_position(j, prices[j], time, 'stop_loss')
+                    for j in np.flatnonzero(stop_profit):
+                        account.close_position(j, prices[j], time, 'stop_profit')
+                    stopped = stop_loss | stop_profit
+                else:
+                    stopped = np.zeros(len(symbols), dtype=bool)
+
+                for j in np.flatnonzero(sell[i] & ~stopped & (account.quantity > 0)):
+                    account.close_position(j, prices[j], time, 'signal')
+
+                # 同一根K线买卖信号同时出现时只处理卖出，与单合约引擎一致
+                entries = np.flatnonzero(buy[i] & ~sell[i] & ~stopped & (account.quantity == 0))
+                if len(entries):
+                    current_equity = account.equity(prices)
+                    for j in entries:
+                        quantity = account.affordable_quantity(j, prices[j], current_equity)
+                        account.open_position(j, 1, quantity, prices[j], time)
+
+                # 盯市：一次数组运算
+                equity[i] = account.equity(prices)
+                cash[i] = account.available_cash
+                margin[i] = account.total_margin
+                positions[i] = int((account.quantity > 0).sum())
+
+        self.equity_curve = pd.DataFrame({
+            'equity': equity, 'available_cash': cash, 'margin': margin, 'positions': positions
+        }, index=pd.DatetimeIndex(timeline, name='time'))
+
+        last_prices = close[-1] if n_bars else np.zeros(len(symbols))
+        return self.generate_report(last_prices)
+
+    def generate_report(self, last_prices: np.ndarray) -> dict:
+        account = self.account
+        trades = pd.DataFrame(account.trades)
+        closed = trades[trades['direction'].str.startswith('CLOSE')] if not trades.empty else trades
+
+        equity = self.equity_curve['equity'].to_numpy() if not self.equity_curve.empty else np.array([self.initial_capital])
+        peak = np.maximum.accumulate(equity)
+        max_drawdown = float(((peak - equity) / peak).max())
+        final_equity = float(equity[-1])
+
+        unrealized = account.unrealized_pnl(last_prices)
+        per_contract = {}
+        for j, symbol in enumerate(account.symbols):
+            rows = closed[closed['symbol'] == symbol] if not closed.empty else closed
+            per_contract[symbol] = {
+                'name': CONTRACT_SPECS.get(symbol, {}).get('name', symbol),
+                'total_trades': len(rows),
+                'total_pnl': float(rows['pnl'].sum()) if len(rows) else 0.0,
+                'win_rate': float((rows['pnl'] > 0).mean()) if len(rows) else 0.0,
+                'unrealized_pnl': float(unrealized[j]),
+            }
+
+        return {
+            'symbols': account.symbols,
+            'total_trades': len(closed),
+            'win_rate': float((closed['pnl'] > 0).mean()) if len(closed) else 0.0,
+            'total_pnl': float(closed['pnl'].sum()) if len(closed) else 0.0,
+            'total_commission': float(closed['total_commission'].sum()) if len(closed) else 0.0,
+            'total_return': (final_equity - self.initial_capital) / self.initial_capital,
+            'max_drawdown': max_drawdown,
+            'max_margin_pct': float((self.equity_curve['margin'] / self.equity_curve['equity']).max()) if not self.equity_curve.empty else 0.0,
+            'final_equity': final_equity,
+            'open_positions': int((account.quantity > 0).sum()),
+            'unrealized_pnl': float(unrealized.sum()),
+            'per_contract': per_contract,
+            'trades': trades,
+            'equity_curve': self.equity_curve,
+        }
+
+    @timed('backtest.save_results')
+    def save_results(self, output_dir: str = 'results/futures_trades', name: str = 'portfolio'):
+        """保存组合成交记录和权益曲线"""
+        os.makedirs(output_dir, exist_ok=True)
+        if self.account is not None and self.account.trades:
+            trades_path = os.path.join(output_dir, f'{name}_trades.csv')
+            pd.DataFrame(self.account.trades).to_csv(trades_path, index=False, encoding='utf-8-sig')
+            logger.info("  交易记录已保存: %s", trades_path)
+        if not self.equity_curve.empty:
+            equity_path = os.path.join(output_dir, f'{name}_equity.csv')
+            self.equity_curve.to_csv(equity_path, encoding='utf-8-sig')
+            logger.info("  权益曲线已保存: %s", equity_path)
 
 
 # ==================== 主函数 ====================
 
-def run_backtest(symbols: List[str] = None, timeframe: str = '5min'):
+def run_backtest(symbols: List[str] = None, timeframe: str = '5min', store: Optional[ResultsStore] = None):
     print("=" * 60)
     print("期货缠论分钟级回测 - 交易第一类和第二类买卖点")
     print("=" * 60)
@@ -627,12 +982,12 @@ def run_backtest(symbols: List[str] = None, timeframe: str = '5min'):
     for symbol in symbols:
         try:
             df = load_futures_data(symbol)
-            print(f"\n{'='*50}")
-            print(f"合约: {symbol} ({CONTRACT_SPECS.get(symbol, {}).get('name', symbol)})")
-            print(f"时间周期: {timeframe}")
+            logger.info("\n%s", '=' * 50)
+            logger.info("合约: %s (%s)", symbol, CONTRACT_SPECS.get(symbol, {}).get('name', symbol))
+            logger.info("时间周期: %s", timeframe)
             
             if timeframe == '15min':
-                df = resample_to_15min(df)
+                df = resample_to_15min(df, symbol)
             
             strategy = ChanFuturesStrategy(k_type='minute')
             engine = FuturesBacktestEngine(
@@ -640,25 +995,24 @@ def run_backtest(symbols: List[str] = None, timeframe: str = '5min'):
                 initial_capital=BACKTEST_CONFIG['initial_capital'],
                 commission_rate=BACKTEST_CONFIG['commission_rate'],
                 slippage=BACKTEST_CONFIG['slippage'],
-                window_size=100 if timeframe == '5min' else 50
+                window_size=100 if timeframe == '5min' else 50,
+                store=store
             )
             
             result = engine.run(df, symbol)
             results.append(result)
             
-            print(f"\n--- {symbol} 回测结果 ---")
-            print(f"交易次数: {result.get('total_trades', 0)}")
-            print(f"胜率: {result.get('win_rate', 0)*100:.2f}%")
-            print(f"总盈亏: {result.get('total_pnl', 0):.2f}")
-            print(f"收益率: {result.get('total_return', 0)*100:.2f}%")
-            print(f"最大回撤: {result.get('max_drawdown', 0)*100:.2f}%")
-            print(f"未平仓持仓: {result.get('open_positions', 0)} 个")
-            print(f"未实现盈亏: {result.get('unrealized_pnl', 0):.2f}")
+            logger.info(
+                "\n--- %s 回测结果 ---\n交易次数: %d\n胜率: %.2f%%\n总盈亏: %.2f\n收益率: %.2f%%\n"
+                "最大回撤: %.2f%%\n未平仓持仓: %d 个\n未实现盈亏: %.2f",
+                symbol, result.get('total_trades', 0), result.get('win_rate', 0) * 100,
+                result.get('total_pnl', 0), result.get('total_return', 0) * 100,
+                result.get('max_drawdown', 0) * 100, result.get('open_positions', 0),
+                result.get('unrealized_pnl', 0)
+            )
             
         except Exception as e:
-            print(f"  回测失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("  回测失败: %s", e)
     
     print("\n" + "=" * 60)
     print("回测汇总")
@@ -676,6 +1030,51 @@ def run_backtest(symbols: List[str] = None, timeframe: str = '5min'):
     return results
 
 
+def run_portfolio_backtest(symbols: List[str] = None, timeframe: str = '5min'):
+    """所有合约在合并时间轴上同时回测，共享保证金"""
+    print("=" * 60)
+    print("期货缠论分钟级组合回测 - 多合约共享保证金")
+    print("=" * 60)
+
+    if symbols is None:
+        symbols = list(CONTRACT_SPECS.keys())
+
+    data_by_symbol = {}
+    for symbol in symbols:
+        try:
+            df = load_futures_data(symbol)
+        except (FileNotFoundError, ValueError) as e:
+            logger.warning("  跳过 %s: %s", symbol, e)
+            continue
+        if timeframe == '15min':
+            df = resample_to_15min(df, symbol)
+        data_by_symbol[symbol] = df
+
+    if not data_by_symbol:
+        print("没有可用的合约数据")
+        return None
+
+    engine = FuturesPortfolioEngine(window_size=100 if timeframe == '5min' else 50)
+    result = engine.run(data_by_symbol)
+    engine.save_results()
+
+    print("\n" + "=" * 60)
+    print("组合回测结果")
+    print("=" * 60)
+    for symbol, stats in result['per_contract'].items():
+        print(f"  {symbol:<5} {stats['name']:<6} 交易 {stats['total_trades']:>4} 次, "
+              f"净盈亏 {stats['total_pnl']:>12.2f}, 未实现 {stats['unrealized_pnl']:>10.2f}")
+    print(f"总交易次数: {result['total_trades']}")
+    print(f"胜率: {result['win_rate']*100:.2f}%")
+    print(f"净盈亏: {result['total_pnl']:.2f}")
+    print(f"收益率: {result['total_return']*100:.2f}%")
+    print(f"最大回撤: {result['max_drawdown']*100:.2f}%")
+    print(f"最高保证金占用: {result['max_margin_pct']*100:.2f}%")
+    print(f"最终权益: {result['final_equity']:.2f}")
+
+    return result
+
+
 def analyze_single_contract(symbol: str, timeframe: str = '5min'):
     print("=" * 60)
     print(f"合约分析: {symbol}")
@@ -684,7 +1083,7 @@ def analyze_single_contract(symbol: str, timeframe: str = '5min'):
     df = load_futures_data(symbol)
     
     if timeframe == '15min':
-        df = resample_to_15min(df)
+        df = resample_to_15min(df, symbol)
     
     print(f"\n数据信息:")
     print(f"  时间范围: {df.index[0]} ~ {df.index[-1]}")
@@ -744,13 +1143,26 @@ def analyze_single_contract(symbol: str, timeframe: str = '5min'):
 if __name__ == '__main__':
     import sys
     
-    if len(sys.argv) > 1:
-        symbol = sys.argv[1]
+    # --profile: 输出分阶段耗时报告到 results/profile/
+    argv = [arg for arg in sys.argv[1:] if arg != '--profile']
+    if '--profile' in sys.argv[1:]:
+        profiling.enable()
+    
+    if len(argv) > 0:
+        symbol = argv[0]
     else:
         symbol = 'I0'
     
     timeframe = '5min'
-    if len(sys.argv) > 2:
-        timeframe = sys.argv[2]
+    if len(argv) > 1:
+        timeframe = argv[1]
+    
+    if symbol == 'portfolio':
+        result = run_portfolio_backtest(timeframe=timeframe)
+    else:
+        result = analyze_single_contract(symbol, timeframe)
     
-    result = analyze_single_contract(symbol, timeframe)
+    if profiling.is_enabled():
+        paths = profiling.write_report(name=f'futures_{symbol}_{timeframe}')
+        print(profiling.format_report())
+        print(f"\n耗时报告: {paths['json']}, {paths['text']}")
@@ -18,11 +18,17 @@ import numpy as np
 import os
 import re
 import concurrent.futures as cf
+import hashlib
+import json
 from datetime import datetime, timedelta
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from core import profiling
+from core.profiling import stage
+from core.job_queue import JobQueue, run_local, run_worker
+from core.log import configure_worker, worker_logging
 from indicators.ma_convergence_strategy import calculate_indicators, generate_signals
 import matplotlib.pyplot as plt
 
@@ -84,7 +90,8 @@ def _backtest_worker(args):
     filename = os.path.basename(filepath)
     symbol = filename.split('_')[0]
 
-    data = pd.read_csv(filepath, index_col='datetime', parse_dates=True)
+    with stage('ma_convergence.load_csv'):
+        data = pd.read_csv(filepath, index_col='datetime', parse_dates=True)
     if len(data) < 50:
         return None
 
@@ -96,6 +103,17 @@ def _backtest_worker(args):
     return backtest_on_stock(data, symbol, signal_params=signal_params)
 
 
+def _queue_worker(payload):
+    """任务队列 worker：payload 为 JSON 化的 (filepath, start_date, end_date, signal_params)"""
+    return _backtest_worker(tuple(payload))
+
+
+def queue_name_for(start_date=None, end_date=None, signal_params=None):
+    """同一组回测参数对应同一个队列名，其他机器用相同参数 --join 即可加入"""
+    key = json.dumps([start_date, end_date, signal_params or {}], sort_keys=True, default=str)
+    return 'ma_convergence-' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+
+
 def backtest_on_stock(data, symbol, initial_capital=100000, signal_params=None):
     """
     对单只股票进行均线收敛策略回测
@@ -446,8 +464,14 @@ def run_backtest_parallel(
     include_symbols=None,
     output_dir: str = 'results/ma_convergence_backtest',
     signal_params=None,
+    queue_path=None,
 ):
-    """并行运行回测（按股票文件并行）"""
+    """
+    并行运行回测（按股票文件并行）
+
+    queue_path 不为空时改用任务队列：任务写入该 SQLite 文件，本机启动 workers 个 worker，
+    其他机器可用相同参数加 --join 加入；中断后重新运行只执行未完成的任务。
+    """
     print("=" * 80)
     print("均线收敛策略回测 (Parallel)")
     print("=" * 80)
@@ -467,25 +491,22 @@ def run_backtest_parallel(
     print(f"[OK] 找到 {len(stock_files)} 个股票数据文件")
     print()
 
-    all_results = []
-    fail_count = 0
-
     signal_params = signal_params if isinstance(signal_params, dict) else {}
     tasks = [(fp, start_date, end_date, signal_params) for fp in stock_files]
-    with cf.ProcessPoolExecutor(max_workers=max(1, int(workers))) as ex:
-        futures = [ex.submit(_backtest_worker, t) for t in tasks]
-        for idx, fut in enumerate(cf.as_completed(futures), 1):
-            try:
-                res = fut.result()
-                if res:
-                    all_results.append(res)
-                else:
-                    fail_count += 1
-            except Exception:
-                fail_count += 1
-
-            if idx % 10 == 0 or idx == len(futures):
-                print(f"[{idx}/{len(futures)}] 进度...")
+    if queue_path:
+        queue = JobQueue(queue_path, name=queue_name_for(start_date, end_date, signal_params))
+        added = queue.submit((os.path.basename(t[0]), list(t)) for t in tasks)
+        print(f"[OK] 任务队列 {queue_path} ({queue.name}): 新入队 {added}, 共 {len(tasks)}")
+        report = run_local(queue, _queue_worker, workers)
+        done = queue.results()
+        job_ids = [os.path.basename(t[0]) for t in tasks]
+        all_results = [done[j] for j in job_ids if done.get(j)]
+        fail_count = len(tasks) - len(all_results)
+        print(f"[OK] 吞吐 {report['throughput_per_s']:.2f} 任务/秒, 失败任务 {report['failed']}")
+        if report['pending']:
+            print(f"[WARN] worker 已全部退出，{report['pending']} 个任务未完成，重新运行相同命令可续跑")
+    else:
+        all_results, fail_count = _run_pool(tasks, workers)
 
     success_count = len(all_results)
 
@@ -499,6 +520,28 @@ def run_backtest_parallel(
     return all_results
 
 
+def _run_pool(tasks, workers):
+    all_results = []
+    fail_count = 0
+    with worker_logging() as log_args, cf.ProcessPoolExecutor(
+        max_workers=max(1, int(workers)), initializer=configure_worker, initargs=log_args
+    ) as ex:
+        futures = [profiling.pool_submit(ex, _backtest_worker, t) for t in tasks]
+        for idx, fut in enumerate(cf.as_completed(futures), 1):
+            try:
+                res = profiling.pool_result(fut)
+                if res:
+                    all_results.append(res)
+                else:
+                    fail_count += 1
+            except Exception:
+                fail_count += 1
+
+            if idx % 10 == 0 or idx == len(futures):
+                print(f"[{idx}/{len(futures)}] 进度...")
+    return all_results, fail_count
+
+
 if __name__ == '__main__':
     import argparse
 
@@ -535,6 +578,8 @@ if __name__ == '__main__':
     parser.add_argument("--a-share-only", action="store_true", help="Only run for A-share symbols (e.g. 000001.SZ).")
     parser.add_argument("--workers", type=int, default=1, help="Parallel workers (1 = serial).")
     parser.add_argument("--output-dir", default="results/ma_convergence_backtest")
+    parser.add_argument("--queue", default="", help="SQLite job queue path; run through the queue (resumable, multi-node).")
+    parser.add_argument("--join", action="store_true", help="Only act as a worker on an existing --queue (same strategy args).")
     parser.add_argument(
         "--exclude-symbols",
         default="",
@@ -559,7 +604,10 @@ if __name__ == '__main__':
     parser.add_argument("--vol-ratio-min", type=float, default=1.2, help="expansion: require vol_ratio >= this.")
     parser.add_argument("--vol-setup-days", type=int, default=5, help="contraction_then_expansion: setup lookback days.")
     parser.add_argument("--vol-setup-max", type=float, default=0.8, help="contraction_then_expansion: setup vol_ratio max.")
+    parser.add_argument("--profile", action="store_true", help="Write a per-stage timing report to results/profile/ (worker timings merged).")
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
 
     if not (0 < float(args.stop_loss_pct) < 1):
         raise SystemExit("--stop-loss-pct must be between 0 and 1 (e.g. 0.15 for 15%)")
@@ -580,7 +628,13 @@ if __name__ == '__main__':
         "volume_setup_ratio_max": args.vol_setup_max,
     }
 
-    if args.workers and args.workers > 1:
+    if args.join:
+        if not args.queue:
+            raise SystemExit("--join requires --queue")
+        name = queue_name_for(args.start_date, args.end_date, signal_params)
+        done = run_worker(args.queue, name, _queue_worker)
+        print(f"[OK] worker finished {done} jobs in {name}")
+    elif args.queue or (args.workers and args.workers > 1):
         run_backtest_parallel(
             data_dir=args.data_dir,
             years=args.years,
@@ -592,6 +646,7 @@ if __name__ == '__main__':
             include_symbols=include_symbols,
             output_dir=args.output_dir,
             signal_params=signal_params,
+            queue_path=args.queue or None,
         )
     else:
         run_backtest(
@@ -605,3 +660,8 @@ if __name__ == '__main__':
             output_dir=args.output_dir,
             signal_params=signal_params,
         )
+
+    if args.profile:
+        paths = profiling.write_report(name="ma_convergence")
+        print(profiling.format_report())
+        print(f"\nProfile report: {paths['json']}, {paths['text']}")
@@ -21,6 +21,16 @@ import pandas as pd
 
 # 导入行业过滤功能 (从 volume_breakout_minute 复用)
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import profiling
+from core.log import get_logger
+from core.mtf import align
+from core.profiling import stage, timed
+from core.results_store import ResultsStore
+from data.bar_store import aggregate_bars
+
+logger = get_logger('backtests.millipede_minute')
+
 # 这里直接复制行业过滤相关代码，避免循环导入
 
 
@@ -135,6 +145,7 @@ class PositionState:
     is_long: bool = True
 
 
+@timed('backtest.load_csv')
 def load_minute_data(symbol: str, period: str) -> Optional[pd.DataFrame]:
     """加载分钟级数据"""
     filename = f"{symbol}_{period}.csv"
@@ -174,19 +185,13 @@ def load_minute_data(symbol: str, period: str) -> Optional[pd.DataFrame]:
         
         return df[required_cols].copy()
     except Exception as e:
-        print(f"加载数据失败 {filepath}: {e}")
+        logger.warning("加载数据失败 %s: %s", filepath, e)
         return None
 
 
 def get_daily_ma5(df_minute: pd.DataFrame) -> pd.Series:
     """从分钟数据计算日线MA5"""
-    daily = df_minute.resample('D').agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    }).dropna()
+    daily = aggregate_bars(df_minute, '1d', 'cn_stock')
     
     daily['MA5'] = daily['Close'].rolling(window=5).mean()
     return daily['MA5']
@@ -235,6 +240,7 @@ def get_symbols_for_period(period: str, filter_industry: bool = True) -> List[st
     return all_symbols
 
 
+@timed('backtest.run')
 def run_backtest(
     df: pd.DataFrame,
     initial_capital: float = 100000.0,
@@ -275,8 +281,8 @@ def run_backtest(
     data['volume_ma'] = data['Volume'].rolling(window=volume_ma_period).mean()
     data['volume_spike'] = data['Volume'] > data['volume_ma'] * volume_ratio
     
-    # 日线MA5
-    daily_ma5 = get_daily_ma5(df)
+    # 日线MA5（盘中只能看到上一个已完成交易日的MA5）
+    data['daily_ma5'] = align(get_daily_ma5(df), data.index, freq='1d')
     
     # 生成交易信号
     # 买入: 上涨趋势 + 放量阳线
@@ -297,11 +303,10 @@ def run_backtest(
 
     # 大盘跳空低开过滤（按交易日应用到当日全部分钟K）
     if market_gap_down_flags is not None and len(market_gap_down_flags) > 0:
-        flag_series = market_gap_down_flags.copy()
-        flag_series.index = pd.to_datetime(flag_series.index).normalize()
-        data['market_gap_down_block'] = (
-            data.index.to_series().dt.normalize().map(flag_series).fillna(False).astype(bool).values
-        )
+        # 跳空标记只依赖开盘价，开盘即可见
+        data['market_gap_down_block'] = align(
+            market_gap_down_flags.astype(bool), data.index, freq='1d', known='open', fill_value=False
+        ).to_numpy()
     else:
         data['market_gap_down_block'] = False
     
@@ -311,100 +316,99 @@ def run_backtest(
     trades = []
     equity_curve = []
     
-    for i in range(len(data)):
-        row = data.iloc[i]
-        date = data.index[i]
-        close_price = float(row['Close'])
-        high_price = float(row['High'])
-        low_price = float(row['Low'])
+    with stage("backtest.trade_loop"):
+        for i in range(len(data)):
+            row = data.iloc[i]
+            date = data.index[i]
+            close_price = float(row['Close'])
+            high_price = float(row['High'])
+            low_price = float(row['Low'])
         
-        # 处理卖出
-        if pos.shares > 0:
-            current_profit_pct = (close_price / pos.avg_cost - 1.0)
-            pos.peak_price = max(pos.peak_price, close_price)
-            pos.peak_profit_pct = max(pos.peak_profit_pct, current_profit_pct)
+            # 处理卖出
+            if pos.shares > 0:
+                current_profit_pct = (close_price / pos.avg_cost - 1.0)
+                pos.peak_price = max(pos.peak_price, close_price)
+                pos.peak_profit_pct = max(pos.peak_profit_pct, current_profit_pct)
             
-            should_sell = False
-            sell_reason = None
+                should_sell = False
+                sell_reason = None
             
-            # 1. 止损
-            stop_price = pos.avg_cost * (1 - stop_loss_pct)
-            if close_price <= stop_price or low_price <= stop_price:
-                should_sell = True
-                sell_reason = "stop_loss"
+                # 1. 止损
+                stop_price = pos.avg_cost * (1 - stop_loss_pct)
+                if close_price <= stop_price or low_price <= stop_price:
+                    should_sell = True
+                    sell_reason = "stop_loss"
             
-            # 2. 止盈 - 涨幅>10%后回抽MA5
-            if not should_sell and pos.peak_profit_pct >= take_profit_trigger_pct:
-                date_ts = pd.Timestamp(date.date()) if hasattr(date, 'date') else pd.Timestamp(date)
-                if date_ts in daily_ma5.index:
-                    daily_ma5_val = daily_ma5.loc[date_ts]
+                # 2. 止盈 - 涨幅>10%后回抽MA5
+                if not should_sell and pos.peak_profit_pct >= take_profit_trigger_pct:
+                    daily_ma5_val = float(row['daily_ma5'])
                     if pd.notna(daily_ma5_val):
                         if close_price < daily_ma5_val and pos.peak_price > daily_ma5_val:
                             should_sell = True
                             sell_reason = "take_profit_ma5"
             
-            # 3. 趋势反转 (多头转空头)
-            if not long_only and not should_sell:
-                if row['trend'] == -1 and row['is_bearish']:
-                    should_sell = True
-                    sell_reason = "trend_reversal"
+                # 3. 趋势反转 (多头转空头)
+                if not long_only and not should_sell:
+                    if row['trend'] == -1 and row['is_bearish']:
+                        should_sell = True
+                        sell_reason = "trend_reversal"
             
-            if should_sell:
-                proceeds = pos.shares * close_price * (1 - slippage) * (1 - commission)
-                cash = cash + proceeds
+                if should_sell:
+                    proceeds = pos.shares * close_price * (1 - slippage) * (1 - commission)
+                    cash = cash + proceeds
                 
-                trades.append({
-                    "date": date,
-                    "type": "sell",
-                    "price": close_price,
-                    "shares": pos.shares,
-                    "value": proceeds,
-                    "reason": sell_reason,
-                    "profit_pct": current_profit_pct * 100,
-                })
+                    trades.append({
+                        "date": date,
+                        "type": "sell",
+                        "price": close_price,
+                        "shares": pos.shares,
+                        "value": proceeds,
+                        "reason": sell_reason,
+                        "profit_pct": current_profit_pct * 100,
+                    })
                 
-                pos = PositionState()
+                    pos = PositionState()
         
-        # 处理买入 - 只做多
-        if long_only:
-            buy_signal = bool(row.get('buy_signal', False))
-        else:
-            buy_signal = bool(row.get('buy_signal', False))
-            sell_signal = bool(row.get('sell_signal', False))
+            # 处理买入 - 只做多
+            if long_only:
+                buy_signal = bool(row.get('buy_signal', False))
+            else:
+                buy_signal = bool(row.get('buy_signal', False))
+                sell_signal = bool(row.get('sell_signal', False))
         
-        market_gap_down_block = bool(row.get('market_gap_down_block', False))
-
-        if pos.shares == 0 and buy_signal and not market_gap_down_block:
-            max_shares = int(cash / (close_price * (1 + slippage) * (1 + commission)))
-            if max_shares > 0:
-                cost = max_shares * close_price * (1 + slippage) * (1 + commission)
-                pos.shares = max_shares
-                pos.avg_cost = close_price * (1 + slippage)
-                pos.entry_price = close_price
-                pos.peak_price = close_price
-                pos.peak_profit_pct = 0.0
-                pos.entry_time = date
-                pos.is_long = True
-                cash -= cost
+            market_gap_down_block = bool(row.get('market_gap_down_block', False))
+
+            if pos.shares == 0 and buy_signal and not market_gap_down_block:
+                max_shares = int(cash / (close_price * (1 + slippage) * (1 + commission)))
+                if max_shares > 0:
+                    cost = max_shares * close_price * (1 + slippage) * (1 + commission)
+                    pos.shares = max_shares
+                    pos.avg_cost = close_price * (1 + slippage)
+                    pos.entry_price = close_price
+                    pos.peak_price = close_price
+                    pos.peak_profit_pct = 0.0
+                    pos.entry_time = date
+                    pos.is_long = True
+                    cash -= cost
                 
-                trades.append({
-                    "date": date,
-                    "type": "buy",
-                    "price": close_price,
-                    "shares": max_shares,
-                    "value": cost,
-                    "reason": "long_entry",
-                })
+                    trades.append({
+                        "date": date,
+                        "type": "buy",
+                        "price": close_price,
+                        "shares": max_shares,
+                        "value": cost,
+                        "reason": "long_entry",
+                    })
         
-        # 记录权益
-        current_equity = cash + pos.shares * close_price if pos.shares != 0 else cash
-        equity_curve.append({
-            "date": date,
-            "equity": current_equity,
-            "close": close_price,
-            "cash": cash,
-            "position": pos.shares,
-        })
+            # 记录权益
+            current_equity = cash + pos.shares * close_price if pos.shares != 0 else cash
+            equity_curve.append({
+                "date": date,
+                "equity": current_equity,
+                "close": close_price,
+                "cash": cash,
+                "position": pos.shares,
+            })
     
     # 最终平仓
     if pos.shares != 0:
@@ -477,20 +481,32 @@ def run_backtest(
 
 def print_summary(symbol: str, result: Dict):
     """打印回测结果摘要"""
-    print("=" * 70)
-    print(f"股票: {symbol}")
-    print(f"最终资金: {result['final_capital']:.2f}")
-    print(f"总收益: {result['total_return_pct']:.2f}%")
-    print(f"年化收益: {result['annualized_return_pct']:.2f}%")
-    print(f"夏普比率: {result['sharpe_ratio']:.2f}")
-    print(f"最大回撤: {result['max_drawdown_pct']:.2f}%")
-    print(f"胜率: {result['win_rate_pct']:.2f}%")
-    print(f"交易次数: {result['total_trades']}")
-    print("=" * 70)
-
-
-def save_results(symbol: str, output_dir: str, result: Dict):
-    """保存回测结果"""
+    logger.info(
+        "%s\n股票: %s\n最终资金: %.2f\n总收益: %.2f%%\n年化收益: %.2f%%\n夏普比率: %.2f\n"
+        "最大回撤: %.2f%%\n胜率: %.2f%%\n交易次数: %d\n%s",
+        "=" * 70, symbol, result['final_capital'], result['total_return_pct'],
+        result['annualized_return_pct'], result['sharpe_ratio'], result['max_drawdown_pct'],
+        result['win_rate_pct'], result['total_trades'], "=" * 70
+    )
+
+
+@timed('backtest.save_results')
+def save_results(symbol: str, output_dir: str, result: Dict, store: Optional[ResultsStore] = None):
+    """保存回测结果（传入 store 时写入结果库，否则按旧格式每只股票写四个CSV）"""
+    summary = {
+        "symbol": symbol,
+        "final_capital": result['final_capital'],
+        "total_return_pct": result['total_return_pct'],
+        "annualized_return_pct": result['annualized_return_pct'],
+        "sharpe_ratio": result['sharpe_ratio'],
+        "max_drawdown_pct": result['max_drawdown_pct'],
+        "win_rate_pct": result['win_rate_pct'],
+        "total_trades": result['total_trades'],
+    }
+    if store is not None:
+        store.add(symbol, summary, trades=result['trades'], equity=result['equity_curve'], signals=result['signals'])
+        return
+
     os.makedirs(output_dir, exist_ok=True)
     
     signal_file = os.path.join(output_dir, f"{symbol}_signals.csv")
@@ -502,18 +518,8 @@ def save_results(symbol: str, output_dir: str, result: Dict):
     equity_file = os.path.join(output_dir, f"{symbol}_equity.csv")
     result['equity_curve'].to_csv(equity_file, encoding='utf-8-sig')
     
-    summary_data = [{
-        "symbol": symbol,
-        "final_capital": result['final_capital'],
-        "total_return_pct": result['total_return_pct'],
-        "annualized_return_pct": result['annualized_return_pct'],
-        "sharpe_ratio": result['sharpe_ratio'],
-        "max_drawdown_pct": result['max_drawdown_pct'],
-        "win_rate_pct": result['win_rate_pct'],
-        "total_trades": result['total_trades'],
-    }]
     summary_file = os.path.join(output_dir, f"{symbol}_summary.csv")
-    pd.DataFrame(summary_data).to_csv(summary_file, index=False, encoding='utf-8-sig')
+    pd.DataFrame([summary]).to_csv(summary_file, index=False, encoding='utf-8-sig')
 
 
 def main():
@@ -530,11 +536,19 @@ def main():
     parser.add_argument("--stop-loss", type=float, default=0.05, help="止损百分比")
     parser.add_argument("--take-profit-trigger", type=float, default=0.10, help="止盈触发涨幅")
     parser.add_argument("--universe", choices=["single", "all"], default="single", help="回测范围")
+    parser.add_argument("--results", choices=["store", "csv"], default="store",
+                        help="结果输出: store=写入结果库(SQLite)，csv=每只股票四个CSV（旧格式）")
+    parser.add_argument("--store-path", default="", help="结果库路径，默认 <output-dir>/results.sqlite")
+    parser.add_argument("--keep-signals", action="store_true", help="结果库中保存逐K线信号")
+    parser.add_argument("--equity-rule", default="", help="结果库中权益曲线降采样规则，如 1D（默认不降采样）")
     parser.add_argument("--no-industry-filter", action="store_true", help="禁用行业过滤")
     parser.add_argument("--market-symbol", default="000001.SS", help="大盘代理代码（用于跳空过滤）")
     parser.add_argument("--market-gap-down-threshold", type=float, default=0.02, help="大盘跳空低开阈值，如0.02=2%%")
     parser.add_argument("--no-market-gap-filter", action="store_true", help="禁用大盘跳空低开过滤")
+    parser.add_argument("--profile", action="store_true", help="输出分阶段耗时报告到 results/profile/")
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
     
     # 获取股票列表
     if args.universe == "all":
@@ -571,15 +585,25 @@ def main():
                 f"触发 {blocked_days} 个交易日暂停开仓"
             )
     
+    store = None
+    if args.results == "store":
+        store = ResultsStore(
+            args.store_path or os.path.join(args.output_dir, "results.sqlite"),
+            strategy="millipede_minute",
+            params=vars(args),
+            keep_signals=args.keep_signals,
+            equity_rule=args.equity_rule or None,
+        )
+
     for symbol in symbols:
-        print(f"\n处理 {symbol}...")
+        logger.debug("\n处理 %s...", symbol)
         
         data = load_minute_data(symbol, args.period)
         if data is None or len(data) < 100:
-            print(f"  跳过: 数据不足")
+            logger.info("  %s 跳过: 数据不足", symbol)
             continue
         
-        print(f"  数据量: {len(data)} 条")
+        logger.debug("  数据量: %d 条", len(data))
         
         result = run_backtest(
             df=data,
@@ -596,7 +620,7 @@ def main():
         )
         
         print_summary(symbol, result)
-        save_results(symbol, args.output_dir, result)
+        save_results(symbol, args.output_dir, result, store)
         
         all_results.append({
             "symbol": symbol,
@@ -610,6 +634,10 @@ def main():
             "total_trades": result['total_trades'],
         })
     
+    if store is not None:
+        store.close()
+        print(f"\n结果库: {store.path} (run_id={store.run_id})")
+
     # 保存汇总
     if all_results:
         summary_file = os.path.join(args.output_dir, f"summary_{args.period}.csv")
@@ -624,6 +652,11 @@ def main():
         print(f"平均最大回撤: {df_summary['max_drawdown_pct'].mean():.2f}%")
         print(f"盈利股票数: {(df_summary['total_return_pct'] > 0).sum()} / {len(df_summary)}")
 
+    if args.profile:
+        paths = profiling.write_report(name=f"millipede_minute_{args.period}")
+        print(profiling.format_report())
+        print(f"\n耗时报告: {paths['json']}, {paths['text']}")
+
 
 if __name__ == "__main__":
     main()
@@ -12,12 +12,13 @@ import sys
 import argparse
 import re
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.profiling import stage, timed
 from indicators.chan.chan_theory_realtime import ChanTheoryRealtime
 
 
@@ -54,16 +55,29 @@ class ChanTheory15minT1Adapter:
         self.hold_days = 0
         self.trades: List[Trade] = []
 
+    # 信号窗口：前一交易日往前7个自然日，到前一交易日 23:00
+    WINDOW_BACK = pd.Timedelta(days=7)
+    WINDOW_FORWARD = pd.Timedelta(hours=23)
+    MIN_WINDOW_BARS = 80
+
     def analyze_15min_signal(self, df_15min: pd.DataFrame) -> Dict:
-        if df_15min is None or len(df_15min) < 80:
+        if df_15min is None or len(df_15min) < self.MIN_WINDOW_BARS:
             return {"buy": False, "sell": False}
 
         chan = ChanTheoryRealtime(k_type="minute")
         chan.analyze(df_15min)
 
+        vol_ma20 = df_15min["Volume"].rolling(20).mean().iloc[-1]
+        ma60 = df_15min["Close"].rolling(60).mean().iloc[-1]
+        return self._signal_from_chan(
+            chan, df_15min.index[-1], float(df_15min["Volume"].iloc[-1]), vol_ma20,
+            float(df_15min["Close"].iloc[-1]), ma60,
+        )
+
+    def _signal_from_chan(self, chan: ChanTheoryRealtime, last_ts, current_vol: float, vol_ma20,
+                          close: float, ma60) -> Dict:
         latest_buy = chan.buy_points[-1] if chan.buy_points else None
         latest_sell = chan.sell_points[-1] if chan.sell_points else None
-        last_ts = df_15min.index[-1]
 
         def _is_recent(point: Optional[dict]) -> bool:
             if not point:
@@ -76,12 +90,8 @@ class ChanTheory15minT1Adapter:
             except Exception:
                 return False
 
-        vol_ma20 = df_15min["Volume"].rolling(20).mean().iloc[-1]
-        current_vol = float(df_15min["Volume"].iloc[-1])
         volume_ok = pd.notna(vol_ma20) and current_vol > float(vol_ma20) * self.volume_threshold
-
-        ma60 = df_15min["Close"].rolling(60).mean().iloc[-1]
-        trend_ok = pd.notna(ma60) and float(df_15min["Close"].iloc[-1]) >= float(ma60)
+        trend_ok = pd.notna(ma60) and close >= float(ma60)
 
         return {
             # 放宽: 买点在最近N根内，且满足量能或趋势任一条件即可
@@ -95,6 +105,47 @@ class ChanTheory15minT1Adapter:
         sig = self.analyze_15min_signal(prev_day_15min)
         return bool(sig["sell"]) or self.hold_days >= self.max_hold_days
 
+    def window_positions(self, index_15min: pd.DatetimeIndex, dates: pd.DatetimeIndex) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        每个交易日信号窗口在15分钟数据中的位置区间 [start, end)
+
+        两次 searchsorted 一次算好全部交易日，替代逐日的整列布尔筛选。
+        """
+        index_15min = pd.DatetimeIndex(index_15min)
+        starts = index_15min.searchsorted(dates - self.WINDOW_BACK, side="left")
+        ends = index_15min.searchsorted(dates + self.WINDOW_FORWARD, side="right")
+        return starts, ends
+
+    def _prepare_15min(self, df_15min_full: pd.DataFrame):
+        """整段15分钟数据只算一次：疑似分型类型、20根量均、60根收盘均线"""
+        self._bars = df_15min_full
+        self._fenxing = ChanTheoryRealtime.realtime_fenxing_types(df_15min_full["High"], df_15min_full["Low"])
+        self._volume = df_15min_full["Volume"].to_numpy(dtype=float)
+        self._close = df_15min_full["Close"].to_numpy(dtype=float)
+        self._vol_ma20 = df_15min_full["Volume"].rolling(20).mean().to_numpy()
+        self._ma60 = df_15min_full["Close"].rolling(60).mean().to_numpy()
+        self._chan = ChanTheoryRealtime(k_type="minute")
+        self._signal_cache: Dict[Tuple[int, int], Dict] = {}
+
+    def _window_signal(self, start: int, end: int) -> Dict:
+        """按位置区间取窗口信号；同一窗口（无新15分钟K线的交易日）只分析一次"""
+        key = (start, end)
+        if key in self._signal_cache:
+            return self._signal_cache[key]
+        if end - start < self.MIN_WINDOW_BARS:
+            sig = {"buy": False, "sell": False}
+        else:
+            # 窗口 >= 80 根，末根的 20/60 根均值完全落在窗口内，直接取整段预算结果
+            self._chan.analyze(self._bars.iloc[start:end], self._fenxing[start:end])
+            last = end - 1
+            sig = self._signal_from_chan(
+                self._chan, self._bars.index[last], self._volume[last], self._vol_ma20[last],
+                self._close[last], self._ma60[last],
+            )
+        self._signal_cache[key] = sig
+        return sig
+
+    @timed("t1_adapter.run_backtest")
     def run_backtest(self, df_15min_full: pd.DataFrame, df_daily_full: pd.DataFrame) -> pd.DataFrame:
         self.reset()
         results = []
@@ -102,56 +153,56 @@ class ChanTheory15minT1Adapter:
         if len(dates) < 3:
             return pd.DataFrame()
 
-        for i in range(1, len(dates)):
-            prev_date = dates[i - 1]
-            today = dates[i]
-            today_bar = df_daily_full.loc[today]
-            prev_bar = df_daily_full.loc[prev_date]
-
-            # 用最近3个交易日的15分钟窗口做结构判断，避免单日数据过短导致无信号
-            window_start = prev_date - pd.Timedelta(days=7)
-            prev_15 = df_15min_full[
-                (df_15min_full.index >= window_start) & (df_15min_full.index <= prev_date + pd.Timedelta(hours=23))
-            ]
-            decision = "wait"
-
-            if self.position == 0:
-                sig = self.analyze_15min_signal(prev_15)
-                if sig["buy"]:
-                    self.position = 1
-                    self.entry_date = today
-                    self.entry_price = float(today_bar["Open"])
-                    self.hold_days = 0
-                    self.trades.append(Trade(today, "buy", self.entry_price, "prev_15m_buy_signal"))
-                    decision = "buy"
-            else:
-                profit_pct = (float(prev_bar["Close"]) - self.entry_price) / self.entry_price
-                should_sell = (
-                    profit_pct <= -self.stop_loss_pct
-                    or profit_pct >= self.take_profit_pct
-                    or self.intraday_risk_flag(prev_15)
-                )
-                if should_sell and self.hold_days >= self.min_hold_days:
-                    exit_px = float(today_bar["Open"])
-                    self.trades.append(Trade(today, "sell", exit_px, "risk_or_profit_or_signal"))
-                    self.position = 0
-                    self.entry_date = None
-                    self.entry_price = 0.0
-                    self.hold_days = 0
-                    decision = "sell"
+        self._prepare_15min(df_15min_full)
+        # 用前一交易日往前约一周的15分钟窗口做结构判断，避免单日数据过短导致无信号
+        starts, ends = self.window_positions(df_15min_full.index, dates)
+        opens = df_daily_full["Open"].to_numpy(dtype=float)
+        closes = df_daily_full["Close"].to_numpy(dtype=float)
+
+        with stage("t1_adapter.day_loop"):
+            for i in range(1, len(dates)):
+                today = dates[i]
+                window = (int(starts[i - 1]), int(ends[i - 1]))
+                decision = "wait"
+
+                if self.position == 0:
+                    sig = self._window_signal(*window)
+                    if sig["buy"]:
+                        self.position = 1
+                        self.entry_date = today
+                        self.entry_price = float(opens[i])
+                        self.hold_days = 0
+                        self.trades.append(Trade(today, "buy", self.entry_price, "prev_15m_buy_signal"))
+                        decision = "buy"
                 else:
-                    self.hold_days += 1
-                    decision = "hold"
-
-            results.append(
-                {
-                    "date": today,
-                    "decision": decision,
-                    "position": self.position,
-                    "entry_price": self.entry_price if self.position else np.nan,
-                    "close": float(today_bar["Close"]),
-                }
-            )
+                    profit_pct = (float(closes[i - 1]) - self.entry_price) / self.entry_price
+                    should_sell = (
+                        profit_pct <= -self.stop_loss_pct
+                        or profit_pct >= self.take_profit_pct
+                        or bool(self._window_signal(*window)["sell"])
+                        or self.hold_days >= self.max_hold_days
+                    )
+                    if should_sell and self.hold_days >= self.min_hold_days:
+                        exit_px = float(opens[i])
+                        self.trades.append(Trade(today, "sell", exit_px, "risk_or_profit_or_signal"))
+                        self.position = 0
+                        self.entry_date = None
+                        self.entry_price = 0.0
+                        self.hold_days = 0
+                        decision = "sell"
+                    else:
+                        self.hold_days += 1
+                        decision = "hold"
+
+                results.append(
+                    {
+                        "date": today,
+                        "decision": decision,
+                        "position": self.position,
+                        "entry_price": self.entry_price if self.position else np.nan,
+                        "close": float(closes[i]),
+                    }
+                )
 
         if not results:
             return pd.DataFrame()
@@ -14,6 +14,17 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import profiling
+from core.log import get_logger
+from core.mtf import align
+from core.profiling import stage, timed
+from core.results_store import ResultsStore
+from core.universe_runner import UniverseRunner, file_fingerprint, parse_shard
+from data.bar_store import aggregate_bars
+
+logger = get_logger('backtests.volume_breakout_minute')
+
 
 # 股票行业分类映射 (股票代码 -> (名称, 行业))
 # 行业: 房地产、酒类、银行、家电、汽车、医药、电子、白酒、光伏、软件等
@@ -198,9 +209,11 @@ class PositionState:
     peak_price: float = 0.0  # 持仓期间的最高/最低价
     peak_profit_pct: float = 0.0  # 持仓期间曾经达到的最高收益率
     entry_time: Optional[pd.Timestamp] = None
+    entry_day_ordinal: int = 0  # 开仓K线所属交易日序号
     is_long: bool = True  # True=多头, False=空头
 
 
+@timed('backtest.load_csv')
 def load_minute_data(symbol: str, period: str) -> Optional[pd.DataFrame]:
     """
     加载分钟级数据
@@ -263,7 +276,7 @@ def load_minute_data(symbol: str, period: str) -> Optional[pd.DataFrame]:
         out = out[~out.index.duplicated(keep='last')].sort_index()
         return out
     except Exception as e:
-        print(f"加载数据失败 {filepath}: {e}")
+        logger.warning("加载数据失败 %s: %s", filepath, e)
         return None
 
 
@@ -297,13 +310,7 @@ def get_daily_ma5(df_minute: pd.DataFrame) -> pd.Series:
         日线MA5序列
     """
     # 将分钟数据聚合为日线
-    daily = df_minute.resample('D').agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    }).dropna()
+    daily = aggregate_bars(df_minute, '1d', 'cn_stock')
     
     # 计算日线MA5
     daily['MA5'] = daily['Close'].rolling(window=5).mean()
@@ -344,6 +351,7 @@ def get_symbols_for_period(period: str, filter_industry: bool = True) -> List[st
     return all_symbols
 
 
+@timed('backtest.run')
 def run_backtest(
     df: pd.DataFrame,
     initial_capital: float = 100000.0,
@@ -388,8 +396,8 @@ def run_backtest(
     # 判断放量: 成交量 > 均线 * 倍数
     data['volume_spike'] = data['Volume'] > data['volume_ma'] * volume_ratio
     
-    # 获取日线MA5用于止盈判断
-    daily_ma5 = get_daily_ma5(df)
+    # 获取日线MA5用于止盈判断（盘中只能看到上一个已完成交易日的MA5）
+    data['daily_ma5'] = align(get_daily_ma5(df), data.index, freq='1d')
     
     # 生成交易信号
     data['buy_signal'] = False
@@ -411,9 +419,8 @@ def run_backtest(
         'sell_signal'
     ] = True
 
-    # 交易日序号映射：用于“持仓超过N天”判断（按交易日，不是自然日）
-    trading_days = pd.DatetimeIndex(pd.to_datetime(data.index).normalize().unique()).sort_values()
-    day_to_idx = {day: idx for idx, day in enumerate(trading_days)}
+    # 交易日序号：数据中实际出现的日期依次编号，用于“持仓超过N天”判断（停牌日不计入）
+    _, day_ordinals = np.unique(pd.to_datetime(data.index).normalize(), return_inverse=True)
 
     # 开始回测 - 只做多
     cash = initial_capital
@@ -449,112 +456,110 @@ def run_backtest(
         if pos.shares <= 0:
             pos = PositionState()
     
-    for i in range(len(data)):
-        row = data.iloc[i]
-        date = data.index[i]
-        open_price = float(row['Open'])
-        close_price = float(row['Close'])
-        high_price = float(row['High'])
-        low_price = float(row['Low'])
+    with stage("backtest.trade_loop"):
+        for i in range(len(data)):
+            row = data.iloc[i]
+            date = data.index[i]
+            open_price = float(row['Open'])
+            close_price = float(row['Close'])
+            high_price = float(row['High'])
+            low_price = float(row['Low'])
         
-        equity = cash + pos.shares * close_price if pos.shares != 0 else cash
+            equity = cash + pos.shares * close_price if pos.shares != 0 else cash
         
-        # ========== 处理卖出 ==========
-        if pos.shares > 0:
-            current_profit_pct = (close_price / pos.avg_cost - 1.0)
+            # ========== 处理卖出 ==========
+            if pos.shares > 0:
+                current_profit_pct = (close_price / pos.avg_cost - 1.0)
             
-            # 更新峰值 (价格和收益率)
-            pos.peak_price = max(pos.peak_price, high_price)
-            pos.peak_profit_pct = max(pos.peak_profit_pct, high_price / pos.avg_cost - 1.0)
+                # 更新峰值 (价格和收益率)
+                pos.peak_price = max(pos.peak_price, high_price)
+                pos.peak_profit_pct = max(pos.peak_profit_pct, high_price / pos.avg_cost - 1.0)
             
-            sell_reason = None
-            should_sell = False
+                sell_reason = None
+                should_sell = False
             
-            # 1. 止损检查（按当根最低价触发）
-            stop_price = pos.avg_cost * (1 - stop_loss_pct)
+                # 1. 止损检查（按当根最低价触发）
+                stop_price = pos.avg_cost * (1 - stop_loss_pct)
             
-            # 跳空低开保护：如果开盘价直接低于止损价，以开盘价卖出
-            if open_price <= stop_price:
-                should_sell = True
-                sell_reason = "stop_loss_gap"
-            elif low_price <= stop_price:
-                should_sell = True
-                sell_reason = "stop_loss"
+                # 跳空低开保护：如果开盘价直接低于止损价，以开盘价卖出
+                if open_price <= stop_price:
+                    should_sell = True
+                    sell_reason = "stop_loss_gap"
+                elif low_price <= stop_price:
+                    should_sell = True
+                    sell_reason = "stop_loss"
             
-            # 2. 止盈检查（单次全平）
-            if not should_sell and pos.shares > 0 and pos.peak_profit_pct >= take_profit_trigger_pct:
-                take_profit_by_ma5 = False
-                date_ts = pd.Timestamp(date.date()) if hasattr(date, 'date') else pd.Timestamp(date)
-                if date_ts in daily_ma5.index:
-                    daily_ma5_val = daily_ma5.loc[date_ts]
+                # 2. 止盈检查（单次全平）
+                if not should_sell and pos.shares > 0 and pos.peak_profit_pct >= take_profit_trigger_pct:
+                    take_profit_by_ma5 = False
+                    daily_ma5_val = float(row['daily_ma5'])
                     if pd.notna(daily_ma5_val):
                         take_profit_by_ma5 = close_price < daily_ma5_val and pos.peak_price > daily_ma5_val
 
-                retrace_pct = pos.peak_profit_pct - current_profit_pct
-                if retrace_pct >= tp_trail_retrace:
-                    should_sell = True
-                    sell_reason = "take_profit_trail"
-                elif take_profit_by_ma5:
-                    should_sell = True
-                    sell_reason = "take_profit_ma5"
-
-            # 3. 时间止损：持仓超过N个交易日且当前亏损 -> 平仓
-            if not should_sell and pos.entry_time is not None:
-                curr_day = pd.Timestamp(date.date()) if hasattr(date, 'date') else pd.Timestamp(date).normalize()
-                entry_day = pd.Timestamp(pos.entry_time.date()) if hasattr(pos.entry_time, 'date') else pd.Timestamp(pos.entry_time).normalize()
-                holding_days = day_to_idx.get(curr_day, 0) - day_to_idx.get(entry_day, 0)
-                if holding_days > max_holding_days_no_profit and current_profit_pct < 0:
-                    should_sell = True
-                    sell_reason = "time_stop_loss"
+                    retrace_pct = pos.peak_profit_pct - current_profit_pct
+                    if retrace_pct >= tp_trail_retrace:
+                        should_sell = True
+                        sell_reason = "take_profit_trail"
+                    elif take_profit_by_ma5:
+                        should_sell = True
+                        sell_reason = "take_profit_ma5"
+
+                # 3. 时间止损：持仓超过N个交易日且当前亏损 -> 平仓
+                if not should_sell and pos.entry_time is not None:
+                    holding_days = int(day_ordinals[i]) - pos.entry_day_ordinal
+                    if holding_days > max_holding_days_no_profit and current_profit_pct < 0:
+                        should_sell = True
+                        sell_reason = "time_stop_loss"
             
-            # 确定卖出价格
-            if sell_reason == "stop_loss_gap":
-                sell_price = open_price  # 跳空低开，以开盘价卖出
-            elif sell_reason == "stop_loss":
-                sell_price = stop_price  # 最低价触发止损，按止损价执行
-            else:
-                sell_price = close_price  # 非止损卖出，仍按收盘价
+                # 确定卖出价格
+                if sell_reason == "stop_loss_gap":
+                    sell_price = open_price  # 跳空低开，以开盘价卖出
+                elif sell_reason == "stop_loss":
+                    sell_price = stop_price  # 最低价触发止损，按止损价执行
+                else:
+                    sell_price = close_price  # 非止损卖出，仍按收盘价
             
-            # 执行卖出
-            if should_sell:
-                execute_sell(int(pos.shares), sell_price, sell_reason, date)
+                # 执行卖出
+                if should_sell:
+                    execute_sell(int(pos.shares), sell_price, sell_reason, date)
         
-        # ========== 处理买入 - 只做多 ==========
-        buy_signal = bool(row.get('buy_signal', False))
-
-        if pos.shares == 0 and buy_signal:
-            # 做多
-            max_shares = int(cash / (close_price * (1 + slippage) * (1 + commission)))
-            if max_shares > 0:
-                cost = max_shares * close_price * (1 + slippage) * (1 + commission)
-                pos.shares = max_shares
-                pos.avg_cost = close_price * (1 + slippage)
-                pos.entry_price = close_price
-                pos.peak_price = close_price
-                pos.peak_profit_pct = 0.0  # 初始化曾经达到的最高收益率
-                pos.entry_time = date
-                pos.is_long = True
-                cash -= cost
+            # ========== 处理买入 - 只做多 ==========
+            buy_signal = bool(row.get('buy_signal', False))
+
+            if pos.shares == 0 and buy_signal:
+                # 做多
+                max_shares = int(cash / (close_price * (1 + slippage) * (1 + commission)))
+                if max_shares > 0:
+                    cost = max_shares * close_price * (1 + slippage) * (1 + commission)
+                    pos.shares = max_shares
+                    pos.avg_cost = close_price * (1 + slippage)
+                    pos.entry_price = close_price
+                    pos.peak_price = close_price
+                    pos.peak_profit_pct = 0.0  # 初始化曾经达到的最高收益率
+                    pos.entry_time = date
+                    pos.entry_day_ordinal = int(day_ordinals[i])
+                    pos.is_long = True
+                    cash -= cost
                 
-                trade = {
-                    "date": date,
-                    "type": "buy",
-                    "price": close_price,
-                    "shares": max_shares,
-                    "value": cost,
-                    "reason": "long_entry",
-                }
-                trades.append(trade)
+                    trade = {
+                        "date": date,
+                        "type": "buy",
+                        "price": close_price,
+                        "shares": max_shares,
+                        "value": cost,
+                        "reason": "long_entry",
+                    }
+                    trades.append(trade)
         
-        # 记录权益
-        current_equity = cash + pos.shares * close_price if pos.shares != 0 else cash
-        equity_curve.append({
-            "date": date,
-            "equity": current_equity,
-            "close": close_price,
-            "cash": cash,
-            "position": pos.shares,
-        })
+            # 记录权益
+            current_equity = cash + pos.shares * close_price if pos.shares != 0 else cash
+            equity_curve.append({
+                "date": date,
+                "equity": current_equity,
+                "close": close_price,
+                "cash": cash,
+                "position": pos.shares,
+            })
     
     # 最终平仓
     if pos.shares != 0:
@@ -634,20 +639,32 @@ def run_backtest(
 
 def print_summary(symbol: str, result: Dict):
     """打印回测结果摘要"""
-    print("=" * 70)
-    print(f"股票: {symbol}")
-    print(f"最终资金: {result['final_capital']:.2f}")
-    print(f"总收益: {result['total_return_pct']:.2f}%")
-    print(f"年化收益: {result['annualized_return_pct']:.2f}%")
-    print(f"夏普比率: {result['sharpe_ratio']:.2f}")
-    print(f"最大回撤: {result['max_drawdown_pct']:.2f}%")
-    print(f"胜率: {result['win_rate_pct']:.2f}%")
-    print(f"交易次数: {result['total_trades']}")
-    print("=" * 70)
-
-
-def save_results(symbol: str, output_dir: str, result: Dict):
-    """保存回测结果"""
+    logger.info(
+        "%s\n股票: %s\n最终资金: %.2f\n总收益: %.2f%%\n年化收益: %.2f%%\n夏普比率: %.2f\n"
+        "最大回撤: %.2f%%\n胜率: %.2f%%\n交易次数: %d\n%s",
+        "=" * 70, symbol, result['final_capital'], result['total_return_pct'],
+        result['annualized_return_pct'], result['sharpe_ratio'], result['max_drawdown_pct'],
+        result['win_rate_pct'], result['total_trades'], "=" * 70
+    )
+
+
+@timed('backtest.save_results')
+def save_results(symbol: str, output_dir: str, result: Dict, store: Optional[ResultsStore] = None):
+    """保存回测结果（传入 store 时写入结果库，否则按旧格式每只股票写四个CSV）"""
+    summary = {
+        "symbol": symbol,
+        "final_capital": result['final_capital'],
+        "total_return_pct": result['total_return_pct'],
+        "annualized_return_pct": result['annualized_return_pct'],
+        "sharpe_ratio": result['sharpe_ratio'],
+        "max_drawdown_pct": result['max_drawdown_pct'],
+        "win_rate_pct": result['win_rate_pct'],
+        "total_trades": result['total_trades'],
+    }
+    if store is not None:
+        store.add(symbol, summary, trades=result['trades'], equity=result['equity_curve'], signals=result['signals'])
+        return
+
     os.makedirs(output_dir, exist_ok=True)
     
     # 保存信号
@@ -663,18 +680,8 @@ def save_results(symbol: str, output_dir: str, result: Dict):
     result['equity_curve'].to_csv(equity_file, encoding='utf-8-sig')
     
     # 保存摘要
-    summary_data = [{
-        "symbol": symbol,
-        "final_capital": result['final_capital'],
-        "total_return_pct": result['total_return_pct'],
-        "annualized_return_pct": result['annualized_return_pct'],
-        "sharpe_ratio": result['sharpe_ratio'],
-        "max_drawdown_pct": result['max_drawdown_pct'],
-        "win_rate_pct": result['win_rate_pct'],
-        "total_trades": result['total_trades'],
-    }]
     summary_file = os.path.join(output_dir, f"{symbol}_summary.csv")
-    pd.DataFrame(summary_data).to_csv(summary_file, index=False, encoding='utf-8-sig')
+    pd.DataFrame([summary]).to_csv(summary_file, index=False, encoding='utf-8-sig')
 
 
 def main():
@@ -692,8 +699,19 @@ def main():
     parser.add_argument("--tp-trail-retrace", type=float, default=0.07, help="峰值回撤止盈阈值")
     parser.add_argument("--max-holding-days-no-profit", type=int, default=20, help="持仓超过N个交易日且亏损则平仓")
     parser.add_argument("--universe", choices=["single", "all"], default="single", help="回测范围")
+    parser.add_argument("--results", choices=["store", "csv"], default="store",
+                        help="结果输出: store=写入结果库(SQLite)，csv=每只股票四个CSV（旧格式）")
+    parser.add_argument("--store-path", default="", help="结果库路径，默认 <output-dir>/results.sqlite")
+    parser.add_argument("--keep-signals", action="store_true", help="结果库中保存逐K线信号")
+    parser.add_argument("--equity-rule", default="", help="结果库中权益曲线降采样规则，如 1D（默认不降采样）")
     parser.add_argument("--no-industry-filter", action="store_true", help="禁用行业过滤（不过滤房地产和酒类股票）")
+    parser.add_argument("--shard", default="", help="只跑第k片（k/N，k从1开始），如 1/4")
+    parser.add_argument("--checkpoint-dir", default="results/checkpoints", help="检查点日志目录（断点续跑）")
+    parser.add_argument("--fresh", action="store_true", help="忽略检查点，全部重跑")
+    parser.add_argument("--profile", action="store_true", help="输出分阶段耗时报告到 results/profile/")
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
     
     # 获取股票列表
     if args.universe == "all":
@@ -711,18 +729,16 @@ def main():
             return
         symbols = [args.symbol]
     
-    all_results = []
-    
-    for symbol in symbols:
-        print(f"\n处理 {symbol}...")
+    def backtest_symbol(symbol):
+        logger.debug("\n处理 %s...", symbol)
         
         # 加载数据
         data = load_minute_data(symbol, args.period)
         if data is None or len(data) < 100:
-            print(f"  跳过: 数据不足")
-            continue
+            logger.info("  %s 跳过: 数据不足", symbol)
+            return None
         
-        print(f"  数据量: {len(data)} 条")
+        logger.debug("  数据量: %d 条", len(data))
         
         # 运行回测
         result = run_backtest(
@@ -741,11 +757,13 @@ def main():
         # 打印结果
         print_summary(symbol, result)
         
-        # 保存结果
-        save_results(symbol, args.output_dir, result)
+        # 保存结果（写入完成后才记检查点）
+        save_results(symbol, args.output_dir, result, store)
+        if store is not None:
+            store.flush()
         
         # 记录汇总
-        all_results.append({
+        return {
             "symbol": symbol,
             "period": args.period,
             "final_capital": result['final_capital'],
@@ -755,11 +773,47 @@ def main():
             "max_drawdown_pct": result['max_drawdown_pct'],
             "win_rate_pct": result['win_rate_pct'],
             "total_trades": result['total_trades'],
-        })
+        }
+
+    shard = parse_shard(args.shard)
+    # 只影响股票范围或运行方式的参数不参与检查点 key
+    run_params = {k: v for k, v in vars(args).items()
+                  if k not in ("symbol", "universe", "no_industry_filter", "shard", "checkpoint_dir", "fresh", "profile")}
+    runner = UniverseRunner(
+        f"volume_breakout_minute_{args.period}",
+        backtest_symbol,
+        params=run_params,
+        code_files=[run_backtest],
+        checkpoint_dir=args.checkpoint_dir,
+        shard=shard,
+        data_key=lambda symbol: file_fingerprint(os.path.join("data_cache", "a_stock_minute", f"{symbol}_{args.period}.csv")),
+        fresh=args.fresh or args.universe == "single",
+    )
+
+    store = None
+    if args.results == "store":
+        # 续跑时写入同一个 run_id
+        store = ResultsStore(
+            args.store_path or os.path.join(args.output_dir, "results.sqlite"),
+            strategy="volume_breakout_minute",
+            params=run_params,
+            run_id=f"volume_breakout_minute-{args.period}-shard{shard[0]}of{shard[1]}-{runner.run_key}",
+            keep_signals=args.keep_signals,
+            equity_rule=args.equity_rule or None,
+        )
+
+    all_results = runner.run(symbols)
+    if runner.stats['restored']:
+        print(f"从检查点恢复 {runner.stats['restored']} 只，本次运行 {runner.stats['done']} 只")
     
+    if store is not None:
+        store.close()
+        print(f"\n结果库: {store.path} (run_id={store.run_id})")
+
     # 保存汇总结果
     if all_results:
-        summary_file = os.path.join(args.output_dir, f"summary_{args.period}.csv")
+        suffix = f"_shard{shard[0]}of{shard[1]}" if shard[1] > 1 else ""
+        summary_file = os.path.join(args.output_dir, f"summary_{args.period}{suffix}.csv")
         pd.DataFrame(all_results).to_csv(summary_file, index=False, encoding='utf-8-sig')
         print(f"\n已保存汇总: {summary_file}")
         
@@ -772,6 +826,11 @@ def main():
         print(f"平均最大回撤: {df_summary['max_drawdown_pct'].mean():.2f}%")
         print(f"盈利股票数: {(df_summary['total_return_pct'] > 0).sum()} / {len(df_summary)}")
 
+    if args.profile:
+        paths = profiling.write_report(name=f"volume_breakout_minute_{args.period}")
+        print(profiling.format_report())
+        print(f"\n耗时报告: {paths['json']}, {paths['text']}")
+
 
 if __name__ == "__main__":
     main()
@@ -6,12 +6,16 @@
 """
 import argparse
 import os
+import sys
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.results_store import ResultsStore
+
 
 @dataclass
 class PositionState:
@@ -353,8 +357,22 @@ def print_summary(symbol: str, result: Dict):
     print("=" * 70)
 
 
-def save_results(symbol: str, output_dir: str, result: Dict):
-    """保存回测结果"""
+def save_results(symbol: str, output_dir: str, result: Dict, store: Optional[ResultsStore] = None):
+    """保存回测结果（传入 store 时写入结果库，否则按旧格式每只股票写四个CSV）"""
+    summary = {
+        "symbol": symbol,
+        "final_capital": result['final_capital'],
+        "total_return_pct": result['total_return_pct'],
+        "annualized_return_pct": result['annualized_return_pct'],
+        "sharpe_ratio": result['sharpe_ratio'],
+        "max_drawdown_pct": result['max_drawdown_pct'],
+        "win_rate_pct": result['win_rate_pct'],
+        "total_trades": result['total_trades'],
+    }
+    if store is not None:
+        store.add(symbol, summary, trades=result['trades'], equity=result['equity_curve'], signals=result['signals'])
+        return
+
     os.makedirs(output_dir, exist_ok=True)
     
     signal_file = os.path.join(output_dir, f"{symbol}_signals.csv")
@@ -366,18 +384,8 @@ def save_results(symbol: str, output_dir: str, result: Dict):
     equity_file = os.path.join(output_dir, f"{symbol}_equity.csv")
     result['equity_curve'].to_csv(equity_file, encoding='utf-8-sig')
     
-    summary_data = [{
-        "symbol": symbol,
-        "final_capital": result['final_capital'],
-        "total_return_pct": result['total_return_pct'],
-        "annualized_return_pct": result['annualized_return_pct'],
-        "sharpe_ratio": result['sharpe_ratio'],
-        "max_drawdown_pct": result['max_drawdown_pct'],
-        "win_rate_pct": result['win_rate_pct'],
-        "total_trades": result['total_trades'],
-    }]
     summary_file = os.path.join(output_dir, f"{symbol}_summary.csv")
-    pd.DataFrame(summary_data).to_csv(summary_file, index=False, encoding='utf-8-sig')
+    pd.DataFrame([summary]).to_csv(summary_file, index=False, encoding='utf-8-sig')
 
 
 def main():
@@ -394,6 +402,11 @@ def main():
     parser.add_argument("--take-profit-trigger", type=float, default=0.15, help="移动止损触发涨幅(默认15)")
     parser.add_argument("--trailing-stop", type=float, default=0.05, help="移动止损回撤百分比(默认5)")
     parser.add_argument("--universe", choices=["single", "all"], default="single", help="回测范围")
+    parser.add_argument("--results", choices=["store", "csv"], default="store",
+                        help="结果输出: store=写入结果库(SQLite)，csv=每只股票四个CSV（旧格式）")
+    parser.add_argument("--store-path", default="", help="结果库路径，默认 <output-dir>/results.sqlite")
+    parser.add_argument("--keep-signals", action="store_true", help="结果库中保存逐K线信号")
+    parser.add_argument("--equity-rule", default="", help="结果库中权益曲线降采样规则，如 1D（默认不降采样）")
     args = parser.parse_args()
     
     if args.universe == "all":
@@ -407,6 +420,16 @@ def main():
     
     all_results = []
     
+    store = None
+    if args.results == "store":
+        store = ResultsStore(
+            args.store_path or os.path.join(args.output_dir, "results.sqlite"),
+            strategy="volume_breakout_v2",
+            params=vars(args),
+            keep_signals=args.keep_signals,
+            equity_rule=args.equity_rule or None,
+        )
+
     for symbol in symbols:
         print(f"\n处理 {symbol}...")
         
@@ -430,7 +453,7 @@ def main():
         )
         
         print_summary(symbol, result)
-        save_results(symbol, args.output_dir, result)
+        save_results(symbol, args.output_dir, result, store)
         
         all_results.append({
             "symbol": symbol,
@@ -444,6 +467,10 @@ def main():
             "total_trades": result['total_trades'],
         })
     
+    if store is not None:
+        store.close()
+        print(f"\n结果库: {store.path} (run_id={store.run_id})")
+
     if all_results:
         summary_file = os.path.join(args.output_dir, f"summary_{args.period}.csv")
         pd.DataFrame(all_results).to_csv(summary_file, index=False, encoding='utf-8-sig')
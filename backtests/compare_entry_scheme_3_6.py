@@ -12,6 +12,7 @@ import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backtests.backtest_chan_realtime import discover_cached_a_share_symbols, load_stock_data
+from core.mtf import align
 from indicators.chan.chan_theory_realtime import ChanTheoryRealtime
 
 
@@ -135,14 +136,14 @@ def build_weekly_boll_lower_daily(data: pd.DataFrame) -> pd.Series:
     weekly_ma = weekly_close.rolling(WEEKLY_BOLL_WINDOW).mean()
     weekly_std = weekly_close.rolling(WEEKLY_BOLL_WINDOW).std()
     weekly_lower = weekly_ma - WEEKLY_BOLL_STD * weekly_std
-    return weekly_lower.reindex(data.index, method="ffill")
+    return align(weekly_lower, data.index, freq="1w")
 
 
 def build_weekly_boll_middle_daily(data: pd.DataFrame) -> pd.Series:
     """计算周线BOLL中轨，并映射到日线/分钟线索引。"""
     weekly_close = data["Close"].resample("W-FRI").last()
     weekly_ma = weekly_close.rolling(WEEKLY_BOLL_WINDOW).mean()
-    return weekly_ma.reindex(data.index, method="ffill")
+    return align(weekly_ma, data.index, freq="1w")
 
 
 def build_local_boll_middle(data: pd.DataFrame, window: int = WEEKLY_BOLL_WINDOW) -> pd.Series:
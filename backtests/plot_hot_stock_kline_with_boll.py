@@ -8,7 +8,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backtests.backtest_chan_realtime import load_stock_data
 from indicators.chan.chan_theory_realtime import ChanTheoryRealtime
-from visualization.kline_plotter import KLinePlotter
+from visualization.kline_batch import BatchKLineRenderer
 
 
 def pick_symbols(csv_path: str, top_n: int = 3, bottom_n: int = 3) -> List[str]:
@@ -47,7 +47,7 @@ def main():
         return
 
     print(f"Selected symbols: {symbols}")
-    plotter = KLinePlotter(style="charles")
+    renderer = BatchKLineRenderer(show_boll=True, show_rsi=False, show_volume=True)
 
     for symbol in symbols:
         print(f"Plotting {symbol} ...")
@@ -64,20 +64,24 @@ def main():
         buy_signals, sell_signals = build_signal_series(plot_data, chan)
 
         save_path = os.path.join(output_dir, f"{symbol}_kline_boll.png")
-        plotter.plot_with_signals_and_indicators(
-            data=plot_data,
+        elapsed = renderer.render(
+            plot_data,
+            save_path,
+            title=f"{symbol} Realtime Buy/Sell Timing with BOLL",
             buy_signals=buy_signals,
             sell_signals=sell_signals,
-            title=f"{symbol} Realtime Buy/Sell Timing with BOLL",
-            show_boll=True,
-            show_rsi=False,
-            show_volume=True,
             boll_period=20,
             boll_std=2,
-            save_path=save_path,
         )
-        print(f"  Saved: {save_path}")
-
+        print(f"  Saved: {save_path} ({elapsed * 1000:.0f}ms)")
+
+    report = renderer.latency_report()
+    renderer.close()
+    if report["charts"]:
+        print(
+            f"Render latency: {report['charts']} charts, mean {report['mean_ms']:.0f}ms, "
+            f"p95 {report['p95_ms']:.0f}ms, max {report['max_ms']:.0f}ms"
+        )
     print(f"Done. Output dir: {output_dir}")
 
 
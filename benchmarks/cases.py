@@ -0,0 +1,312 @@
+"""
+基准用例
+
+每个用例是一个 setup 函数：接收 (scale, workdir)，准备好合成数据后返回被计时的无参函数。
+setup 本身不计时；依赖的模块导入失败（语法错误、缺少可选依赖）时该用例记为 skipped，不影响其他用例。
+"""
+import os
+import sys
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'indicators', 'chan'))
+from benchmarks.synthetic import DEFAULT_END, daily_bars, minute_bars, synthetic_symbols  # noqa: E402
+
+
+@dataclass(frozen=True)
+class BenchmarkScale:
+    """数据规模预设"""
+    name: str
+    symbols: int          # 全市场类用例（加载、扫描）的股票数
+    daily_days: int       # 单只日线长度
+    minute_days: int      # 单只分钟数据交易日数（5 分钟K线，A股每天 48 根）
+    chan_bars: int        # 缠论分析的K线数
+    futures_days: int     # 期货分钟回测交易日数（逐窗口重算缠论，最慢）
+    repeat: int           # 重复次数，取最小值
+
+
+SCALES: Dict[str, BenchmarkScale] = {
+    'smoke': BenchmarkScale('smoke', symbols=5, daily_days=200, minute_days=5, chan_bars=200, futures_days=2, repeat=1),
+    'quick': BenchmarkScale('quick', symbols=200, daily_days=750, minute_days=60, chan_bars=1000, futures_days=5, repeat=3),
+    'full': BenchmarkScale('full', symbols=1000, daily_days=1250, minute_days=250, chan_bars=3000, futures_days=20, repeat=3),
+    'max': BenchmarkScale('max', symbols=5000, daily_days=1250, minute_days=250, chan_bars=5000, futures_days=40, repeat=3),
+}
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    name: str
+    group: str
+    setup: Callable[[BenchmarkScale, str], Callable[[], object]]
+    description: str
+
+
+CASES: List[BenchmarkCase] = []
+
+
+def benchmark(name: str, group: str):
+    """注册基准用例"""
+    def decorator(setup):
+        CASES.append(BenchmarkCase(name, group, setup, (setup.__doc__ or '').strip()))
+        return setup
+    return decorator
+
+
+# ---------------- 缠论 ----------------
+
+@benchmark('chan.analyze', 'indicators')
+def chan_analyze(scale, workdir):
+    """ChanTheory.analyze 单只日线"""
+    from chan_theory import ChanTheory
+    data = daily_bars('000001.SZ', days=scale.chan_bars)
+    return lambda: ChanTheory(k_type='day').analyze(data)
+
+
+@benchmark('chan_realtime.analyze', 'indicators')
+def chan_realtime_analyze(scale, workdir):
+    """ChanTheoryRealtime.analyze 单只日线"""
+    from chan_theory_realtime import ChanTheoryRealtime
+    data = daily_bars('000001.SZ', days=scale.chan_bars)
+    return lambda: ChanTheoryRealtime(k_type='day').analyze(data)
+
+
+# ---------------- 策略信号 ----------------
+
+@benchmark('strategy.volume_breakout', 'strategies')
+def volume_breakout_signals(scale, workdir):
+    """VolumeBreakoutStrategy.generate_signals 日线"""
+    from indicators.volume_breakout_strategy import VolumeBreakoutStrategy
+    data = daily_bars('000001.SZ', days=scale.daily_days)
+    return lambda: VolumeBreakoutStrategy().generate_signals(data)
+
+
+@benchmark('strategy.volume_breakout_intraday', 'strategies')
+def volume_breakout_intraday_signals(scale, workdir):
+    """VolumeBreakoutStrategyIntraday.generate_signals 5 分钟"""
+    from indicators.volume_breakout_strategy import VolumeBreakoutStrategyIntraday
+    data = minute_bars('000001.SZ', days=scale.minute_days)
+    return lambda: VolumeBreakoutStrategyIntraday().generate_signals(data)
+
+
+@benchmark('strategy.millipede', 'strategies')
+def millipede_signals(scale, workdir):
+    """millipede calculate_indicators + generate_signals 5 分钟"""
+    from indicators import millipede_strategy
+    data = minute_bars('000001.SZ', days=scale.minute_days)
+    return lambda: millipede_strategy.generate_signals(millipede_strategy.calculate_indicators(data))
+
+
+@benchmark('strategy.ma_convergence', 'strategies')
+def ma_convergence_signals(scale, workdir):
+    """ma_convergence calculate_indicators + generate_signals 日线"""
+    from indicators import ma_convergence_strategy
+    data = daily_bars('000001.SZ', days=scale.daily_days)
+    return lambda: ma_convergence_strategy.generate_signals(ma_convergence_strategy.calculate_indicators(data))
+
+
+@benchmark('strategy.ma60_pullback', 'strategies')
+def ma60_pullback_signals(scale, workdir):
+    """ma60_pullback calculate_indicators + generate_signals 日线"""
+    from indicators import ma60_pullback_strategy
+    data = daily_bars('000001.SZ', days=scale.daily_days)
+    return lambda: ma60_pullback_strategy.generate_signals(ma60_pullback_strategy.calculate_indicators(data))
+
+
+@benchmark('strategy.boll_volume', 'strategies')
+def boll_volume_signals(scale, workdir):
+    """BollVolumeStrategy.generate_signals 日线"""
+    from indicators.boll.boll_volume_strategy import BollVolumeStrategy
+    data = daily_bars('000001.SZ', days=scale.daily_days)
+    return lambda: BollVolumeStrategy().generate_signals(data)
+
+
+@benchmark('strategy.boll_basic', 'strategies')
+def boll_basic_signals(scale, workdir):
+    """indicators/boll/strategies.py 中全部策略的 generate_signals 日线"""
+    from indicators.boll import strategies
+    from core.backtest_engine import BaseStrategy
+    data = daily_bars('000001.SZ', days=scale.daily_days)
+    instances = [
+        cls() for cls in vars(strategies).values()
+        if isinstance(cls, type) and issubclass(cls, BaseStrategy) and cls is not BaseStrategy
+    ]
+
+    def run():
+        for strategy in instances:
+            strategy.generate_signals(data)
+    return run
+
+
+@benchmark('strategy.boll_family', 'strategies')
+def boll_family_signals(scale, workdir):
+    """布林带策略族全部版本 compare_variants 日线（共享特征缓存）"""
+    from indicators.boll.boll_family import compare_variants, default_variants
+    data = daily_bars('000001.SZ', days=scale.daily_days)
+    strategies = default_variants()
+    return lambda: compare_variants(data, strategies)
+
+
+# ---------------- 回测引擎 ----------------
+
+@benchmark('engine.run_backtest', 'backtests')
+def backtest_engine_run(scale, workdir):
+    """core.BacktestEngine.run_backtest + BollVolumeStrategy 日线"""
+    from core.backtest_engine import BacktestEngine
+    from indicators.boll.boll_volume_strategy import BollVolumeStrategy
+    data = daily_bars('000001.SZ', days=scale.daily_days)
+    return lambda: BacktestEngine().run_backtest(data, BollVolumeStrategy())
+
+
+@benchmark('minute.volume_breakout', 'backtests')
+def volume_breakout_minute(scale, workdir):
+    """backtest_volume_breakout_minute.run_backtest 5 分钟"""
+    from backtests.backtest_volume_breakout_minute import run_backtest
+    data = minute_bars('000001.SZ', days=scale.minute_days)
+    return lambda: run_backtest(data)
+
+
+@benchmark('minute.millipede', 'backtests')
+def millipede_minute(scale, workdir):
+    """backtest_millipede_minute.run_backtest 5 分钟"""
+    from backtests.backtest_millipede_minute import run_backtest
+    data = minute_bars('000001.SZ', days=scale.minute_days)
+    return lambda: run_backtest(data)
+
+
+@benchmark('minute.t1_adapter', 'backtests')
+def t1_adapter_minute(scale, workdir):
+    """ChanTheory15minT1Adapter.run_backtest 15 分钟信号 + 日线 T+1"""
+    from backtests.backtest_t1_adapter_hot import ChanTheory15minT1Adapter
+    from data.bar_store import aggregate_bars
+    data = minute_bars('000001.SZ', days=scale.minute_days)
+    m15, daily = aggregate_bars(data, '15m'), aggregate_bars(data, '1d')
+    return lambda: ChanTheory15minT1Adapter().run_backtest(m15, daily)
+
+
+@benchmark('minute.futures', 'backtests')
+def futures_minute(scale, workdir):
+    """FuturesBacktestEngine.run 5 分钟（含夜盘）"""
+    from backtests.backtest_futures_minute import ChanFuturesStrategy, FuturesBacktestEngine
+    from core.results_store import ResultsStore
+    data = minute_bars('RB0', days=scale.futures_days, profile='cn_futures_2300')
+
+    def run():
+        # 成交写进 workdir 下的结果库、不画图，不往 results/ 写文件
+        with ResultsStore(os.path.join(workdir, 'futures_results.sqlite'), strategy='bench') as store:
+            return FuturesBacktestEngine(ChanFuturesStrategy(), store=store, plot=False).run(data, 'RB0')
+    return run
+
+
+# ---------------- 数据加载 ----------------
+
+def _write_universe(scale, workdir: str, fmt: str) -> List[str]:
+    """把合成日线按指定格式写到 workdir/<fmt>/ 下，已存在时直接复用"""
+    folder = os.path.join(workdir, f'{scale.name}_{scale.symbols}x{scale.daily_days}', fmt)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for symbol in synthetic_symbols(scale.symbols):
+        path = os.path.join(folder, f'{symbol}.{fmt}')
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+        data = daily_bars(symbol, days=scale.daily_days)
+        if fmt == 'csv':
+            data.to_csv(path)
+        elif fmt == 'pkl':
+            data.to_pickle(path)
+        elif fmt == 'npz':
+            np.savez(path, index=data.index.values.astype('int64'),
+                     **{col: data[col].to_numpy() for col in data.columns})
+        elif fmt == 'parquet':
+            data.to_parquet(path)
+    return paths
+
+
+def _read_npz(path: str) -> pd.DataFrame:
+    with np.load(path) as arrays:
+        index = pd.DatetimeIndex(arrays['index'].astype('datetime64[ns]'), name='datetime')
+        return pd.DataFrame({col: arrays[col] for col in arrays.files if col != 'index'}, index=index)
+
+
+@benchmark('load.csv', 'io')
+def load_csv(scale, workdir):
+    """全市场日线 CSV 读取（read_csv + 解析日期）"""
+    paths = _write_universe(scale, workdir, 'csv')
+    return lambda: [pd.read_csv(path, index_col=0, parse_dates=True) for path in paths]
+
+
+@benchmark('load.pickle', 'io')
+def load_pickle(scale, workdir):
+    """全市场日线 pickle 读取"""
+    paths = _write_universe(scale, workdir, 'pkl')
+    return lambda: [pd.read_pickle(path) for path in paths]
+
+
+@benchmark('load.npz', 'io')
+def load_npz(scale, workdir):
+    """全市场日线 numpy 列存读取"""
+    paths = _write_universe(scale, workdir, 'npz')
+    return lambda: [_read_npz(path) for path in paths]
+
+
+@benchmark('load.parquet', 'io')
+def load_parquet(scale, workdir):
+    """全市场日线 parquet 读取（需要 pyarrow）"""
+    import pyarrow  # noqa: F401
+    paths = _write_universe(scale, workdir, 'parquet')
+    return lambda: [pd.read_parquet(path) for path in paths]
+
+
+# ---------------- 扫描器 ----------------
+
+@benchmark('scan.ma_convergence', 'scanners')
+def scan_ma_convergence(scale, workdir):
+    """scan_ma_convergence_daily 全市场单进程扫描（读 CSV + 指标 + 信号）"""
+    from pathlib import Path
+    from scanners.scan_ma_convergence_daily import ScanJob, _scan_one
+    paths = _write_universe(scale, workdir, 'csv')
+    jobs = [ScanJob(symbol=symbol, csv_path=Path(path))
+            for symbol, path in zip(synthetic_symbols(scale.symbols), paths)]
+    return lambda: [_scan_one((job, 5, {})) for job in jobs]
+
+
+# ---------------- 截面面板 ----------------
+
+@benchmark('indicators.ma_convergence_universe', 'panel')
+def ma_convergence_universe(scale, workdir):
+    """全市场 ma_convergence 指标：逐只 calculate_indicators（面板用例的对照）"""
+    from indicators.ma_convergence_strategy import calculate_indicators
+    frames = [daily_bars(symbol, days=scale.daily_days) for symbol in synthetic_symbols(scale.symbols)]
+    return lambda: [calculate_indicators(df) for df in frames]
+
+
+@benchmark('panel.ma_convergence_features', 'panel')
+def panel_ma_convergence_features(scale, workdir):
+    """全市场 ma_convergence 指标：对齐成面板后按列一次算完（含构建面板）"""
+    from indicators.panel import Panel, ma_convergence_features
+    frames = {symbol: daily_bars(symbol, days=scale.daily_days) for symbol in synthetic_symbols(scale.symbols)}
+
+    def run():
+        panel = Panel.from_frames(frames)
+        panel.update(ma_convergence_features(panel))
+        return panel
+    return run
+
+
+@benchmark('selector.rebalance_study', 'panel')
+def selector_rebalance_study(scale, workdir):
+    """DynamicStockSelector 每 4 周再平衡的全程选股：预计算周得分 + 每期在一行上取前 N"""
+    from analysis.y_dynamic_stock_selector import DynamicStockSelector
+    frames = {symbol: daily_bars(symbol, days=scale.daily_days) for symbol in synthetic_symbols(scale.symbols)}
+    dates = pd.date_range(min(df.index[0] for df in frames.values()), DEFAULT_END, freq='4W')
+    symbols = list(frames)
+
+    def run():
+        selector = DynamicStockSelector().fit(frames)
+        return [selector.select_stocks(symbols, date, frames) for date in dates]
+    return run
@@ -0,0 +1,247 @@
+"""
+性能基准
+
+用确定性合成数据对关键路径计时，与保存的基线比较，超出预算时返回非零退出码。
+
+用法：
+    python benchmarks/run_benchmarks.py                      # quick 规模，与基线比较
+    python benchmarks/run_benchmarks.py --scale full         # 1000 只股票
+    python benchmarks/run_benchmarks.py --filter chan,load   # 只跑名称包含 chan 或 load 的用例
+    python benchmarks/run_benchmarks.py --save-baseline      # 把本次结果写为基线
+    python benchmarks/run_benchmarks.py --margin 0.5         # 允许比基线慢 50%
+    python benchmarks/run_benchmarks.py --profile            # 同时输出分阶段耗时报告
+
+预算：
+    基线文件 benchmarks/baselines/<scale>.json 记录每个用例的 seconds；
+    预算 = seconds * (1 + margin)，margin 默认 0.25，可用 --margin 或 QUANT_BENCH_MARGIN 覆盖；
+    基线中某个用例写了 "budget" 字段时，该用例直接使用这个绝对预算（秒）。
+    基线与机器相关，换机器后先 --save-baseline 再比较。
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import traceback
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.cases import CASES, SCALES, BenchmarkCase, BenchmarkScale  # noqa: E402
+from core import profiling  # noqa: E402
+from core.log import configure_logging  # noqa: E402
+
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+OUTPUT_DIR = 'results/benchmarks'
+DEFAULT_MARGIN = float(os.environ.get('QUANT_BENCH_MARGIN', '0.25'))
+
+
+def select_cases(patterns: Optional[List[str]] = None) -> List[BenchmarkCase]:
+    """按名称子串或分组名筛选用例"""
+    if not patterns:
+        return list(CASES)
+    return [case for case in CASES if any(p == case.group or p in case.name for p in patterns)]
+
+
+def run_case(case: BenchmarkCase, scale: BenchmarkScale, workdir: str) -> Dict:
+    """
+    执行单个用例
+
+    Returns:
+        {'name', 'group', 'status': ok/skipped/error, 'seconds': 最小耗时, 'mean', 'runs', 'error'}
+    """
+    result = {'name': case.name, 'group': case.group, 'status': 'ok',
+              'seconds': None, 'mean': None, 'runs': [], 'error': ''}
+    try:
+        func = case.setup(scale, workdir)
+    except (ImportError, SyntaxError) as e:
+        result.update(status='skipped', error=f'{type(e).__name__}: {e}')
+        return result
+    except Exception as e:
+        result.update(status='error', error=f'setup {type(e).__name__}: {e}')
+        return result
+
+    try:
+        for _ in range(scale.repeat):
+            start = time.perf_counter()
+            func()
+            result['runs'].append(time.perf_counter() - start)
+    except Exception as e:
+        result.update(status='error', error=f'{type(e).__name__}: {e}\n{traceback.format_exc(limit=3)}')
+        return result
+
+    result['seconds'] = min(result['runs'])
+    result['mean'] = sum(result['runs']) / len(result['runs'])
+    return result
+
+
+def run_suite(scale: BenchmarkScale, patterns: Optional[List[str]] = None,
+              workdir: Optional[str] = None, verbose: bool = True) -> List[Dict]:
+    """按注册顺序执行筛选出的用例；workdir 为空时使用临时目录"""
+    cases = select_cases(patterns)
+    with tempfile.TemporaryDirectory(prefix='quant_bench_') as tmp:
+        workdir = workdir or tmp
+        results = []
+        for case in cases:
+            result = run_case(case, scale, workdir)
+            results.append(result)
+            if verbose:
+                print(format_result_line(result))
+    return results
+
+
+def baseline_path(scale_name: str, baseline_dir: str = BASELINE_DIR) -> str:
+    return os.path.join(baseline_dir, f'{scale_name}.json')
+
+
+def load_baseline(scale_name: str, baseline_dir: str = BASELINE_DIR) -> Dict[str, Dict]:
+    """读取基线 {用例名: {'seconds': ..., 'budget': 可选}}，不存在时返回空字典"""
+    path = baseline_path(scale_name, baseline_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('cases', {})
+
+
+def save_baseline(scale: BenchmarkScale, results: List[Dict], baseline_dir: str = BASELINE_DIR,
+                  merge: bool = True) -> str:
+    """
+    把成功的用例写入基线
+
+    merge=True 时保留基线中本次未运行的用例，以及已有的绝对预算 budget 字段。
+    """
+    cases = load_baseline(scale.name, baseline_dir) if merge else {}
+    for result in results:
+        if result['status'] != 'ok':
+            continue
+        entry = cases.get(result['name'], {})
+        entry['seconds'] = round(result['seconds'], 6)
+        cases[result['name']] = entry
+
+    os.makedirs(baseline_dir, exist_ok=True)
+    path = baseline_path(scale.name, baseline_dir)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'scale': scale.__dict__,
+            'machine': platform.platform(),
+            'python': platform.python_version(),
+            'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'cases': dict(sorted(cases.items())),
+        }, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def compare(results: List[Dict], baseline: Dict[str, Dict], margin: float = DEFAULT_MARGIN) -> List[Dict]:
+    """
+    与基线比较，给每个结果补充 budget / ratio / regressed 字段
+
+    Returns:
+        超出预算的结果列表
+    """
+    regressions = []
+    for result in results:
+        entry = baseline.get(result['name'])
+        result['baseline'] = entry.get('seconds') if entry else None
+        result['budget'] = None
+        result['ratio'] = None
+        result['regressed'] = False
+        if result['status'] != 'ok' or not entry:
+            continue
+        budget = entry.get('budget') or entry['seconds'] * (1 + margin)
+        result['budget'] = budget
+        result['ratio'] = result['seconds'] / entry['seconds'] if entry.get('seconds') else None
+        if result['seconds'] > budget:
+            result['regressed'] = True
+            regressions.append(result)
+    return regressions
+
+
+def format_result_line(result: Dict) -> str:
+    if result['status'] != 'ok':
+        return f"{result['name']:<34} {result['status']:>8}  {result['error'].splitlines()[0]}"
+    return f"{result['name']:<34} {result['seconds']:>10.4f}s  (mean {result['mean']:.4f}s, n={len(result['runs'])})"
+
+
+def format_comparison(results: List[Dict]) -> str:
+    lines = [f"{'case':<34} {'seconds':>10} {'baseline':>10} {'budget':>10} {'ratio':>7}  status"]
+    for result in results:
+        if result['status'] != 'ok':
+            lines.append(f"{result['name']:<34} {'-':>10} {'-':>10} {'-':>10} {'-':>7}  {result['status']}")
+            continue
+        baseline = f"{result['baseline']:.4f}" if result.get('baseline') else '-'
+        budget = f"{result['budget']:.4f}" if result.get('budget') else '-'
+        ratio = f"{result['ratio']:.2f}x" if result.get('ratio') else '-'
+        status = 'SLOW' if result.get('regressed') else ('new' if result.get('baseline') is None else 'ok')
+        lines.append(f"{result['name']:<34} {result['seconds']:>10.4f} {baseline:>10} {budget:>10} {ratio:>7}  {status}")
+    return '\n'.join(lines)
+
+
+def save_run(scale: BenchmarkScale, results: List[Dict], output_dir: str = OUTPUT_DIR) -> str:
+    """保存本次运行的完整结果"""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"bench_{scale.name}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'scale': scale.__dict__, 'results': results}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='关键路径性能基准')
+    parser.add_argument('--scale', default='quick', choices=sorted(SCALES), help='数据规模预设，默认 quick')
+    parser.add_argument('--symbols', type=int, default=None, help='覆盖全市场类用例的股票数（如 1000~5000）')
+    parser.add_argument('--repeat', type=int, default=None, help='覆盖重复次数')
+    parser.add_argument('--filter', default='', help='逗号分隔的用例名子串或分组名')
+    parser.add_argument('--margin', type=float, default=DEFAULT_MARGIN, help='允许超出基线的比例，默认 0.25')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果写为基线')
+    parser.add_argument('--baseline-dir', default=BASELINE_DIR, help='基线目录')
+    parser.add_argument('--workdir', default=None, help='合成数据文件目录（默认临时目录，指定后可复用）')
+    parser.add_argument('--profile', action='store_true', help='输出分阶段耗时报告到 results/profile/')
+    parser.add_argument('--list', action='store_true', help='列出全部用例')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for case in CASES:
+            print(f"{case.group:<12} {case.name:<34} {case.description}")
+        return 0
+
+    scale = SCALES[args.scale]
+    if args.symbols or args.repeat:
+        overrides = {'symbols': args.symbols or scale.symbols, 'repeat': args.repeat or scale.repeat}
+        name = scale.name if args.symbols is None else f'{scale.name}_{args.symbols}'
+        scale = BenchmarkScale(**{**scale.__dict__, **overrides, 'name': name})
+
+    configure_logging(level='WARNING')
+    if args.profile:
+        profiling.enable()
+
+    patterns = [p.strip() for p in args.filter.split(',') if p.strip()]
+    print(f"规模: {scale}")
+    results = run_suite(scale, patterns, workdir=args.workdir)
+
+    baseline = load_baseline(scale.name, args.baseline_dir)
+    regressions = compare(results, baseline, args.margin)
+    print()
+    print(format_comparison(results))
+    print(f"\n结果: {save_run(scale, results)}")
+
+    if args.profile:
+        paths = profiling.write_report(name=f'bench_{scale.name}')
+        print(f"耗时报告: {paths['text']}")
+
+    if args.save_baseline:
+        print(f"基线已保存: {save_baseline(scale, results, args.baseline_dir)}")
+        return 0
+    if not baseline:
+        print(f"没有 {scale.name} 基线，使用 --save-baseline 创建")
+    if regressions:
+        print(f"\n{len(regressions)} 个用例超出预算（margin={args.margin:.0%}）:")
+        for result in regressions:
+            print(f"  {result['name']}: {result['seconds']:.4f}s > {result['budget']:.4f}s")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
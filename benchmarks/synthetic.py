@@ -0,0 +1,174 @@
+"""
+确定性合成行情
+
+与 data/create_cache.py 的 generate_realistic_stock_data 思路相同（随机游走 + 日内振幅），但：
+- 种子由 zlib.crc32(代码) 得出，不受 PYTHONHASHSEED 影响，每次运行生成完全相同的数据
+- 价格序列一次性向量化生成，生成 5000 只股票也只需数秒
+- 分钟K线按 core.calendar 的交易时段生成，时间戳为K线结束时间，期货夜盘落在前一交易日晚上
+"""
+import os
+import sys
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.calendar import SESSION_PROFILES, TradingCalendar  # noqa: E402
+
+
+DEFAULT_END = '2024-12-31'
+
+
+def symbol_seed(symbol: str, salt: int = 0) -> int:
+    """代码 -> 稳定的随机种子"""
+    return (zlib.crc32(symbol.encode('utf-8')) + salt) % 2**32
+
+
+def synthetic_symbols(n: int, market: str = 'stock') -> List[str]:
+    """
+    生成 n 个代码
+
+    stock: 000001.SZ ~ / 600000.SS ~ 交替；futures: 品种代码 + 序号
+    """
+    if market == 'futures':
+        products = ['RB', 'I', 'M', 'TA', 'CU', 'AU', 'IF', 'SA']
+        return [f'{products[i % len(products)]}{i // len(products)}' for i in range(n)]
+    return [f'{600000 + i // 2:06d}.SS' if i % 2 else f'{i // 2 + 1:06d}.SZ' for i in range(n)]
+
+
+def _ohlcv(rng: np.random.Generator, n: int, start_price: float, volatility: float,
+           drift: float, base_volume: float) -> Dict[str, np.ndarray]:
+    """随机游走收盘价 + 围绕收盘价的开高低；偶发放量（约 3% 的K线）"""
+    returns = rng.normal(drift, volatility, n)
+    close = start_price * np.exp(np.cumsum(returns))
+    prev_close = np.concatenate([[start_price], close[:-1]])
+    open_ = prev_close * (1 + rng.normal(0, volatility * 0.3, n))
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    high = body_high * (1 + np.abs(rng.normal(0, volatility * 0.5, n)))
+    low = body_low * (1 - np.abs(rng.normal(0, volatility * 0.5, n)))
+
+    volume = base_volume * rng.lognormal(0, 0.4, n)
+    spikes = rng.random(n) < 0.03
+    volume[spikes] *= rng.uniform(2.5, 6.0, spikes.sum())
+    return {
+        'Open': np.round(open_, 2),
+        'High': np.round(high, 2),
+        'Low': np.round(low, 2),
+        'Close': np.round(close, 2),
+        'Volume': np.round(volume).astype(np.int64),
+    }
+
+
+def daily_bars(
+    symbol: str,
+    days: int = 750,
+    end: str = DEFAULT_END,
+    start_price: Optional[float] = None,
+    volatility: float = 0.02
+) -> pd.DataFrame:
+    """
+    合成日线
+
+    Args:
+        symbol: 代码（决定随机种子）
+        days: 交易日数
+        end: 最后一个交易日
+        start_price: 起始价，默认按代码在 10~200 之间取
+        volatility: 日收益率标准差
+    """
+    rng = np.random.default_rng(symbol_seed(symbol))
+    start_price = start_price or float(rng.uniform(10, 200))
+    dates = pd.bdate_range(end=end, periods=days)
+    data = pd.DataFrame(_ohlcv(rng, days, start_price, volatility, 0.0003, 5e7), index=dates)
+    data.index.name = 'datetime'
+    return data
+
+
+def session_bar_ends(profile: str, period: int) -> np.ndarray:
+    """一个交易日内各K线结束时刻（相对交易日 00:00 的分钟，夜盘为负）"""
+    ends = []
+    for start, end in SESSION_PROFILES[profile]:
+        ends.extend(range(start + period, end, period))
+        ends.append(end)
+    return np.asarray(ends, dtype=np.int64)
+
+
+def _night_mask(profile: str, period: int) -> np.ndarray:
+    """session_bar_ends 中属于夜盘（含跨零点部分）的K线"""
+    mask = []
+    for start, end in SESSION_PROFILES[profile]:
+        mask.extend([start < 0] * len(range(start + period, end, period)))
+        mask.append(start < 0)
+    return np.asarray(mask, dtype=bool)
+
+
+def minute_index(days: int, period: int = 5, profile: str = 'cn_stock', end: str = DEFAULT_END) -> pd.DatetimeIndex:
+    """
+    合成分钟K线时间戳
+
+    夜盘K线（负分钟）挂到前一交易日晚上，周一夜盘即上周五晚上。
+    """
+    calendar = TradingCalendar(profile)
+    trading_dates = calendar.trading_days(np.datetime64(end, 'D') - np.timedelta64(days * 2 + 10, 'D'), end)[-days:]
+    trading_days = trading_dates.values.astype('datetime64[D]')
+    offsets = session_bar_ends(profile, period)
+
+    night = _night_mask(profile, period)
+    previous = calendar.previous_trading_day(trading_days)
+    day_part = trading_days[:, None] + offsets[None, ~night].astype('timedelta64[m]')
+    night_part = previous[:, None] + (offsets[None, night] + 1440).astype('timedelta64[m]')
+    stamps = np.concatenate([night_part, day_part], axis=1).ravel()
+    return pd.DatetimeIndex(stamps.astype('datetime64[ns]'), name='datetime')
+
+
+def minute_bars(
+    symbol: str,
+    days: int = 60,
+    period: int = 5,
+    profile: str = 'cn_stock',
+    end: str = DEFAULT_END,
+    start_price: Optional[float] = None
+) -> pd.DataFrame:
+    """
+    合成分钟K线（A股或期货交易时段）
+
+    Args:
+        symbol: 代码（决定随机种子）
+        days: 交易日数
+        period: K线分钟数（5/15/30/60）
+        profile: core.calendar 交易时段配置名，期货可用 'cn_futures_2300' 等带夜盘的配置
+    """
+    index = minute_index(days, period, profile, end)
+    rng = np.random.default_rng(symbol_seed(symbol, period))
+    start_price = start_price or float(rng.uniform(10, 200))
+    volatility = 0.02 / np.sqrt(240 / period)
+    data = pd.DataFrame(_ohlcv(rng, len(index), start_price, volatility, 0.0, 2e5 * period), index=index)
+    data.index.name = 'datetime'
+    return data
+
+
+def universe(
+    n_symbols: int,
+    kind: str = 'daily',
+    bars: Optional[int] = None,
+    period: int = 5,
+    profile: Optional[str] = None
+) -> Iterable:
+    """
+    按需逐只生成 (代码, K线)，避免一次性在内存里放 5000 只股票
+
+    kind: 'daily' / 'minute' / 'futures'
+    bars: 日线为交易日数，分钟为交易日数
+    """
+    market = 'futures' if kind == 'futures' else 'stock'
+    for symbol in synthetic_symbols(n_symbols, market):
+        if kind == 'daily':
+            yield symbol, daily_bars(symbol, days=bars or 750)
+        else:
+            yield symbol, minute_bars(
+                symbol, days=bars or 20, period=period,
+                profile=profile or ('cn_futures_2300' if kind == 'futures' else 'cn_stock')
+            )
@@ -0,0 +1,321 @@
+"""
+交易日历：交易所交易时段、节假日与K线对齐
+
+交易时段表来自 core/calendar_sessions.json，交易日列表来自本地文件
+data_cache/cn_trade_dates.csv（可用 update_trade_dates_file() 从 AkShare 下载）。
+交易日文件不存在时按周一至周五处理。
+
+所有日期运算基于 numpy busdaycalendar，按数组批量计算：
+- 交易日判断、交易日序号、N 个交易日后的日期、两日之间的交易日数
+- K线 -> 交易日 / 交易时段映射（期货夜盘归属下一交易日）
+- 日内K线所属聚合周期的结束时间、所在交易时段的收盘时间、交易日开盘/收盘时间
+
+时段以相对交易日 00:00 的分钟数表示，夜盘起点为负数（21:00 = -180）。
+"""
+import json
+import os
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+SESSIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_sessions.json')
+
+
+def _parse_clock(value: str) -> int:
+    hour, minute = value.split(':')
+    return int(hour) * 60 + int(minute)
+
+
+def _parse_sessions(pairs: Sequence[Sequence[str]]) -> Tuple[Tuple[int, int], ...]:
+    """'21:00'-'01:00' 这类夜盘起点转为负分钟，跨零点的终点保持正数"""
+    sessions = []
+    for start_text, end_text in pairs:
+        start, end = _parse_clock(start_text), _parse_clock(end_text)
+        if start >= 18 * 60:
+            start -= 1440
+            if end >= 18 * 60:
+                end -= 1440
+        sessions.append((start, end))
+    return tuple(sorted(sessions))
+
+
+@lru_cache(maxsize=None)
+def load_session_table(path: str = SESSIONS_FILE) -> Dict:
+    """读取交易时段表（带缓存）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    table['parsed_profiles'] = {name: _parse_sessions(pairs) for name, pairs in table['profiles'].items()}
+    return table
+
+
+SESSION_PROFILES: Dict[str, Tuple[Tuple[int, int], ...]] = load_session_table()['parsed_profiles']
+TRADE_DATES_FILE = load_session_table()['trade_dates_file']
+
+
+def futures_session_profile(symbol: str) -> str:
+    """按期货合约代码（如 'I0', 'AU2406'）返回交易时段配置名"""
+    product = symbol.rstrip('0123456789').upper()
+    entry = load_session_table()['futures_products'].get(product)
+    return entry[1] if entry else 'cn_futures_day'
+
+
+def symbol_session_profile(symbol: str) -> str:
+    """A股代码（000001.SZ / 600519.SS）返回 cn_stock，其余按期货品种查找"""
+    if symbol.upper().endswith(('.SZ', '.SS', '.SH', '.BJ')) or symbol[:6].isdigit():
+        return 'cn_stock'
+    return futures_session_profile(symbol)
+
+
+def load_trade_dates(path: Optional[str] = None) -> Optional[np.ndarray]:
+    """读取交易日列表文件（单列 trade_date），不存在时返回 None"""
+    path = path or TRADE_DATES_FILE
+    if not os.path.exists(path):
+        return None
+    dates = pd.read_csv(path)['trade_date']
+    return np.unique(pd.to_datetime(dates).values.astype('datetime64[D]'))
+
+
+def update_trade_dates_file(path: Optional[str] = None) -> int:
+    """从 AkShare 下载上交所历史及未来交易日列表并写入本地文件，返回交易日数量"""
+    import akshare as ak
+
+    path = path or TRADE_DATES_FILE
+    df = ak.tool_trade_date_hist_sina()
+    dates = pd.to_datetime(df['trade_date']).dt.strftime('%Y-%m-%d')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    pd.DataFrame({'trade_date': dates}).to_csv(path, index=False)
+    load_calendar.cache_clear()
+    return len(dates)
+
+
+def _holidays_from_trade_dates(trade_dates: np.ndarray) -> np.ndarray:
+    """交易日文件覆盖范围内、不在列表中的工作日即为节假日"""
+    weekdays = np.arange(trade_dates[0], trade_dates[-1] + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+    weekdays = weekdays[np.is_busday(weekdays)]
+    return np.setdiff1d(weekdays, trade_dates)
+
+
+def _to_days(dates) -> np.ndarray:
+    """任意日期输入（标量/序列/DatetimeIndex）转为 datetime64[D] 数组"""
+    if isinstance(dates, (pd.DatetimeIndex, pd.Series)):
+        values = pd.DatetimeIndex(dates)
+        if values.tz is not None:
+            values = values.tz_localize(None)
+        return values.values.astype('datetime64[D]')
+    if isinstance(dates, (date, pd.Timestamp, np.datetime64, str)):
+        ts = pd.Timestamp(dates)
+        if ts.tzinfo is not None:
+            ts = ts.tz_localize(None)
+        return np.array([ts.to_datetime64()]).astype('datetime64[D]')
+    return np.asarray(pd.to_datetime(dates).values, dtype='datetime64[D]')
+
+
+def _wall_clock(index) -> pd.DatetimeIndex:
+    """去掉时区，保留当地时钟时间"""
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+class TradingCalendar:
+    """单个交易时段配置 + 节假日的向量化交易日历"""
+
+    EPOCH = np.datetime64('1990-01-01', 'D')
+
+    def __init__(
+        self,
+        profile: Union[str, Sequence[Tuple[int, int]]] = 'cn_stock',
+        holidays: Optional[Iterable] = None,
+        trade_dates: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            profile: 交易时段配置名（见 calendar_sessions.json）或自定义时段列表
+            holidays: 额外节假日
+            trade_dates: 完整交易日列表，覆盖范围内不在列表中的工作日视为节假日
+        """
+        if isinstance(profile, str):
+            if profile not in SESSION_PROFILES:
+                raise ValueError(f"未知交易时段配置: {profile}")
+            self.profile = profile
+            sessions = SESSION_PROFILES[profile]
+        else:
+            self.profile = 'custom'
+            sessions = tuple(profile)
+        self.sessions = np.asarray(sessions, dtype=float)
+
+        holiday_days = [] if holidays is None else list(_to_days(list(holidays)))
+        if trade_dates is not None and len(trade_dates):
+            holiday_days += list(_holidays_from_trade_dates(np.asarray(trade_dates, dtype='datetime64[D]')))
+        self.holidays = np.unique(np.asarray(holiday_days, dtype='datetime64[D]'))
+        self.busdaycal = np.busdaycalendar(holidays=self.holidays)
+
+        starts = self.sessions[:, 0]
+        self._lengths = self.sessions[:, 1] - starts
+        self._cum = np.concatenate([[0.0], np.cumsum(self._lengths)])
+        self.has_night = bool((starts < 0).any())
+        self.night_end = float(self.sessions[starts < 0, 1].max()) if self.has_night else None
+
+    # ---------------- 交易日运算 ----------------
+
+    def is_trading_day(self, dates) -> np.ndarray:
+        return np.is_busday(_to_days(dates), busdaycal=self.busdaycal)
+
+    def trading_day_ordinal(self, dates) -> np.ndarray:
+        """交易日序号：自 1990-01-01 起早于该日的交易日数，两日序号相减即相隔交易日数"""
+        days = _to_days(dates)
+        return np.busday_count(self.EPOCH, days, busdaycal=self.busdaycal)
+
+    def add_trading_days(self, dates, n: int) -> np.ndarray:
+        """n 个交易日后的日期（非交易日先顺延到下一交易日）"""
+        return np.busday_offset(_to_days(dates), n, roll='forward', busdaycal=self.busdaycal)
+
+    def previous_trading_day(self, dates) -> np.ndarray:
+        """严格早于给定日期的最近交易日"""
+        days = _to_days(dates) - np.timedelta64(1, 'D')
+        return np.busday_offset(days, 0, roll='backward', busdaycal=self.busdaycal)
+
+    def trading_days_between(self, start, end) -> Union[int, np.ndarray]:
+        """(start, end] 区间内的交易日数，end 不晚于 start 时为 0"""
+        start_days = _to_days(start) + np.timedelta64(1, 'D')
+        end_days = _to_days(end) + np.timedelta64(1, 'D')
+        counts = np.maximum(np.busday_count(start_days, end_days, busdaycal=self.busdaycal), 0)
+        scalar = isinstance(start, (date, pd.Timestamp, np.datetime64, str)) and \
+            isinstance(end, (date, pd.Timestamp, np.datetime64, str))
+        return int(counts[0]) if scalar else counts
+
+    def trading_days(self, start, end) -> pd.DatetimeIndex:
+        """[start, end] 之间的全部交易日"""
+        days = np.arange(_to_days(start)[0], _to_days(end)[0] + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+        return pd.DatetimeIndex(days[np.is_busday(days, busdaycal=self.busdaycal)])
+
+    # ---------------- K线对齐 ----------------
+
+    def bar_positions(self, index) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        每根K线的交易日和相对交易日 00:00 的分钟偏移（夜盘为负或跨零点）
+
+        Returns:
+            (trading_dates[datetime64[D]], offsets[float 分钟])
+        """
+        index = _wall_clock(index)
+        dates = index.values.astype('datetime64[D]')
+        minutes = index.hour.to_numpy() * 60 + index.minute.to_numpy() + index.second.to_numpy() / 60.0
+        offsets = minutes.astype(float)
+        trading_dates = dates.copy()
+
+        if self.has_night:
+            evening = minutes >= 18 * 60
+            early = (minutes <= max(self.night_end, 0)) & (self.night_end > 0)
+            night = evening | early
+            night_base = np.where(early, dates - np.timedelta64(1, 'D'), dates)
+            offsets = np.where(evening, minutes - 1440, minutes)
+            trading_dates[night] = np.busday_offset(night_base[night], 1, roll='forward', busdaycal=self.busdaycal)
+
+        return trading_dates, offsets
+
+    def bar_trading_dates(self, index) -> np.ndarray:
+        """K线所属交易日（期货夜盘归属下一交易日）"""
+        return self.bar_positions(index)[0]
+
+    def bar_day_ordinals(self, index) -> np.ndarray:
+        """K线所属交易日的序号，相减即为相隔交易日数"""
+        return self.trading_day_ordinal(self.bar_trading_dates(index))
+
+    def bar_sessions(self, index) -> np.ndarray:
+        """K线所在交易时段序号（K线结束时间落在 (开盘, 收盘]），不在任何时段内为 -1"""
+        _, offsets = self.bar_positions(index)
+        pos = np.searchsorted(self.sessions[:, 0], offsets, side='left') - 1
+        inside = (pos >= 0) & (offsets <= self.sessions[np.clip(pos, 0, None), 1])
+        return np.where(inside, pos, -1)
+
+    def _traded_minutes(self, offsets: np.ndarray) -> np.ndarray:
+        """交易日内累计已交易分钟数（时段之间的时间计入前一时段末尾）"""
+        starts = self.sessions[:, 0]
+        pos = np.searchsorted(starts, offsets, side='left') - 1
+        safe = np.clip(pos, 0, None)
+        inside = np.clip(offsets - starts[safe], 0, self._lengths[safe])
+        return np.where(pos >= 0, self._cum[safe] + inside, 0.0)
+
+    def _clock_time(self, trading_dates: np.ndarray, traded: np.ndarray) -> np.ndarray:
+        """累计交易分钟数映射回时钟时间"""
+        starts = self.sessions[:, 0]
+        session = np.searchsorted(self._cum[1:], traded, side='left')
+        offset = starts[session] + (traded - self._cum[session])
+
+        anchor = trading_dates.copy()
+        night = starts[session] < 0
+        if night.any():
+            anchor[night] = self.previous_trading_day(trading_dates[night]) + np.timedelta64(1, 'D')
+        return anchor.astype('datetime64[ns]') + (offset * 60).astype('timedelta64[s]')
+
+    def bar_close(self, index, minutes: int) -> np.ndarray:
+        """
+        K线所属 N 分钟聚合K线的结束时间
+
+        按交易日内累计交易分钟切分，例如A股 60 分钟K线结束于 10:30/11:30/14:00/15:00。
+        """
+        trading_dates, offsets = self.bar_positions(index)
+        traded = self._traded_minutes(offsets)
+        bins = np.maximum(1, np.ceil(traded / minutes - 1e-9)).astype(np.int64)
+        return self._clock_time(trading_dates, np.minimum(bins * minutes, self._cum[-1]))
+
+    def session_close(self, index) -> np.ndarray:
+        """K线所在交易时段的收盘时间（时段之间的K线取前一时段收盘）"""
+        trading_dates, offsets = self.bar_positions(index)
+        traded = self._traded_minutes(offsets)
+        session = np.searchsorted(self._cum[1:], np.maximum(traded, 1e-9), side='left')
+        return self._clock_time(trading_dates, self._cum[session + 1])
+
+    def day_open(self, dates) -> np.ndarray:
+        """交易日第一个时段的开盘时间（有夜盘时为前一晚夜盘开盘）"""
+        days = _to_days(dates)
+        return self._clock_time(days, np.zeros(len(days)))
+
+    def day_close(self, dates) -> np.ndarray:
+        """交易日最后一个时段的收盘时间"""
+        days = _to_days(dates)
+        return self._clock_time(days, np.full(len(days), self._cum[-1]))
+
+    # ---------------- 实时判断 ----------------
+
+    def is_open(self, ts: datetime) -> bool:
+        """给定时刻是否处于交易时段内（开盘 <= t < 收盘）"""
+        stamp = pd.Timestamp(ts)
+        if stamp.tzinfo is not None:
+            stamp = stamp.tz_localize(None)
+        trading_dates, offsets = self.bar_positions(pd.DatetimeIndex([stamp]))
+        if not self.is_trading_day(trading_dates)[0]:
+            return False
+        offset = offsets[0]
+        return bool(((self.sessions[:, 0] <= offset) & (offset < self.sessions[:, 1])).any())
+
+    def next_open(self, ts: datetime) -> datetime:
+        """给定时刻之后（含当前）的下一个开盘时刻；已在交易时段内时返回该时刻本身（秒归零）"""
+        base = ts.replace(second=0, microsecond=0)
+        if self.is_open(base):
+            return base
+        stamp = pd.Timestamp(base)
+        if stamp.tzinfo is not None:
+            stamp = stamp.tz_localize(None)
+
+        day = _to_days(stamp)[0]
+        for _ in range(2):
+            trading_day = np.busday_offset(day, 0, roll='forward', busdaycal=self.busdaycal)
+            opens = self._clock_time(np.repeat(trading_day, len(self.sessions)), self._cum[:-1] + 1e-9)
+            opens = pd.DatetimeIndex(opens).floor('min')
+            later = opens[opens >= stamp]
+            if len(later):
+                result = later[0].to_pydatetime()
+                return result.replace(tzinfo=ts.tzinfo) if ts.tzinfo is not None else result
+            day = trading_day + np.timedelta64(1, 'D')
+        raise RuntimeError("无法确定下一个开盘时间")
+
+
+@lru_cache(maxsize=None)
+def load_calendar(profile: str = 'cn_stock') -> TradingCalendar:
+    """按配置名返回带本地交易日文件的日历（进程内缓存）"""
+    return TradingCalendar(profile, trade_dates=load_trade_dates())
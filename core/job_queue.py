@@ -0,0 +1,485 @@
+"""
+基于 SQLite 的本地/多节点任务队列
+
+全市场 × 多周期 × 参数网格的回测一台机器跑不完时，把任务放进一个 SQLite 文件，
+任意数量的 worker 进程（同机或共享文件系统上的其他机器）从中领取：
+
+- 租约：worker 领取任务时写入 lease_until，执行期间心跳线程定期续约；
+  worker 崩溃后租约过期，任务被其他 worker 重新领取（attempts + 1，超过 max_attempts 记为 failed）
+- 幂等：job_id 即任务键，重复 submit 不会重复入队；complete() 只有第一次生效，
+  租约过期后被重复执行的任务，后完成的结果被丢弃
+- 心跳：workers 表记录每个 worker 的最后心跳和完成数
+- Coordinator：汇总进度、吞吐（整体 / 最近窗口）、预计剩余时间、离线 worker 和慢任务；
+  本机 worker 全部退出（如被 OOM 杀掉）时收回失联的租约后返回，不等租约自然过期
+
+领取与提交都在 BEGIN IMMEDIATE 事务里完成，依赖 SQLite 文件锁；
+跨机器使用时共享文件系统需支持 POSIX 文件锁（NFS 的锁实现不可靠时请改用同机多进程）。
+
+用法：
+    queue = JobQueue('results/queue/ma_conv.sqlite', name='ma_conv')
+    queue.submit((symbol, payload) for symbol, payload in tasks)
+    # 每个 worker 进程（可在其他机器）：
+    run_worker('results/queue/ma_conv.sqlite', 'ma_conv', backtest_fn)
+    # 协调进程：
+    Coordinator(queue).watch(interval=10)
+    results = queue.results()
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.log import configure_worker, get_logger, worker_logging
+from core.storage import connect, json_default, transaction
+
+
+logger = get_logger('core.job_queue')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    queue TEXT,
+    job_id TEXT,
+    payload TEXT,
+    state TEXT DEFAULT 'pending',
+    attempts INTEGER DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    enqueued_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (queue, job_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (queue, state);
+CREATE TABLE IF NOT EXISTS workers (
+    queue TEXT,
+    worker_id TEXT,
+    host TEXT,
+    pid INTEGER,
+    started_at REAL,
+    heartbeat_at REAL,
+    done INTEGER DEFAULT 0,
+    PRIMARY KEY (queue, worker_id)
+);
+"""
+
+
+def default_worker_id() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class Job:
+    """领取到的任务"""
+
+    __slots__ = ('job_id', 'payload', 'attempts')
+
+    def __init__(self, job_id: str, payload: Any, attempts: int):
+        self.job_id = job_id
+        self.payload = payload
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f'Job({self.job_id!r}, attempts={self.attempts})'
+
+
+class JobQueue:
+    """SQLite 任务队列（每个进程各自实例化，连接不跨线程共享）"""
+
+    def __init__(
+        self,
+        path: str,
+        name: str = 'default',
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        timeout: float = 60.0
+    ):
+        """
+        Args:
+            path: SQLite 文件路径
+            name: 队列名（同一文件可放多个队列）
+            lease_seconds: 租约时长，worker 心跳间隔应明显小于它
+            max_attempts: 最多领取次数，超过后任务记为 failed
+            timeout: 等待数据库锁的秒数
+        """
+        self.path = path
+        self.name = name
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = int(max_attempts)
+        self.timeout = timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect(self.path, self.timeout)
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return transaction(self.path, fn, self.timeout)
+
+    # ---------- 生产者 ----------
+
+    def submit(self, jobs: Iterable[Tuple[str, Any]]) -> int:
+        """
+        入队（job_id 已存在的跳过）
+
+        Returns:
+            新入队的任务数
+        """
+        now = time.time()
+        rows = [(self.name, str(job_id), json.dumps(payload, ensure_ascii=False, default=json_default), now)
+                for job_id, payload in jobs]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO jobs (queue, job_id, payload, enqueued_at) VALUES (?, ?, ?, ?)', rows)
+            return conn.total_changes - before
+
+        return self._transaction(insert)
+
+    # ---------- worker ----------
+
+    def register(self, worker_id: str):
+        now = time.time()
+        self._transaction(lambda conn: conn.execute(
+            'INSERT INTO workers (queue, worker_id, host, pid, started_at, heartbeat_at) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(queue, worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at',
+            (self.name, worker_id, socket.gethostname(), os.getpid(), now, now)))
+
+    def lease(self, worker_id: str) -> Optional[Job]:
+        """领取一个待执行或租约已过期的任务，没有时返回 None"""
+        def take(conn):
+            now = time.time()
+            # 租约过期且次数用尽的任务直接记为失败
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', error = COALESCE(error, 'lease expired') "
+                "WHERE queue = ? AND state = 'leased' AND lease_until < ? AND attempts >= ?",
+                (self.name, now, self.max_attempts))
+            row = conn.execute(
+                "SELECT job_id, payload, attempts FROM jobs WHERE queue = ? AND "
+                "(state = 'pending' OR (state = 'leased' AND lease_until < ?)) "
+                "ORDER BY attempts, enqueued_at, rowid LIMIT 1",
+                (self.name, now)).fetchone()
+            if row is None:
+                return None
+            job_id, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET state = 'leased', worker = ?, attempts = attempts + 1, lease_until = ?, "
+                "started_at = ? WHERE queue = ? AND job_id = ?",
+                (worker_id, now + self.lease_seconds, now, self.name, job_id))
+            return Job(job_id, json.loads(payload), attempts + 1)
+
+        return self._transaction(take)
+
+    def heartbeat(self, worker_id: str, job_id: Optional[str] = None):
+        """worker 心跳，并为正在执行的任务续约"""
+        def beat(conn):
+            now = time.time()
+            conn.execute('UPDATE workers SET heartbeat_at = ? WHERE queue = ? AND worker_id = ?',
+                         (now, self.name, worker_id))
+            if job_id is not None:
+                conn.execute(
+                    "UPDATE jobs SET lease_until = ? WHERE queue = ? AND job_id = ? AND worker = ? AND state = 'leased'",
+                    (now + self.lease_seconds, self.name, job_id, worker_id))
+
+        self._transaction(beat)
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        """
+        提交结果（幂等：任务已完成时不覆盖）
+
+        Returns:
+            本次是否生效
+        """
+        text = json.dumps(result, ensure_ascii=False, default=json_default)
+
+        def commit(conn):
+            cur = conn.execute(
+                "UPDATE jobs SET state = 'done', result = ?, worker = ?, finished_at = ?, error = NULL "
+                "WHERE queue = ? AND job_id = ? AND state != 'done'",
+                (text, worker_id, time.time(), self.name, job_id))
+            if cur.rowcount:
+                conn.execute('UPDATE workers SET done = done + 1 WHERE queue = ? AND worker_id = ?',
+                             (self.name, worker_id))
+            return cur.rowcount > 0
+
+        return self._transaction(commit)
+
+    def fail(self, job_id: str, worker_id: str, error: str):
+        """执行出错：次数未用尽时放回队列，否则记为 failed"""
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_until = NULL WHERE queue = ? AND job_id = ? AND worker = ? AND state = 'leased'",
+            (self.max_attempts, str(error), self.name, job_id, worker_id)))
+
+    def release(self, worker_ids: Iterable[str] = ()) -> int:
+        """
+        收回不会再完成的租约：租约已过期、持有者没有在租约时长内心跳过，或持有者在 worker_ids 中
+        （调用方已确认这些 worker 进程退出）。次数用尽的记为 failed，其余放回 pending
+
+        Returns:
+            收回的任务数
+        """
+        dead = list(worker_ids)
+        marks = ', '.join('?' * len(dead)) or 'NULL'
+
+        def sweep(conn):
+            now = time.time()
+            where = (
+                "queue = ? AND state = 'leased' AND (lease_until < ? OR worker IN (" + marks + ") OR worker NOT IN "
+                "(SELECT worker_id FROM workers WHERE queue = ? AND heartbeat_at >= ?))"
+            )
+            params = [self.name, now, *dead, self.name, now - self.lease_seconds]
+            before = conn.total_changes
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', error = COALESCE(error, 'worker lost'), lease_until = NULL "
+                f"WHERE {where} AND attempts >= ?", params + [self.max_attempts])
+            conn.execute(f"UPDATE jobs SET state = 'pending', lease_until = NULL WHERE {where}", params)
+            return conn.total_changes - before
+
+        return self._transaction(sweep)
+
+    # ---------- 查询 ----------
+
+    def counts(self) -> Dict[str, int]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT state, COUNT(*) FROM jobs WHERE queue = ? GROUP BY state',
+                                (self.name,)).fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def is_finished(self) -> bool:
+        counts = self.counts()
+        return counts['pending'] == 0 and counts['leased'] == 0
+
+    def results(self) -> Dict[str, Any]:
+        """job_id -> 结果（按入队顺序）"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT job_id, result FROM jobs WHERE queue = ? AND state = 'done' ORDER BY enqueued_at, rowid",
+                (self.name,)).fetchall()
+        return {job_id: json.loads(result) for job_id, result in rows}
+
+    def failures(self) -> Dict[str, str]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT job_id, error FROM jobs WHERE queue = ? AND state = 'failed'",
+                                (self.name,)).fetchall()
+        return dict(rows)
+
+
+def run_worker(
+    path: str,
+    name: str,
+    fn: Callable[[Any], Any],
+    worker_id: Optional[str] = None,
+    lease_seconds: float = 300.0,
+    max_attempts: int = 3,
+    heartbeat_every: Optional[float] = None,
+    poll: float = 1.0,
+    exit_when_idle: bool = True,
+    max_jobs: Optional[int] = None
+) -> int:
+    """
+    worker 主循环：领取 -> 执行 fn(payload) -> 提交，直到队列清空
+
+    Args:
+        fn: 任务函数，返回值需可 JSON 序列化；抛异常时任务放回队列重试
+        lease_seconds, max_attempts: 与协调进程的 JobQueue 保持一致
+        heartbeat_every: 心跳间隔，默认租约时长的 1/3
+        exit_when_idle: 没有可领取的任务且队列已结束时退出；False 时持续轮询
+        max_jobs: 最多执行的任务数（测试用）
+
+    Returns:
+        本 worker 成功提交的任务数
+    """
+    queue = JobQueue(path, name, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    worker_id = worker_id or default_worker_id()
+    queue.register(worker_id)
+    interval = heartbeat_every or lease_seconds / 3.0
+
+    current: Dict[str, Optional[str]] = {'job': None}
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                queue.heartbeat(worker_id, current['job'])
+            except sqlite3.Error as exc:
+                logger.warning("[%s] 心跳失败: %s", worker_id, exc)
+
+    thread = threading.Thread(target=beat, name='job-heartbeat', daemon=True)
+    thread.start()
+    committed = 0
+    executed = 0
+    try:
+        while max_jobs is None or executed < max_jobs:
+            job = queue.lease(worker_id)
+            if job is None:
+                if exit_when_idle and queue.is_finished():
+                    break
+                time.sleep(poll)  # 其他 worker 的任务可能因租约过期回到队列
+                continue
+            current['job'] = job.job_id
+            executed += 1
+            try:
+                result = fn(job.payload)
+            except Exception as exc:  # noqa: BLE001 - 放回队列重试
+                logger.warning("[%s] 任务 %s 失败(第%d次): %r", worker_id, job.job_id, job.attempts, exc)
+                queue.fail(job.job_id, worker_id, repr(exc))
+            else:
+                committed += int(queue.complete(job.job_id, worker_id, result))
+            finally:
+                current['job'] = None
+    finally:
+        stop.set()
+        thread.join()
+        queue.heartbeat(worker_id)
+    return committed
+
+
+class Coordinator:
+    """进度、吞吐与慢任务报告"""
+
+    def __init__(self, queue: JobQueue, window: float = 60.0, straggler_factor: float = 3.0):
+        """
+        Args:
+            queue: 任务队列
+            window: 最近吞吐的统计窗口（秒）
+            straggler_factor: 执行时间超过已完成任务耗时中位数的多少倍算慢任务
+        """
+        self.queue = queue
+        self.window = window
+        self.straggler_factor = straggler_factor
+
+    def report(self) -> Dict[str, Any]:
+        now = time.time()
+        counts = self.queue.counts()
+        with closing(self.queue._connect()) as conn:
+            done_rows = conn.execute(
+                "SELECT started_at, finished_at FROM jobs WHERE queue = ? AND state = 'done'",
+                (self.queue.name,)).fetchall()
+            leased = conn.execute(
+                "SELECT job_id, worker, started_at, lease_until FROM jobs WHERE queue = ? AND state = 'leased'",
+                (self.queue.name,)).fetchall()
+            workers = conn.execute(
+                'SELECT worker_id, heartbeat_at, done FROM workers WHERE queue = ?',
+                (self.queue.name,)).fetchall()
+            first_start = conn.execute(
+                'SELECT MIN(started_at) FROM jobs WHERE queue = ?', (self.queue.name,)).fetchone()[0]
+
+        durations = np.array([f - s for s, f in done_rows if s is not None and f is not None])
+        finished = np.array([f for _, f in done_rows if f is not None])
+        elapsed = now - first_start if first_start else 0.0
+        throughput = len(finished) / elapsed if elapsed > 0 else 0.0
+        recent = float(np.sum(finished >= now - self.window)) / self.window if len(finished) else 0.0
+        remaining = counts['pending'] + counts['leased']
+        rate = recent or throughput
+        median = float(np.median(durations)) if len(durations) else None
+
+        stragglers = []
+        for job_id, worker, started_at, lease_until in leased:
+            running = now - (started_at or now)
+            expired = lease_until is not None and lease_until < now
+            if expired or (median is not None and running > self.straggler_factor * max(median, 1e-3)):
+                stragglers.append({'job_id': job_id, 'worker': worker, 'running_s': running, 'lease_expired': expired})
+
+        alive = [w for w, beat, _ in workers if beat is not None and now - beat < self.queue.lease_seconds]
+        return {
+            **counts,
+            'workers': len(workers),
+            'workers_alive': len(alive),
+            'per_worker_done': {w: done for w, _, done in workers},
+            'throughput_per_s': throughput,
+            'recent_per_s': recent,
+            'median_job_s': median,
+            'eta_s': remaining / rate if rate > 0 else None,
+            'stragglers': stragglers,
+        }
+
+    @staticmethod
+    def format(report: Dict[str, Any]) -> str:
+        eta = f"{report['eta_s']:.0f}s" if report['eta_s'] is not None else '-'
+        line = (f"完成 {report['done']} / 执行中 {report['leased']} / 待领取 {report['pending']} / 失败 {report['failed']}，"
+                f"worker {report['workers_alive']}/{report['workers']}，"
+                f"吞吐 {report['throughput_per_s']:.2f}/s（最近 {report['recent_per_s']:.2f}/s），剩余约 {eta}")
+        if report['stragglers']:
+            slow = ', '.join(f"{s['job_id']}@{s['worker']}({s['running_s']:.0f}s)" for s in report['stragglers'][:5])
+            line += f"，慢任务: {slow}"
+        return line
+
+    def watch(self, interval: float = 10.0, until_done: bool = True, workers: Iterable = ()) -> Dict[str, Any]:
+        """
+        定期输出进度，队列结束时返回最后一次报告
+
+        Args:
+            workers: 本机启动的 worker 进程；全部退出后收回它们（及其他失联 worker）的租约，
+                没有存活 worker 持有租约时停止等待，未完成的任务留在队列里
+        """
+        workers = list(workers)
+        host = socket.gethostname()
+        local_ids = [f'{host}:{p.pid}' for p in workers]
+
+        def all_exited():
+            return bool(workers) and not any(p.is_alive() for p in workers)
+
+        while True:
+            report = self.report()
+            if all_exited():
+                released = self.queue.release(local_ids)
+                if released:
+                    logger.warning("[%s] 本机 worker 已全部退出，收回 %d 个租约", self.queue.name, released)
+                    report = self.report()
+            logger.info("[%s] %s", self.queue.name, self.format(report))
+            if until_done and report['pending'] == 0 and report['leased'] == 0:
+                return report
+            if all_exited() and report['leased'] == 0:
+                return report
+            exited = all_exited()
+            deadline = time.time() + interval
+            while time.time() < deadline:
+                time.sleep(min(0.5, interval))
+                if self.queue.is_finished() or all_exited() != exited:
+                    break
+
+
+def _worker_entry(path, name, fn, lease_seconds, max_attempts, log_args=()):
+    if log_args:
+        configure_worker(*log_args)
+    run_worker(path, name, fn, lease_seconds=lease_seconds, max_attempts=max_attempts)
+
+
+def run_local(
+    queue: JobQueue,
+    fn: Callable[[Any], Any],
+    workers: int,
+    report_every: float = 10.0
+) -> Dict[str, Any]:
+    """
+    本机启动 workers 个 worker 进程执行队列，协调进程输出进度，返回最后一次报告
+
+    worker 的日志经队列由协调进程统一输出；其他机器可同时对同一队列文件运行 run_worker 加入。
+    """
+    import multiprocessing
+
+    procs: List[multiprocessing.Process] = []
+    with worker_logging() as log_args:
+        for _ in range(max(1, int(workers))):
+            proc = multiprocessing.Process(target=_worker_entry, args=(queue.path, queue.name, fn, queue.lease_seconds,
+                                                                       queue.max_attempts, log_args))
+            proc.start()
+            procs.append(proc)
+        try:
+            return Coordinator(queue).watch(interval=report_every, workers=procs)
+        finally:
+            for proc in procs:
+                proc.join()
@@ -0,0 +1,241 @@
+"""
+项目统一日志
+
+- get_logger(name): 返回 'quant.<name>' 日志器，消息用 %s 占位符延迟格式化，级别不够时不拼接字符串
+- configure_logging(): 控制台输出（默认只输出消息本身，与原 print 一致）、按模块设置级别、
+  可选缓冲输出和 JSONL 文件
+- start_queue_listener() / configure_worker(): 多进程回测时子进程把日志放进队列，由主进程统一输出；
+  worker_logging() 把两者包成上下文，进程池在其中以 configure_worker 为 initializer 启动
+- EventCounter: 热循环里只计数，循环结束后输出一行汇总
+
+环境变量：
+    QUANT_LOG_LEVEL=WARNING                               全局级别（默认 INFO）
+    QUANT_LOG_LEVELS=data.data_fetcher=DEBUG,backtests=WARNING   按模块设置级别
+    QUANT_LOG_JSONL=results/logs/run.jsonl                同时写入 JSONL
+"""
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+
+ROOT_LOGGER_NAME = 'quant'
+CONSOLE_FORMAT = '%(message)s'
+
+_configure_lock = threading.Lock()
+_configured = False
+_module_levels_set = set()
+
+
+def _parse_level(level: Union[str, int]) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(level.strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"未知日志级别: {level}")
+    return value
+
+
+def _parse_module_levels(text: str) -> Dict[str, str]:
+    """'a.b=DEBUG,c=WARNING' -> {'a.b': 'DEBUG', 'c': 'WARNING'}"""
+    levels = {}
+    for item in text.split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip()
+    return levels
+
+
+class JsonlHandler(logging.Handler):
+    """每条日志写一行 JSON：time/level/logger/message 以及 extra 传入的字段"""
+
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def __init__(self, path: str):
+        super().__init__()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.stream = open(path, 'a', encoding='utf-8')
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            entry = {
+                'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                'level': record.levelname,
+                'logger': record.name,
+                'message': record.getMessage(),
+            }
+            for key, value in record.__dict__.items():
+                if key not in self.RESERVED and not key.startswith('_'):
+                    entry[key] = value
+            if record.exc_info:
+                entry['exc_info'] = logging.Formatter().formatException(record.exc_info)
+            self.acquire()
+            try:
+                self.stream.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+                self.stream.flush()
+            finally:
+                self.release()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            if not self.stream.closed:
+                self.stream.close()
+        finally:
+            self.release()
+        super().close()
+
+
+def configure_logging(
+    level: Union[str, int, None] = None,
+    module_levels: Optional[Dict[str, Union[str, int]]] = None,
+    jsonl_path: Optional[str] = None,
+    console: bool = True,
+    buffer_size: int = 0,
+    fmt: str = CONSOLE_FORMAT
+) -> logging.Logger:
+    """
+    配置项目日志（重复调用会替换之前的配置）
+
+    Args:
+        level: 全局级别，默认取 QUANT_LOG_LEVEL，未设置为 INFO
+        module_levels: 按模块设置级别，如 {'data.data_fetcher': 'WARNING'}，与 QUANT_LOG_LEVELS 合并
+        jsonl_path: JSONL 输出文件，None 时取 QUANT_LOG_JSONL，'' 表示不输出
+        console: 是否输出到控制台（stdout）
+        buffer_size: >0 时控制台输出先缓冲，满 buffer_size 条或遇到 ERROR 才写出
+        fmt: 控制台格式
+
+    Returns:
+        项目根日志器
+    """
+    global _configured
+    with _configure_lock:
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+
+        root.setLevel(_parse_level(level or os.environ.get('QUANT_LOG_LEVEL', 'INFO')))
+        root.propagate = False
+
+        if console:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter(fmt))
+            if buffer_size > 0:
+                handler = logging.handlers.MemoryHandler(buffer_size, flushLevel=logging.ERROR, target=handler)
+            root.addHandler(handler)
+
+        if jsonl_path is None:
+            jsonl_path = os.environ.get('QUANT_LOG_JSONL')
+        if jsonl_path:
+            root.addHandler(JsonlHandler(jsonl_path))
+
+        for name in _module_levels_set:
+            logging.getLogger(name).setLevel(logging.NOTSET)
+        _module_levels_set.clear()
+
+        levels = _parse_module_levels(os.environ.get('QUANT_LOG_LEVELS', ''))
+        levels.update(module_levels or {})
+        for name, module_level in levels.items():
+            logger_name = f'{ROOT_LOGGER_NAME}.{name}'
+            logging.getLogger(logger_name).setLevel(_parse_level(module_level))
+            _module_levels_set.add(logger_name)
+
+        _configured = True
+        return root
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    获取模块日志器（首次使用时按环境变量做默认配置）
+
+    Args:
+        name: 模块名，如 'data.data_fetcher'、'backtests.futures_minute'
+    """
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f'{ROOT_LOGGER_NAME}.{name}')
+
+
+def flush_logs():
+    """写出缓冲中的日志"""
+    for handler in logging.getLogger(ROOT_LOGGER_NAME).handlers:
+        handler.flush()
+
+
+def start_queue_listener(queue=None):
+    """
+    主进程：创建日志队列并启动监听线程，把子进程日志交给当前已配置的处理器输出
+
+    Returns:
+        (queue, listener)，结束时调用 listener.stop()
+    """
+    if not _configured:
+        configure_logging()
+    queue = queue or multiprocessing.Manager().Queue(-1)
+    handlers = logging.getLogger(ROOT_LOGGER_NAME).handlers
+    listener = logging.handlers.QueueListener(queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return queue, listener
+
+
+def configure_worker(queue, level: Union[str, int, None] = None,
+                     module_levels: Optional[Dict[str, Union[str, int]]] = None):
+    """
+    子进程初始化：日志只放进队列，不直接写控制台/文件
+
+    用作 ProcessPoolExecutor(initializer=configure_worker, initargs=(queue,)) 的初始化函数。
+    """
+    global _configured
+    configure_logging(level=level, module_levels=module_levels, console=False, jsonl_path='')
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.addHandler(logging.handlers.QueueHandler(queue))
+    _configured = True
+
+
+@contextmanager
+def worker_logging():
+    """
+    主进程：进程池运行期间转发子进程日志，产出 configure_worker 的参数
+
+        with worker_logging() as log_args:
+            with ProcessPoolExecutor(initializer=configure_worker, initargs=log_args) as pool:
+                ...
+
+    子进程沿用主进程根日志器的级别；退出上下文时停止监听（剩余日志先输出完）。
+    """
+    queue, listener = start_queue_listener()
+    try:
+        yield queue, logging.getLogger(ROOT_LOGGER_NAME).level
+    finally:
+        listener.stop()
+
+
+class EventCounter:
+    """热循环中的事件计数器，循环结束后一次性输出汇总"""
+
+    def __init__(self, logger: logging.Logger, title: str):
+        self.logger = logger
+        self.title = title
+        self.counts: Counter = Counter()
+
+    def incr(self, event: str, n: int = 1):
+        self.counts[event] += n
+
+    def __getitem__(self, event: str) -> int:
+        return self.counts[event]
+
+    def summary(self, level: int = logging.INFO):
+        if self.logger.isEnabledFor(level):
+            parts = ', '.join(f'{event} {count}' for event, count in self.counts.items())
+            self.logger.log(level, '%s: %s', self.title, parts or '无', extra={'counts': dict(self.counts)})
@@ -0,0 +1,184 @@
+"""
+多周期特征对齐（周线/日线/分钟线）
+
+高周期特征整列算一次，再按"可见时间"用 searchsorted 一次性广播到低周期索引，
+替代回测循环里逐根K线的 .loc / 布尔筛选查找。
+
+可见性规则（保证不使用未来数据）：
+- 每根K线有一个"可见时间"：分钟K线为其结束时间（索引本身），日线为该交易日收盘，
+  周线为该周最后一个交易日收盘；known='open' 时改为开盘时间（只依赖开盘价的特征，如跳空标记）
+- 低周期K线按其收盘时刻决策，只能看到可见时间 <= 该时刻的最近一根高周期K线
+  （语义同 merge_asof(direction='backward') / 前向填充）
+
+因此分钟K线看到的是上一个已完成交易日的日线特征（当日最后一根K线收盘时才看到当日），
+日线K线在周五（或该周最后一个交易日）才看到本周周线特征。
+
+用法：
+    from core.mtf import align, broadcast
+
+    data['daily_ma5'] = align(daily_ma5, data.index, freq='1d')
+    data['weekly_mid'] = broadcast(data, '1w', lambda w: w['Close'].rolling(20).mean())
+
+索引约定与 data.bar_store 一致：分钟K线时间戳为K线结束时间，日线标签为交易日 00:00，
+周线标签为该周任意一天（resample('W-FRI') 的周五、resample('W') 的周日均可）。
+"""
+from typing import Callable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.calendar import TradingCalendar, load_calendar
+from data.bar_store import aggregate_bars, normalize_interval
+
+
+Session = Union[str, Sequence[Tuple[int, int]]]
+Feature = Union[pd.Series, pd.DataFrame]
+
+
+def _calendar(session: Session) -> TradingCalendar:
+    if isinstance(session, str):
+        return load_calendar(session)
+    return TradingCalendar(session)
+
+
+def infer_freq(index) -> str:
+    """
+    推断K线周期：时间戳全为 00:00 时按相邻间隔中位数区分 '1d' / '1w'，否则为 'intraday'
+    """
+    index = pd.DatetimeIndex(index)
+    if len(index) == 0 or (index != index.normalize()).any():
+        return 'intraday'
+    if len(index) > 1 and np.median(np.diff(index.values).astype('timedelta64[D]').astype(np.int64)) >= 5:
+        return '1w'
+    return '1d'
+
+
+def _normalize_freq(freq: Optional[str], index) -> str:
+    if freq is None:
+        return infer_freq(index)
+    if freq == 'intraday':
+        return freq
+    value = normalize_interval(freq)
+    return value if value in ('1d', '1w') else 'intraday'
+
+
+def available_times(
+    index,
+    freq: Optional[str] = None,
+    known: str = 'close',
+    session: Session = 'cn_stock'
+) -> np.ndarray:
+    """
+    每根K线特征的可见时间
+
+    Args:
+        index: K线索引
+        freq: 'intraday'（或 '5m'/'15m' 等）/'1d'/'1w'，None 时按索引推断
+        known: 'close' 收盘后可见；'open' 开盘即可见（仅对日线/周线有意义）
+        session: 交易时段配置名或自定义时段列表
+
+    Returns:
+        datetime64[ns] 数组
+    """
+    if known not in ('close', 'open'):
+        raise ValueError(f"known 只能为 'close' 或 'open': {known}")
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    freq = _normalize_freq(freq, index)
+    if freq == 'intraday':
+        return index.values.astype('datetime64[ns]')
+
+    calendar = _calendar(session)
+    days = index.values.astype('datetime64[D]')
+    if freq == '1d':
+        # 非交易日标签顺延到下一交易日，只会更晚可见
+        days = np.busday_offset(days, 0, roll='forward', busdaycal=calendar.busdaycal)
+        return calendar.day_open(days) if known == 'open' else calendar.day_close(days)
+
+    # 周线：同一自然周（周一至周日）内的首/末交易日
+    weekday = (days.astype(np.int64) + 3) % 7          # 1970-01-01 为周四
+    monday = days - weekday.astype('timedelta64[D]')
+    if known == 'open':
+        first = np.busday_offset(monday, 0, roll='forward', busdaycal=calendar.busdaycal)
+        return calendar.day_open(first)
+    last = np.busday_offset(monday + np.timedelta64(6, 'D'), 0, roll='backward', busdaycal=calendar.busdaycal)
+    return calendar.day_close(last)
+
+
+def visible_positions(available: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    每个决策时刻能看到的最近一根高周期K线位置，看不到任何K线时为 -1
+
+    Args:
+        available: 高周期K线可见时间（单调不减）
+        times: 低周期决策时刻
+    """
+    available = np.asarray(available, dtype='datetime64[ns]')
+    if len(available) > 1 and (available[1:] < available[:-1]).any():
+        raise ValueError("高周期特征的索引必须按时间升序")
+    return np.searchsorted(available, np.asarray(times, dtype='datetime64[ns]'), side='right') - 1
+
+
+def align(
+    feature: Feature,
+    lower_index,
+    freq: Optional[str] = None,
+    lower_freq: Optional[str] = None,
+    known: str = 'close',
+    session: Session = 'cn_stock',
+    fill_value=np.nan
+) -> Feature:
+    """
+    把高周期特征广播到低周期索引（无未来数据）
+
+    Args:
+        feature: 以高周期K线为索引的 Series / DataFrame
+        lower_index: 低周期K线索引
+        freq: 高周期，None 时按 feature.index 推断
+        lower_freq: 低周期，None 时按 lower_index 推断
+        known: 高周期特征的可见时刻，见 available_times
+        session: 交易时段配置
+        fill_value: 尚无可见高周期K线时的填充值
+
+    Returns:
+        与 feature 同类型、索引为 lower_index 的结果
+    """
+    lower_index = pd.DatetimeIndex(lower_index)
+    available = available_times(feature.index, freq, known, session)
+    times = available_times(lower_index, lower_freq, 'close', session)
+    pos = visible_positions(available, times)
+    valid = pos >= 0
+
+    if len(feature) == 0:
+        if isinstance(feature, pd.DataFrame):
+            return pd.DataFrame(fill_value, index=lower_index, columns=feature.columns)
+        return pd.Series(fill_value, index=lower_index, name=feature.name)
+
+    result = feature.iloc[np.maximum(pos, 0)]
+    result.index = lower_index
+    if not valid.all():
+        mask = valid if isinstance(result, pd.Series) else np.broadcast_to(valid[:, None], result.shape)
+        result = result.where(mask, fill_value)
+    return result
+
+
+def broadcast(
+    data: pd.DataFrame,
+    interval: str,
+    compute: Callable[[pd.DataFrame], Feature],
+    known: str = 'close',
+    session: Session = 'cn_stock',
+    fill_value=np.nan
+) -> Feature:
+    """
+    低周期K线聚合到 interval，计算一次高周期特征，再对齐回 data.index
+
+    Args:
+        data: 低周期 OHLCV（分钟线或日线）
+        interval: 高周期 '1d' / '1w'
+        compute: 高周期K线 -> 特征（Series / DataFrame）
+        known / session / fill_value: 见 align
+    """
+    higher = aggregate_bars(data, interval, session)
+    return align(compute(higher), data.index, freq=interval, known=known, session=session, fill_value=fill_value)
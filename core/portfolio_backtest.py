@@ -0,0 +1,255 @@
+"""
+定期再平衡的股票组合回测
+
+动态选股原先每个再平衡期把选中的股票切片、各自从空仓重新回测再平均收益：
+策略状态每期清零，指标的预热数据被丢掉，同一段行情的指标每期重算一遍。这里：
+
+- 信号只算一次：每只股票在完整历史上运行 strategy.generate_signals（可多进程）
+- 选股结果作为持仓许可：再平衡日起到下一次再平衡前，只有选中的股票可以按买入信号开仓
+- 资金与持仓跨期延续：仍被选中的持仓不动；落选的持仓在再平衡日收盘卖出（停牌则顺延到复牌）
+- 每个再平衡日按当时的组合净值 / 选中股票数确定单只股票的资金上限，买入时不超过可用现金
+- 成交价为信号当天收盘价，手续费 / 滑点口径同 BacktestEngine；停牌（无K线）的股票不成交，
+  净值按最近收盘价计算
+
+用法：
+    schedule = [(date, selector.select_stocks(symbols, date, data_cache)) for date in rebalance_dates]
+    result = RebalancingPortfolioEngine(initial_capital=1e6, workers=8).run(data_cache, strategy, schedule)
+    result['equity_curve'], result['trades'], result['periods']
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.backtest_engine import BaseStrategy
+from core.log import get_logger
+from core.profiling import stage
+from indicators.panel import Panel, ffill
+
+
+logger = get_logger('core.portfolio_backtest')
+
+
+def _signal_worker(args) -> np.ndarray:
+    symbol, data, strategy = args
+    signals = strategy.generate_signals(data)
+    return signals['signal'].reindex(data.index).fillna(0).to_numpy(dtype=np.int8)
+
+
+def compute_signals(
+    data_by_symbol: Dict[str, pd.DataFrame],
+    strategy: BaseStrategy,
+    workers: int = 1
+) -> Dict[str, pd.Series]:
+    """
+    每只股票在完整历史上生成一次信号
+
+    Returns:
+        代码 -> signal 序列（1=买入, -1=卖出, 0=无）；出错的股票记录日志后跳过
+    """
+    symbols = list(data_by_symbol)
+    tasks = [(symbol, data_by_symbol[symbol], strategy) for symbol in symbols]
+    results: Dict[str, pd.Series] = {}
+
+    def collect(symbol, fetch):
+        try:
+            results[symbol] = pd.Series(fetch(), index=data_by_symbol[symbol].index)
+        except Exception as exc:  # noqa: BLE001 - 单只出错不影响组合
+            logger.warning("  %s 信号计算失败: %r", symbol, exc)
+
+    with stage('portfolio.signals'):
+        if workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                collect(task[0], lambda task=task: _signal_worker(task))
+        else:
+            with ProcessPoolExecutor(max_workers=int(workers)) as pool:
+                futures = [pool.submit(_signal_worker, task) for task in tasks]
+                for task, future in zip(tasks, futures):
+                    collect(task[0], future.result)
+    return results
+
+
+class RebalancingPortfolioEngine:
+    """共享资金、按选股结果定期再平衡的多股票回测"""
+
+    def __init__(
+        self,
+        initial_capital: float = 100000,
+        commission: float = 0.001,
+        slippage: float = 0.0001,
+        workers: int = 1
+    ):
+        """
+        Args:
+            initial_capital: 初始资金
+            commission: 手续费率
+            slippage: 滑点率
+            workers: 计算信号的进程数
+        """
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.slippage = slippage
+        self.workers = workers
+
+    def run(
+        self,
+        data_by_symbol: Dict[str, pd.DataFrame],
+        strategy: BaseStrategy,
+        schedule: Iterable[Tuple[pd.Timestamp, Sequence[str]]],
+        end_date=None,
+        signals_by_symbol: Optional[Dict[str, pd.Series]] = None
+    ) -> Dict:
+        """
+        Args:
+            data_by_symbol: 代码 -> 日线（完整历史，用于信号预热）
+            strategy: 生成 signal 列的策略
+            schedule: [(再平衡日, 选中的代码)]，按时间升序
+            end_date: 回测结束日，默认数据最后一天
+            signals_by_symbol: 已算好的信号，缺省时调用 compute_signals
+
+        Returns:
+            equity_curve / trades / periods 及绩效指标
+        """
+        schedule = [(pd.Timestamp(date), list(symbols)) for date, symbols in schedule]
+        if not schedule:
+            raise ValueError("schedule 为空")
+        if signals_by_symbol is None:
+            signals_by_symbol = compute_signals(data_by_symbol, strategy, self.workers)
+
+        frames = {
+            symbol: pd.DataFrame({'Close': data_by_symbol[symbol]['Close'], 'signal': signals})
+            for symbol, signals in signals_by_symbol.items()
+        }
+        panel = Panel.from_frames(frames, fields=('Close', 'signal'), dtype=np.float64)
+        start = panel.dates.searchsorted(schedule[0][0])
+        stop = len(panel.dates) if end_date is None else panel.row_of(end_date) + 1
+        dates = panel.dates[start:stop]
+        if len(dates) == 0:
+            raise ValueError("再平衡区间内没有行情")
+
+        close_raw = panel['Close'][start:stop]
+        tradable = panel.present[start:stop] & ~np.isnan(close_raw)
+        close = ffill(panel['Close'])[start:stop]          # 停牌时按最近收盘价计净值
+        signal = np.nan_to_num(panel['signal'][start:stop]).astype(np.int8)
+        symbols = panel.symbols
+        column = {symbol: j for j, symbol in enumerate(symbols)}
+
+        rebalance_rows = {}
+        for date, selected in schedule:
+            row = int(dates.searchsorted(date))
+            if row < len(dates):
+                rebalance_rows[row] = [column[s] for s in selected if s in column]
+
+        n_bars, n_symbols = close.shape
+        cash = float(self.initial_capital)
+        shares = np.zeros(n_symbols)
+        entry_price = np.zeros(n_symbols)
+        entry_date = np.empty(n_symbols, dtype=object)
+        allowed = np.zeros(n_symbols, dtype=bool)
+        pending_exit = np.zeros(n_symbols, dtype=bool)
+        slot_value = 0.0
+
+        equity = np.empty(n_bars)
+        cash_curve = np.empty(n_bars)
+        holdings = np.empty(n_bars, dtype=np.int64)
+        trades: List[Dict] = []
+        periods: List[Dict] = []
+
+        def sell(j, i, reason, price=None):
+            nonlocal cash
+            price = close_raw[i, j] if price is None else price
+            proceeds = shares[j] * price * (1 - self.slippage) * (1 - self.commission)
+            cost = shares[j] * entry_price[j] * (1 + self.slippage) * (1 + self.commission)
+            cash += proceeds
+            trades.append({
+                'symbol': symbols[j],
+                'entry_date': entry_date[j],
+                'exit_date': dates[i],
+                'entry_price': entry_price[j],
+                'exit_price': price,
+                'shares': shares[j],
+                'pnl': proceeds - cost,
+                'return_pct': (proceeds / cost - 1) * 100 if cost > 0 else 0.0,
+                'exit_reason': reason,
+            })
+            shares[j] = 0.0
+            pending_exit[j] = False
+
+        with stage('portfolio.trade_loop'):
+            for i in range(n_bars):
+                prices = close_raw[i]
+                can_trade = tradable[i]
+                held = shares > 0
+
+                if i in rebalance_rows:
+                    selected = rebalance_rows[i]
+                    allowed[:] = False
+                    allowed[selected] = True
+                    pending_exit |= held & ~allowed
+                    pending_exit &= ~allowed
+                    value = cash + float(np.dot(shares, np.nan_to_num(close[i])))
+                    slot_value = value / max(1, len(selected))
+                    periods.append({'date': dates[i], 'symbols': [symbols[j] for j in selected], 'start_equity': value})
+
+                exits = held & can_trade & (pending_exit | (signal[i] == -1))
+                for j in np.flatnonzero(exits):
+                    sell(j, i, 'deselected' if pending_exit[j] else 'signal')
+
+                entries = allowed & can_trade & (shares == 0) & (signal[i] == 1)
+                for j in np.flatnonzero(entries):
+                    budget = min(slot_value, cash)
+                    unit_cost = prices[j] * (1 + self.slippage) * (1 + self.commission)
+                    if budget <= 0 or unit_cost <= 0:
+                        continue
+                    shares[j] = budget / unit_cost
+                    entry_price[j] = prices[j]
+                    entry_date[j] = dates[i]
+                    cash -= shares[j] * unit_cost
+
+                equity[i] = cash + float(np.dot(shares, np.nan_to_num(close[i])))
+                cash_curve[i] = cash
+                holdings[i] = int(np.count_nonzero(shares))
+
+        # 结束时按最近收盘价清仓
+        for j in np.flatnonzero(shares > 0):
+            sell(j, n_bars - 1, 'final_bar', close[-1, j])
+        final_capital = cash
+
+        equity_curve = pd.DataFrame({'equity': equity, 'cash': cash_curve, 'positions': holdings}, index=dates)
+        equity_curve.index.name = 'date'
+        trades_df = pd.DataFrame(trades)
+
+        boundaries = [dates.get_loc(p['date']) for p in periods] + [n_bars]
+        for period, begin, end in zip(periods, boundaries[:-1], boundaries[1:]):
+            end_equity = final_capital if end == n_bars else equity[end - 1]
+            period['end_equity'] = end_equity
+            period['return_pct'] = (end_equity / period['start_equity'] - 1) * 100 if period['start_equity'] else 0.0
+
+        result = {
+            'equity_curve': equity_curve,
+            'trades': trades_df,
+            'periods': periods,
+            'final_capital': final_capital,
+            'total_trades': len(trades_df),
+        }
+        result.update(self._metrics(equity_curve['equity'], final_capital, trades_df))
+        logger.info("组合回测: %d 只股票, %d 个交易日, %d 次再平衡, %d 笔交易, 收益 %.2f%%",
+                    n_symbols, n_bars, len(periods), len(trades_df), result['total_return_pct'])
+        return result
+
+    def _metrics(self, equity: pd.Series, final_capital: float, trades: pd.DataFrame) -> Dict:
+        values = equity.to_numpy(dtype=np.float64, copy=True)
+        values[-1] = final_capital
+        returns = np.diff(values) / values[:-1] if len(values) > 1 else np.array([])
+        total = final_capital / self.initial_capital
+        std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+        peak = np.maximum.accumulate(values)
+        return {
+            'total_return_pct': (total - 1) * 100,
+            'annualized_return_pct': (total ** (252 / len(values)) - 1) * 100 if total > 0 else -100.0,
+            'sharpe_ratio': returns.mean() / std * np.sqrt(252) if std > 0 else 0.0,
+            'max_drawdown_pct': float(np.max((peak - values) / peak)) * 100,
+            'win_rate_pct': float((trades['pnl'] > 0).mean() * 100) if len(trades) else 0.0,
+            'volatility_pct': std * np.sqrt(252) * 100,
+        }
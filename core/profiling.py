@@ -0,0 +1,232 @@
+"""
+分阶段耗时统计（可选开启）
+
+用法：
+    from core.profiling import stage, timed, count
+
+    with stage('load_csv'):
+        df = pd.read_csv(path)
+
+    @timed('chan.bi')
+    def identify_bi(...): ...
+
+    count('trades.open')
+
+未开启时 stage() 返回共享的空上下文、timed() 直接调用原函数、count() 立即返回，开销只有一次布尔判断。
+开启方式：enable()，或环境变量 QUANT_PROFILE=1，或各 CLI 的 --profile 参数。
+
+阶段按调用栈嵌套记录（'backtest;chan.bi'），可输出：
+- JSON：每个阶段路径的调用次数、总耗时、自身耗时，以及计数器
+- 文本：按耗时排序的缩进树（火焰图式），带占比条
+
+进程池：pool_submit(executor, fn, ...) 提交任务，开启统计时子进程用 run_profiled 执行并返回 (结果, 快照)；
+pool_result(future) 取回结果并在主进程 merge(快照) 汇总。未开启时两者等同于 submit()/result()。
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+
+_enabled = os.environ.get('QUANT_PROFILE', '').lower() in ('1', 'true', 'yes')
+_lock = threading.Lock()
+_local = threading.local()
+_stages: Dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0])   # path -> [calls, total, child_time]
+_counters: Dict[str, float] = defaultdict(float)
+_NULL = nullcontext()
+
+
+def enable(flag: bool = True):
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+def _stack() -> list:
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+@contextmanager
+def _timing(name: str):
+    stack = _stack()
+    path = f'{stack[-1][0]};{name}' if stack else name
+    frame = [path, 0.0]
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1][1] += elapsed
+        with _lock:
+            entry = _stages[path]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += frame[1]
+
+
+def stage(name: str):
+    """计时上下文；未开启时为空操作"""
+    if not _enabled:
+        return _NULL
+    return _timing(name)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """计时装饰器，默认阶段名为函数的 __qualname__"""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _timing(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, n: float = 1):
+    """事件计数；未开启时为空操作"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += n
+
+
+def snapshot() -> Dict:
+    """当前统计的可序列化快照"""
+    with _lock:
+        return {
+            'stages': {path: list(values) for path, values in _stages.items()},
+            'counters': dict(_counters),
+        }
+
+
+def merge(data: Dict):
+    """合并其他进程的快照"""
+    if not data:
+        return
+    with _lock:
+        for path, (calls, total, child) in data.get('stages', {}).items():
+            entry = _stages[path]
+            entry[0] += calls
+            entry[1] += total
+            entry[2] += child
+        for name, value in data.get('counters', {}).items():
+            _counters[name] += value
+
+
+def run_profiled(func: Callable, *args, **kwargs):
+    """
+    进程池任务包装：在子进程里开启统计执行 func，返回 (结果, 快照)
+
+    executor.submit(run_profiled, backtest_one, symbol)
+    """
+    enable(True)
+    reset()
+    result = func(*args, **kwargs)
+    return result, snapshot()
+
+
+def pool_submit(executor, func: Callable, *args, **kwargs):
+    """提交进程池任务；主进程已开启统计时改用 run_profiled 执行，须配合 pool_result() 取结果"""
+    if _enabled:
+        future = executor.submit(run_profiled, func, *args, **kwargs)
+    else:
+        future = executor.submit(func, *args, **kwargs)
+    future.profiled = _enabled
+    return future
+
+
+def pool_result(future):
+    """取回 pool_submit() 的任务结果，并把子进程的统计快照合并到主进程"""
+    value = future.result()
+    if getattr(future, 'profiled', False):
+        value, data = value
+        merge(data)
+    return value
+
+
+def profile_tree(data: Optional[Dict] = None) -> Dict:
+    """把 'a;b;c' 路径整理为嵌套树，附自身耗时"""
+    data = data or snapshot()
+    tree = {'name': 'total', 'calls': 0, 'total': 0.0, 'self': 0.0, 'children': {}}
+    for path, (calls, total, child) in sorted(data['stages'].items()):
+        node = tree
+        for part in path.split(';'):
+            node = node['children'].setdefault(
+                part, {'name': part, 'calls': 0, 'total': 0.0, 'self': 0.0, 'children': {}}
+            )
+        node['calls'] += calls
+        node['total'] += total
+        node['self'] += total - child
+    tree['total'] = sum(child['total'] for child in tree['children'].values())
+    return tree
+
+
+def format_report(data: Optional[Dict] = None, width: int = 30, min_share: float = 0.001) -> str:
+    """火焰图式文本报告：缩进表示嵌套，条形长度表示占总耗时比例"""
+    data = data or snapshot()
+    tree = profile_tree(data)
+    grand_total = tree['total'] or 1e-12
+    lines = [f"{'stage':<48} {'calls':>8} {'total(s)':>10} {'self(s)':>10} {'share':>7}"]
+
+    def walk(node, depth):
+        children = sorted(node['children'].values(), key=lambda n: n['total'], reverse=True)
+        for child in children:
+            share = child['total'] / grand_total
+            if share < min_share:
+                continue
+            bar = '#' * max(1, int(round(share * width)))
+            label = ('  ' * depth + child['name'])[:48]
+            lines.append(f"{label:<48} {child['calls']:>8} {child['total']:>10.3f} {child['self']:>10.3f} {share:>6.1%} {bar}")
+            walk(child, depth + 1)
+
+    walk(tree, 0)
+    if data['counters']:
+        lines.append('')
+        lines.append('counters:')
+        for name, value in sorted(data['counters'].items()):
+            lines.append(f"  {name:<46} {value:>12g}")
+    return '\n'.join(lines)
+
+
+def write_report(output_dir: str = 'results/profile', name: Optional[str] = None) -> Dict[str, str]:
+    """
+    写出本次运行的 JSON 和文本报告
+
+    Returns:
+        {'json': 路径, 'text': 路径}
+    """
+    data = snapshot()
+    name = name or time.strftime('profile_%Y%m%d_%H%M%S')
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, f'{name}.json')
+    text_path = os.path.join(output_dir, f'{name}.txt')
+
+    tree = profile_tree(data)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'stages': data['stages'], 'counters': data['counters'], 'tree': tree}, f, ensure_ascii=False, indent=2)
+    with open(text_path, 'w', encoding='utf-8') as f:
+        f.write(format_report(data) + '\n')
+    return {'json': json_path, 'text': text_path}
@@ -0,0 +1,344 @@
+"""
+按运行归档的回测结果库
+
+全市场回测时每只股票写 signals/trades/equity/summary 四个 CSV，一次运行就是上万个文件、
+几个 GB 的文本。这里改为一次运行写进一个 SQLite 文件：
+
+- runs:      run_id / strategy / params(JSON) / 开始、结束时间 / 股票数
+- summaries: (run_id, symbol) -> 指标 JSON，可直接用 json_extract 查询，load_summaries() 展开成表
+- frames:    (run_id, symbol, kind) -> 压缩后的 DataFrame（kind = trades / equity / signals）
+             装了 pyarrow 时存 Parquet(zstd)，否则存 zlib 压缩的 CSV；读取按 format 列分派
+
+权益曲线可按 equity_rule（如 '1D'）降采样为每期末值；逐K线信号默认不存（keep_signals=True 才存）。
+写入由后台线程完成：add() 只把数据放进有界队列，序列化、压缩和 SQLite 提交都在写线程里做，
+队列满时 add() 阻塞（背压）。写线程出错时，下一次 add()/flush()/close() 抛出。
+
+用法：
+    with ResultsStore('results/results.sqlite', strategy='volume_breakout', params=vars(args)) as store:
+        for symbol in symbols:
+            store.add(symbol, summary, trades=trades_df, equity=equity_df)
+
+    load_summaries('results/results.sqlite', run_id=store.run_id)
+    load_frame('results/results.sqlite', run_id, '000001.SZ', 'trades')
+"""
+import hashlib
+import io
+import json
+import os
+import queue
+import sqlite3
+import threading
+import zlib
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from core.profiling import stage
+from core.storage import connect, json_default
+
+try:
+    import pyarrow  # noqa: F401
+    FRAME_FORMAT = 'parquet'
+except ImportError:
+    FRAME_FORMAT = 'csv'
+
+
+DEFAULT_STORE_PATH = 'results/results.sqlite'
+FRAME_KINDS = ('trades', 'equity', 'signals')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    strategy TEXT,
+    params TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    symbols INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    run_id TEXT,
+    strategy TEXT,
+    symbol TEXT,
+    metrics TEXT,
+    PRIMARY KEY (run_id, symbol)
+);
+CREATE TABLE IF NOT EXISTS frames (
+    run_id TEXT,
+    symbol TEXT,
+    kind TEXT,
+    format TEXT,
+    meta TEXT,
+    rows INTEGER,
+    payload BLOB,
+    PRIMARY KEY (run_id, symbol, kind)
+);
+"""
+
+_STOP = object()
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=json_default)
+
+
+def make_run_id(strategy: str, params: Optional[Dict] = None) -> str:
+    """'<strategy>-<时间>-<参数摘要>'"""
+    digest = hashlib.sha1(_dumps(params or {}).encode('utf-8')).hexdigest()[:8]
+    return f"{strategy or 'run'}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{digest}"
+
+
+def downsample_equity(equity: pd.DataFrame, rule: Optional[str]) -> pd.DataFrame:
+    """按时间规则取每期末值（索引不是时间时原样返回）"""
+    if not rule or equity is None or equity.empty or not isinstance(equity.index, pd.DatetimeIndex):
+        return equity
+    return equity.resample(rule).last().dropna(how='all')
+
+
+def encode_frame(frame: pd.DataFrame):
+    """DataFrame -> (format, meta, payload)"""
+    keep_index = not isinstance(frame.index, pd.RangeIndex)
+    meta = {
+        'index': frame.index.name if keep_index else None,
+        'keep_index': keep_index,
+        'datetime_index': isinstance(frame.index, pd.DatetimeIndex),
+    }
+    if FRAME_FORMAT == 'parquet':
+        buf = io.BytesIO()
+        frame.to_parquet(buf, compression='zstd', index=keep_index)
+        return 'parquet', meta, buf.getvalue()
+    text = frame.to_csv(index=keep_index)
+    return 'csv', meta, zlib.compress(text.encode('utf-8'), 6)
+
+
+def decode_frame(fmt: str, meta: Dict, payload: bytes) -> pd.DataFrame:
+    """encode_frame 的逆操作"""
+    if fmt == 'parquet':
+        return pd.read_parquet(io.BytesIO(payload))
+    text = zlib.decompress(payload).decode('utf-8')
+    if not meta.get('keep_index'):
+        return pd.read_csv(io.StringIO(text))
+    frame = pd.read_csv(io.StringIO(text), index_col=0, parse_dates=bool(meta.get('datetime_index')))
+    frame.index.name = meta.get('index')
+    return frame
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = connect(path, autocommit=False)          # 写线程按批 commit()
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class ResultsStore:
+    """一次回测运行的结果写入器（后台线程写 SQLite）"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_STORE_PATH,
+        strategy: str = '',
+        params: Optional[Dict] = None,
+        run_id: Optional[str] = None,
+        keep_signals: bool = False,
+        equity_rule: Optional[str] = None,
+        max_pending: int = 64,
+        commit_every: int = 200
+    ):
+        """
+        Args:
+            path: SQLite 文件路径
+            strategy: 策略名
+            params: 运行参数（JSON 化后存入 runs 表）
+            run_id: 运行ID，默认由策略名、时间和参数摘要生成；传入已有ID时继续写入该运行
+            keep_signals: 是否保存逐K线信号
+            equity_rule: 权益曲线降采样规则（pandas 频率，如 '1D'），None 不降采样
+            max_pending: 写队列上限，满了 add() 阻塞
+            commit_every: 每写入多少条提交一次（队列空时也会提交）
+        """
+        self.path = path
+        self.strategy = strategy
+        self.params = dict(params or {})
+        self.run_id = run_id or make_run_id(strategy, self.params)
+        self.keep_signals = keep_signals
+        self.equity_rule = equity_rule
+        self.commit_every = max(1, int(commit_every))
+        self.symbols = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._thread = threading.Thread(target=self._writer, name='results-store', daemon=True)
+        self._thread.start()
+        self._queue.put(('run', (self.run_id, self.strategy, _dumps(self.params), datetime.now().isoformat())))
+
+    def add(
+        self,
+        symbol: str,
+        summary: Dict,
+        trades: Optional[pd.DataFrame] = None,
+        equity: Optional[pd.DataFrame] = None,
+        signals: Optional[pd.DataFrame] = None
+    ):
+        """
+        放入一只股票的结果（立即返回，实际写入在后台线程）
+
+        传入的 DataFrame 在写入完成前不应再被修改。
+        """
+        self._raise_error()
+        if self._closed:
+            raise RuntimeError('ResultsStore 已关闭')
+        frames = {'trades': trades, 'equity': equity}
+        if self.keep_signals:
+            frames['signals'] = signals
+        self._queue.put(('symbol', (symbol, summary, frames)))
+        self.symbols += 1
+
+    def flush(self):
+        """等待队列中的结果全部写入"""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """写完剩余结果、记录结束时间并停止写线程"""
+        if self._closed:
+            self._raise_error()
+            return
+        self._closed = True
+        self._queue.put(('finish', (datetime.now().isoformat(),)))
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError(f'结果写入失败: {self._error!r}') from self._error
+
+    # ---------- 写线程 ----------
+
+    def _writer(self):
+        conn = None
+        pending = 0
+        try:
+            conn = _connect(self.path)
+        except Exception as exc:  # noqa: BLE001 - 交给调用线程抛出
+            self._error = exc
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    break
+                if conn is not None and self._error is None:
+                    self._write(conn, *item)
+                    pending += 1
+                    if pending >= self.commit_every or self._queue.empty():
+                        conn.commit()
+                        pending = 0
+            except Exception as exc:  # noqa: BLE001
+                self._error = exc
+            finally:
+                self._queue.task_done()
+        if conn is not None:
+            try:
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _write(self, conn: sqlite3.Connection, op: str, args):
+        if op == 'run':
+            run_id, strategy, params, started_at = args
+            conn.execute(
+                'INSERT INTO runs (run_id, strategy, params, started_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(run_id) DO NOTHING',
+                (run_id, strategy, params, started_at))
+        elif op == 'finish':
+            finished_at, = args
+            conn.execute(
+                'UPDATE runs SET finished_at = ?, symbols = '
+                '(SELECT COUNT(*) FROM summaries WHERE run_id = ?) WHERE run_id = ?',
+                (finished_at, self.run_id, self.run_id))
+        elif op == 'symbol':
+            symbol, summary, frames = args
+            with stage('results_store.write'):
+                conn.execute(
+                    'INSERT OR REPLACE INTO summaries (run_id, strategy, symbol, metrics) VALUES (?, ?, ?, ?)',
+                    (self.run_id, self.strategy, symbol, _dumps(summary)))
+                for kind, frame in frames.items():
+                    if frame is None:
+                        continue
+                    if isinstance(frame, pd.Series):
+                        frame = frame.to_frame()
+                    if kind == 'equity':
+                        frame = downsample_equity(frame, self.equity_rule)
+                    fmt, meta, payload = encode_frame(frame)
+                    conn.execute(
+                        'INSERT OR REPLACE INTO frames (run_id, symbol, kind, format, meta, rows, payload) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (self.run_id, symbol, kind, fmt, _dumps(meta), len(frame), sqlite3.Binary(payload)))
+
+
+# ---------- 读取 ----------
+
+def _read_connection(path: str):
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return closing(sqlite3.connect(path))
+
+
+def list_runs(path: str = DEFAULT_STORE_PATH, strategy: Optional[str] = None) -> pd.DataFrame:
+    """运行列表（按开始时间排序）"""
+    with _read_connection(path) as conn:
+        sql = 'SELECT run_id, strategy, params, started_at, finished_at, symbols FROM runs'
+        args: List = []
+        if strategy is not None:
+            sql += ' WHERE strategy = ?'
+            args.append(strategy)
+        return pd.read_sql_query(sql + ' ORDER BY started_at', conn, params=args)
+
+
+def load_summaries(
+    path: str = DEFAULT_STORE_PATH,
+    run_id: Optional[str] = None,
+    strategy: Optional[str] = None
+) -> pd.DataFrame:
+    """汇总指标表：run_id / strategy / symbol + 各指标列"""
+    sql = 'SELECT run_id, strategy, symbol, metrics FROM summaries'
+    clauses, args = [], []
+    if run_id is not None:
+        clauses.append('run_id = ?')
+        args.append(run_id)
+    if strategy is not None:
+        clauses.append('strategy = ?')
+        args.append(strategy)
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    with _read_connection(path) as conn:
+        rows = conn.execute(sql + ' ORDER BY rowid', args).fetchall()
+    records = []
+    for rid, strat, symbol, metrics in rows:
+        record = {'run_id': rid, 'strategy': strat, 'symbol': symbol}
+        record.update({k: v for k, v in json.loads(metrics).items() if k not in record})
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def load_frame(path: str, run_id: str, symbol: str, kind: str) -> Optional[pd.DataFrame]:
+    """读取某只股票的 trades / equity / signals，未保存时返回 None"""
+    if kind not in FRAME_KINDS:
+        raise ValueError(f'kind 必须是 {FRAME_KINDS} 之一: {kind}')
+    with _read_connection(path) as conn:
+        row = conn.execute(
+            'SELECT format, meta, payload FROM frames WHERE run_id = ? AND symbol = ? AND kind = ?',
+            (run_id, symbol, kind)).fetchone()
+    if row is None:
+        return None
+    fmt, meta, payload = row
+    return decode_frame(fmt, json.loads(meta), payload)
@@ -0,0 +1,307 @@
+"""
+实时扫描的信号历史库
+
+实时扫描器每个周期往历史 CSV 追加信号、整文件重写 summary / positions JSON，
+分析脚本再把所有 summary_*.json 逐个解析一遍；15 分钟一轮跑几个月后，分析越来越慢。
+这里把扫描记录、信号和模拟持仓放进一个 SQLite（WAL）文件：
+
+- scan_runs: 每轮扫描一行（strategy / scan_time / 信号数 / 持仓数 / 统计 JSON）
+- signals:   每个信号一行，常用字段单独成列，完整记录存 payload(JSON)；
+             索引 (symbol, signal_date, strategy)、(strategy, side, scan_time)
+- positions: (strategy, symbol) -> 当前模拟持仓，每轮整体替换
+
+一轮扫描的 scan_runs / signals / positions 在同一个 BEGIN IMMEDIATE 事务里写入，
+扫描进程中途退出不会留下半轮数据；分析用 SQL 聚合（signal_frequency / daily_counts / type_counts），
+不再把全部历史读进内存。
+
+用法：
+    history = SignalHistory('results/signal_history.sqlite')
+    history.record_scan('volume_breakout', buy_signals + sell_signals, stats={'error_count': 0},
+                        positions={symbol: asdict(pos) for symbol, pos in positions.items()})
+    history.load_positions('volume_breakout')
+    history.signal_frequency('chan_realtime', side='BUY', limit=20)
+"""
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from core.storage import connect, json_default, transaction
+
+
+DEFAULT_PATH = 'results/signal_history.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    strategy TEXT,
+    scan_time TEXT,
+    signal_count INTEGER,
+    position_count INTEGER,
+    stats TEXT
+);
+CREATE INDEX IF NOT EXISTS scan_runs_time ON scan_runs (strategy, scan_time);
+CREATE TABLE IF NOT EXISTS signals (
+    run_id INTEGER,
+    strategy TEXT,
+    scan_time TEXT,
+    symbol TEXT,
+    name TEXT,
+    side TEXT,
+    signal_date TEXT,
+    signal_type TEXT,
+    price REAL,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS signals_symbol ON signals (symbol, signal_date, strategy);
+CREATE INDEX IF NOT EXISTS signals_side ON signals (strategy, side, scan_time);
+CREATE INDEX IF NOT EXISTS signals_run ON signals (run_id);
+CREATE TABLE IF NOT EXISTS positions (
+    strategy TEXT,
+    symbol TEXT,
+    shares REAL,
+    entry_price REAL,
+    entry_time TEXT,
+    peak_price REAL,
+    peak_profit_pct REAL,
+    updated_at TEXT,
+    PRIMARY KEY (strategy, symbol)
+);
+"""
+
+_POSITION_FIELDS = ('shares', 'entry_price', 'entry_time', 'peak_price', 'peak_profit_pct')
+
+
+def _signal_row(run_id: int, strategy: str, scan_time: str, record: Dict) -> tuple:
+    """
+    信号记录 -> signals 行
+
+    兼容两种扫描器的字段：缠论扫描 signal_date / signal_type / signal_price，
+    量能突破扫描 signal_time / reason / signal_price（卖点为 realtime_price）
+    """
+    signal_date = record.get('signal_date') or str(record.get('signal_time') or scan_time)
+    signal_type = record.get('signal_type') or record.get('reason')
+    price = record.get('signal_price', record.get('realtime_price'))
+    return (
+        run_id, strategy, str(record.get('scan_time') or scan_time), record['symbol'], record.get('name'),
+        str(record.get('side', '')).upper(), str(signal_date)[:10], signal_type,
+        None if price is None else float(price),
+        json.dumps(record, ensure_ascii=False, default=json_default),
+    )
+
+
+class SignalHistory:
+    """信号历史库（每次读写新开连接，可在多个扫描进程间共享同一文件）"""
+
+    def __init__(self, path: str = DEFAULT_PATH, timeout: float = 30.0):
+        """
+        Args:
+            path: SQLite 文件路径
+            timeout: 等待数据库锁的秒数
+        """
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect(self.path, self.timeout)
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return transaction(self.path, fn, self.timeout)
+
+    def _query(self, sql: str, params: Iterable = ()) -> pd.DataFrame:
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=list(params))
+
+    # ---------- 写入 ----------
+
+    def record_scan(
+        self,
+        strategy: str,
+        signals: List[Dict],
+        scan_time: Optional[str] = None,
+        stats: Optional[Dict] = None,
+        positions: Optional[Dict[str, Dict]] = None
+    ) -> int:
+        """
+        写入一轮扫描（单个事务）
+
+        Args:
+            strategy: 扫描策略名
+            signals: 信号记录，需含 symbol / side
+            scan_time: 扫描时间（ISO 格式），默认当前时间
+            stats: 本轮统计（股票数、错误数等）
+            positions: 本轮结束后的模拟持仓 symbol -> 字段；None 表示不更新持仓
+
+        Returns:
+            run_id
+        """
+        scan_time = scan_time or datetime.now().isoformat(timespec='seconds')
+        stats_text = json.dumps(stats or {}, ensure_ascii=False, default=json_default)
+
+        def write(conn):
+            cur = conn.execute(
+                'INSERT INTO scan_runs (strategy, scan_time, signal_count, position_count, stats) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (strategy, scan_time, len(signals), None if positions is None else len(positions), stats_text))
+            run_id = cur.lastrowid
+            conn.executemany(
+                'INSERT INTO signals (run_id, strategy, scan_time, symbol, name, side, signal_date, '
+                'signal_type, price, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [_signal_row(run_id, strategy, scan_time, record) for record in signals])
+            if positions is not None:
+                conn.execute('DELETE FROM positions WHERE strategy = ?', (strategy,))
+                conn.executemany(
+                    'INSERT INTO positions (strategy, symbol, shares, entry_price, entry_time, peak_price, '
+                    'peak_profit_pct, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(strategy, symbol) + tuple(p.get(f) for f in _POSITION_FIELDS) + (scan_time,)
+                     for symbol, p in positions.items()])
+            return run_id
+
+        return self._transaction(write)
+
+    # ---------- 读取 ----------
+
+    def has_positions(self, strategy: str) -> bool:
+        """是否写入过持仓（哪怕是空仓），用于判断是否需要从旧的 positions JSON 迁移"""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT 1 FROM scan_runs WHERE strategy = ? AND position_count IS NOT NULL LIMIT 1',
+                               (strategy,)).fetchone()
+        return row is not None
+
+    def load_positions(self, strategy: str) -> Dict[str, Dict]:
+        """symbol -> 持仓字段"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT symbol, {', '.join(_POSITION_FIELDS)} FROM positions WHERE strategy = ? ORDER BY symbol",
+                (strategy,)).fetchall()
+        return {row[0]: dict(zip(_POSITION_FIELDS, row[1:])) for row in rows}
+
+    def latest_run(self, strategy: str) -> Optional[Dict]:
+        """最近一轮扫描：统计字段 + signals 列表（替代 summary_latest.json）"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT run_id, scan_time, stats FROM scan_runs WHERE strategy = ? ORDER BY run_id DESC LIMIT 1',
+                (strategy,)).fetchone()
+            if row is None:
+                return None
+            payloads = conn.execute('SELECT payload FROM signals WHERE run_id = ? ORDER BY rowid',
+                                    (row[0],)).fetchall()
+        summary = {'run_id': row[0], 'scan_time': row[1]}
+        summary.update(json.loads(row[2]))
+        summary['signals'] = [json.loads(p[0]) for p in payloads]
+        return summary
+
+    def signals(
+        self,
+        strategy: Optional[str] = None,
+        symbol: Optional[str] = None,
+        side: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> pd.DataFrame:
+        """按条件取信号明细（since / until 为扫描时间，闭区间按字符串比较）"""
+        where, params = self._where(strategy, side, since, until)
+        if symbol:
+            where.append('symbol = ?')
+            params.append(symbol)
+        return self._query(
+            'SELECT run_id, strategy, scan_time, symbol, name, side, signal_date, signal_type, price '
+            f'FROM signals {self._clause(where)} ORDER BY scan_time, rowid', params)
+
+    def scan_count(self, strategy: Optional[str] = None, since: Optional[str] = None) -> int:
+        where, params = self._where(strategy, None, since, None)
+        with closing(self._connect()) as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM scan_runs {self._clause(where)}', params).fetchone()[0]
+
+    # ---------- 聚合 ----------
+
+    def signal_frequency(
+        self,
+        strategy: Optional[str] = None,
+        side: Optional[str] = None,
+        since: Optional[str] = None,
+        limit: Optional[int] = 20,
+        recent: int = 3
+    ) -> pd.DataFrame:
+        """
+        每只股票的信号次数（按次数降序）
+
+        Returns:
+            symbol / side / count / avg_price / first_scan / last_scan / recent（最近 recent 次 'MMDD@价格'）
+        """
+        where, params = self._where(strategy, side, since, None)
+        sql = f"""
+            WITH picked AS (
+                SELECT symbol, side, scan_time, price,
+                       ROW_NUMBER() OVER (PARTITION BY symbol, side ORDER BY scan_time DESC, rowid DESC) AS rn
+                FROM signals {self._clause(where)}
+            )
+            SELECT symbol, side, COUNT(*) AS count, AVG(price) AS avg_price,
+                   MIN(scan_time) AS first_scan, MAX(scan_time) AS last_scan,
+                   GROUP_CONCAT(CASE WHEN rn <= ? THEN
+                       substr(scan_time, 6, 2) || substr(scan_time, 9, 2) || '@' || price END, ', ') AS recent
+            FROM picked
+            GROUP BY symbol, side
+            ORDER BY count DESC, symbol
+        """
+        params.append(int(recent))
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        return self._query(sql, params)
+
+    def daily_counts(self, strategy: Optional[str] = None, since: Optional[str] = None) -> pd.DataFrame:
+        """按扫描日期统计买卖信号数：date / BUY / SELL"""
+        where, params = self._where(strategy, None, since, None)
+        df = self._query(
+            f"SELECT substr(scan_time, 1, 10) AS date, "
+            f"SUM(side = 'BUY') AS BUY, SUM(side = 'SELL') AS SELL "
+            f"FROM signals {self._clause(where)} GROUP BY date ORDER BY date", params)
+        return df
+
+    def type_counts(self, strategy: Optional[str] = None, since: Optional[str] = None) -> pd.DataFrame:
+        """side / signal_type / count"""
+        where, params = self._where(strategy, None, since, None)
+        return self._query(
+            f'SELECT side, signal_type, COUNT(*) AS count FROM signals {self._clause(where)} '
+            f'GROUP BY side, signal_type ORDER BY side, count DESC', params)
+
+    def overview(self, strategy: Optional[str] = None, since: Optional[str] = None) -> Dict[str, int]:
+        """信号总数、出现过买 / 卖点的股票数、买卖都出现过的股票数"""
+        where, params = self._where(strategy, None, since, None)
+        sql = f"""
+            WITH per_symbol AS (
+                SELECT symbol, SUM(side = 'BUY') AS buys, SUM(side = 'SELL') AS sells
+                FROM signals {self._clause(where)} GROUP BY symbol
+            )
+            SELECT COALESCE(SUM(buys), 0), SUM(buys > 0), COALESCE(SUM(sells), 0), SUM(sells > 0),
+                   SUM(buys > 0 AND sells > 0)
+            FROM per_symbol
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(sql, params).fetchone()
+        keys = ('buy_signals', 'buy_symbols', 'sell_signals', 'sell_symbols', 'both_symbols')
+        return {key: int(value or 0) for key, value in zip(keys, row)}
+
+    @staticmethod
+    def _where(strategy, side, since, until):
+        where, params = [], []
+        for column, op, value in (('strategy', '=', strategy), ('side', '=', side and side.upper()),
+                                  ('scan_time', '>=', since), ('scan_time', '<=', until)):
+            if value:
+                where.append(f'{column} {op} ?')
+                params.append(value)
+        return where, params
+
+    @staticmethod
+    def _clause(where: List[str]) -> str:
+        return f"WHERE {' AND '.join(where)}" if where else ''
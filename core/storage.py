@@ -0,0 +1,74 @@
+"""
+本地存储共用工具：SQLite 连接与事务、JSON 序列化
+
+- connect(): WAL + synchronous=NORMAL 的连接，多个进程可共享同一文件；
+  默认 isolation_level=None，事务由调用方显式开启（见 transaction()）
+- transaction(): 新开连接，在 BEGIN IMMEDIATE 事务里执行 fn(conn)，出错回滚
+- json_default(): json.dumps 的 default，处理 numpy 标量 / 数组、时间、路径、dataclass
+
+任务队列（job_queue）、信号历史库（signal_history）、结果库（results_store）、
+检查点日志（universe_runner）和图表缓存键（chart_farm）共用这里的实现。
+"""
+import sqlite3
+from contextlib import closing
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+from pathlib import PurePath
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+
+def connect(path: str, timeout: float = 5.0, autocommit: bool = True) -> sqlite3.Connection:
+    """
+    打开 WAL 模式的 SQLite 连接
+
+    Args:
+        timeout: 等待数据库锁的秒数
+        autocommit: True 时 isolation_level=None，由调用方显式 BEGIN；
+            False 时沿用 sqlite3 的隐式事务，调用方按批 commit()
+    """
+    if autocommit:
+        conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    else:
+        conn = sqlite3.connect(path, timeout=timeout)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def transaction(path: str, fn: Callable[[sqlite3.Connection], Any], timeout: float = 5.0) -> Any:
+    """新开连接，在 BEGIN IMMEDIATE 事务里执行 fn(conn) 并提交；fn 抛异常时回滚后重新抛出"""
+    with closing(connect(path, timeout)) as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            value = fn(conn)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return value
+
+
+def json_default(value, strict: bool = False):
+    """
+    json.dumps 的 default
+
+    Args:
+        strict: True 时无法识别的类型抛 TypeError（用于内容哈希，避免 str() 带上对象地址）；
+            False 时转成字符串
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, PurePath):
+        return str(value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if strict:
+        raise TypeError(f"无法序列化: {type(value).__name__}")
+    return str(value)
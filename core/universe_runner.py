@@ -0,0 +1,260 @@
+"""
+可断点续跑的全市场回测执行器
+
+逐只股票回测时结果原先只保存在内存里，跑到一半崩溃或 Ctrl-C 就全部丢失。
+这里每完成一只股票就向检查点日志（JSONL，逐行追加并 flush）写一行：
+
+    {"symbol": ..., "key": ..., "status": "ok" | "error", "result": ..., "finished_at": ...}
+
+- key = sha1(代码版本, 参数, 该股票的数据指纹)，重启时 key 相同且 status 为 ok 的股票直接跳过，
+  结果从日志恢复；代码、参数或数据任一变化都会重跑
+- 代码版本：code_files 中各源文件内容的摘要（默认取回测函数所在文件）
+- 数据指纹：默认按文件路径取 (大小, 修改时间)，与 chart_farm 的源文件指纹同口径
+- 失败的股票记为 error，下次运行会重试
+- 分片：--shard k/N 按代码的稳定哈希把股票分到 N 片，第 k 片（1..N）只跑自己那部分，
+  每片写自己的日志文件；collect() 读取全部分片日志合并结果，可在任一机器上汇总
+
+回测函数的返回值需可 JSON 序列化（时间等会转成字符串）；返回 None 表示该股票已处理但无结果
+（如数据不足），同样记为完成。从日志恢复的结果经过 JSON 往返，时间字段为 ISO 字符串。
+
+用法：
+    runner = UniverseRunner('ma60_pullback', backtest_one, params=vars(args), shard=parse_shard(args.shard))
+    results = runner.run(files)          # 本分片全部结果（含恢复的）
+    merged = runner.collect(files)       # 所有分片已完成的结果
+"""
+import glob
+import hashlib
+import inspect
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core import profiling
+from core.log import configure_worker, get_logger, worker_logging
+from core.storage import json_default
+
+
+logger = get_logger('core.universe_runner')
+
+DEFAULT_CHECKPOINT_DIR = 'results/checkpoints'
+
+
+def parse_shard(text: Optional[str]) -> Tuple[int, int]:
+    """'k/N' -> (k, N)，k 从 1 开始；空值表示不分片 (1, 1)"""
+    if not text:
+        return 1, 1
+    try:
+        k, n = (int(part) for part in str(text).split('/'))
+    except ValueError:
+        raise ValueError(f"分片格式应为 k/N，如 1/4: {text!r}") from None
+    if n < 1 or not 1 <= k <= n:
+        raise ValueError(f"分片序号超出范围: {text!r}")
+    return k, n
+
+
+def shard_of(symbol: str, shards: int) -> int:
+    """股票所属分片（1..shards），只取决于代码本身，与列表顺序无关"""
+    return zlib.crc32(str(symbol).encode('utf-8')) % max(1, int(shards)) + 1
+
+
+def symbol_from_path(item: Any) -> str:
+    """'data_cache/000001.SZ_20y_1d_forward.csv' -> '000001.SZ'；非路径原样返回"""
+    text = str(item)
+    if os.sep in text or '/' in text or text.endswith('.csv'):
+        return os.path.basename(text).split('_')[0]
+    return text
+
+
+def file_fingerprint(item: Any) -> str:
+    """数据指纹：item 是已存在的文件时取 (大小, 修改时间)，否则为空"""
+    path = str(item)
+    if os.path.isfile(path):
+        st = os.stat(path)
+        return f'{st.st_size}:{st.st_mtime_ns}'
+    return ''
+
+
+def code_version(files: Sequence[Any]) -> str:
+    """源文件内容摘要（元素可以是路径、模块或函数）"""
+    paths = {f if isinstance(f, str) else inspect.getsourcefile(getattr(f, 'func', f)) for f in files}
+    digest = hashlib.sha1()
+    for path in sorted(p for p in paths if p):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class UniverseRunner:
+    """带检查点日志与分片的逐股回测执行器"""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        params: Optional[Dict] = None,
+        code_files: Sequence[Any] = (),
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+        shard: Tuple[int, int] = (1, 1),
+        workers: int = 1,
+        symbol_of: Callable[[Any], str] = symbol_from_path,
+        data_key: Callable[[Any], str] = file_fingerprint,
+        fresh: bool = False
+    ):
+        """
+        Args:
+            name: 任务名（日志文件前缀）
+            fn: 单只股票回测函数 fn(item) -> 可 JSON 序列化的结果或 None；workers > 1 时需可 pickle
+            params: 影响结果的参数（参与 key 计算）
+            code_files: 参与代码版本计算的源文件（路径、模块或函数），默认取 fn 所在文件
+            checkpoint_dir: 日志目录
+            shard: (k, N) 分片
+            workers: 进程数，1 为串行
+            symbol_of: item -> 股票代码
+            data_key: item -> 数据指纹
+            fresh: 忽略已有日志全部重跑
+        """
+        self.name = name
+        self.fn = fn
+        self.params = dict(params or {})
+        self.checkpoint_dir = checkpoint_dir
+        self.shard = shard
+        self.workers = max(1, int(workers))
+        self.symbol_of = symbol_of
+        self.data_key = data_key
+        self.fresh = fresh
+
+        self.code_version = code_version(code_files or [fn])
+        self.params_key = json.dumps(self.params, sort_keys=True, ensure_ascii=False, default=json_default)
+        self.stats = {'done': 0, 'restored': 0, 'failed': 0, 'other_shards': 0}
+
+    @property
+    def journal_path(self) -> str:
+        k, n = self.shard
+        return os.path.join(self.checkpoint_dir, f'{self.name}.shard{k}of{n}.jsonl')
+
+    @property
+    def run_key(self) -> str:
+        """代码版本 + 参数的摘要（不含数据指纹），可用作结果库的 run_id 后缀"""
+        return hashlib.sha1(f'{self.code_version}\x1f{self.params_key}'.encode('utf-8')).hexdigest()[:12]
+
+    def item_key(self, item: Any) -> str:
+        raw = '\x1f'.join([self.code_version, self.params_key, self.data_key(item)])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _read_journals(self, paths: Iterable[str]) -> Dict[str, Dict]:
+        """symbol -> 最后一条成功记录"""
+        done: Dict[str, Dict] = {}
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 中断时写了一半的行
+                    if entry.get('status') == 'ok':
+                        done[entry['symbol']] = entry
+                    else:
+                        done.pop(entry.get('symbol'), None)
+        return done
+
+    def _all_journals(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.checkpoint_dir, f'{self.name}.shard*of*.jsonl')))
+
+    def run(self, items: Sequence[Any], progress_every: int = 20) -> List[Any]:
+        """
+        运行本分片的股票，跳过日志中已完成的
+
+        Returns:
+            本分片全部结果（按 items 顺序，含从日志恢复的，不含 None）
+        """
+        k, n = self.shard
+        mine = [item for item in items if shard_of(self.symbol_of(item), n) == k]
+        self.stats['other_shards'] = len(items) - len(mine)
+
+        done = {} if self.fresh else self._read_journals([self.journal_path])
+        results: Dict[str, Any] = {}
+        pending = []
+        for item in mine:
+            symbol, key = self.symbol_of(item), self.item_key(item)
+            entry = done.get(symbol)
+            if entry is not None and entry.get('key') == key:
+                results[symbol] = entry.get('result')
+                self.stats['restored'] += 1
+            else:
+                pending.append((item, symbol, key))
+
+        if self.stats['restored']:
+            logger.info("[%s] 从检查点恢复 %d 只，待运行 %d 只", self.name, self.stats['restored'], len(pending))
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            for count, (symbol, key, result, error) in enumerate(self._execute(pending), 1):
+                entry = {'symbol': symbol, 'key': key, 'finished_at': datetime.now().isoformat()}
+                if error is None:
+                    entry.update(status='ok', result=result)
+                    self.stats['done'] += 1
+                else:
+                    entry.update(status='error', error=error)
+                    self.stats['failed'] += 1
+                    logger.warning("  %s 失败: %s", symbol, error)
+                line = json.dumps(entry, ensure_ascii=False, default=json_default)
+                journal.write(line + '\n')
+                journal.flush()
+                if error is None:
+                    # 与恢复的结果同样经过 JSON 往返，新跑与续跑的输出一致
+                    results[symbol] = json.loads(line)['result']
+                if progress_every and (count % progress_every == 0 or count == len(pending)):
+                    logger.info("[%s] 进度 %d/%d", self.name, count, len(pending))
+
+        return self._ordered(mine, results)
+
+    def _execute(self, pending):
+        """逐个产出 (symbol, key, result, error)"""
+        if self.workers == 1 or len(pending) <= 1:
+            for item, symbol, key in pending:
+                try:
+                    yield symbol, key, self.fn(item), None
+                except Exception as exc:  # noqa: BLE001 - 记入日志，下次重试
+                    yield symbol, key, None, repr(exc)
+            return
+        with worker_logging() as log_args, ProcessPoolExecutor(
+            max_workers=self.workers, initializer=configure_worker, initargs=log_args
+        ) as pool:
+            futures = {profiling.pool_submit(pool, self.fn, item): (symbol, key) for item, symbol, key in pending}
+            for future in as_completed(futures):
+                symbol, key = futures[future]
+                try:
+                    yield symbol, key, profiling.pool_result(future), None
+                except Exception as exc:  # noqa: BLE001
+                    yield symbol, key, None, repr(exc)
+
+    def collect(self, items: Sequence[Any]) -> List[Any]:
+        """
+        合并所有分片日志中 key 与当前一致的结果
+
+        Returns:
+            结果列表（按 items 顺序，不含 None）；未完成的股票数记在 stats['missing']
+        """
+        done = self._read_journals(self._all_journals())
+        results = {}
+        for item in items:
+            symbol = self.symbol_of(item)
+            entry = done.get(symbol)
+            if entry is not None and entry.get('key') == self.item_key(item):
+                results[symbol] = entry.get('result')
+        self.stats['missing'] = len(items) - len(results)
+        return self._ordered(items, results)
+
+    def _ordered(self, items: Sequence[Any], results: Dict[str, Any]) -> List[Any]:
+        ordered = []
+        for item in items:
+            result = results.get(self.symbol_of(item))
+            if result is not None:
+                ordered.append(result)
+        return ordered
@@ -0,0 +1,160 @@
+"""
+复权因子存储与按需复权
+
+K线只以原始价格存储一份，并附带每根K线的累计复权因子列 adj_factor。
+前复权 / 后复权 / 不复权都是读取时的向量化视图：
+
+    前复权价格 = 原始价格 × adj_factor / adj_factor[-1]
+    后复权价格 = 原始价格 × adj_factor / adj_factor[0]
+
+adj_factor 只有相对大小有意义（随除权除息单调递增）。
+"""
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+ADJ_FACTOR_COL = 'adj_factor'
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+ADJUST_MODES = ('none', 'forward', 'backward', 'auto')
+
+
+def compute_adjustment_factor(data: pd.DataFrame) -> pd.Series:
+    """
+    从原始K线推导累计复权因子
+
+    优先级：
+    1. 'Adj Close' 列（yfinance auto_adjust=False）：因子 = Adj Close / Close
+    2. 'Dividends' 列：按除息日 (1 - 分红 / 前收盘) 累乘
+    3. 无公司行为信息时因子恒为 1（不复权）
+
+    Args:
+        data: 原始K线数据
+
+    Returns:
+        与 data 同索引的因子序列
+    """
+    close = data['Close'].to_numpy(dtype=float)
+
+    if 'Adj Close' in data.columns:
+        adj_close = data['Adj Close'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factor = adj_close / close
+        factor = pd.Series(factor, index=data.index).replace([np.inf, -np.inf], np.nan)
+        return factor.ffill().bfill().fillna(1.0)
+
+    if 'Dividends' in data.columns:
+        dividends = data['Dividends'].fillna(0).to_numpy(dtype=float)
+        prev_close = np.concatenate([[np.nan], close[:-1]])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = 1.0 - dividends / prev_close
+        ratio = np.where((dividends > 0) & np.isfinite(ratio) & (ratio > 0), ratio, 1.0)
+        return pd.Series(np.cumprod(1.0 / ratio), index=data.index)
+
+    return pd.Series(1.0, index=data.index)
+
+
+def attach_adjustment_factor(data: pd.DataFrame) -> pd.DataFrame:
+    """返回原始价格 + adj_factor 列的数据（已有因子列时原样返回）"""
+    if ADJ_FACTOR_COL in data.columns:
+        return data
+    raw = data.copy()
+    raw[ADJ_FACTOR_COL] = compute_adjustment_factor(raw)
+    if 'Adj Close' in raw.columns:
+        raw = raw.drop(columns=['Adj Close'])
+    return raw
+
+
+def adjust_prices(raw: pd.DataFrame, adjust: str = 'forward') -> pd.DataFrame:
+    """
+    由原始价格 + 复权因子计算复权视图
+
+    Args:
+        raw: 含 adj_factor 列的原始K线（无该列时视为因子恒为1）
+        adjust: 'forward'(前复权), 'backward'(后复权), 'none'(不复权), 'auto'(同前复权)
+
+    Returns:
+        复权后的K线（不含 adj_factor 列）
+    """
+    if adjust not in ADJUST_MODES:
+        raise ValueError(f"不支持的复权方式: {adjust}")
+
+    view = raw.drop(columns=[ADJ_FACTOR_COL], errors='ignore')
+    if adjust == 'none' or ADJ_FACTOR_COL not in raw.columns or raw.empty:
+        return view.copy()
+
+    factor = raw[ADJ_FACTOR_COL].to_numpy(dtype=float)
+    base = factor[0] if adjust == 'backward' else factor[-1]
+    scale = factor / base
+
+    view = view.copy()
+    columns = [col for col in PRICE_COLUMNS if col in view.columns]
+    view[columns] = view[columns].to_numpy(dtype=float) * scale[:, None]
+    return view
+
+
+def raw_cache_path(cache_dir: str, symbol: str, period: str, interval: str) -> str:
+    """原始价格 + 复权因子的缓存文件路径"""
+    return os.path.join(cache_dir, f'{symbol}_{period}_{interval}_raw.csv')
+
+
+def legacy_cache_path(cache_dir: str, symbol: str, period: str, interval: str, adjust: str) -> str:
+    """旧版按复权方式分别缓存的文件路径"""
+    return os.path.join(cache_dir, f'{symbol}_{period}_{interval}_{adjust}.csv')
+
+
+def read_bars_csv(path: str) -> pd.DataFrame:
+    """读取缓存CSV，索引统一为无时区的 datetime"""
+    data = pd.read_csv(path, index_col=0)
+    index = pd.to_datetime(data.index, utc=True).tz_localize(None)
+    data.index = index
+    data.index.name = 'datetime'
+    return data
+
+
+def load_adjusted_cache(
+    cache_dir: str,
+    symbol: str,
+    period: str = '20y',
+    interval: str = '1d',
+    adjust: str = 'forward'
+) -> Optional[pd.DataFrame]:
+    """
+    读取缓存并返回指定复权方式的视图
+
+    优先读取原始价格 + 因子文件，不存在时回退到旧版 {adjust} 缓存文件。
+
+    Returns:
+        K线数据，缓存不存在时返回 None
+    """
+    path = raw_cache_path(cache_dir, symbol, period, interval)
+    if os.path.exists(path):
+        return adjust_prices(read_bars_csv(path), adjust)
+
+    path = legacy_cache_path(cache_dir, symbol, period, interval, adjust)
+    if os.path.exists(path):
+        return read_bars_csv(path)
+
+    return None
+
+
+def discover_cached_symbols(
+    cache_dir: str,
+    period: str = '20y',
+    interval: str = '1d',
+    adjust: str = 'forward'
+) -> List[str]:
+    """列出缓存目录中可读取为指定复权方式的股票代码（原始+因子文件或旧版文件）"""
+    if not os.path.exists(cache_dir):
+        return []
+
+    suffixes = (f'_{period}_{interval}_raw.csv', f'_{period}_{interval}_{adjust}.csv')
+    symbols = set()
+    for filename in os.listdir(cache_dir):
+        for suffix in suffixes:
+            if filename.endswith(suffix):
+                symbols.add(filename[:-len(suffix)])
+                break
+    return sorted(symbols)
@@ -0,0 +1,256 @@
+"""
+多周期K线金字塔存储
+
+以最细粒度K线（默认5分钟）为基础，入库时按交易时段聚合出 15m/30m/60m/1d/1w 各级K线并落盘，
+读取时直接取所需周期，无需每次运行都 resample。
+
+聚合规则：
+- 分钟K线时间戳为K线结束时间（与 AkShare / 新浪数据一致）
+- 日内周期按"交易分钟"累计切分，不跨午休/夜盘边界错位：
+  A股 60 分钟K线为 10:30 / 11:30 / 14:00 / 15:00
+- 期货夜盘归属下一交易日（周五夜盘归属下周一），日线/周线按交易日聚合
+- 日线标签为交易日 00:00，周线标签为该周周五（与 resample('W-FRI') 一致）
+
+增量入库时只重算受影响交易周内的各级K线，再追加到已有数据之后。
+交易时段与交易日由 core.calendar 统一提供。
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.calendar import TradingCalendar, load_calendar
+
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+INTRADAY_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '30m': 30, '60m': 60}
+PYRAMID_LEVELS = ('5m', '15m', '30m', '60m', '1d', '1w')
+
+
+def normalize_interval(interval: str) -> str:
+    """统一周期写法：'15min' -> '15m'，'1h' -> '60m'，'D' -> '1d'，'W' -> '1w'"""
+    value = interval.strip().lower()
+    aliases = {'1h': '60m', 'd': '1d', 'day': '1d', 'w': '1w', 'week': '1w', '1wk': '1w'}
+    if value in aliases:
+        return aliases[value]
+    if value.endswith('min'):
+        value = value[:-3] + 'm'
+    if value not in INTRADAY_MINUTES and value not in ('1d', '1w'):
+        raise ValueError(f"不支持的周期: {interval}")
+    return value
+
+
+def _get_calendar(
+    session: Union[str, Sequence[Tuple[int, int]]],
+    holidays: Optional[Iterable] = None
+) -> TradingCalendar:
+    """未指定节假日时使用带本地交易日文件的共享日历"""
+    if holidays is None and isinstance(session, str):
+        return load_calendar(session)
+    return TradingCalendar(session, holidays=holidays)
+
+
+def _reduce_sorted(data: pd.DataFrame, keys: np.ndarray, labels: np.ndarray, index_name: str) -> pd.DataFrame:
+    """keys 已按时间单调不减，按连续相同 key 分段做 OHLCV 聚合"""
+    if len(keys) == 0:
+        empty = pd.DataFrame(columns=[c for c in data.columns], dtype=float)
+        empty.index = pd.DatetimeIndex([], name=index_name)
+        return empty
+
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    ends = np.concatenate([starts[1:], [len(keys)]]) - 1
+
+    out = {}
+    for col in data.columns:
+        values = data[col].to_numpy(dtype=float)
+        if col == 'Open':
+            out[col] = values[starts]
+        elif col == 'High':
+            out[col] = np.maximum.reduceat(values, starts)
+        elif col == 'Low':
+            out[col] = np.minimum.reduceat(values, starts)
+        elif col == 'Close':
+            out[col] = values[ends]
+        else:
+            out[col] = np.add.reduceat(values, starts)
+
+    result = pd.DataFrame(out, index=pd.DatetimeIndex(labels[starts], name=index_name))
+    return result
+
+
+def aggregate_bars(
+    bars: pd.DataFrame,
+    interval: str,
+    session: Union[str, Sequence[Tuple[int, int]]] = 'cn_stock',
+    holidays: Optional[Iterable] = None
+) -> pd.DataFrame:
+    """
+    按交易时段把细粒度K线聚合为更高周期
+
+    Args:
+        bars: 按时间升序的K线（DatetimeIndex 为K线结束时间），含 Open/High/Low/Close/Volume，
+              可选 Amount 列按求和聚合，其余列丢弃
+        interval: 目标周期 '5m'/'15m'/'30m'/'60m'/'1d'/'1w'
+        session: 交易时段配置名（见 core/calendar_sessions.json）或自定义时段列表
+        holidays: 节假日列表，默认使用本地交易日文件（不存在时只跳过周末）
+
+    Returns:
+        聚合后的K线，索引名与输入一致
+    """
+    interval = normalize_interval(interval)
+    calendar = _get_calendar(session, holidays)
+    index_name = bars.index.name or 'datetime'
+
+    columns = [c for c in OHLCV_COLUMNS + ['Amount'] if c in bars.columns]
+    data = bars[columns].dropna(subset=[c for c in OHLCV_COLUMNS if c in columns])
+    index = pd.DatetimeIndex(data.index)
+
+    trading_dates = calendar.bar_trading_dates(index)
+
+    if interval == '1d':
+        keys = trading_dates.astype(np.int64)
+        labels = trading_dates.astype('datetime64[ns]')
+    elif interval == '1w':
+        day_number = trading_dates.astype(np.int64)
+        weekday = (day_number + 3) % 7          # 1970-01-01 为周四
+        friday = day_number - weekday + 4
+        keys = friday
+        labels = friday.astype('datetime64[D]').astype('datetime64[ns]')
+    else:
+        labels = calendar.bar_close(index, INTRADAY_MINUTES[interval])
+        keys = labels.astype(np.int64)
+
+    result = _reduce_sorted(data, keys, labels, index_name)
+    result.index = result.index.as_unit(index.unit)
+    return result
+
+
+def normalize_bars(bars: pd.DataFrame) -> pd.DataFrame:
+    """统一列名（open -> Open）和索引（datetime 列 -> DatetimeIndex），按时间升序去重"""
+    df = bars.rename(columns={c: c.capitalize() for c in bars.columns if c.lower() in ('open', 'high', 'low', 'close', 'volume', 'amount')})
+    for col in ('datetime', 'DateTime', 'day'):
+        if col in df.columns:
+            df = df.set_index(col)
+            break
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.index), name='datetime')
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df
+
+
+class BarStore:
+    """按 {root}/{interval}/{symbol}.csv 存放的多周期K线金字塔"""
+
+    def __init__(
+        self,
+        root: str = 'data_cache/bars',
+        base_interval: str = '5m',
+        levels: Sequence[str] = PYRAMID_LEVELS,
+        holidays: Optional[Iterable] = None
+    ):
+        """
+        Args:
+            root: 存储根目录
+            base_interval: 入库的最细周期
+            levels: 需要维护的周期（不低于 base_interval）
+            holidays: 节假日列表，默认使用本地交易日文件
+        """
+        self.root = root
+        self.base_interval = normalize_interval(base_interval)
+        base_minutes = INTRADAY_MINUTES[self.base_interval]
+        self.levels: List[str] = []
+        for level in levels:
+            level = normalize_interval(level)
+            if level in INTRADAY_MINUTES and (INTRADAY_MINUTES[level] < base_minutes or INTRADAY_MINUTES[level] % base_minutes):
+                continue
+            if level != self.base_interval:
+                self.levels.append(level)
+        self.holidays = list(holidays) if holidays is not None else None
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, f'{symbol}.csv')
+
+    def intervals(self) -> List[str]:
+        """可直接读取的周期"""
+        return [self.base_interval] + self.levels
+
+    def has(self, symbol: str, interval: str = None) -> bool:
+        return os.path.exists(self._path(symbol, normalize_interval(interval or self.base_interval)))
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        读取指定周期K线
+
+        Returns:
+            K线 DataFrame，未入库时返回 None
+        """
+        interval = normalize_interval(interval)
+        if interval != self.base_interval and interval not in self.levels:
+            raise ValueError(f"周期 {interval} 不在金字塔中: {self.intervals()}")
+        path = self._path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        data = pd.read_csv(path, index_col=0, parse_dates=True)
+        data.index.name = 'datetime'
+        if start is not None or end is not None:
+            data = data.loc[start:end]
+        return data
+
+    def _write(self, symbol: str, interval: str, data: pd.DataFrame):
+        path = self._path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data.to_csv(path)
+
+    def ingest(
+        self,
+        symbol: str,
+        bars: pd.DataFrame,
+        session: Union[str, Sequence[Tuple[int, int]]] = 'cn_stock'
+    ) -> Dict[str, int]:
+        """
+        写入最细周期K线并增量维护各级K线
+
+        只重算新K线所在交易周（及之后）的聚合K线，早于该周的已有K线原样保留。
+
+        Args:
+            symbol: 代码
+            bars: 新的最细周期K线（可与已有数据重叠，重叠部分以新数据为准）
+            session: 交易时段配置
+
+        Returns:
+            每个周期本次重写的K线条数
+        """
+        new_bars = normalize_bars(bars)
+        if new_bars.empty:
+            return {}
+
+        existing = self.read(symbol, self.base_interval)
+        if existing is not None and not existing.empty:
+            merged = pd.concat([existing[~existing.index.isin(new_bars.index)], new_bars]).sort_index()
+        else:
+            merged = new_bars
+        self._write(symbol, self.base_interval, merged)
+
+        calendar = _get_calendar(session, self.holidays)
+        trading_dates = calendar.bar_trading_dates(merged.index)
+        first_new_dates = calendar.bar_trading_dates(new_bars.index[:1])
+        first_day = first_new_dates[0].astype(np.int64)
+        week_start = first_day - (first_day + 3) % 7
+        tail = merged[trading_dates.astype(np.int64) >= week_start]
+
+        updated = {self.base_interval: len(new_bars)}
+        for level in self.levels:
+            agg = aggregate_bars(tail, level, session, self.holidays)
+            updated[level] = len(agg)
+            current = self.read(symbol, level)
+            if current is not None and not current.empty and not agg.empty:
+                agg = pd.concat([current[current.index < agg.index[0]], agg])
+            self._write(symbol, level, agg)
+        return updated
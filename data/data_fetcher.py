@@ -2,14 +2,32 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import time
 import os
 import pickle
 
+from core.log import get_logger
+from core.profiling import count, stage, timed
+from data.adjustment import adjust_prices, attach_adjustment_factor, raw_cache_path
+from data.providers import ProviderRegistry
+
+
+logger = get_logger('data.data_fetcher')
+
 
 class DataFetcher:
-    def __init__(self, cache_dir: str = 'data_cache', cache_days: int = 1, proxy: Optional[str] = None, retry_count: int = 3, retry_delay: float = 2.0):
+    # 免费 API 的请求频率上限（次/分钟）
+    PROVIDER_RATE_LIMITS = {
+        'twelve_data': 8,
+        'alpha_vantage': 5,
+        'polygon': 5,
+    }
+    REQUEST_TIMEOUT = 30
+    
+    def __init__(self, cache_dir: str = 'data_cache', cache_days: int = 1, proxy: Optional[str] = None, retry_count: int = 3, retry_delay: float = 2.0, provider_registry: Optional[ProviderRegistry] = None, pool_size: int = 8):
         """
         初始化数据获取器
         
@@ -19,20 +37,62 @@ class DataFetcher:
             proxy: 代理地址，如 'http://127.0.0.1:7890'
             retry_count: 重试次数
             retry_delay: 重试延迟（秒）
+            provider_registry: 数据源注册表，传入时使用其中的数据源和熔断状态（可在多个实例/线程间共享）
+            pool_size: 每个数据源 HTTP 连接池大小（并发获取时的最大复用连接数）
         """
         self.cache_dir = cache_dir
         self.cache_days = cache_days
         self.proxy = proxy
         self.retry_count = retry_count
         self.retry_delay = retry_delay
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        
+        if provider_registry is None:
+            provider_registry = ProviderRegistry()
+            self._register_default_providers(provider_registry)
+        self.providers = provider_registry
         
         if not os.path.exists(cache_dir):
             os.makedirs(cache_dir)
     
+    def _register_default_providers(self, registry: ProviderRegistry):
+        """注册默认回退链：yfinance -> Stooq -> Twelve Data -> Alpha Vantage -> Polygon.io"""
+        registry.register('yfinance', self._fetch_from_yfinance, max_attempts=self.retry_count)
+        registry.register('stooq', lambda symbol, start_date, end_date, period, interval: self._fetch_from_stooq(symbol, period))
+        registry.register('twelve_data', lambda symbol, start_date, end_date, period, interval: self._fetch_from_twelve_data(symbol, period),
+                          max_per_minute=self.PROVIDER_RATE_LIMITS['twelve_data'])
+        registry.register('alpha_vantage', lambda symbol, start_date, end_date, period, interval: self._fetch_from_alpha_vantage(symbol, period),
+                          max_per_minute=self.PROVIDER_RATE_LIMITS['alpha_vantage'])
+        registry.register('polygon', lambda symbol, start_date, end_date, period, interval: self._fetch_from_polygon(symbol, period),
+                          max_per_minute=self.PROVIDER_RATE_LIMITS['polygon'])
+    
+    def _get_session(self, provider: str):
+        """获取数据源共享的 requests.Session（keep-alive 连接池，线程间复用）"""
+        with self._sessions_lock:
+            session = self._sessions.get(provider)
+            if session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                if self.proxy:
+                    session.proxies.update({'http': self.proxy, 'https': self.proxy})
+                self._sessions[provider] = session
+            return session
+    
     def _get_cache_path(self, symbol: str, period: str, interval: str, adjust: str = "auto") -> str:
-        """获取缓存文件路径"""
+        """获取旧版（按复权方式分别存储）缓存文件路径"""
         return os.path.join(self.cache_dir, f'{symbol}_{period}_{interval}_{adjust}.csv')
     
+    def _get_raw_cache_path(self, symbol: str, period: str, interval: str) -> str:
+        """获取原始价格 + 复权因子缓存文件路径（所有复权方式共用）"""
+        return raw_cache_path(self.cache_dir, symbol, period, interval)
+    
     def _is_cache_valid(self, cache_path: str) -> bool:
         """检查缓存是否有效"""
         if not os.path.exists(cache_path):
@@ -43,23 +103,25 @@ class DataFetcher:
         
         return age.days < self.cache_days
     
+    @timed('fetch.read_cache')
     def _load_cache(self, cache_path: str) -> Optional[pd.DataFrame]:
         """从缓存加载数据"""
         try:
             data = pd.read_csv(cache_path, index_col=0, parse_dates=True)
-            print("  [OK] 从缓存加载数据")
+            logger.debug("  [OK] 从缓存加载数据: %s", cache_path)
             return data
         except Exception as e:
-            print(f"  [WARN] 加载缓存失败: {e}")
+            logger.warning("  [WARN] 加载缓存失败: %s", e)
             return None
     
+    @timed('fetch.write_cache')
     def _save_cache(self, data: pd.DataFrame, cache_path: str):
         """保存数据到缓存"""
         try:
             data.to_csv(cache_path)
-            print("  [OK] 数据已缓存到本地")
+            logger.debug("  [OK] 数据已缓存到本地: %s", cache_path)
         except Exception as e:
-            print(f"  [WARN] 保存缓存失败: {e}")
+            logger.warning("  [WARN] 保存缓存失败: %s", e)
     
     def _fetch_from_alpha_vantage(self, symbol: str, period: str = "1y") -> pd.DataFrame:
         """从 Alpha Vantage 获取股票数据"""
@@ -89,10 +151,10 @@ class DataFetcher:
             
             return data
         except ImportError:
-            print("  [WARN] 需要安装 alpha_vantage: python -m pip install alpha_vantage")
+            logger.warning("  [WARN] 需要安装 alpha_vantage: python -m pip install alpha_vantage")
             raise
         except Exception as e:
-            print(f"  [WARN] Alpha Vantage 获取失败: {e}")
+            logger.warning("  [WARN] Alpha Vantage 获取失败: %s", e)
             raise
     
     def _fetch_from_polygon(self, symbol: str, period: str = "1y") -> pd.DataFrame:
@@ -111,7 +173,7 @@ class DataFetcher:
             
             url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/day/{start_date.strftime('%Y-%m-%d')}/{end_date.strftime('%Y-%m-%d')}?apiKey={api_key}"
             
-            response = requests.get(url)
+            response = self._get_session('polygon').get(url, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             
             result = response.json()
@@ -139,10 +201,10 @@ class DataFetcher:
             
             return data
         except ImportError:
-            print("  [WARN] 需要安装 requests: python -m pip install requests")
+            logger.warning("  [WARN] 需要安装 requests: python -m pip install requests")
             raise
         except Exception as e:
-            print(f"  [WARN] Polygon.io 获取失败: {e}")
+            logger.warning("  [WARN] Polygon.io 获取失败: %s", e)
             raise
     
     def _fetch_from_stooq(self, symbol: str, period: str = "1y") -> pd.DataFrame:
@@ -156,7 +218,7 @@ class DataFetcher:
             # 获取日线数据
             url = f"https://stooq.com/q/d/l/?s={stooq_symbol}&i=d"
             
-            response = requests.get(url)
+            response = self._get_session('stooq').get(url, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             
             # Stooq 返回 CSV 格式数据
@@ -185,7 +247,7 @@ class DataFetcher:
             
             return data
         except Exception as e:
-            print(f"  [WARN] Stooq 获取失败: {e}")
+            logger.warning("  [WARN] Stooq 获取失败: %s", e)
             raise
     
     def _fetch_from_twelve_data(self, symbol: str, period: str = "1y") -> pd.DataFrame:
@@ -201,7 +263,7 @@ class DataFetcher:
             
             url = f"https://api.twelvedata.com/time_series?symbol={symbol}&interval=1day&outputsize=500&apikey={api_key}"
             
-            response = requests.get(url)
+            response = self._get_session('twelve_data').get(url, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             
             result = response.json()
@@ -236,62 +298,9 @@ class DataFetcher:
             
             return data
         except Exception as e:
-            print(f"  [WARN] Twelve Data 获取失败: {e}")
+            logger.warning("  [WARN] Twelve Data 获取失败: %s", e)
             raise
     
-    def _apply_adjustment(self, data: pd.DataFrame, adjust: str = "none") -> pd.DataFrame:
-        """
-        应用复权调整
-        
-        Args:
-            data: 原始数据
-            adjust: 复权方式，'forward'(前复权) 或 'backward'(后复权)
-        
-        Returns:
-            复权后的数据
-        """
-        if adjust == 'none':
-            return data
-        
-        data = data.copy()
-        
-        # 计算累计收益率（简单复权方法）
-        # 注意：这是一个简化的复权方法，真实的复权需要拆股、分红等历史数据
-        if adjust == 'forward':
-            # 前复权：以最新价格为基准，调整历史价格
-            latest_close = data['Close'].iloc[-1]
-            cumulative_returns = (1 + data['Close'].pct_change()).cumprod()
-            adjustment_factor = cumulative_returns.iloc[-1] / cumulative_returns
-            
-            # 填充NaN值（第一行）
-            adjustment_factor = adjustment_factor.fillna(1.0)
-            
-            for col in ['Open', 'High', 'Low', 'Close']:
-                data[col] = data[col] * adjustment_factor
-            
-            # 保留两位小数
-            for col in ['Open', 'High', 'Low', 'Close']:
-                data[col] = data[col].round(2)
-            
-        elif adjust == 'backward':
-            # 后复权：以历史价格为基准，调整未来价格
-            first_close = data['Close'].iloc[0]
-            cumulative_returns = (1 + data['Close'].pct_change()).cumprod()
-            adjustment_factor = cumulative_returns / cumulative_returns.iloc[0]
-            
-            # 填充NaN值（第一行）
-            adjustment_factor = adjustment_factor.fillna(1.0)
-            
-            for col in ['Open', 'High', 'Low', 'Close']:
-                data[col] = data[col] / adjustment_factor
-            
-            # 保留两位小数
-            for col in ['Open', 'High', 'Low', 'Close']:
-                data[col] = data[col].round(2)
-        
-        print(f"  [OK] 已应用{adjust}复权")
-        return data
-    
     def fetch_stock_data(
         self,
         symbol: str,
@@ -321,107 +330,100 @@ class DataFetcher:
         Returns:
             包含OHLCV数据的DataFrame
         """
-        cache_path = self._get_cache_path(symbol, period, interval, adjust)
+        if use_cache and not self._is_cache_valid(self._get_raw_cache_path(symbol, period, interval)):
+            # 兼容旧版缓存：按复权方式单独保存的文件已是复权后的数据
+            legacy_path = self._get_cache_path(symbol, period, interval, adjust)
+            if self._is_cache_valid(legacy_path):
+                cached_data = self._load_cache(legacy_path)
+                if cached_data is not None:
+                    return cached_data
+        
+        raw = self.fetch_raw_data(symbol, start_date, end_date, period, interval, use_cache=use_cache)
+        return adjust_prices(raw, adjust)
+
+    def fetch_raw_data(
+        self,
+        symbol: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        period: str = "1y",
+        interval: str = "1d",
+        use_cache: bool = True
+    ) -> pd.DataFrame:
+        """
+        获取原始价格 + 复权因子（adj_factor 列）数据，所有复权方式共用一份缓存
+        
+        复权视图由 data.adjustment.adjust_prices 在读取时计算，参数同 fetch_stock_data。
+        
+        Returns:
+            原始K线 + adj_factor 列
+        """
+        cache_path = self._get_raw_cache_path(symbol, period, interval)
         
         if use_cache and self._is_cache_valid(cache_path):
             cached_data = self._load_cache(cache_path)
             if cached_data is not None:
+                count('fetch.cache_hit')
                 return cached_data
         
-        # 首先尝试 yfinance（支持复权数据）
-        try:
-            # 设置代理环境变量
-            if self.proxy:
-                import os
-                os.environ['HTTP_PROXY'] = self.proxy
-                os.environ['HTTPS_PROXY'] = self.proxy
-                print(f"  [OK] 使用代理: {self.proxy}")
-            
-            ticker = yf.Ticker(symbol)
+        count('fetch.cache_miss')
+        for provider in self.providers.ordered():
+            try:
+                with stage(f'fetch.{provider.name}'):
+                    data = self._fetch_with_retry(provider, symbol, start_date, end_date, period, interval)
+            except Exception as e:
+                logger.warning("  [WARN] %s 获取失败: %s", provider.name, e)
+                continue
             
-            for attempt in range(self.retry_count):
-                try:
-                    if start_date and end_date:
-                        data = ticker.history(
-                            start=start_date, 
-                            end=end_date, 
-                            interval=interval,
-                            auto_adjust=(adjust == 'auto')
-                        )
-                    else:
-                        data = ticker.history(
-                            period=period, 
-                            interval=interval,
-                            auto_adjust=(adjust == 'auto')
-                        )
-                    
-                    if data.empty:
-                        raise ValueError(f"无法获取股票 {symbol} 的数据")
-                    
-                    data.index = pd.to_datetime(data.index)
-                    data.index.name = 'datetime'
-                    
-                    if use_cache:
-                        self._save_cache(data, cache_path)
-                    
-                    return data
-                except Exception as e:
-                    if attempt < self.retry_count - 1:
-                        current_delay = self.retry_delay * (2 ** attempt)
-                        print(f"yfinance 获取 {symbol} 数据失败，{current_delay}秒后重试... (尝试 {attempt + 1}/{self.retry_count})")
-                        time.sleep(current_delay)
-                    else:
-                        raise e
-        except Exception as e:
-            print(f"  [WARN] yfinance 获取失败: {e}")
-            print(f"  正在尝试 Stooq...")
-        
-        # 如果 yfinance 失败，尝试 Stooq
-        try:
-            data = self._fetch_from_stooq(symbol, period)
-            if adjust != 'none':
-                data = self._apply_adjustment(data, adjust)
+            data = attach_adjustment_factor(data)
             if use_cache:
                 self._save_cache(data, cache_path)
             return data
-        except Exception as e:
-            print(f"  [WARN] Stooq 获取失败: {e}")
-            print(f"  正在尝试 Twelve Data...")
         
-        # 如果 Stooq 失败，尝试 Twelve Data
-        try:
-            data = self._fetch_from_twelve_data(symbol, period)
-            if adjust != 'none':
-                data = self._apply_adjustment(data, adjust)
-            if use_cache:
-                self._save_cache(data, cache_path)
-            return data
-        except Exception as e:
-            print(f"  [WARN] Twelve Data 获取失败: {e}")
-            print(f"  正在尝试 Alpha Vantage...")
+        raise ValueError(f"无法获取股票 {symbol} 的真实数据。所有数据源均失败。")
+
+    def _fetch_with_retry(self, provider, symbol, start_date, end_date, period, interval) -> pd.DataFrame:
+        """经熔断器调用数据源，失败时指数退避重试；数据源熔断后立即放弃"""
+        for attempt in range(provider.max_attempts):
+            try:
+                return self.providers.call(provider.name, symbol, start_date, end_date, period, interval)
+            except Exception as e:
+                if attempt < provider.max_attempts - 1 and self.providers.is_available(provider.name):
+                    current_delay = self.retry_delay * (2 ** attempt)
+                    logger.info("%s 获取 %s 数据失败，%s秒后重试... (尝试 %d/%d)", provider.name, symbol, current_delay, attempt + 1, provider.max_attempts)
+                    time.sleep(current_delay)
+                else:
+                    raise e
+
+    def _fetch_from_yfinance(self, symbol: str, start_date: Optional[str], end_date: Optional[str], period: str, interval: str) -> pd.DataFrame:
+        """从 yfinance 获取原始股票数据（含 Adj Close，用于计算复权因子）"""
+        # 设置代理环境变量
+        if self.proxy:
+            os.environ['HTTP_PROXY'] = self.proxy
+            os.environ['HTTPS_PROXY'] = self.proxy
+            logger.debug("  [OK] 使用代理: %s", self.proxy)
         
-        # 如果 Twelve Data 失败，尝试 Alpha Vantage
-        try:
-            data = self._fetch_from_alpha_vantage(symbol, period)
-            if adjust != 'none':
-                data = self._apply_adjustment(data, adjust)
-            if use_cache:
-                self._save_cache(data, cache_path)
-            return data
-        except Exception as e:
-            print(f"  [WARN] Alpha Vantage 获取失败: {e}")
-            print(f"  正在尝试 Polygon.io...")
+        ticker = yf.Ticker(symbol)
+        if start_date and end_date:
+            data = ticker.history(
+                start=start_date, 
+                end=end_date, 
+                interval=interval,
+                auto_adjust=False
+            )
+        else:
+            data = ticker.history(
+                period=period, 
+                interval=interval,
+                auto_adjust=False
+            )
         
-        # 如果 Alpha Vantage 失败，尝试 Polygon.io
-        try:
-            data = self._fetch_from_polygon(symbol, period)
-            if adjust != 'none':
-                data = self._apply_adjustment(data, adjust)
-            if use_cache:
-                self._save_cache(data, cache_path)
-            return data
-        except Exception as e:
-            raise ValueError(f"无法获取股票 {symbol} 的真实数据。所有数据源均失败。")
+        if data.empty:
+            raise ValueError(f"无法获取股票 {symbol} 的数据")
+        
+        data.index = pd.to_datetime(data.index)
+        data.index.name = 'datetime'
+        return data
 
     def resample_data(
         self,
@@ -465,16 +467,61 @@ class DataFetcher:
         
         return resampled
 
+    def iter_multiple_stocks(
+        self,
+        symbols: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        period: str = "1y",
+        interval: str = "1d",
+        max_workers: int = 8,
+        use_cache: bool = True,
+        adjust: str = "forward"
+    ) -> Iterator[Tuple[str, Optional[pd.DataFrame], Optional[Exception]]]:
+        """
+        并发获取多只股票，按完成顺序逐个产出结果
+
+        每只股票在工作线程内获取完成后立即写入缓存；数据源熔断和限流状态在线程间共享。
+
+        Args:
+            symbols: 股票代码列表（重复代码只获取一次）
+            max_workers: 线程池大小
+            其余参数同 fetch_stock_data
+
+        Yields:
+            (symbol, data, error)，成功时 error 为 None，失败时 data 为 None
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        if not unique_symbols:
+            return
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_symbols)))) as executor:
+            futures = {
+                executor.submit(
+                    self.fetch_stock_data, symbol, start_date, end_date, period, interval,
+                    use_cache=use_cache, adjust=adjust
+                ): symbol
+                for symbol in unique_symbols
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    yield symbol, future.result(), None
+                except Exception as e:
+                    yield symbol, None, e
+
     def fetch_multiple_stocks(
         self,
         symbols: List[str],
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         period: str = "1y",
-        interval: str = "1d"
+        interval: str = "1d",
+        max_workers: int = 8,
+        on_result: Optional[Callable[[str, pd.DataFrame], None]] = None
     ) -> dict:
         """
-        获取多只股票的数据
+        获取多只股票的数据（线程池并发）
         
         Args:
             symbols: 股票代码列表
@@ -482,19 +529,24 @@ class DataFetcher:
             end_date: 结束日期
             period: 时间周期
             interval: 数据间隔
+            max_workers: 并发线程数，1 表示串行
+            on_result: 每只股票获取成功后的回调 on_result(symbol, data)
         
         Returns:
-            字典，key为股票代码，value为对应的DataFrame
+            字典，key为股票代码，value为对应的DataFrame（按输入顺序）
         """
-        result = {}
-        for symbol in symbols:
-            try:
-                data = self.fetch_stock_data(symbol, start_date, end_date, period, interval)
-                result[symbol] = data
-            except Exception as e:
-                print(f"获取 {symbol} 数据失败: {e}")
+        fetched = {}
+        for symbol, data, error in self.iter_multiple_stocks(
+            symbols, start_date, end_date, period, interval, max_workers=max_workers
+        ):
+            if error is not None:
+                logger.warning("获取 %s 数据失败: %s", symbol, error)
+                continue
+            fetched[symbol] = data
+            if on_result is not None:
+                on_result(symbol, data)
         
-        return result
+        return {symbol: fetched[symbol] for symbol in dict.fromkeys(symbols) if symbol in fetched}
 
     def fetch_stock_data_batch(
         self,
@@ -505,7 +557,7 @@ class DataFetcher:
         adjust: str = "forward"
     ) -> Dict[str, pd.DataFrame]:
         """
-        使用 yfinance 一次性批量拉取多只股票，并按单股票缓存文件写入。
+        使用 yfinance 一次性批量拉取多只股票，并按单股票缓存文件写入（原始价格 + 复权因子）。
 
         Returns:
             key 为 symbol，value 为该股票 DataFrame（OHLCV）
@@ -519,14 +571,14 @@ class DataFetcher:
             if self.proxy:
                 os.environ['HTTP_PROXY'] = self.proxy
                 os.environ['HTTPS_PROXY'] = self.proxy
-                print(f"  [OK] 使用代理: {self.proxy}")
+                logger.debug("  [OK] 使用代理: %s", self.proxy)
 
             raw = yf.download(
                 tickers=' '.join(unique_symbols),
                 period=period,
                 interval=interval,
                 group_by='ticker',
-                auto_adjust=(adjust == 'auto'),
+                auto_adjust=False,
                 progress=False,
                 threads=False,
             )
@@ -552,18 +604,19 @@ class DataFetcher:
                 if not set(required_cols).issubset(item.columns):
                     continue
 
-                item = item[required_cols].dropna()
+                keep_cols = required_cols + (['Adj Close'] if 'Adj Close' in item.columns else [])
+                item = item[keep_cols].dropna(subset=required_cols)
                 if item.empty:
                     continue
 
                 item.index = pd.to_datetime(item.index)
                 item.index.name = 'datetime'
 
-                result[symbol] = item
+                item = attach_adjustment_factor(item)
+                result[symbol] = adjust_prices(item, adjust)
 
                 if use_cache:
-                    cache_path = self._get_cache_path(symbol, period, interval, adjust)
-                    self._save_cache(item, cache_path)
+                    self._save_cache(item, self._get_raw_cache_path(symbol, period, interval))
             except Exception:
                 continue
 
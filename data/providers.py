@@ -0,0 +1,273 @@
+"""
+数据源注册表：熔断器 + 按延迟/成功率排序的回退链
+
+DataFetcher 通过 ProviderRegistry 依次尝试各数据源：
+- 每个数据源有独立熔断器，连续失败 failure_threshold 次后熔断（open），
+  reset_timeout 秒后进入半开（half_open）状态，只放行一次探测请求
+- 滚动窗口内统计成功率和平均耗时，回退链按得分动态排序
+- 可为每个数据源设置请求频率上限（RateLimiter），并发获取时统一限流
+- 所有状态由一把锁保护，可在线程间共享
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """单个数据源的熔断器（非线程安全，由 ProviderRegistry 加锁调用）"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断后多少秒允许半开探测
+            clock: 时钟函数（测试时可替换）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def current_state(self) -> str:
+        """返回当前状态，熔断超时后自动转为半开"""
+        if self.state == STATE_OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+            self.state = STATE_HALF_OPEN
+            self.probe_in_flight = False
+        return self.state
+
+    def allow_request(self) -> bool:
+        """是否允许发起请求；半开状态只放行一个探测请求"""
+        state = self.current_state()
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = STATE_OPEN
+            self.opened_at = self.clock()
+        self.probe_in_flight = False
+
+
+class RateLimiter:
+    """线程安全的匀速限流器：相邻两次请求间隔不小于 60 / max_per_minute 秒"""
+
+    def __init__(
+        self,
+        max_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Args:
+            max_per_minute: 每分钟最多请求次数
+            clock: 时钟函数
+            sleep: 等待函数（测试时可替换）
+        """
+        self.interval = 60.0 / max_per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> float:
+        """占用下一个请求时间槽，必要时阻塞等待；返回等待秒数"""
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+class DataProvider:
+    """数据源描述：名称、获取函数、重试与限流设置"""
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[..., pd.DataFrame],
+        priority: int = 0,
+        max_attempts: int = 1,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        """
+        Args:
+            name: 数据源名称
+            fetch: 获取函数，签名 fetch(symbol, start_date, end_date, period, interval)，返回原始（未复权）K线
+            priority: 默认顺序（越小越靠前），无统计数据时使用
+            max_attempts: 单次获取的最大尝试次数（熔断后不再重试）
+            rate_limiter: 请求限流器，None 表示不限流
+        """
+        self.name = name
+        self.fetch = fetch
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.rate_limiter = rate_limiter
+
+
+class ProviderRegistry:
+    """线程安全的数据源注册表"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60.0,
+        window: int = 20,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            failure_threshold: 熔断阈值（连续失败次数）
+            reset_timeout: 熔断恢复探测间隔（秒）
+            window: 成功率/耗时滚动窗口长度
+            clock: 时钟函数
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.window = window
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._providers: Dict[str, DataProvider] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._history: Dict[str, Deque[Tuple[bool, float]]] = {}
+
+    def register(
+        self,
+        name: str,
+        fetch: Callable[..., pd.DataFrame],
+        priority: Optional[int] = None,
+        max_attempts: int = 1,
+        max_per_minute: Optional[float] = None
+    ) -> DataProvider:
+        """
+        注册数据源，priority 默认按注册顺序递增
+
+        max_per_minute 为该数据源每分钟最多请求次数（所有线程共享），None 表示不限流
+        """
+        rate_limiter = RateLimiter(max_per_minute, clock=self.clock) if max_per_minute else None
+        with self._lock:
+            if priority is None:
+                priority = len(self._providers)
+            provider = DataProvider(name, fetch, priority, max_attempts, rate_limiter)
+            self._providers[name] = provider
+            self._breakers[name] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+            self._history[name] = deque(maxlen=self.window)
+            return provider
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._providers)
+
+    def _score(self, name: str) -> Tuple[float, float]:
+        """返回 (成功率, 平均成功耗时)，无数据时成功率视为1、耗时视为无穷大"""
+        history = self._history[name]
+        if not history:
+            return 1.0, float('inf')
+        success_rate = sum(1 for ok, _ in history if ok) / len(history)
+        latencies = [elapsed for ok, elapsed in history if ok]
+        mean_latency = sum(latencies) / len(latencies) if latencies else float('inf')
+        return success_rate, mean_latency
+
+    def ordered(self) -> List[DataProvider]:
+        """
+        按得分排序的可用数据源（已熔断的数据源被跳过）
+
+        排序键：半开探测优先级最低，其余按成功率降序、平均耗时升序、默认顺序升序
+        """
+        with self._lock:
+            ranked = []
+            for name, provider in self._providers.items():
+                state = self._breakers[name].current_state()
+                if state == STATE_OPEN:
+                    continue
+                success_rate, mean_latency = self._score(name)
+                ranked.append((state == STATE_HALF_OPEN, -success_rate, mean_latency, provider.priority, provider))
+            ranked.sort(key=lambda item: item[:4])
+            return [item[-1] for item in ranked]
+
+    def acquire(self, name: str) -> bool:
+        """请求前调用：熔断器是否放行"""
+        with self._lock:
+            return self._breakers[name].allow_request()
+
+    def record_success(self, name: str, elapsed: float):
+        with self._lock:
+            self._breakers[name].record_success()
+            self._history[name].append((True, elapsed))
+
+    def record_failure(self, name: str, elapsed: float = 0.0):
+        with self._lock:
+            self._breakers[name].record_failure()
+            self._history[name].append((False, elapsed))
+
+    def is_available(self, name: str) -> bool:
+        """数据源当前未熔断"""
+        with self._lock:
+            return self._breakers[name].current_state() != STATE_OPEN
+
+    def stats(self) -> Dict[str, Dict]:
+        """各数据源状态快照"""
+        with self._lock:
+            result = {}
+            for name in self._providers:
+                success_rate, mean_latency = self._score(name)
+                breaker = self._breakers[name]
+                result[name] = {
+                    'state': breaker.current_state(),
+                    'consecutive_failures': breaker.consecutive_failures,
+                    'samples': len(self._history[name]),
+                    'success_rate': success_rate,
+                    'mean_latency': mean_latency,
+                }
+            return result
+
+    def call(self, name: str, *args, **kwargs) -> pd.DataFrame:
+        """
+        通过熔断器调用数据源并记录结果
+
+        Raises:
+            RuntimeError: 数据源已熔断
+        """
+        if not self.acquire(name):
+            raise RuntimeError(f"数据源 {name} 已熔断")
+        provider = self._providers[name]
+        if provider.rate_limiter is not None:
+            provider.rate_limiter.acquire()
+        start = self.clock()
+        try:
+            data = provider.fetch(*args, **kwargs)
+            if data is None or data.empty:
+                raise ValueError(f"数据源 {name} 返回空数据")
+        except Exception:
+            self.record_failure(name, self.clock() - start)
+            raise
+        self.record_success(name, self.clock() - start)
+        return data
@@ -5,13 +5,15 @@
 1. 仅更新 data_cache/a_stock_minute 中已存在的分钟文件；
 2. 读取每个文件最后一根 K 线时间；
 3. 从 AKShare 拉取对应周期数据并追加新增部分；
-4. 去重、排序后写回原文件。
+4. 去重、排序后写回原文件；
+5. 可选 --pyramid：把新增 5 分钟K线写入 BarStore，增量维护 15m/30m/60m/日线/周线金字塔。
 """
 from __future__ import annotations
 
 import argparse
 import os
 import re
+import sys
 import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -19,6 +21,14 @@ from datetime import datetime, timedelta
 import akshare as ak
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import profiling  # noqa: E402
+from core.log import EventCounter, get_logger  # noqa: E402
+from core.profiling import timed  # noqa: E402
+from data.bar_store import BarStore  # noqa: E402
+
+logger = get_logger("data.update_a_stock_minute")
+
 CACHE_DIR = "data_cache"
 MINUTE_DIR = os.path.join(CACHE_DIR, "a_stock_minute")
 TARGET_PERIODS = {"5", "15", "30", "60"}
@@ -81,6 +91,7 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
+@timed("update.read_csv")
 def read_existing(path: str) -> pd.DataFrame:
     df = pd.read_csv(path)
     if df.empty:
@@ -93,6 +104,7 @@ def read_existing(path: str) -> pd.DataFrame:
     return normalize_columns(df)
 
 
+@timed("update.fetch_akshare")
 def fetch_minute(ak_symbol: str, period: str, retries: int = 3, adjust: str = "qfq") -> pd.DataFrame | None:
     """获取分钟级数据
     
@@ -107,18 +119,31 @@ def fetch_minute(ak_symbol: str, period: str, retries: int = 3, adjust: str = "q
             return normalize_columns(df)
         except Exception as e:
             if i == retries - 1:
-                print(f"  [失败] 拉取 {ak_symbol} {period}min 出错: {e}")
+                logger.warning("  [失败] 拉取 %s %smin 出错: %s", ak_symbol, period, e)
                 return None
             time.sleep(1)
     return None
 
 
-def update_one_file(item: MinuteFile, adjust: str = "qfq", full_refresh: bool = False) -> tuple[bool, int]:
+@timed("update.ingest_pyramid")
+def ingest_pyramid(bar_store: BarStore | None, item: MinuteFile, bars: pd.DataFrame) -> None:
+    """把 5 分钟K线增量写入多周期金字塔（其他周期文件不入库）"""
+    if bar_store is None or item.period != "5" or bars.empty:
+        return
+    bar_store.ingest(item.symbol, bars, session="cn_stock")
+
+
+def update_one_file(
+    item: MinuteFile,
+    adjust: str = "qfq",
+    full_refresh: bool = False,
+    bar_store: BarStore | None = None,
+) -> tuple[bool, int]:
     ak_symbol = convert_to_akshare(item.symbol)
     try:
         old_df = read_existing(item.path)
     except Exception as e:
-        print(f"[跳过] 读取失败 {os.path.basename(item.path)}: {e}")
+        logger.warning("[跳过] 读取失败 %s: %s", os.path.basename(item.path), e)
         return False, 0
 
     last_dt = old_df["datetime"].max() if not old_df.empty else None
@@ -129,6 +154,7 @@ def update_one_file(item: MinuteFile, adjust: str = "qfq", full_refresh: bool =
     if full_refresh:
         new_df = new_df.drop_duplicates(subset=["datetime"], keep="last").sort_values("datetime")
         new_df.to_csv(item.path, index=False)
+        ingest_pyramid(bar_store, item, new_df)
         return True, len(new_df)
 
     if last_dt is not None:
@@ -142,39 +168,38 @@ def update_one_file(item: MinuteFile, adjust: str = "qfq", full_refresh: bool =
     merged = pd.concat([old_df, add_df], ignore_index=True)
     merged = merged.drop_duplicates(subset=["datetime"], keep="last").sort_values("datetime")
     merged.to_csv(item.path, index=False)
+    ingest_pyramid(bar_store, item, add_df)
     return True, len(add_df)
 
 
-def run_once(sleep_sec: float = 0.2, adjust: str = "qfq", full_refresh: bool = False) -> None:
+def run_once(sleep_sec: float = 0.2, adjust: str = "qfq", full_refresh: bool = False, pyramid: bool = False) -> None:
     files = discover_minute_files()
     if not files:
-        print(f"未找到可更新文件: {MINUTE_DIR}")
+        logger.warning("未找到可更新文件: %s", MINUTE_DIR)
         return
 
-    print("=" * 72)
+    logger.info("=" * 72)
     mode_name = "全量覆盖" if full_refresh else "增量更新"
-    print(f"开始{mode_name}, 文件数: {len(files)}, 复权: {adjust}, 时间: {datetime.now():%Y-%m-%d %H:%M:%S}")
-    print("=" * 72)
+    logger.info("开始%s, 文件数: %d, 复权: %s, 时间: %s", mode_name, len(files), adjust, f"{datetime.now():%Y-%m-%d %H:%M:%S}")
+    logger.info("=" * 72)
 
-    ok, fail, add_total = 0, 0, 0
+    bar_store = BarStore() if pyramid else None
+    events = EventCounter(logger, "更新统计")
     for i, item in enumerate(files, start=1):
-        print(f"[{i}/{len(files)}] {os.path.basename(item.path)}", end=" ... ")
-        success, added = update_one_file(item, adjust=adjust, full_refresh=full_refresh)
+        success, added = update_one_file(item, adjust=adjust, full_refresh=full_refresh, bar_store=bar_store)
         if success:
-            ok += 1
-            add_total += added
-            if full_refresh:
-                print(f"完成, 重写 {added} 条")
-            else:
-                print(f"完成, 新增 {added} 条")
+            events.incr("成功")
+            events.incr("新增条数", added)
+            logger.debug("[%d/%d] %s ... 完成, %s %d 条", i, len(files), os.path.basename(item.path),
+                         "重写" if full_refresh else "新增", added)
         else:
-            fail += 1
-            print("失败")
+            events.incr("失败")
+            logger.warning("[%d/%d] %s ... 失败", i, len(files), os.path.basename(item.path))
         time.sleep(sleep_sec)
 
-    print("-" * 72)
-    print(f"更新完成: 成功 {ok}, 失败 {fail}, 新增总条数 {add_total}")
-    print("=" * 72)
+    logger.info("-" * 72)
+    logger.info("更新完成: 成功 %d, 失败 %d, 新增总条数 %d", events["成功"], events["失败"], events["新增条数"])
+    logger.info("=" * 72)
 
 
 def parse_run_time(run_time: str) -> tuple[int, int]:
@@ -197,7 +222,7 @@ def get_next_run(run_time: str, now: datetime | None = None) -> datetime:
     return target
 
 
-def run_daemon(run_time: str, sleep_sec: float = 0.2, adjust: str = "qfq") -> None:
+def run_daemon(run_time: str, sleep_sec: float = 0.2, adjust: str = "qfq", pyramid: bool = False) -> None:
     print(f"定时模式已启动，每天 {run_time} 执行一次（复权: {adjust}）。按 Ctrl+C 退出。")
     while True:
         next_run = get_next_run(run_time)
@@ -209,7 +234,7 @@ def run_daemon(run_time: str, sleep_sec: float = 0.2, adjust: str = "qfq") -> No
             time.sleep(chunk)
             wait_s -= chunk
 
-        run_once(sleep_sec=sleep_sec, adjust=adjust, full_refresh=False)
+        run_once(sleep_sec=sleep_sec, adjust=adjust, full_refresh=False, pyramid=pyramid)
 
 
 def main() -> None:
@@ -241,16 +266,33 @@ def main() -> None:
         action="store_true",
         help="全量重写已有分钟文件（适合把历史不复权数据整体转换为前复权）",
     )
+    parser.add_argument(
+        "--pyramid",
+        action="store_true",
+        help="同时把 5 分钟K线写入 data_cache/bars 多周期金字塔（15m/30m/60m/1d/1w）",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="单次执行结束后输出分阶段耗时报告到 results/profile/",
+    )
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
 
     if args.daemon:
-        run_daemon(run_time=args.run_time, sleep_sec=args.sleep_sec, adjust=args.adjust)
+        run_daemon(run_time=args.run_time, sleep_sec=args.sleep_sec, adjust=args.adjust, pyramid=args.pyramid)
     else:
         run_once(
             sleep_sec=args.sleep_sec,
             adjust=args.adjust,
             full_refresh=args.full_refresh,
+            pyramid=args.pyramid,
         )
+        if args.profile:
+            paths = profiling.write_report(name="update_a_stock_minute")
+            print(profiling.format_report())
+            print(f"\n耗时报告: {paths['json']}, {paths['text']}")
 
 
 if __name__ == "__main__":
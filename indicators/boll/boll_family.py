@@ -0,0 +1,330 @@
+"""
+布林带策略族
+
+原先每个版本一个文件、各自重复一遍布林带 / 均线计算和整段状态机，这里每个版本只是一组规则参数
+（规则组件见 boll_rules）。旧模块（moderate_boll_strategy_v*.py 等）保留为兼容入口。
+
+同一标的上对比多个版本用 compare_variants：特征（布林带、均线、穿越事件、创新高计数）只算一次。
+
+版本差异一览：
+- ModerateBollStrategy:        均线上行期，上行期内 2 次破下轨 + 2 次上穿中轨后回落买入
+- ImprovedStrictBollStrategy:  同上，需要 3 次上穿中轨
+- StrictBollingerStrategy:     连续创新高上行期，2 次破下轨 + 3 次上穿中轨
+- V2 / V3:                     额外记录上穿上轨，要求至少 2 次反弹没有上穿上轨；V3 只需 1 次破下轨
+- V4:                          事件不区分上行期，非上行期买入，买入后清空事件
+- V5:                          V4 + 卖出分阶段（上行期 2 次破下轨后到上轨 / 非上行期 10 根后破下轨）+ 最大持仓
+- V6 / V7:                     V5，上行期卖出改为最高价达到中轨 × sell_threshold
+- V8:                          V5，上行期卖出改为移动止损
+"""
+from typing import Dict, Iterable, Mapping, Optional, Union
+
+import pandas as pd
+
+from indicators.boll.boll_features import BollFeatureCache
+from indicators.boll.boll_rules import (
+    BandEvents, BollRuleSet, BollStrategy, LowerBandStop, MaTrend, MaxHoldExit, MiddleMultipleExit,
+    MiddleRetestEntry, NewHighStreakTrend, PhaseExit, TrailingStopExit, UpperAfterBreaksExit,
+    WeeklyPhaseRules, WeeklyRegimeRules,
+)
+
+
+class StrictBollingerStrategy(BollStrategy):
+    """更严格的布林带策略：上行期为连续一个月创新高"""
+
+    def __init__(self, period=20, std_dev=2, min_uptrend_days=20, min_interval_days=10):
+        """
+        初始化策略
+
+        Args:
+            period: 布林带周期
+            std_dev: 标准差倍数
+            min_uptrend_days: 最小上行期天数（一个月约20个交易日）
+            min_interval_days: 最小间隔天数（2周约10个交易日）
+        """
+        super().__init__("StrictBollingerStrategy")
+        self.period = period
+        self.std_dev = std_dev
+        self.min_uptrend_days = min_uptrend_days
+        self.min_interval_days = min_interval_days
+
+    def build_rules(self) -> BollRuleSet:
+        return BollRuleSet(
+            self.period, self.std_dev,
+            trend=NewHighStreakTrend(self.min_uptrend_days),
+            events=BandEvents(self.min_interval_days),
+            entry=MiddleRetestEntry(self.min_interval_days, min_breaks=2, min_crosses=3),
+            exits=[PhaseExit(uptrend=UpperAfterBreaksExit(2)), LowerBandStop(5)],
+        )
+
+
+class _MaTrendStrategy(BollStrategy):
+    """均线判断上行期的各版本共用的参数"""
+
+    def __init__(self, name, period=20, std_dev=2, min_uptrend_days=20, min_interval_days=10,
+                 ma_period=60, uptrend_threshold=0.5):
+        super().__init__(name)
+        self.period = period
+        self.std_dev = std_dev
+        self.min_uptrend_days = min_uptrend_days
+        self.min_interval_days = min_interval_days
+        self.ma_period = ma_period
+        self.uptrend_threshold = uptrend_threshold
+
+    def _trend(self, **kwargs) -> MaTrend:
+        return MaTrend(self.min_uptrend_days, self.ma_period, self.uptrend_threshold, **kwargs)
+
+
+class ModerateBollStrategy(_MaTrendStrategy):
+    """适中的布林带策略：上行期内 2 次破下轨、2 次上穿中轨后回落到中轨之下买入"""
+
+    _min_crosses = 2
+
+    def __init__(self, period=20, std_dev=2, min_uptrend_days=20, min_interval_days=10,
+                 ma_period=60, uptrend_threshold=0.5):
+        """
+        初始化策略
+
+        Args:
+            period: 布林带周期
+            std_dev: 标准差倍数
+            min_uptrend_days: 最小上行期天数（一个月约20个交易日）
+            min_interval_days: 最小间隔天数（2周约10个交易日）
+            ma_period: 用于判断趋势的移动平均线周期
+            uptrend_threshold: 上行期判断阈值（0-1之间，越高越严格）
+        """
+        super().__init__(type(self).__name__, period, std_dev, min_uptrend_days, min_interval_days,
+                         ma_period, uptrend_threshold)
+
+    def build_rules(self) -> BollRuleSet:
+        return BollRuleSet(
+            self.period, self.std_dev,
+            trend=self._trend(),
+            events=BandEvents(self.min_interval_days),
+            entry=MiddleRetestEntry(self.min_interval_days, min_breaks=2, min_crosses=self._min_crosses),
+            exits=[PhaseExit(uptrend=UpperAfterBreaksExit(2)), LowerBandStop(5)],
+        )
+
+
+class ImprovedStrictBollStrategy(ModerateBollStrategy):
+    """改进的严格布林带策略：均线判断上行期，需要 3 次上穿中轨"""
+
+    _min_crosses = 3
+
+
+class ModerateBollStrategyV2(_MaTrendStrategy):
+    """调整后的适中布林带策略：上行期内至少 2 次反弹没有上穿上轨，第三次及之后上穿中轨后回落买入"""
+
+    _min_breaks = 2
+
+    def __init__(self, period=20, std_dev=2, min_uptrend_days=20, min_interval_days=10,
+                 ma_period=60, uptrend_threshold=0.5):
+        """参数同 ModerateBollStrategy"""
+        super().__init__(type(self).__name__, period, std_dev, min_uptrend_days, min_interval_days,
+                         ma_period, uptrend_threshold)
+
+    def build_rules(self) -> BollRuleSet:
+        return BollRuleSet(
+            self.period, self.std_dev,
+            trend=self._trend(),
+            events=BandEvents(self.min_interval_days, track_upper=True),
+            entry=MiddleRetestEntry(self.min_interval_days, min_breaks=self._min_breaks, min_crosses=3, upper_gap=2),
+            exits=[PhaseExit(uptrend=UpperAfterBreaksExit(2)), LowerBandStop(5)],
+        )
+
+
+class ModerateBollStrategyV3(ModerateBollStrategyV2):
+    """调整后的适中布林带策略 V3：买入只要求 1 次破下轨"""
+
+    _min_breaks = 1
+
+
+class ModerateBollStrategyV4(ModerateBollStrategyV2):
+    """调整后的适中布林带策略 V4：事件不区分上行期，在非上行期（下行期）买入，买入后清空事件"""
+
+    def build_rules(self) -> BollRuleSet:
+        return BollRuleSet(
+            self.period, self.std_dev,
+            trend=self._trend(),
+            events=BandEvents(self.min_interval_days, uptrend_only=False, track_upper=True),
+            entry=MiddleRetestEntry(self.min_interval_days, in_uptrend=False, min_breaks=1, min_crosses=3,
+                                    upper_gap=2, reset_events=True),
+            exits=[PhaseExit(uptrend=UpperAfterBreaksExit(2)), LowerBandStop(5)],
+        )
+
+
+class ModerateBollStrategyV5(_MaTrendStrategy):
+    """
+    修正后的适中布林带策略 V5
+
+    下行期买入；上行期内买入后 2 次破下轨再涨到上轨卖出，非上行期买入 10 根K线之后跌破下轨止损，
+    持仓超过 max_hold_days 强制卖出
+    """
+
+    def __init__(self, period=20, std_dev=2, min_uptrend_days=20, min_interval_days=10,
+                 ma_period=60, uptrend_threshold=0.5, max_hold_days=120):
+        """
+        初始化策略
+
+        Args:
+            period ~ uptrend_threshold: 同 ModerateBollStrategy
+            max_hold_days: 最大持仓天数（如果超过这个天数仍未卖出，强制卖出）
+        """
+        super().__init__(type(self).__name__, period, std_dev, min_uptrend_days, min_interval_days,
+                         ma_period, uptrend_threshold)
+        self.max_hold_days = max_hold_days
+
+    def _uptrend_exit(self):
+        return UpperAfterBreaksExit(2)
+
+    def build_rules(self) -> BollRuleSet:
+        return BollRuleSet(
+            self.period, self.std_dev,
+            trend=self._trend(reset_events=False, hold_resets_breaks=True),
+            events=BandEvents(self.min_interval_days, uptrend_only=False, track_upper=True),
+            entry=MiddleRetestEntry(self.min_interval_days, in_uptrend=False, min_breaks=1, min_crosses=3,
+                                    upper_gap=2, reset_events=True),
+            exits=[PhaseExit(uptrend=self._uptrend_exit(), downtrend=LowerBandStop(10)),
+                   MaxHoldExit(self.max_hold_days)],
+            reset_breaks_on_exit=True,
+        )
+
+
+class ModerateBollStrategyV6(ModerateBollStrategyV5):
+    """修正后的适中布林带策略 V6（周K版本）：上行期最高价超过中轨 × sell_threshold 时卖出"""
+
+    def __init__(self, period=20, std_dev=2, min_uptrend_days=20, min_interval_days=10,
+                 ma_period=60, uptrend_threshold=0.5, max_hold_days=120, sell_threshold=1.5):
+        """
+        初始化策略
+
+        Args:
+            period ~ max_hold_days: 同 ModerateBollStrategyV5
+            sell_threshold: 卖出阈值（价格超过中轨的倍数，默认1.5即50%）
+        """
+        super().__init__(period, std_dev, min_uptrend_days, min_interval_days, ma_period, uptrend_threshold,
+                         max_hold_days)
+        self.sell_threshold = sell_threshold
+
+    def _uptrend_exit(self):
+        return MiddleMultipleExit(self.sell_threshold)
+
+
+class ModerateBollStrategyV7(ModerateBollStrategyV6):
+    """修正后的适中布林带策略 V7（周K版本）：卖出阈值默认 2.5，即高过中轨 150%"""
+
+    def __init__(self, period=20, std_dev=2, min_uptrend_days=20, min_interval_days=10,
+                 ma_period=60, uptrend_threshold=0.5, max_hold_days=120, sell_threshold=2.5):
+        super().__init__(period, std_dev, min_uptrend_days, min_interval_days, ma_period, uptrend_threshold,
+                         max_hold_days, sell_threshold)
+
+
+class ModerateBollStrategyV8(ModerateBollStrategyV5):
+    """修正后的适中布林带策略 V8（周K版本，使用移动止损）：上行期价格从持仓最高点回落 trailing_stop_pct 时卖出"""
+
+    def __init__(self, period=20, std_dev=2, min_uptrend_days=20, min_interval_days=10,
+                 ma_period=60, uptrend_threshold=0.5, max_hold_days=120, trailing_stop_pct=0.10):
+        """
+        初始化策略
+
+        Args:
+            period ~ max_hold_days: 同 ModerateBollStrategyV5
+            trailing_stop_pct: 移动止损比例（默认0.10即10%）
+        """
+        super().__init__(period, std_dev, min_uptrend_days, min_interval_days, ma_period, uptrend_threshold,
+                         max_hold_days)
+        self.trailing_stop_pct = trailing_stop_pct
+
+    def _uptrend_exit(self):
+        return TrailingStopExit(self.trailing_stop_pct)
+
+
+class WeeklyBollingerStrategy(BollStrategy):
+    """周布林带策略：周K判断上行期 / 下跌期，从下跌期回升后靠近中轨买入，3 次跌破中轨后超过上轨卖出"""
+
+    def __init__(self, period: int = 20, std_dev: float = 2, middle_threshold: float = 0.05):
+        """
+        初始化周布林带策略
+
+        Args:
+            period: 布林带周期（周数）
+            std_dev: 标准差倍数
+            middle_threshold: 中轨附近的阈值（百分比）
+        """
+        super().__init__(name=f"WeeklyBoll{period}")
+        self.period = period
+        self.std_dev = std_dev
+        self.middle_threshold = middle_threshold
+
+    def _resample_to_weekly(self, data: pd.DataFrame) -> pd.DataFrame:
+        """将日线数据转换为周线数据"""
+        return BollFeatureCache(data).resampled('W').data
+
+    def build_rules(self) -> WeeklyPhaseRules:
+        return WeeklyPhaseRules(self.period, self.std_dev, self.middle_threshold)
+
+
+class WeeklyRegimeBollStrategy(BollStrategy):
+    """
+    周布林带四状态策略（原 strategies.WeeklyBollingerStrategy）
+
+    直接在传入的K线上计算布林带，传入周K即为周布林带
+    """
+
+    def __init__(self, period: int = 20, std_dev: float = 2):
+        """
+        Args:
+            period: 布林带周期（周数）
+            std_dev: 标准差倍数
+        """
+        super().__init__(name=f"WeeklyBoll{period}")
+        self.period = period
+        self.std_dev = std_dev
+
+    def build_rules(self) -> WeeklyRegimeRules:
+        return WeeklyRegimeRules(self.period, self.std_dev)
+
+
+BOLL_VARIANTS = {
+    'moderate': ModerateBollStrategy,
+    'improved_strict': ImprovedStrictBollStrategy,
+    'strict': StrictBollingerStrategy,
+    'moderate_v2': ModerateBollStrategyV2,
+    'moderate_v3': ModerateBollStrategyV3,
+    'moderate_v4': ModerateBollStrategyV4,
+    'moderate_v5': ModerateBollStrategyV5,
+    'moderate_v6': ModerateBollStrategyV6,
+    'moderate_v7': ModerateBollStrategyV7,
+    'moderate_v8': ModerateBollStrategyV8,
+    'weekly': WeeklyBollingerStrategy,
+    'weekly_regime': WeeklyRegimeBollStrategy,
+}
+
+
+def default_variants(names: Optional[Iterable[str]] = None) -> Dict[str, BollStrategy]:
+    """按名称创建默认参数的策略实例，names 为 None 时返回全部版本"""
+    names = list(BOLL_VARIANTS) if names is None else list(names)
+    unknown = [name for name in names if name not in BOLL_VARIANTS]
+    if unknown:
+        raise KeyError(f'未知的BOLL策略版本: {unknown}，可选: {list(BOLL_VARIANTS)}')
+    return {name: BOLL_VARIANTS[name]() for name in names}
+
+
+def compare_variants(data: pd.DataFrame,
+                     strategies: Union[None, Mapping[str, BollStrategy], Iterable[BollStrategy]] = None
+                     ) -> Dict[str, pd.DataFrame]:
+    """
+    同一份数据上运行多个版本，共享一份特征缓存
+
+    Args:
+        data: 包含OHLCV数据的DataFrame
+        strategies: {名称: 策略} 或策略列表（以 strategy.name 为名称）；None 表示全部默认版本
+
+    Returns:
+        {名称: generate_signals 的结果}
+    """
+    if strategies is None:
+        strategies = default_variants()
+    elif not isinstance(strategies, Mapping):
+        strategies = {strategy.name: strategy for strategy in strategies}
+    features = BollFeatureCache(data)
+    return {name: strategy.generate_signals(data, features=features) for name, strategy in strategies.items()}
@@ -0,0 +1,174 @@
+"""
+BOLL 策略共用的预计算特征
+
+各版本布林带策略的状态机只在逐K线循环里做标量比较，这里把能整体算出的量一次性向量化：
+- 布林带 / 趋势均线（列名、计算方式与原实现一致，保证输出逐位相同）
+- 窗口内"创新高"天数：High.diff() > 0 的累计和相减，替代每根K线重新切片再内层循环
+- 上穿 / 下穿事件：前一根在轨道下方（上方）且当前在上方（下方）
+- 事件列表保持有序，"某下标之后有几次事件"用 bisect 计数
+
+BollFeatureCache 在同一份数据上缓存上述结果，多个策略变体对比时布林带 / 均线 / 穿越事件只算一次。
+"""
+from bisect import bisect_right
+from typing import Callable, Dict, Hashable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.profiling import count
+
+
+def add_bands(df: pd.DataFrame, period: int, std_dev: float):
+    """原地添加 middle_band / std / upper_band / lower_band 列"""
+    df['middle_band'] = df['Close'].rolling(window=period).mean()
+    df['std'] = df['Close'].rolling(window=period).std()
+    df['upper_band'] = df['middle_band'] + std_dev * df['std']
+    df['lower_band'] = df['middle_band'] - std_dev * df['std']
+
+
+def add_trend_mas(df: pd.DataFrame, ma_period: int, period: int):
+    """原地添加 ma_long / ma_short 列（判断上行期用）"""
+    df['ma_long'] = df['Close'].rolling(window=ma_period).mean()
+    df['ma_short'] = df['Close'].rolling(window=period).mean()
+
+
+def new_high_counts(high, window: int, strict: bool = False) -> np.ndarray:
+    """
+    以每根K线结尾、长度 window+1 的窗口内，相邻两根"后一根更高"的次数
+
+    Args:
+        high: 最高价序列
+        window: 比较次数（即原实现的 min_uptrend_days）
+        strict: False 按 high[j] > high[j-1] 计数；
+                True 按 not (high[j] <= high[j-1]) 计数（NaN 视为创新高，与严格版原实现一致）
+
+    Returns:
+        int 数组，前 window 根K线（窗口不完整）为 -1
+    """
+    values = np.asarray(high, dtype=float)
+    up = np.zeros(len(values), dtype=np.int64)
+    if strict:
+        up[1:] = ~(values[1:] <= values[:-1])
+    else:
+        up[1:] = values[1:] > values[:-1]
+    cumulative = np.cumsum(up)
+    counts = np.full(len(values), -1, dtype=np.int64)
+    if len(values) > window:
+        counts[window:] = cumulative[window:] - cumulative[:len(values) - window]
+    return counts
+
+
+def cross_above(close, band) -> np.ndarray:
+    """前一根收盘 <= 前一根轨道 且 当前收盘 > 当前轨道"""
+    close = np.asarray(close, dtype=float)
+    band = np.asarray(band, dtype=float)
+    flags = np.zeros(len(close), dtype=bool)
+    flags[1:] = (close[:-1] <= band[:-1]) & (close[1:] > band[1:])
+    return flags
+
+
+def cross_below(close, band) -> np.ndarray:
+    """前一根收盘 > 前一根轨道 且 当前收盘 <= 当前轨道"""
+    close = np.asarray(close, dtype=float)
+    band = np.asarray(band, dtype=float)
+    flags = np.zeros(len(close), dtype=bool)
+    flags[1:] = (close[:-1] > band[:-1]) & (close[1:] <= band[1:])
+    return flags
+
+
+def period_change(close, window: int) -> np.ndarray:
+    """(close[i] - close[i-window]) / close[i-window]，前 window 根为 NaN"""
+    close = np.asarray(close, dtype=float)
+    change = np.full(len(close), np.nan)
+    if len(close) > window:
+        change[window:] = (close[window:] - close[:-window]) / close[:-window]
+    return change
+
+
+def valid_rows(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """指定列全部非 NaN 的K线"""
+    return df[list(columns)].notna().all(axis=1).to_numpy()
+
+
+def count_after(events: List[int], index: int) -> int:
+    """有序事件下标列表中大于 index 的个数"""
+    return len(events) - bisect_right(events, index)
+
+
+class BollFeatureCache:
+    """
+    单个标的的特征缓存
+
+    计算结果按 (特征名, 参数) 缓存，同一实例上重复请求直接返回；
+    缓存只绑定构造时传入的数据，数据变了应新建实例。
+    返回的 Series / 数组由多个变体共享，调用方不要原地修改。
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        self._cache: Dict[Hashable, object] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def memo(self, key: Hashable, build: Callable[[], object]):
+        """按 key 缓存 build() 的结果"""
+        if key in self._cache:
+            self.hits += 1
+            count('boll.features.hit')
+            return self._cache[key]
+        self.misses += 1
+        count('boll.features.miss')
+        value = self._cache[key] = build()
+        return value
+
+    def rolling_mean(self, window: int) -> pd.Series:
+        """收盘价滚动均值（布林带中轨 / 均线共用）"""
+        return self.memo(('mean', window), lambda: self.data['Close'].rolling(window=window).mean())
+
+    def rolling_std(self, window: int) -> pd.Series:
+        """收盘价滚动标准差"""
+        return self.memo(('std', window), lambda: self.data['Close'].rolling(window=window).std())
+
+    def bands(self, period: int, std_dev: float) -> Dict[str, pd.Series]:
+        """{'middle', 'std', 'upper', 'lower'}，算法与 add_bands 一致"""
+        def build():
+            middle = self.rolling_mean(period)
+            std = self.rolling_std(period)
+            return {'middle': middle, 'std': std,
+                    'upper': middle + std_dev * std, 'lower': middle - std_dev * std}
+        return self.memo(('bands', period, std_dev), build)
+
+    def column(self, name: str) -> list:
+        """原始列转成 list（逐K线循环用）"""
+        return self.memo(('list', name), lambda: self.data[name].tolist())
+
+    def values(self, series_key: Hashable, series: pd.Series) -> list:
+        """已缓存特征转成 list，series_key 用于区分"""
+        return self.memo(('list', series_key), lambda: series.tolist())
+
+    def new_high_counts(self, window: int, strict: bool = False) -> np.ndarray:
+        return self.memo(('new_high', window, strict), lambda: new_high_counts(self.data['High'], window, strict))
+
+    def period_change(self, window: int) -> np.ndarray:
+        return self.memo(('change', window), lambda: period_change(self.data['Close'], window))
+
+    def cross_above(self, band_key: Hashable, band: pd.Series) -> list:
+        """收盘价上穿 band 的标记（list），band_key 标识是哪条轨道"""
+        return self.memo(('cross_above', band_key), lambda: cross_above(self.data['Close'], band).tolist())
+
+    def cross_below(self, band_key: Hashable, band: pd.Series) -> list:
+        """收盘价下穿 band 的标记（list）"""
+        return self.memo(('cross_below', band_key), lambda: cross_below(self.data['Close'], band).tolist())
+
+    def resampled(self, rule: str = 'W') -> 'BollFeatureCache':
+        """按周期重采样后的数据对应的缓存（周线等）"""
+        def build():
+            weekly = self.data.resample(rule).agg({
+                'Open': 'first',
+                'High': 'max',
+                'Low': 'min',
+                'Close': 'last',
+                'Volume': 'sum'
+            }).dropna()
+            return BollFeatureCache(weekly)
+        return self.memo(('resample', rule), build)
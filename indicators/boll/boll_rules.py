@@ -0,0 +1,633 @@
+"""
+BOLL 策略规则组件
+
+各版本布林带策略共用同一套状态机，只在以下环节不同，这里拆成可组合的组件：
+- 上行期判断：NewHighStreakTrend（连续创新高） / MaTrend（均线 + 创新高占比）
+- 事件记录：BandEvents（破下轨、上穿中轨 / 上轨，是否只在上行期记录）
+- 买入：MiddleRetestEntry（若干次破下轨、上穿中轨后回落到中轨之下）
+- 卖出：UpperAfterBreaksExit / MiddleMultipleExit / TrailingStopExit / LowerBandStop / MaxHoldExit，
+  PhaseExit 按是否处于上行期选择其一
+
+BollRuleSet 把组件组合起来，在 BollFeatureCache 提供的特征上单次遍历生成信号。
+组件本身不保存逐K线状态（状态在 _State 中），同一个规则集可以反复用于不同标的。
+
+两个周线策略的状态机和上面差别较大，用 WeeklyPhaseRules / WeeklyRegimeRules 单独实现，
+同样从特征缓存取布林带。
+"""
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.backtest_engine import BaseStrategy
+from core.profiling import stage
+from indicators.boll.boll_features import BollFeatureCache, count_after
+
+
+class _State:
+    """一次遍历中的可变状态"""
+    __slots__ = ('in_uptrend', 'highest_high', 'last_high_idx', 'position', 'buy_idx', 'highest_price',
+                 'lower_band_breaks', 'last_lower_band_break_idx', 'upper_band_crosses',
+                 'last_upper_band_cross_idx', 'middle_band_crosses', 'last_middle_band_cross_idx')
+
+    def __init__(self):
+        self.in_uptrend = False
+        self.highest_high = 0
+        self.last_high_idx = 0
+        self.position = 0
+        self.buy_idx = -1
+        self.highest_price = 0  # 持仓期间最高价（移动止损用）
+        self.lower_band_breaks = []  # 破下轨的K线下标（有序）
+        self.last_lower_band_break_idx = -1
+        self.upper_band_crosses = []  # 上穿上轨的K线下标（反弹强度）
+        self.last_upper_band_cross_idx = -1
+        self.middle_band_crosses = []  # 上穿中轨的K线下标
+        self.last_middle_band_cross_idx = -1
+
+    def reset_events(self):
+        self.lower_band_breaks = []
+        self.upper_band_crosses = []
+        self.middle_band_crosses = []
+
+
+class BollBars:
+    """规则组件共用的逐K线数据：价格和布林带转成 list，穿越事件从缓存取"""
+
+    def __init__(self, features: BollFeatureCache, period: int, std_dev: float):
+        self.features = features
+        self.period = period
+        self.std_dev = std_dev
+        self.bands = features.bands(period, std_dev)
+        self.close = features.column('Close')
+        self.high = features.column('High')
+        self.low = features.column('Low')
+        self.middle = features.values(('mean', period), self.bands['middle'])
+        self.upper = features.values(('upper', period, std_dev), self.bands['upper'])
+        self.lower = features.values(('lower', period, std_dev), self.bands['lower'])
+        self.valid = features.memo(('valid', period, std_dev), lambda: (
+            self.bands['middle'].notna() & self.bands['upper'].notna() & self.bands['lower'].notna()).to_numpy())
+
+    def cross_above(self, band: str) -> list:
+        """收盘价上穿 'middle' / 'upper'"""
+        key = ('mean', self.period) if band == 'middle' else (band, self.period, self.std_dev)
+        return self.features.cross_above(key, self.bands[band])
+
+    def cross_below(self, band: str) -> list:
+        key = ('mean', self.period) if band == 'middle' else (band, self.period, self.std_dev)
+        return self.features.cross_below(key, self.bands[band])
+
+
+# ---------------------------------------------------------------- 上行期判断
+
+class NewHighStreakTrend:
+    """
+    上行期：窗口内每根K线都创新高时进入；进入后跟踪最高价，超过 min_days 根没有新高即结束
+    （进入和结束时都清空事件）
+    """
+
+    def __init__(self, min_days: int = 20):
+        self.min_days = min_days
+
+    def valid_mask(self, bars: BollBars) -> Optional[np.ndarray]:
+        return None
+
+    def columns(self, bars: BollBars) -> Dict[str, pd.Series]:
+        return {}
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], None]:
+        w = self.min_days
+        high = bars.high
+        all_higher = bars.features.memo(
+            ('all_higher', w), lambda: (bars.features.new_high_counts(w, strict=True) == w).tolist())
+
+        def update(i, st):
+            if st.in_uptrend:
+                if high[i] > st.highest_high:
+                    st.highest_high = high[i]
+                    st.last_high_idx = i
+                if i - st.last_high_idx > w:
+                    st.in_uptrend = False
+                    st.highest_high = 0
+                    st.last_high_idx = 0
+                    st.reset_events()
+            elif i >= w and all_higher[i]:
+                st.in_uptrend = True
+                st.highest_high = high[i]
+                st.last_high_idx = i
+                st.reset_events()
+        return update
+
+
+class MaTrend:
+    """
+    上行期：价格在长期均线上方、短期均线（布林带周期）在长期均线上方，
+    且窗口内创新高天数占比 >= threshold、窗口内上涨；任一均线条件破坏即结束
+
+    Args:
+        min_days: 创新高窗口
+        ma_period: 长期均线周期
+        threshold: 创新高天数占比阈值（0-1）
+        reset_events: 进入 / 结束上行期时是否清空事件
+        hold_resets_breaks: 非上行期持仓时每根K线都清空破下轨记录（V5 起的行为）
+    """
+
+    def __init__(self, min_days: int = 20, ma_period: int = 60, threshold: float = 0.5,
+                 reset_events: bool = True, hold_resets_breaks: bool = False):
+        self.min_days = min_days
+        self.ma_period = ma_period
+        self.threshold = threshold
+        self.reset_events = reset_events
+        self.hold_resets_breaks = hold_resets_breaks
+
+    def valid_mask(self, bars: BollBars) -> Optional[np.ndarray]:
+        return bars.features.rolling_mean(self.ma_period).notna().to_numpy()
+
+    def columns(self, bars: BollBars) -> Dict[str, pd.Series]:
+        return {'ma_long': bars.features.rolling_mean(self.ma_period),
+                'ma_short': bars.features.rolling_mean(bars.period)}
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], None]:
+        f = bars.features
+        w = self.min_days
+        close = bars.close
+        ma_long = f.values(('mean', self.ma_period), f.rolling_mean(self.ma_period))
+        ma_short = f.values(('mean', bars.period), f.rolling_mean(bars.period))
+        rising = f.memo(('ma_trend_rising', w, self.threshold), lambda: (
+            (f.new_high_counts(w) / (w + 1) >= self.threshold) & (f.period_change(w) > 0)).tolist())
+        reset_events = self.reset_events
+        hold_resets_breaks = self.hold_resets_breaks
+
+        def update(i, st):
+            if st.in_uptrend:
+                if close[i] < ma_long[i] or ma_short[i] < ma_long[i]:
+                    st.in_uptrend = False
+                    if reset_events:
+                        st.reset_events()
+            else:
+                if i >= w and close[i] > ma_long[i] and ma_short[i] > ma_long[i] and rising[i]:
+                    st.in_uptrend = True
+                    if reset_events:
+                        st.reset_events()
+                if hold_resets_breaks and st.position == 1:
+                    st.lower_band_breaks = []
+        return update
+
+
+# ---------------------------------------------------------------- 事件记录
+
+class BandEvents:
+    """
+    记录破下轨、上穿中轨（以及可选的上穿上轨）事件，同类事件间隔不少于 interval 根K线
+
+    Args:
+        interval: 最小间隔（min_interval_days）
+        uptrend_only: 只在上行期记录
+        track_upper: 是否记录上穿上轨（买入时要求中轨穿越比上轨穿越多）
+    """
+
+    def __init__(self, interval: int = 10, uptrend_only: bool = True, track_upper: bool = False):
+        self.interval = interval
+        self.uptrend_only = uptrend_only
+        self.track_upper = track_upper
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], None]:
+        interval = self.interval
+        uptrend_only = self.uptrend_only
+        track_upper = self.track_upper
+        low = bars.low
+        lower = bars.lower
+        middle_up = bars.cross_above('middle')
+        upper_up = bars.cross_above('upper') if track_upper else None
+
+        def update(i, st):
+            active = st.in_uptrend or not uptrend_only
+            if active and low[i] <= lower[i]:
+                last = st.last_lower_band_break_idx
+                if last == -1 or i - last >= interval:
+                    st.lower_band_breaks.append(i)
+                    st.last_lower_band_break_idx = i
+            if active and st.position == 0:
+                if track_upper and upper_up[i]:
+                    last = st.last_upper_band_cross_idx
+                    if last == -1 or i - last >= interval:
+                        st.upper_band_crosses.append(i)
+                        st.last_upper_band_cross_idx = i
+                if middle_up[i]:
+                    last = st.last_middle_band_cross_idx
+                    if last == -1 or i - last >= interval:
+                        st.middle_band_crosses.append(i)
+                        st.last_middle_band_cross_idx = i
+        return update
+
+
+# ---------------------------------------------------------------- 买入
+
+class MiddleRetestEntry:
+    """
+    至少 min_breaks 次破下轨、min_crosses 次上穿中轨后，最近一次上穿中轨后 interval 根K线内回落到中轨之下买入
+
+    Args:
+        interval: 回落距最近一次上穿中轨的最大K线数
+        in_uptrend: True 只在上行期买入，False 只在非上行期买入
+        min_breaks: 破下轨次数下限
+        min_crosses: 上穿中轨次数下限
+        upper_gap: 不为 None 时要求 上穿中轨次数 >= 上穿上轨次数 + upper_gap（反弹没有上穿上轨）
+        reset_events: 买入后清空事件重新计数
+    """
+
+    def __init__(self, interval: int = 10, in_uptrend: bool = True, min_breaks: int = 2, min_crosses: int = 3,
+                 upper_gap: Optional[int] = None, reset_events: bool = False):
+        self.interval = interval
+        self.in_uptrend = in_uptrend
+        self.min_breaks = min_breaks
+        self.min_crosses = min_crosses
+        self.upper_gap = upper_gap
+        self.reset_events = reset_events
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], bool]:
+        interval = self.interval
+        want_uptrend = self.in_uptrend
+        min_breaks = self.min_breaks
+        min_crosses = self.min_crosses
+        upper_gap = self.upper_gap
+        middle_down = bars.cross_below('middle')
+
+        def check(i, st):
+            if st.in_uptrend != want_uptrend or not middle_down[i]:
+                return False
+            crosses = st.middle_band_crosses
+            if len(st.lower_band_breaks) < min_breaks or len(crosses) < min_crosses:
+                return False
+            if upper_gap is not None and len(crosses) < len(st.upper_band_crosses) + upper_gap:
+                return False
+            last_cross_idx = crosses[-1]
+            return last_cross_idx < i and i - last_cross_idx <= interval
+        return check
+
+
+# ---------------------------------------------------------------- 卖出
+
+class UpperAfterBreaksExit:
+    """买入后至少 min_breaks 次破下轨，再涨到上轨"""
+
+    def __init__(self, min_breaks: int = 2):
+        self.min_breaks = min_breaks
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], bool]:
+        high, upper, min_breaks = bars.high, bars.upper, self.min_breaks
+        return lambda i, st: count_after(st.lower_band_breaks, st.buy_idx) >= min_breaks and high[i] >= upper[i]
+
+
+class MiddleMultipleExit:
+    """最高价达到中轨 × threshold"""
+
+    def __init__(self, threshold: float = 1.5):
+        self.threshold = threshold
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], bool]:
+        high, middle, threshold = bars.high, bars.middle, self.threshold
+        return lambda i, st: high[i] >= middle[i] * threshold
+
+
+class TrailingStopExit:
+    """最低价从持仓期间最高价回落 pct"""
+
+    def __init__(self, pct: float = 0.10):
+        self.pct = pct
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], bool]:
+        low, pct = bars.low, self.pct
+        return lambda i, st: low[i] <= st.highest_price * (1 - pct)
+
+
+class LowerBandStop:
+    """买入 after 根K线之后跌破下轨止损"""
+
+    def __init__(self, after: int = 5):
+        self.after = after
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], bool]:
+        low, lower, after = bars.low, bars.lower, self.after
+        return lambda i, st: i > st.buy_idx + after and low[i] <= lower[i]
+
+
+class MaxHoldExit:
+    """持仓达到 days 根K线强制卖出"""
+
+    def __init__(self, days: int = 120):
+        self.days = days
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], bool]:
+        days = self.days
+        return lambda i, st: i - st.buy_idx >= days
+
+
+class PhaseExit:
+    """上行期用 uptrend 规则，非上行期用 downtrend 规则（为 None 表示该阶段不卖）"""
+
+    def __init__(self, uptrend=None, downtrend=None):
+        self.uptrend = uptrend
+        self.downtrend = downtrend
+
+    def bind(self, bars: BollBars) -> Callable[[int, _State], bool]:
+        up = self.uptrend.bind(bars) if self.uptrend is not None else None
+        down = self.downtrend.bind(bars) if self.downtrend is not None else None
+
+        def check(i, st):
+            rule = up if st.in_uptrend else down
+            return rule is not None and rule(i, st)
+        return check
+
+
+# ---------------------------------------------------------------- 规则集
+
+class BollRuleSet:
+    """
+    上行期 + 事件 + 买入 + 卖出 组合成的布林带规则
+
+    每根K线依次：上行期判断 -> 事件记录 -> 空仓时检查买入 -> 持仓时更新最高价并按顺序检查卖出规则
+    （第一个满足的卖出规则生效）。
+
+    Args:
+        period: 布林带周期
+        std_dev: 标准差倍数
+        trend: 上行期判断组件
+        events: 事件记录组件
+        entry: 买入组件
+        exits: 卖出组件列表
+        reset_breaks_on_exit: 卖出后清空破下轨记录
+    """
+
+    def __init__(self, period: int, std_dev: float, trend, events: BandEvents, entry: MiddleRetestEntry,
+                 exits: Sequence, reset_breaks_on_exit: bool = False):
+        self.period = period
+        self.std_dev = std_dev
+        self.trend = trend
+        self.events = events
+        self.entry = entry
+        self.exits = list(exits)
+        self.reset_breaks_on_exit = reset_breaks_on_exit
+
+    def evaluate(self, features: BollFeatureCache) -> np.ndarray:
+        """单次遍历生成信号数组（1 买入，-1 卖出）"""
+        bars = BollBars(features, self.period, self.std_dev)
+        valid = bars.valid
+        extra_mask = self.trend.valid_mask(bars)
+        if extra_mask is not None:
+            valid = valid & extra_mask
+        valid = valid.tolist()
+        close, high = bars.close, bars.high
+
+        update_trend = self.trend.bind(bars)
+        update_events = self.events.bind(bars)
+        entry = self.entry.bind(bars)
+        reset_on_entry = self.entry.reset_events
+        exits = [rule.bind(bars) for rule in self.exits]
+        reset_breaks_on_exit = self.reset_breaks_on_exit
+
+        signals = np.zeros(len(close), dtype=np.int64)
+        st = _State()
+        for i in range(len(close)):
+            if not valid[i]:
+                continue
+            update_trend(i, st)
+            update_events(i, st)
+
+            if st.position == 0 and entry(i, st):
+                signals[i] = 1
+                st.position = 1
+                st.buy_idx = i
+                st.highest_price = close[i]
+                if reset_on_entry:
+                    st.reset_events()
+
+            if st.position == 1:
+                if high[i] > st.highest_price:
+                    st.highest_price = high[i]
+                for check in exits:
+                    if check(i, st):
+                        signals[i] = -1
+                        st.position = 0
+                        st.buy_idx = -1
+                        st.highest_price = 0
+                        if reset_breaks_on_exit:
+                            st.lower_band_breaks = []
+                        break
+        return signals
+
+    def apply(self, df: pd.DataFrame, features: BollFeatureCache) -> pd.DataFrame:
+        """在 df 上添加 middle_band / std / upper_band / lower_band（/ ma_long / ma_short）/ signal 列"""
+        bars = BollBars(features, self.period, self.std_dev)
+        df['middle_band'] = bars.bands['middle'].to_numpy()
+        df['std'] = bars.bands['std'].to_numpy()
+        df['upper_band'] = bars.bands['upper'].to_numpy()
+        df['lower_band'] = bars.bands['lower'].to_numpy()
+        for name, series in self.trend.columns(bars).items():
+            df[name] = series.to_numpy()
+        df['signal'] = self.evaluate(features)
+        return df
+
+
+class WeeklyPhaseRules:
+    """
+    周线阶段策略：日线重采样为周线，在周K上判断上行期 / 下跌期并生成信号，再映射回日线
+
+    - 上行期：周K收盘价不跌破布林带下轨；下跌期：跌破下轨
+    - 买入：从下跌期回到下轨之上后，下一周收盘价距中轨 middle_threshold 以内
+    - 卖出：持仓期间累计 3 周收盘在中轨之下后，收盘价超过上轨
+    - 日线：每周最后一个交易日取周信号，其余交易日延续前一日（卖出次日转为空仓）
+    """
+
+    def __init__(self, period: int = 20, std_dev: float = 2, middle_threshold: float = 0.05):
+        self.period = period
+        self.std_dev = std_dev
+        self.middle_threshold = middle_threshold
+
+    def _weekly_states(self, weekly: BollFeatureCache) -> Dict[str, list]:
+        """周K状态机，返回逐周的各状态列"""
+        n = len(weekly.data)
+        bands = weekly.bands(self.period, self.std_dev)
+        close = weekly.column('Close')
+        middle = bands['middle'].tolist()
+        upper = bands['upper'].tolist()
+        lower = bands['lower'].tolist()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            middle_distance = (np.abs(weekly.data['Close'].to_numpy() - bands['middle'].to_numpy())
+                               / bands['middle'].to_numpy()).tolist()
+
+        signal = [0] * n
+        phase = [''] * n
+        below_count = [0] * n
+        market_phase = [''] * n
+        ready_to_buy = [False] * n
+        ready_to_sell = [False] * n
+        recovered = [False] * n
+        touched_middle = [False] * n
+
+        for i in range(n):
+            if i < self.period:
+                phase[i] = '初始化'
+                market_phase[i] = '初始化'
+                continue
+
+            prev_signal = signal[i - 1]
+            above_lower = close[i] >= lower[i]
+            market_phase[i] = '上行期' if above_lower else '下跌期'
+            # 刚从下跌期回到下轨之上
+            recovered[i] = market_phase[i - 1] == '下跌期' and above_lower
+
+            if prev_signal == 0:
+                phase[i] = '空仓'
+                if recovered[i - 1] and middle_distance[i] <= self.middle_threshold:
+                    touched_middle[i] = True
+                    signal[i] = 1
+                    phase[i] = '买入'
+                    recovered[i] = False
+                else:
+                    touched_middle[i] = touched_middle[i - 1]
+            elif prev_signal == 1:
+                recovered[i] = False
+                if close[i] < middle[i]:
+                    below_count[i] = below_count[i - 1] + 1
+                    signal[i] = 1
+                    if below_count[i] >= 3:
+                        ready_to_sell[i] = True
+                        phase[i] = '准备卖出'
+                    else:
+                        phase[i] = '持有'
+                elif close[i] > upper[i] and ready_to_sell[i - 1]:
+                    signal[i] = -1
+                    phase[i] = '卖出'
+                else:
+                    signal[i] = 1
+                    phase[i] = '持有'
+                    below_count[i] = below_count[i - 1]
+                    ready_to_sell[i] = ready_to_sell[i - 1]
+            elif prev_signal == -1:
+                phase[i] = '空仓'
+                recovered[i] = False
+
+        return {'signal': signal, 'phase': phase, 'market_phase': market_phase, 'below_middle_count': below_count,
+                'ready_to_buy': ready_to_buy, 'ready_to_sell': ready_to_sell,
+                'recovered_from_down': recovered, 'touched_middle_nearby': touched_middle}
+
+    def apply(self, df: pd.DataFrame, features: BollFeatureCache) -> pd.DataFrame:
+        weekly = features.resampled('W')
+        weeks = self._weekly_states(weekly)
+
+        daily_period = self.period * 5
+        bands = features.bands(daily_period, self.std_dev)
+        df['Middle'] = bands['middle'].to_numpy()
+        df['Upper'] = bands['upper'].to_numpy()
+        df['Lower'] = bands['lower'].to_numpy()
+        n = len(df)
+        if n == 0:
+            return df
+
+        # 每个交易日所在周（周一到周日）的周线标签，以及是否为本周最后一个交易日
+        index = df.index
+        week_label = index.normalize() + pd.to_timedelta(6 - index.weekday, unit='D')
+        week_pos = weekly.data.index.get_indexer(week_label).tolist()
+        last_day = pd.Series(index).groupby(week_label).transform('last')
+        is_last_day = (index == pd.DatetimeIndex(last_day)).tolist()
+
+        flag_names = ('ready_to_buy', 'ready_to_sell', 'recovered_from_down', 'touched_middle_nearby')
+        signal = [0] * n
+        phase = ['初始化'] * n
+        market_phase = ['初始化'] * n
+        below_count = [0] * n
+        flags = {name: [False] * n for name in flag_names}
+
+        for i in range(daily_period, n):
+            k = week_pos[i]
+            if k < 0:
+                phase[i] = '空仓'
+                market_phase[i] = '上行期'
+                continue
+            if is_last_day[i]:
+                signal[i] = weeks['signal'][k]
+                phase[i] = weeks['phase'][k]
+            elif i > 0 and signal[i - 1] != -1:
+                signal[i] = signal[i - 1]
+                phase[i] = phase[i - 1]
+            else:
+                phase[i] = '空仓'
+            market_phase[i] = weeks['market_phase'][k]
+            below_count[i] = weeks['below_middle_count'][k]
+            for name in flag_names:
+                flags[name][i] = weeks[name][k]
+
+        df['signal'] = np.array(signal, dtype=float)
+        df['phase'] = phase
+        df['market_phase'] = market_phase
+        df['below_middle_count'] = np.array(below_count, dtype=float)
+        for name in flag_names:
+            df[name] = np.array(flags[name], dtype=object)
+        return df
+
+
+class WeeklyRegimeRules:
+    """
+    布林带四状态：-1 下跌期（收盘在中轨下）、2 下跌期后突破上轨、1 回落到下轨附近买入后的持有期、0 初始
+
+    - 初始：收盘在中轨下进入 -1，否则进入 1
+    - -1 -> 2：收盘超过上轨
+    - 2 -> 1：收盘距下轨不到带宽的 10%
+    - 1 -> -1：收盘跌破下轨
+    """
+
+    def __init__(self, period: int = 20, std_dev: float = 2):
+        self.period = period
+        self.std_dev = std_dev
+
+    def apply(self, df: pd.DataFrame, features: BollFeatureCache) -> pd.DataFrame:
+        bands = features.bands(self.period, self.std_dev)
+        df['Middle'] = bands['middle'].to_numpy()
+        df['Upper'] = bands['upper'].to_numpy()
+        df['Lower'] = bands['lower'].to_numpy()
+
+        close = features.column('Close')
+        middle = bands['middle'].tolist()
+        upper = bands['upper'].tolist()
+        lower = bands['lower'].tolist()
+        signal = [0] * len(close)
+        for i in range(self.period, len(close)):
+            prev = signal[i - 1]
+            if prev == 0:
+                signal[i] = -1 if close[i] < middle[i] else 1
+            elif prev == -1:
+                signal[i] = 2 if close[i] > upper[i] else -1
+            elif prev == 2:
+                signal[i] = 1 if abs(close[i] - lower[i]) < (upper[i] - lower[i]) * 0.1 else 2
+            elif prev == 1:
+                signal[i] = -1 if close[i] < lower[i] else 1
+        df['signal'] = np.array(signal, dtype=np.int64)
+        return df
+
+
+class BollStrategy(BaseStrategy):
+    """
+    规则驱动的布林带策略基类
+
+    子类在 build_rules() 里按自身参数组合规则；generate_signals 可传入共享的 BollFeatureCache，
+    同一份数据上比较多个变体时特征只计算一次。
+    """
+
+    def build_rules(self):
+        raise NotImplementedError
+
+    def generate_signals(self, data: pd.DataFrame, features: Optional[BollFeatureCache] = None) -> pd.DataFrame:
+        """
+        生成交易信号
+
+        Args:
+            data: 包含OHLCV数据的DataFrame
+            features: 该数据上的特征缓存，None 时新建
+
+        Returns:
+            添加了信号列的DataFrame
+        """
+        if features is None:
+            features = BollFeatureCache(data)
+        with stage('boll.rules'):
+            return self.build_rules().apply(data.copy(), features)
@@ -1,33 +1,38 @@
-﻿import pandas as pd
+import pandas as pd
 import numpy as np
 from core.backtest_engine import BaseStrategy
+# 周布林带策略已并入布林带策略族，这里保留原名称
+from indicators.boll.boll_family import WeeklyRegimeBollStrategy as WeeklyBollingerStrategy  # noqa: F401
 
 
 class MovingAverageStrategy(BaseStrategy):
-    """绉诲姩骞冲潎绾跨瓥鐣?""
+    """移动平均线策�"""
     
     def __init__(self, short_period: int = 5, long_period: int = 20):
         """
-        鍒濆鍖栫Щ鍔ㄥ钩鍧囩嚎绛栫暐
+        初�?化移动平均线策略
         
         Args:
-            short_period: 鐭湡绉诲姩骞冲潎绾垮懆鏈?            long_period: 闀挎湡绉诲姩骞冲潎绾垮懆鏈?        """
+            short_period: �?��移动平均线周�
+            long_period: 长期移动平均线周�
+        """
         super().__init__(name=f"MA{short_period}-{long_period}")
         self.short_period = short_period
         self.long_period = long_period
     
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        鐢熸垚浜ゆ槗淇″彿
+        生成交易信号
         
-        绛栫暐閫昏緫锛?        - 褰撶煭鏈烳A涓婄┛闀挎湡MA鏃讹紝浜х敓涔板叆淇″彿锛堥噾鍙夛級
-        - 褰撶煭鏈烳A涓嬬┛闀挎湡MA鏃讹紝浜х敓鍗栧嚭淇″彿锛堟鍙夛級
+        策略逻辑�
+        - 当短期MA上穿长期MA时，产生买入信号（金叉）
+        - 当短期MA下穿长期MA时，产生卖出信号（�?叉）
         
         Args:
-            data: 鍖呭惈OHLCV鏁版嵁鐨凞ataFrame
+            data: 包含OHLCV数据的DataFrame
         
         Returns:
-            娣诲姞浜嗕俊鍙峰垪鐨凞ataFrame
+            添加了信号列的DataFrame
         """
         df = data.copy()
         
@@ -51,15 +56,17 @@ class MovingAverageStrategy(BaseStrategy):
 
 
 class RSIStrategy(BaseStrategy):
-    """RSI绛栫暐"""
+    """RSI策略"""
     
     def __init__(self, period: int = 14, overbought: float = 70, oversold: float = 30):
         """
-        鍒濆鍖朢SI绛栫暐
+        初�?化RSI策略
         
         Args:
-            period: RSI鍛ㄦ湡
-            overbought: 瓒呬拱闃堝€?            oversold: 瓒呭崠闃堝€?        """
+            period: RSI周期
+            overbought: 超买阈�
+            oversold: 超卖阈�
+        """
         super().__init__(name=f"RSI{period}")
         self.period = period
         self.overbought = overbought
@@ -67,14 +74,16 @@ class RSIStrategy(BaseStrategy):
     
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        鐢熸垚浜ゆ槗淇″彿
+        生成交易信号
         
-        绛栫暐閫昏緫锛?        - 褰揜SI浣庝簬瓒呭崠闃堝€兼椂锛屼骇鐢熶拱鍏ヤ俊鍙?        - 褰揜SI楂樹簬瓒呬拱闃堝€兼椂锛屼骇鐢熷崠鍑轰俊鍙?        
+        策略逻辑�
+        - 当RSI低于超卖阈�?�时，产生买入信�
+        - 当RSI高于超买阈�?�时，产生卖出信�?        
         Args:
-            data: 鍖呭惈OHLCV鏁版嵁鐨凞ataFrame
+            data: 包含OHLCV数据的DataFrame
         
         Returns:
-            娣诲姞浜嗕俊鍙峰垪鐨凞ataFrame
+            添加了信号列的DataFrame
         """
         df = data.copy()
         
@@ -99,14 +108,15 @@ class RSIStrategy(BaseStrategy):
 
 
 class BollingerBandsStrategy(BaseStrategy):
-    """甯冩灄甯︾瓥鐣?""
+    """布林带策�"""
     
     def __init__(self, period: int = 20, std_dev: float = 2):
         """
-        鍒濆鍖栧竷鏋楀甫绛栫暐
+        初�?化布林带策略
         
         Args:
-            period: 甯冩灄甯﹀懆鏈?            std_dev: 鏍囧噯宸€嶆暟
+            period: 布林带周�
+            std_dev: 标准�??�数
         """
         super().__init__(name=f"BB{period}")
         self.period = period
@@ -114,14 +124,16 @@ class BollingerBandsStrategy(BaseStrategy):
     
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        鐢熸垚浜ゆ槗淇″彿
+        生成交易信号
         
-        绛栫暐閫昏緫锛?        - 褰撲环鏍艰Е鍙婁笅杞ㄦ椂锛屼骇鐢熶拱鍏ヤ俊鍙?        - 褰撲环鏍艰Е鍙婁笂杞ㄦ椂锛屼骇鐢熷崠鍑轰俊鍙?        
+        策略逻辑�
+        - 当价格触及下轨时，产生买入信�
+        - 当价格触及上轨时，产生卖出信�?        
         Args:
-            data: 鍖呭惈OHLCV鏁版嵁鐨凞ataFrame
+            data: 包含OHLCV数据的DataFrame
         
         Returns:
-            娣诲姞浜嗕俊鍙峰垪鐨凞ataFrame
+            添加了信号列的DataFrame
         """
         df = data.copy()
         
@@ -143,16 +155,17 @@ class BollingerBandsStrategy(BaseStrategy):
 
 
 class MACDStrategy(BaseStrategy):
-    """MACD绛栫暐"""
+    """MACD策略"""
     
     def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
         """
-        鍒濆鍖朚ACD绛栫暐
+        初�?化MACD策略
         
         Args:
-            fast_period: 蹇嚎鍛ㄦ湡
-            slow_period: 鎱㈢嚎鍛ㄦ湡
-            signal_period: 淇″彿绾垮懆鏈?        """
+            fast_period: �?��周期
+            slow_period: 慢线周期
+            signal_period: 信号线周�
+        """
         super().__init__(name=f"MACD{fast_period}-{slow_period}")
         self.fast_period = fast_period
         self.slow_period = slow_period
@@ -160,16 +173,17 @@ class MACDStrategy(BaseStrategy):
     
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        鐢熸垚浜ゆ槗淇″彿
+        生成交易信号
         
-        绛栫暐閫昏緫锛?        - 褰揗ACD绾夸笂绌夸俊鍙风嚎鏃讹紝浜х敓涔板叆淇″彿
-        - 褰揗ACD绾夸笅绌夸俊鍙风嚎鏃讹紝浜х敓鍗栧嚭淇″彿
+        策略逻辑�
+        - 当MACD线上穿信号线时，产生买入信号
+        - 当MACD线下穿信号线时，产生卖出信号
         
         Args:
-            data: 鍖呭惈OHLCV鏁版嵁鐨凞ataFrame
+            data: 包含OHLCV数据的DataFrame
         
         Returns:
-            娣诲姞浜嗕俊鍙峰垪鐨凞ataFrame
+            添加了信号列的DataFrame
         """
         df = data.copy()
         
@@ -191,72 +205,3 @@ class MACDStrategy(BaseStrategy):
         df.loc[df['signal'] == -2, 'signal'] = -1
         
         return df
-
-
-class WeeklyBollingerStrategy(BaseStrategy):
-    """鍛ㄥ竷鏋楀甫绛栫暐"""
-    
-    def __init__(self, period: int = 20, std_dev: float = 2):
-        """
-        鍒濆鍖栧懆甯冩灄甯︾瓥鐣?        
-        Args:
-            period: 甯冩灄甯﹀懆鏈燂紙鍛ㄦ暟锛?            std_dev: 鏍囧噯宸€嶆暟
-        """
-        super().__init__(name=f"WeeklyBoll{period}")
-        self.period = period
-        self.std_dev = std_dev
-    
-    def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
-        """
-        鐢熸垚浜ゆ槗淇″彿
-        
-        绛栫暐閫昏緫锛?        - 涓嬭穼鏈燂細K绾垮浜庡懆BOLL甯︿腑绾夸笅锛屼笖鍛↘鐨勬敹鐩樹环娌℃湁楂樹簬鍛˙OLL甯︿腑绾?        - 涓婅鏈燂細K绾跨殑鏀剁洏浠锋病鏈変綆浜庡懆BOLL甯︿綆绾?        - 涔板叆淇″彿锛氳繘鍏ヤ笅璺屾湡鍚庯紝鍛↘瓒呰繃BOLL甯︾殑楂樼嚎鍚庯紝鍥炶惤鍒癇OLL涓嚎闄勮繎涔板叆
-        - 鍗栧嚭淇″彿锛氬懆K 3娆′綆浜庢垨闈犺繎BOLL甯﹀簳绾垮悗锛屾渶鍚庝竴娆¤秴鍑築OLL甯﹂珮绾挎椂鍗栧嚭
-        
-        Args:
-            data: 鍖呭惈OHLCV鏁版嵁鐨凞ataFrame
-        
-        Returns:
-            娣诲姞浜嗕俊鍙峰垪鐨凞ataFrame
-        """
-        df = data.copy()
-        
-        df['Middle'] = df['Close'].rolling(window=self.period).mean()
-        df['Upper'] = df['Middle'] + df['Close'].rolling(window=self.period).std() * self.std_dev
-        df['Lower'] = df['Middle'] - df['Close'].rolling(window=self.period).std() * self.std_dev
-        
-        df['signal'] = 0
-        
-        for i in range(len(df)):
-            if i < self.period:
-                df.loc[df.index[i], 'signal'] = 0
-                continue
-            
-            current_close = df['Close'].iloc[i]
-            current_middle = df['Middle'].iloc[i]
-            current_upper = df['Upper'].iloc[i]
-            current_lower = df['Lower'].iloc[i]
-            
-            if df['signal'].iloc[i-1] == 0:
-                if current_close < current_middle:
-                    df.loc[df.index[i], 'signal'] = -1
-                else:
-                    df.loc[df.index[i], 'signal'] = 1
-            elif df['signal'].iloc[i-1] == -1:
-                if current_close > current_upper:
-                    df.loc[df.index[i], 'signal'] = 2
-                else:
-                    df.loc[df.index[i], 'signal'] = -1
-            elif df['signal'].iloc[i-1] == 2:
-                if abs(current_close - current_lower) < (current_upper - current_lower) * 0.1:
-                    df.loc[df.index[i], 'signal'] = 1
-                else:
-                    df.loc[df.index[i], 'signal'] = 2
-            elif df['signal'].iloc[i-1] == 1:
-                if current_close < current_lower:
-                    df.loc[df.index[i], 'signal'] = -1
-                else:
-                    df.loc[df.index[i], 'signal'] = 1
-        
-        return df
-
@@ -5,6 +5,11 @@
 import pandas as pd
 import numpy as np
 from typing import List, Tuple, Optional
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from core.profiling import stage  # noqa: E402
 
 
 class ChanTheory:
@@ -683,19 +688,24 @@ class ChanTheory:
         df = data.copy()
         
         # 1. 处理包含关系 + 识别分型
-        df = self.identify_fenxing(df)
+        with stage('chan.fenxing'):
+            df = self.identify_fenxing(df)
         
         # 2. 识别笔
-        df = self.identify_bi(df)
+        with stage('chan.bi'):
+            df = self.identify_bi(df)
         
         # 3. 识别线段
-        df = self.identify_xianduan(df)
+        with stage('chan.xianduan'):
+            df = self.identify_xianduan(df)
         
         # 4. 识别中枢
-        df = self.identify_zhongshu(df)
+        with stage('chan.zhongshu'):
+            df = self.identify_zhongshu(df)
         
         # 5. 识别买卖点
-        df = self.identify_buy_sell_points(df)
+        with stage('chan.buy_sell_points'):
+            df = self.identify_buy_sell_points(df)
         
         return df
     
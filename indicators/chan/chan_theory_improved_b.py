@@ -5,6 +5,11 @@
 import pandas as pd
 import numpy as np
 from typing import List, Tuple, Optional
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from core.profiling import stage  # noqa: E402
 
 
 class ChanTheoryImprovedB:
@@ -312,9 +317,14 @@ class ChanTheoryImprovedB:
     def analyze(self, data: pd.DataFrame) -> pd.DataFrame:
         """完整分析流程"""
         df = data.copy()
-        df = self.identify_fenxing_realtime(df)
-        df = self.identify_bi(df)
-        df = self.identify_xianduan(df)
-        df = self.identify_zhongshu(df)
-        df = self.identify_buy_sell_points(df)
+        with stage('chan.fenxing'):
+            df = self.identify_fenxing_realtime(df)
+        with stage('chan.bi'):
+            df = self.identify_bi(df)
+        with stage('chan.xianduan'):
+            df = self.identify_xianduan(df)
+        with stage('chan.zhongshu'):
+            df = self.identify_zhongshu(df)
+        with stage('chan.buy_sell_points'):
+            df = self.identify_buy_sell_points(df)
         return df
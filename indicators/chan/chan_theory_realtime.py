@@ -16,6 +16,32 @@
 import pandas as pd
 import numpy as np
 from typing import List, Tuple, Optional
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from core.profiling import stage  # noqa: E402
+
+
+def _paint_spans(index: pd.Index, spans: List[Tuple], fill, dtype) -> np.ndarray:
+    """
+    按 [start, end] 时间区间依次填值（后写覆盖先写）
+
+    等价于逐段 df.loc[(index >= start) & (index <= end), col] = value，但只在最后整列赋值一次；
+    索引升序时用 searchsorted 定位区间。
+    """
+    out = np.full(len(index), fill, dtype=dtype)
+    if not spans:
+        return out
+    if index.is_monotonic_increasing:
+        starts = index.searchsorted([span[0] for span in spans], side='left')
+        ends = index.searchsorted([span[1] for span in spans], side='right')
+        for lo, hi, span in zip(starts, ends, spans):
+            out[lo:hi] = span[2]
+    else:
+        for start, end, value in spans:
+            out[(index >= start) & (index <= end)] = value
+    return out
 
 
 class ChanTheoryRealtime:
@@ -41,7 +67,23 @@ class ChanTheoryRealtime:
         self.buy_points = []
         self.sell_points = []
     
-    def identify_fenxing_realtime(self, data: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def realtime_fenxing_types(high, low) -> np.ndarray:
+        """
+        逐根K线的疑似分型类型（1:疑似顶分型, -1:疑似底分型, 0:无）
+
+        只依赖前一根K线，可以对整段数据算一次，再按窗口切片复用。
+        """
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        types = np.zeros(len(high), dtype=np.int64)
+        if len(high) > 1:
+            up = (high[1:] > high[:-1]) & (low[1:] > low[:-1])
+            down = (low[1:] < low[:-1]) & (high[1:] < high[:-1])
+            types[1:] = np.where(up, 1, np.where(down, -1, 0))
+        return types
+
+    def identify_fenxing_realtime(self, data: pd.DataFrame, fenxing_types: Optional[np.ndarray] = None) -> pd.DataFrame:
         """
         实时识别疑似分型
         
@@ -50,51 +92,38 @@ class ChanTheoryRealtime:
         - 疑似底分型：当前低点 < 前一根低点 AND 当前高点 < 前一根高点
         
         不等待后一根K线确认，当天收盘即可判断
+
+        Args:
+            data: K线数据
+            fenxing_types: 预先按更长数据算好的 realtime_fenxing_types 切片（与 data 等长），
+                           首根K线没有前一根，按窗口内语义置为 0
         """
         df = data.copy()
         
-        # 初始化分型标记
-        df['fenxing_type'] = 0  # 0:无分型, 1:疑似顶分型, -1:疑似底分型
+        if fenxing_types is None:
+            types = self.realtime_fenxing_types(df['High'], df['Low'])
+        else:
+            types = np.array(fenxing_types, dtype=np.int64)
+            types[:1] = 0
+        
+        # 初始化分型标记（0:无分型, 1:疑似顶分型, -1:疑似底分型）
+        df['fenxing_type'] = types
         df['fenxing_high'] = df['High']
         df['fenxing_low'] = df['Low']
         
-        self.fenxing_list = []
-        
-        # 遍历K线识别疑似分型（从第1根开始，需要前一根）
-        for i in range(1, len(df)):
-            prev_high = df['High'].iloc[i - 1]
-            prev_low = df['Low'].iloc[i - 1]
-            curr_high = df['High'].iloc[i]
-            curr_low = df['Low'].iloc[i]
-            curr_idx = df.index[i]
-            
-            # 疑似顶分型：当前高于前一根（上涨趋势中的高点）
-            if curr_high > prev_high and curr_low > prev_low:
-                df.loc[curr_idx, 'fenxing_type'] = 1
-                df.loc[curr_idx, 'fenxing_high'] = curr_high
-                df.loc[curr_idx, 'fenxing_low'] = curr_low
-                self.fenxing_list.append({
-                    'index': curr_idx,
-                    'date': curr_idx,
-                    'type': 1,
-                    'high': curr_high,
-                    'low': curr_low,
-                    'confirmed': False  # 标记为未确认
-                })
-            
-            # 疑似底分型：当前低于前一根（下跌趋势中的低点）
-            elif curr_low < prev_low and curr_high < prev_high:
-                df.loc[curr_idx, 'fenxing_type'] = -1
-                df.loc[curr_idx, 'fenxing_high'] = curr_high
-                df.loc[curr_idx, 'fenxing_low'] = curr_low
-                self.fenxing_list.append({
-                    'index': curr_idx,
-                    'date': curr_idx,
-                    'type': -1,
-                    'high': curr_high,
-                    'low': curr_low,
-                    'confirmed': False
-                })
+        highs = df['High'].to_numpy()
+        lows = df['Low'].to_numpy()
+        self.fenxing_list = [
+            {
+                'index': df.index[i],
+                'date': df.index[i],
+                'type': int(types[i]),
+                'high': highs[i],
+                'low': lows[i],
+                'confirmed': False  # 标记为未确认
+            }
+            for i in np.flatnonzero(types)
+        ]
         
         return df
     
@@ -115,6 +144,7 @@ class ChanTheoryRealtime:
         
         # 按时间顺序处理分型
         fenxing_sorted = sorted(self.fenxing_list, key=lambda x: x['index'])
+        spans = []
         
         i = 0
         while i < len(fenxing_sorted) - 1:
@@ -151,9 +181,7 @@ class ChanTheoryRealtime:
                     'k_count': k_count + 2
                 }
                 self.bi_list.append(bi)
-                
-                mask = (df.index >= curr_fx['index']) & (df.index <= next_fx['index'])
-                df.loc[mask, 'bi_type'] = 1
+                spans.append((curr_fx['index'], next_fx['index'], 1))
                 
             elif curr_fx['type'] == 1 and next_fx['type'] == -1:
                 # 顶分型到底分型：向下笔
@@ -166,12 +194,11 @@ class ChanTheoryRealtime:
                     'k_count': k_count + 2
                 }
                 self.bi_list.append(bi)
-                
-                mask = (df.index >= curr_fx['index']) & (df.index <= next_fx['index'])
-                df.loc[mask, 'bi_type'] = -1
+                spans.append((curr_fx['index'], next_fx['index'], -1))
             
             i += 1
         
+        df['bi_type'] = _paint_spans(df.index, spans, 0, np.int64)
         return df
     
     def identify_xianduan(self, data: pd.DataFrame) -> pd.DataFrame:
@@ -218,9 +245,8 @@ class ChanTheoryRealtime:
             else:
                 i += 1
         
-        for xd in self.xianduan_list:
-            mask = (df.index >= xd['start']) & (df.index <= xd['end'])
-            df.loc[mask, 'xianduan_type'] = xd['type']
+        spans = [(xd['start'], xd['end'], xd['type']) for xd in self.xianduan_list]
+        df['xianduan_type'] = _paint_spans(df.index, spans, 0, np.int64)
         
         return df
     
@@ -278,10 +304,10 @@ class ChanTheoryRealtime:
             else:
                 i += 1
         
-        for zs in self.zhongshu_list:
-            mask = (df.index >= zs['start']) & (df.index <= zs['end'])
-            df.loc[mask, 'zhongshu_high'] = zs['high']
-            df.loc[mask, 'zhongshu_low'] = zs['low']
+        df['zhongshu_high'] = _paint_spans(
+            df.index, [(zs['start'], zs['end'], zs['high']) for zs in self.zhongshu_list], np.nan, float)
+        df['zhongshu_low'] = _paint_spans(
+            df.index, [(zs['start'], zs['end'], zs['low']) for zs in self.zhongshu_list], np.nan, float)
         
         return df
     
@@ -420,15 +446,26 @@ class ChanTheoryRealtime:
         
         return df
     
-    def analyze(self, data: pd.DataFrame) -> pd.DataFrame:
-        """完整分析流程"""
+    def analyze(self, data: pd.DataFrame, fenxing_types: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        完整分析流程
+
+        Args:
+            data: K线数据
+            fenxing_types: 可选，整段数据预先算好的疑似分型类型切片，见 identify_fenxing_realtime
+        """
         df = data.copy()
         
-        df = self.identify_fenxing_realtime(df)
-        df = self.identify_bi(df)
-        df = self.identify_xianduan(df)
-        df = self.identify_zhongshu(df)
-        df = self.identify_buy_sell_points(df)
+        with stage('chan.fenxing'):
+            df = self.identify_fenxing_realtime(df, fenxing_types)
+        with stage('chan.bi'):
+            df = self.identify_bi(df)
+        with stage('chan.xianduan'):
+            df = self.identify_xianduan(df)
+        with stage('chan.zhongshu'):
+            df = self.identify_zhongshu(df)
+        with stage('chan.buy_sell_points'):
+            df = self.identify_buy_sell_points(df)
         
         return df
     
@@ -0,0 +1,64 @@
+"""
+缠论买卖点信号边沿检测
+
+ChanTheoryRealtime.analyze 输出的 buy_point / sell_point 列在买卖点持续期间保持非零，
+交易和绘图只关心"由 0 变为指定类型"的那根K线。这里用 isin + 前移一位的数组运算一次算出全部边沿，
+替代逐行 result.iloc[i] / result.iloc[i-1] 比较。
+"""
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_POINT_TYPES = (1, 2)
+
+
+def rising_edges(points, types: Optional[Iterable[int]] = DEFAULT_POINT_TYPES) -> np.ndarray:
+    """
+    买卖点上升沿：当前K线类型属于 types 且前一根K线为 0
+
+    Args:
+        points: buy_point 或 sell_point 列（Series / 数组）
+        types: 需要的买卖点类型，None 表示任意非零类型
+
+    Returns:
+        与 points 等长的 bool 数组，第一根K线恒为 False
+    """
+    values = np.asarray(points)
+    if types is None:
+        current = values > 0
+    else:
+        current = np.isin(values, list(types))
+    previous_zero = np.zeros(len(values), dtype=bool)
+    previous_zero[1:] = values[:-1] == 0
+    return current & previous_zero
+
+
+def chan_signal_edges(
+    result: pd.DataFrame,
+    types: Optional[Iterable[int]] = DEFAULT_POINT_TYPES
+) -> Tuple[np.ndarray, np.ndarray]:
+    """返回 (买入上升沿, 卖出上升沿) 两个 bool 数组"""
+    return rising_edges(result['buy_point'], types), rising_edges(result['sell_point'], types)
+
+
+def chan_edge_prices(
+    result: pd.DataFrame,
+    data: pd.DataFrame,
+    types: Optional[Iterable[int]] = DEFAULT_POINT_TYPES
+) -> Tuple[pd.Series, pd.Series]:
+    """
+    绘图用买卖点序列：边沿处为该K线收盘价，其余为 0.0
+
+    result 与 data 按位置对齐，长度不一致时只取两者重叠部分。
+    """
+    buy, sell = chan_signal_edges(result, types)
+    n = min(len(result), len(data))
+    close = data['Close'].to_numpy(dtype=float)
+
+    buy_prices = np.zeros(len(data))
+    sell_prices = np.zeros(len(data))
+    buy_prices[:n] = np.where(buy[:n], close[:n], 0.0)
+    sell_prices[:n] = np.where(sell[:n], close[:n], 0.0)
+    return pd.Series(buy_prices, index=data.index), pd.Series(sell_prices, index=data.index)
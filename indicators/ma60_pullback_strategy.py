@@ -13,7 +13,10 @@ from typing import Dict
 import numpy as np
 import pandas as pd
 
+from core.profiling import timed
 
+
+@timed('indicators.ma60_pullback.calculate_indicators')
 def calculate_indicators(
     df: pd.DataFrame,
     ma5_period: int = 5,
@@ -61,6 +64,7 @@ def calculate_indicators(
     return data
 
 
+@timed('indicators.ma60_pullback.generate_signals')
 def generate_signals(
     df: pd.DataFrame,
     take_profit_threshold_pct: float = 20.0,
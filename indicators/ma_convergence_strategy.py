@@ -17,7 +17,10 @@ import numpy as np
 import pandas as pd
 from typing import Dict, Optional
 
+from core.profiling import timed
 
+
+@timed('indicators.ma_convergence.calculate_indicators')
 def calculate_indicators(
     df: pd.DataFrame,
     ma5_period: int = 5,
@@ -82,6 +85,7 @@ def calculate_indicators(
     return data
 
 
+@timed('indicators.ma_convergence.generate_signals')
 def generate_signals(
     df: pd.DataFrame,
     stop_loss_enabled: bool = True,
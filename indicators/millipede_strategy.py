@@ -19,7 +19,10 @@ import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple
 
+from core.profiling import timed
 
+
+@timed('indicators.millipede.calculate_indicators')
 def calculate_indicators(
     df: pd.DataFrame,
     trend_ma_period: int = 20,      # 趋势判断均线周期 (分钟)
@@ -99,6 +102,7 @@ def calculate_indicators(
     return data
 
 
+@timed('indicators.millipede.generate_signals')
 def generate_signals(
     df: pd.DataFrame,
     stop_loss_pct: float = 0.05,
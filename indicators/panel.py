@@ -0,0 +1,500 @@
+"""
+截面面板指标引擎
+
+各策略的 calculate_indicators 逐只股票用 pandas rolling 计算，全市场排名 / 扫描时
+5000 只股票就是 5000 次独立的 pandas 计算。这里把全部股票对齐到同一时间轴：
+
+- 每个字段一个 (时间 × 股票) 的 float32 矩阵，present 矩阵标记该股票当天是否有K线
+- 滚动均值 / 标准差用累计和相减按列一次算完（内部 float64，先减去列均值降低抵消误差）；
+  分位数用滑动窗口视图分块排序；EMA 按时间递推、各列同时更新
+- NaN 语义与 pandas 一致：窗口内有效值少于 min_periods（默认等于窗口）时为 NaN
+- 窗口按每只股票自己的K线计数（停牌日不占窗口），与逐只 rolling 的结果一致；
+  中间有缺口的列先把有效行压紧再计算、算完放回原位置
+
+ma_convergence_features() / ma60_pullback_features() / millipede_features() 给出与对应策略
+calculate_indicators 同名同口径的特征（布尔列存为 1.0 / 0.0，阈值判断建议用 float64 面板）；
+symbol_frame() 取回单只股票的 DataFrame（含特征列）可直接交给 generate_signals，
+cross_section() / frame() 给出某天的截面或整张矩阵，供选股排名使用。
+
+float32 存储在 5000 只 × 20 年日线时每个字段约 100MB；与逐只 float64 计算的差异在 1e-6 相对量级。
+
+用法：
+    panel = Panel.from_files(glob.glob('data_cache/*_20y_1d_forward.csv'))
+    panel.update(ma_convergence_features(panel))
+    df = panel.symbol_frame('000001.SZ')          # 等价于 calculate_indicators(原始数据)
+    today = panel.cross_section(panel.dates[-1], ['Close', 'ma20', 'vol_ratio'])
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.profiling import timed
+
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+ArrayLike = Union[str, np.ndarray]
+
+
+# ---------- 按列计算的滚动函数（输入输出均为 (时间 × 列) 矩阵） ----------
+
+def _window_diff(cumulative: np.ndarray, window: int) -> np.ndarray:
+    out = cumulative.copy()
+    if len(out) > window:
+        out[window:] -= cumulative[:-window]
+    return out
+
+
+def _min_periods(window: int, min_periods: Optional[int]) -> int:
+    return window if min_periods is None else max(1, int(min_periods))
+
+
+def _centered(values: np.ndarray):
+    """减去列均值（滚动均值 / 方差对平移不变，减小累计和的数值误差）"""
+    finite = np.where(np.isfinite(values), values, 0.0)
+    count = np.isfinite(values).sum(axis=0)
+    offset = finite.sum(axis=0) / np.maximum(count, 1)
+    return values - offset, offset
+
+
+def rolling_sum(x, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    values = np.asarray(x, dtype=np.float64)
+    valid = ~np.isnan(values)
+    total = _window_diff(np.cumsum(np.where(valid, values, 0.0), axis=0), window)
+    count = _window_diff(np.cumsum(valid, axis=0), window)
+    return np.where(count >= _min_periods(window, min_periods), total, np.nan)
+
+
+def rolling_mean(x, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    values = np.asarray(x, dtype=np.float64)
+    centered, offset = _centered(values)
+    valid = ~np.isnan(centered)
+    total = _window_diff(np.cumsum(np.where(valid, centered, 0.0), axis=0), window)
+    count = _window_diff(np.cumsum(valid, axis=0), window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count + offset
+    return np.where(count >= _min_periods(window, min_periods), mean, np.nan)
+
+
+def rolling_std(x, window: int, min_periods: Optional[int] = None, ddof: int = 1) -> np.ndarray:
+    values = np.asarray(x, dtype=np.float64)
+    centered, _ = _centered(values)
+    valid = ~np.isnan(centered)
+    filled = np.where(valid, centered, 0.0)
+    s1 = _window_diff(np.cumsum(filled, axis=0), window)
+    s2 = _window_diff(np.cumsum(filled * filled, axis=0), window)
+    count = _window_diff(np.cumsum(valid, axis=0), window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (s2 - s1 * s1 / count) / (count - ddof)
+    var = np.maximum(var, 0.0)
+    ok = (count >= _min_periods(window, min_periods)) & (count > ddof)
+    return np.where(ok, np.sqrt(var), np.nan)
+
+
+def rolling_quantile(x, window: int, q: float, min_periods: Optional[int] = None,
+                     block_elements: int = 4_000_000) -> np.ndarray:
+    """滚动分位数（线性插值，同 pandas rolling().quantile）；按时间分块，单块不超过 block_elements 个元素"""
+    values = np.asarray(x, dtype=np.float64)
+    n_rows = len(values)
+    out = np.full(values.shape, np.nan)
+    if n_rows == 0:
+        return out
+    padded = np.concatenate([np.full((window - 1,) + values.shape[1:], np.nan), values])
+    windows = sliding_window_view(padded, window, axis=0)          # (时间, 列, 窗口)
+    step = max(1, block_elements // max(1, windows[0].size))
+    need = _min_periods(window, min_periods)
+    for start in range(0, n_rows, step):
+        block = np.sort(windows[start:start + step], axis=-1)       # NaN 排在最后
+        count = np.sum(~np.isnan(block), axis=-1)
+        pos = q * np.maximum(count - 1, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, np.maximum(count - 1, 0))
+        v_lo = np.take_along_axis(block, lo[..., None], axis=-1)[..., 0]
+        v_hi = np.take_along_axis(block, hi[..., None], axis=-1)[..., 0]
+        result = v_lo + (v_hi - v_lo) * (pos - lo)
+        out[start:start + step] = np.where(count >= need, result, np.nan)
+    return out
+
+
+def shift(x, periods: int = 1) -> np.ndarray:
+    values = np.asarray(x, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if periods == 0:
+        out[:] = values
+    elif periods > 0:
+        out[periods:] = values[:-periods]
+    else:
+        out[:periods] = values[-periods:]
+    return out
+
+
+def ewm_mean(x, span: float) -> np.ndarray:
+    """EMA（同 pandas ewm(span, adjust=False).mean()，含中间 NaN 的权重衰减）"""
+    values = np.asarray(x, dtype=np.float64)
+    alpha = 2.0 / (span + 1.0)
+    out = np.full(values.shape, np.nan)
+    if len(values) == 0:
+        return out
+    weighted = values[0].copy()
+    old_wt = np.ones(values.shape[1:])
+    out[0] = weighted
+    for i in range(1, len(values)):
+        cur = values[i]
+        observed = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+        decay = started                                     # 已开始的列：无论本行是否有值，旧权重都衰减
+        old_wt = np.where(decay, old_wt * (1.0 - alpha), old_wt)
+        update = started & observed
+        with np.errstate(invalid='ignore'):
+            blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(update, blended, weighted)
+        old_wt = np.where(update, 1.0, old_wt)
+        first = ~started & observed
+        weighted = np.where(first, cur, weighted)
+        out[i] = weighted
+    return out
+
+
+def ffill(x) -> np.ndarray:
+    """按列向前填充 NaN"""
+    values = np.asarray(x)
+    rows = np.where(~np.isnan(values), np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(values, rows, axis=0)
+
+
+# ---------- 面板 ----------
+
+def _read_csv(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, index_col='datetime', parse_dates=True)
+
+
+class Panel:
+    """(时间 × 股票) 对齐的行情与特征矩阵"""
+
+    def __init__(
+        self,
+        dates: Sequence,
+        symbols: Sequence[str],
+        data: Mapping[str, np.ndarray],
+        present: Optional[np.ndarray] = None,
+        dtype=np.float32
+    ):
+        """
+        Args:
+            dates: 时间轴（升序）
+            symbols: 股票代码（列顺序）
+            data: 字段名 -> (len(dates), len(symbols)) 矩阵
+            present: 该股票当天是否有K线，默认取任一字段非 NaN
+            dtype: 存储精度
+        """
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = list(symbols)
+        self.dtype = dtype
+        self.data: Dict[str, np.ndarray] = {name: np.asarray(values, dtype=dtype) for name, values in data.items()}
+        if present is None:
+            present = np.zeros(self.shape, dtype=bool)
+            for values in self.data.values():
+                present |= ~np.isnan(values)
+        self.present = np.asarray(present, dtype=bool)
+        self._columns = {symbol: j for j, symbol in enumerate(self.symbols)}
+        self._packing_cache = None
+
+    # ---------- 构建 ----------
+
+    @classmethod
+    @timed('indicators.panel.from_frames')
+    def from_frames(cls, frames: Mapping[str, pd.DataFrame], fields: Sequence[str] = FIELDS,
+                    dtype=np.float32) -> 'Panel':
+        """{代码: OHLCV DataFrame(DatetimeIndex)} -> Panel，时间轴取全部日期的并集"""
+        frames = {symbol: df for symbol, df in frames.items() if df is not None and len(df)}
+        symbols = list(frames)
+        stamps = [df.index.values for df in frames.values()]
+        dates = pd.DatetimeIndex(np.unique(np.concatenate(stamps))) if stamps else pd.DatetimeIndex([])
+        shape = (len(dates), len(symbols))
+        data = {field: np.full(shape, np.nan, dtype=dtype) for field in fields}
+        present = np.zeros(shape, dtype=bool)
+        for j, df in enumerate(frames.values()):
+            rows = dates.get_indexer(df.index)
+            present[rows, j] = True
+            for field in fields:
+                if field in df.columns:
+                    data[field][rows, j] = df[field].to_numpy(dtype=np.float64)
+        return cls(dates, symbols, data, present, dtype=dtype)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], symbol_of: Optional[Callable[[str], str]] = None,
+                   loader: Callable[[str], pd.DataFrame] = _read_csv, fields: Sequence[str] = FIELDS,
+                   workers: int = 8, dtype=np.float32) -> 'Panel':
+        """读取缓存文件（默认 data_cache 的 CSV 格式）构建面板；读取失败的文件跳过"""
+        from core.universe_runner import symbol_from_path
+        symbol_of = symbol_of or symbol_from_path
+        paths = list(paths)
+
+        def load(path):
+            try:
+                df = loader(path)
+            except Exception:  # noqa: BLE001 - 与逐只扫描一致，坏文件跳过
+                return None
+            return df.loc[df.index.notna()].sort_index()
+
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+            frames = dict(zip((symbol_of(p) for p in paths), pool.map(load, paths)))
+        return cls.from_frames(frames, fields=fields, dtype=dtype)
+
+    # ---------- 访问 ----------
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.symbols)
+
+    @property
+    def fields(self):
+        return list(self.data)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.data[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.data
+
+    def __setitem__(self, name: str, values):
+        values = np.array(values, dtype=self.dtype)
+        if values.shape != self.shape:
+            raise ValueError(f"{name}: 形状 {values.shape} 与面板 {self.shape} 不一致")
+        values[~self.present] = np.nan
+        self.data[name] = values
+
+    def update(self, features: Mapping[str, np.ndarray]):
+        for name, values in features.items():
+            self[name] = values
+
+    def column(self, symbol: str) -> int:
+        return self._columns[symbol]
+
+    def row_of(self, date) -> int:
+        """date 当天或之前最近一个时间点的行号，早于面板起点时为 -1"""
+        return int(self.dates.searchsorted(pd.Timestamp(date), side='right')) - 1
+
+    def frame(self, name: str) -> pd.DataFrame:
+        return pd.DataFrame(self.data[name], index=self.dates, columns=self.symbols)
+
+    def symbol_frame(self, symbol: str, fields: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """单只股票有K线的各行（float64），列顺序同 fields（默认全部字段）"""
+        j = self.column(symbol)
+        rows = self.present[:, j]
+        fields = self.fields if fields is None else fields
+        df = pd.DataFrame({name: self.data[name][rows, j].astype(np.float64) for name in fields},
+                          index=self.dates[rows])
+        df.index.name = 'datetime'
+        return df
+
+    def cross_section(self, date, fields: Optional[Sequence[str]] = None, present_only: bool = True) -> pd.DataFrame:
+        """某天（或之前最近一天）的截面：行=股票，列=字段"""
+        row = self.row_of(date)
+        fields = self.fields if fields is None else fields
+        if row < 0:
+            return pd.DataFrame(columns=list(fields), dtype=np.float64)
+        df = pd.DataFrame({name: self.data[name][row].astype(np.float64) for name in fields}, index=self.symbols)
+        return df[self.present[row]] if present_only else df
+
+    def resample_last(self, rule: str = 'W-FRI') -> 'Panel':
+        """按周期取每列最后一个有效值（同 DataFrame.resample(rule).last()），没有数据的周期去掉"""
+        positions = pd.Series(np.arange(len(self.dates)), index=self.dates).resample(rule)
+        ends, starts = positions.max().dropna(), positions.min().dropna()
+        ends_idx, starts_idx = ends.to_numpy(dtype=np.int64), starts.to_numpy(dtype=np.int64)[:, None]
+
+        def last_valid(valid):
+            rows = np.where(valid, np.arange(len(self.dates))[:, None], -1)
+            np.maximum.accumulate(rows, axis=0, out=rows)
+            return rows[ends_idx]
+
+        data = {}
+        for name, values in self.data.items():
+            rows = last_valid(~np.isnan(values))
+            out = np.take_along_axis(values, np.maximum(rows, 0), axis=0)
+            out[rows < starts_idx] = np.nan
+            data[name] = out
+        present = last_valid(self.present) >= starts_idx
+        return Panel(ends.index, self.symbols, data, present, dtype=self.dtype)
+
+    # ---------- 按每只股票自己的K线计算 ----------
+
+    def _values(self, x: ArrayLike) -> np.ndarray:
+        return self.data[x] if isinstance(x, str) else np.asarray(x)
+
+    def _packing(self, present: np.ndarray):
+        """有中间缺口的列需要压紧：返回 (各列有效行在前的行号, 压紧后的有效标记)；全部连续时为 None"""
+        n_rows = len(present)
+        count = present.sum(axis=0)
+        first = np.argmax(present, axis=0)
+        last = n_rows - 1 - np.argmax(present[::-1], axis=0)
+        if np.all((count == 0) | (last - first + 1 == count)):
+            return None
+        order = np.argsort(~present, axis=0, kind='stable')
+        return order, np.arange(n_rows)[:, None] < count
+
+    def apply(self, fn: Callable[[np.ndarray], np.ndarray], x: ArrayLike,
+              present: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        在每只股票自己的K线序列上执行按列函数 fn（停牌 / 未上市的行不占窗口），结果放回原时间轴
+
+        Args:
+            present: 有效行标记，默认用面板的 present
+        """
+        if present is None:
+            if self._packing_cache is None:
+                self._packing_cache = (self._packing(self.present),)
+            packing, present = self._packing_cache[0], self.present
+        else:
+            packing = self._packing(present)
+        values = np.where(present, self._values(x), np.nan)
+        if packing is None:
+            out = fn(values)
+        else:
+            order, packed_valid = packing
+            packed = np.take_along_axis(values, order, axis=0)
+            packed[~packed_valid] = np.nan
+            out = np.empty(values.shape)
+            np.put_along_axis(out, order, np.where(packed_valid, fn(packed), np.nan), axis=0)
+        out = np.asarray(out, dtype=np.float64)
+        out[~present] = np.nan
+        return out
+
+    def rolling_mean(self, x: ArrayLike, window: int, min_periods: Optional[int] = None, present=None):
+        return self.apply(lambda v: rolling_mean(v, window, min_periods), x, present)
+
+    def rolling_std(self, x: ArrayLike, window: int, min_periods: Optional[int] = None, present=None):
+        return self.apply(lambda v: rolling_std(v, window, min_periods), x, present)
+
+    def rolling_quantile(self, x: ArrayLike, window: int, q: float, min_periods: Optional[int] = None, present=None):
+        return self.apply(lambda v: rolling_quantile(v, window, q, min_periods), x, present)
+
+    def shift(self, x: ArrayLike, periods: int = 1, present=None):
+        return self.apply(lambda v: shift(v, periods), x, present)
+
+    def ewm_mean(self, x: ArrayLike, span: float, present=None):
+        return self.apply(lambda v: ewm_mean(v, span), x, present)
+
+
+# ---------- 策略特征 ----------
+
+@timed('indicators.panel.ma_convergence_features')
+def ma_convergence_features(
+    panel: Panel,
+    ma5_period: int = 5,
+    ma10_period: int = 10,
+    ma20_period: int = 20,
+    ma60_period: int = 60,
+    ma120_period: int = 120,
+    volume_ma_period: int = 20,
+    boll_period: int = 20,
+    boll_std: float = 2.0,
+) -> Dict[str, np.ndarray]:
+    """与 ma_convergence_strategy.calculate_indicators 同名同口径的特征矩阵"""
+    close = panel['Close']
+    features = {
+        'ma5': panel.rolling_mean(close, ma5_period),
+        'ma10': panel.rolling_mean(close, ma10_period),
+        'ma20': panel.rolling_mean(close, ma20_period),
+        'ma60': panel.rolling_mean(close, ma60_period),
+        'ma120': panel.rolling_mean(close, ma120_period),
+    }
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if 'Volume' in panel:
+            volume = panel['Volume'].astype(np.float64)
+            features['vol_ma'] = panel.rolling_mean(volume, volume_ma_period)
+            features['vol_ratio'] = volume / features['vol_ma']
+            features['amount'] = close * volume
+            features['amount_ma'] = panel.rolling_mean(features['amount'], volume_ma_period)
+
+        middle = panel.rolling_mean(close, boll_period)
+        std = panel.rolling_std(close, boll_period)
+        features['boll_middle'] = middle
+        features['boll_upper'] = middle + boll_std * std
+        features['boll_lower'] = middle - boll_std * std
+
+        ma5, ma10, ma20 = features['ma5'], features['ma10'], features['ma20']
+        features['ma5_vs_ma20_pct'] = (ma5 - ma20) / ma20 * 100
+        features['ma10_vs_ma20_pct'] = (ma10 - ma20) / ma20 * 100
+        features['ma5_ma10_diff_pct'] = np.abs(ma5 - ma10) / ma20 * 100
+    return features
+
+
+@timed('indicators.panel.ma60_pullback_features')
+def ma60_pullback_features(
+    panel: Panel,
+    ma5_period: int = 5,
+    ma10_period: int = 10,
+    ma20_period: int = 20,
+    ma60_period: int = 60,
+    ma60_uptrend_lookback: int = 5,
+) -> Dict[str, np.ndarray]:
+    """与 ma60_pullback_strategy.calculate_indicators 同名同口径的特征矩阵（布尔列为 1.0 / 0.0）"""
+    close = panel['Close'].astype(np.float64)
+    ma5 = panel.rolling_mean(close, ma5_period)
+    ma10 = panel.rolling_mean(close, ma10_period)
+    ma20 = panel.rolling_mean(close, ma20_period)
+    ma60 = panel.rolling_mean(close, ma60_period)
+    lookback = max(1, int(ma60_uptrend_lookback))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'ma5': ma5,
+            'ma10': ma10,
+            'ma20': ma20,
+            'ma60': ma60,
+            'trend_ready': (ma5 > ma60) & (ma10 > ma60) & (ma20 > ma60),
+            'price_cross_below_ma60': (close < ma60) & (panel.shift(close, 1) >= panel.shift(ma60, 1)),
+            'ma10_cross_below_ma60': (ma10 < ma60) & (panel.shift(ma10, 1) >= panel.shift(ma60, 1)),
+            'ma10_vs_ma60_pct': (ma10 - ma60) / ma60 * 100.0,
+            'ma60_uptrend': ma60 > panel.shift(ma60, lookback),
+        }
+
+
+@timed('indicators.panel.millipede_features')
+def millipede_features(
+    panel: Panel,
+    trend_ma_period: int = 20,
+    volume_ma_period: int = 20,
+    volume_ratio: float = 1.5,
+) -> Dict[str, np.ndarray]:
+    """
+    与 millipede_strategy.calculate_indicators 同名同口径的特征矩阵（布尔列为 1.0 / 0.0）
+
+    涨跌幅按每只股票自己的上一根K线计算（同 pct_change，不填充缺失值）。
+    """
+    close = panel['Close'].astype(np.float64)
+    open_ = panel['Open'].astype(np.float64)
+    volume = panel['Volume'].astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ema_fast = panel.ewm_mean(close, 5)
+        ema_slow = panel.ewm_mean(close, trend_ma_period)
+        trend = np.where(ema_fast > ema_slow, 1.0, np.where(ema_fast < ema_slow, -1.0, 0.0))
+        volume_ma = panel.rolling_mean(volume, volume_ma_period)
+        ratio = volume / volume_ma
+        spike = ratio > volume_ratio
+        bullish, bearish = close > open_, close < open_
+        bb_middle = panel.rolling_mean(close, 20)
+        bb_std = panel.rolling_std(close, 20)
+        return {
+            'change': close / panel.shift(close, 1) - 1,
+            'is_bullish': bullish,
+            'is_bearish': bearish,
+            'ema_fast': ema_fast,
+            'ema_slow': ema_slow,
+            'trend': trend,
+            'trend_strength': (ema_fast - ema_slow) / ema_slow,
+            'volume_ma': volume_ma,
+            'volume_ratio': ratio,
+            'volume_spike': spike,
+            'momentum': close / panel.shift(close, 5) - 1,
+            'bb_middle': bb_middle,
+            'bb_upper': bb_middle + 2 * bb_std,
+            'bb_lower': bb_middle - 2 * bb_std,
+            'price_change_cum': close / panel.shift(close, 100) - 1,
+            'buy_signal': (trend == 1) & spike & bullish & ~np.isnan(volume_ma),
+            'sell_signal': (trend == -1) & spike & bearish & ~np.isnan(volume_ma),
+        }
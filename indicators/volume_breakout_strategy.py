@@ -9,6 +9,8 @@ import pandas as pd
 import numpy as np
 from typing import Optional
 
+from core.profiling import timed
+
 
 class VolumeBreakoutStrategy:
     """
@@ -47,6 +49,7 @@ class VolumeBreakoutStrategy:
         self.take_profit_trigger_pct = take_profit_trigger_pct
         self.ma_period = ma_period
     
+    @timed('indicators.volume_breakout.generate_signals')
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         生成交易信号
@@ -133,6 +136,7 @@ class VolumeBreakoutStrategyIntraday(VolumeBreakoutStrategy):
             ma_period=ma_period,
         )
     
+    @timed('indicators.volume_breakout_intraday.generate_signals')
     def generate_signals(self, df: pd.DataFrame, daily_ma5: Optional[pd.Series] = None) -> pd.DataFrame:
         """
         生成交易信号
@@ -10,6 +10,7 @@ Usage examples:
     python scanners/scan_ma_convergence_daily.py --symbols-file scanners/稳定行业.txt
     python scanners/scan_ma_convergence_daily.py --stock-pool-file scanners/stock_pool.csv
     python scanners/scan_ma_convergence_daily.py --lookback-bars 3 --workers 8
+    python scanners/scan_ma_convergence_daily.py --a-share-only --stock-pool-file scanners/stock_pool.csv --panel
     python scanners/scan_ma_convergence_daily.py --no-stop-loss --time-exit-days 90
 """
 
@@ -33,6 +34,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from indicators.ma_convergence_strategy import calculate_indicators, generate_signals  # noqa: E402
+from indicators.panel import Panel, ma_convergence_features  # noqa: E402
 from data.data_fetcher import DataFetcher  # noqa: E402
 
 
@@ -297,35 +299,63 @@ def _scan_one(args):
             return []
 
         df_ind = calculate_indicators(df, volume_ma_period=int(signal_params.get("volume_ma_period", 20)))
-        sig = generate_signals(df_ind, **signal_params)
-
-        lookback_bars = int(lookback_bars)
-        if lookback_bars <= 0:
-            lookback_bars = 1
-        tail = sig.tail(lookback_bars)
-        rows = []
-        for dt, r in tail.iterrows():
-            s = int(r.get("signal", 0))
-            if s not in (1, -1):
-                continue
-            rows.append(
-                {
-                    "symbol": job.symbol,
-                    "date": str(pd.Timestamp(dt)),
-                    "signal": "BUY" if s == 1 else "SELL",
-                    "close": float(r.get("Close", np.nan)),
-                    "exit_reason": str(r.get("exit_reason", "")),
-                    "ma5": float(r.get("ma5", np.nan)) if "ma5" in r else np.nan,
-                    "ma10": float(r.get("ma10", np.nan)) if "ma10" in r else np.nan,
-                    "ma20": float(r.get("ma20", np.nan)) if "ma20" in r else np.nan,
-                    "volume": float(r.get("Volume", np.nan)) if "Volume" in r else np.nan,
-                }
-            )
-        return rows
+        return _scan_indicators(job.symbol, df_ind, lookback_bars, signal_params)
     except Exception:
         return []
 
 
+def _scan_indicators(symbol: str, df_ind: pd.DataFrame, lookback_bars: int, signal_params: dict) -> list[dict]:
+    sig = generate_signals(df_ind, **signal_params)
+
+    lookback_bars = int(lookback_bars)
+    if lookback_bars <= 0:
+        lookback_bars = 1
+    tail = sig.tail(lookback_bars)
+    rows = []
+    for dt, r in tail.iterrows():
+        s = int(r.get("signal", 0))
+        if s not in (1, -1):
+            continue
+        rows.append(
+            {
+                "symbol": symbol,
+                "date": str(pd.Timestamp(dt)),
+                "signal": "BUY" if s == 1 else "SELL",
+                "close": float(r.get("Close", np.nan)),
+                "exit_reason": str(r.get("exit_reason", "")),
+                "ma5": float(r.get("ma5", np.nan)) if "ma5" in r else np.nan,
+                "ma10": float(r.get("ma10", np.nan)) if "ma10" in r else np.nan,
+                "ma20": float(r.get("ma20", np.nan)) if "ma20" in r else np.nan,
+                "volume": float(r.get("Volume", np.nan)) if "Volume" in r else np.nan,
+            }
+        )
+    return rows
+
+
+def _scan_panel(jobs: list[ScanJob], lookback_bars: int, signal_params: dict) -> list[dict]:
+    """
+    Panel mode: load every symbol into one (date x symbol) panel, compute the
+    indicators column-wise in a single pass, then run the signal state machine per symbol.
+    """
+    panel = Panel.from_files(
+        [str(job.csv_path) for job in jobs],
+        symbol_of=lambda path: Path(path).name.split("_")[0],
+        loader=_load_ohlcv,
+    )
+    panel.update(ma_convergence_features(panel, volume_ma_period=int(signal_params.get("volume_ma_period", 20))))
+    bars = panel.present.sum(axis=0)
+
+    rows: list[dict] = []
+    for symbol in panel.symbols:
+        if bars[panel.column(symbol)] < 140:
+            continue
+        try:
+            rows.extend(_scan_indicators(symbol, panel.symbol_frame(symbol), lookback_bars, signal_params))
+        except Exception:
+            continue
+    return rows
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Daily MA Convergence scanner (buy/sell points).")
     parser.add_argument("--data-dir", default="data_cache")
@@ -336,6 +366,11 @@ def main() -> int:
     parser.add_argument("--exclude-symbols", default="", help="Comma-separated symbols to exclude.")
     parser.add_argument("--lookback-bars", type=int, default=1, help="Scan signals within last N bars (default: latest bar only).")
     parser.add_argument("--workers", type=int, default=1, help="Parallel workers.")
+    parser.add_argument(
+        "--panel",
+        action="store_true",
+        help="Compute indicators for all symbols at once on a date x symbol panel (ignores --workers).",
+    )
     parser.add_argument("--out-dir", default="results/ma_convergence_daily_scan", help="Output directory for scan CSVs.")
     parser.add_argument(
         "--update-missing",
@@ -507,7 +542,9 @@ def main() -> int:
     print(f"[INFO] symbols={len(symbols)} jobs={len(jobs)} lookback_bars={int(args.lookback_bars)}")
 
     rows: list[dict] = []
-    if int(args.workers) > 1:
+    if args.panel:
+        rows = _scan_panel(jobs, int(args.lookback_bars), signal_params)
+    elif int(args.workers) > 1:
         with cf.ProcessPoolExecutor(max_workers=max(1, int(args.workers))) as ex:
             futs = [
                 ex.submit(_scan_one, (job, int(args.lookback_bars), signal_params))
@@ -3,10 +3,10 @@
 
 - 扫描股票池中的近期买卖点信号。
 - 优先读取本地缓存，缓存过期时在线拉取数据。
-- 结果追加写入固定历史 CSV 文件。
+- 每轮扫描结果写入信号历史库（core/signal_history.py，默认 results/signal_history.sqlite）。
 """
 
-import json
+import logging
 import os
 import sys
 import warnings
@@ -20,9 +20,16 @@ warnings.filterwarnings('ignore')
 # 将项目根目录加入导入路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from core.log import EventCounter, get_logger
+from core.signal_history import DEFAULT_PATH, SignalHistory
+from data.adjustment import adjust_prices, legacy_cache_path, load_adjusted_cache, raw_cache_path, read_bars_csv
 from data.data_fetcher import DataFetcher
 from indicators.chan.chan_theory_realtime import ChanTheoryRealtime
 
+logger = get_logger('scanners.scan_signals_realtime')
+
+# 信号历史库中的策略名
+STRATEGY_NAME = 'chan_realtime'
 
 # 扫描使用的股票池
 STOCK_UNIVERSE = {# A股主要指数成分股
@@ -107,13 +114,19 @@ STOCK_UNIVERSE = {# A股主要指数成分股
 class SignalScanner:
     """实时买卖点信号扫描器。"""
 
-    def __init__(self, stock_universe: Dict[str, str] = None, only_latest_trading_day: bool = False):
+    def __init__(
+        self,
+        stock_universe: Dict[str, str] = None,
+        only_latest_trading_day: bool = False,
+        history_db: str = DEFAULT_PATH,
+    ):
         """
         初始化扫描器
         
         Args:
             stock_universe: 股票池，格式 {symbol: name}
             only_latest_trading_day: 是否仅保留最新交易日触发的信号
+            history_db: 信号历史库路径
         """
         self.stock_universe = stock_universe or STOCK_UNIVERSE
         self.only_latest_trading_day = only_latest_trading_day
@@ -125,6 +138,7 @@ class SignalScanner:
             retry_delay=2.0,
         )
         self.prefetched_data: Dict[str, pd.DataFrame] = {}
+        self.history = SignalHistory(history_db)
 
     @staticmethod
     def _normalize_price_frame(data: pd.DataFrame) -> pd.DataFrame:
@@ -142,7 +156,7 @@ class SignalScanner:
     def prefetch_all_symbols(self):
         """一次性批量拉取股票池日线数据并更新缓存。"""
         symbols = list(self.stock_universe.keys())
-        print(f"Batch fetching daily data for {len(symbols)} symbols...")
+        logger.info("Batch fetching daily data for %d symbols...", len(symbols))
         try:
             batch_data = self.fetcher.fetch_stock_data_batch(
                 symbols=symbols,
@@ -156,31 +170,33 @@ class SignalScanner:
                 for symbol, data in batch_data.items()
                 if data is not None and len(data) > 0
             }
-            print(f"Batch fetch complete: {len(self.prefetched_data)}/{len(symbols)} symbols updated")
+            logger.info("Batch fetch complete: %d/%d symbols updated", len(self.prefetched_data), len(symbols))
         except Exception as exc:
-            print(f"Batch fetch failed: {exc}")
+            logger.warning("Batch fetch failed: %s", exc)
             self.prefetched_data = {}
 
     def fetch_stock_data(self, symbol: str) -> Optional[pd.DataFrame]:
         """优先读取当日缓存，否则在线拉取。"""
         try:
             today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            cache_file = f'data_cache/{symbol}_1y_1d_forward.csv'
+            cache_file = raw_cache_path('data_cache', symbol, '1y', '1d')
+            if not os.path.exists(cache_file):
+                cache_file = legacy_cache_path('data_cache', symbol, '1y', '1d', 'forward')
 
             if os.path.exists(cache_file):
                 cache_mtime = datetime.fromtimestamp(os.path.getmtime(cache_file))
                 if cache_mtime >= today:
-                    data = self._normalize_price_frame(pd.read_csv(cache_file))
+                    data = self._normalize_price_frame(adjust_prices(read_bars_csv(cache_file), 'forward'))
                     if len(data) > 0 and data.index[-1].date() == today.date():
-                        print(f"  [{symbol}] Using cached data (latest: {data.index[-1].date()})")
+                        logger.debug("  [%s] Using cached data (latest: %s)", symbol, data.index[-1].date())
                         return data
 
             prefetched = self.prefetched_data.get(symbol)
             if prefetched is not None and len(prefetched) > 0:
-                print(f"  [{symbol}] Using batch-fetched data (latest: {prefetched.index[-1].date()})")
+                logger.debug("  [%s] Using batch-fetched data (latest: %s)", symbol, prefetched.index[-1].date())
                 return prefetched
 
-            print(f"  [{symbol}] Cache outdated, fetching online...")
+            logger.debug("  [%s] Cache outdated, fetching online...", symbol)
             try:
                 data = self.fetcher.fetch_stock_data(
                     symbol=symbol,
@@ -191,20 +207,20 @@ class SignalScanner:
                 )
                 if data is not None and len(data) > 0:
                     data = self._normalize_price_frame(data)
-                    print(f"  [{symbol}] Fetched online data (latest: {data.index[-1].date()})")
+                    logger.debug("  [%s] Fetched online data (latest: %s)", symbol, data.index[-1].date())
                     return data
             except Exception as exc:
-                print(f"  [{symbol}] Online fetch failed: {exc}")
+                logger.warning("  [%s] Online fetch failed: %s", symbol, exc)
 
-            cache_file_20y = f'data_cache/{symbol}_20y_1d_forward.csv'
-            if os.path.exists(cache_file_20y):
-                print(f"  [{symbol}] Using 20y cached data (fallback)")
-                return self._normalize_price_frame(pd.read_csv(cache_file_20y))
+            data_20y = load_adjusted_cache('data_cache', symbol, '20y', '1d', 'forward')
+            if data_20y is not None:
+                logger.info("  [%s] Using 20y cached data (fallback)", symbol)
+                return self._normalize_price_frame(data_20y)
 
-            print(f"  [{symbol}] No data available, skipping")
+            logger.warning("  [%s] No data available, skipping", symbol)
             return None
         except Exception as exc:
-            print(f"  [{symbol}] Error: {exc}")
+            logger.warning("  [%s] Error: %s", symbol, exc)
             return None
 
     def analyze_signals(self, symbol: str, name: str) -> Dict:
@@ -273,95 +289,69 @@ class SignalScanner:
 
     def scan_all_stocks(self) -> Dict:
         """扫描所有配置股票。"""
-        print('=' * 100)
-        print(f"Chan Theory Real-time Signal Scan - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print('=' * 100)
-        print(f"Stock universe: {len(self.stock_universe)} stocks")
-        print()
+        logger.info('=' * 100)
+        logger.info("Chan Theory Real-time Signal Scan - %s", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        logger.info('=' * 100)
+        logger.info("Stock universe: %d stocks\n", len(self.stock_universe))
         self.prefetch_all_symbols()
-        print()
 
         all_buy_signals = []
         all_sell_signals = []
-        error_count = 0
+        events = EventCounter(logger, 'Scan events')
 
         for i, (symbol, name) in enumerate(self.stock_universe.items(), 1):
-            print(f"[{i}/{len(self.stock_universe)}] Scanning: {name} ({symbol})")
+            logger.debug("[%d/%d] Scanning: %s (%s)", i, len(self.stock_universe), name, symbol)
             try:
                 result = self.analyze_signals(symbol, name)
 
-                if result['buy_signals']:
-                    for signal in result['buy_signals']:
-                        all_buy_signals.append(signal)
-                        print(f"  >>> BUY SIGNAL: {signal['signal_type']} @ {signal['signal_price']} ({signal['price_diff']:+.2f}%)")
+                for signal in result['buy_signals']:
+                    all_buy_signals.append(signal)
+                    logger.info("  >>> BUY SIGNAL: %s %s @ %s (%+.2f%%)", symbol, signal['signal_type'],
+                                signal['signal_price'], signal['price_diff'])
 
-                if result['sell_signals']:
-                    for signal in result['sell_signals']:
-                        all_sell_signals.append(signal)
-                        print(f"  >>> SELL SIGNAL: {signal['signal_type']} @ {signal['signal_price']} ({signal['price_diff']:+.2f}%)")
+                for signal in result['sell_signals']:
+                    all_sell_signals.append(signal)
+                    logger.info("  >>> SELL SIGNAL: %s %s @ %s (%+.2f%%)", symbol, signal['signal_type'],
+                                signal['signal_price'], signal['price_diff'])
 
+                events.incr('scanned')
                 if not result['buy_signals'] and not result['sell_signals']:
-                    print('  No recent signals')
+                    events.incr('no_signal')
             except Exception as exc:
-                print(f"  Error: {exc}")
-                error_count += 1
-            print()
+                logger.warning("  [%s] Error: %s", symbol, exc)
+                events.incr('errors')
 
-        print('=' * 100)
-        print('Scan complete')
-        print(f"  Buy signals: {len(all_buy_signals)}")
-        print(f"  Sell signals: {len(all_sell_signals)}")
-        print(f"  Errors: {error_count}")
-        print('=' * 100)
+        logger.info('=' * 100)
+        logger.info('Scan complete')
+        logger.info("  Buy signals: %d", len(all_buy_signals))
+        logger.info("  Sell signals: %d", len(all_sell_signals))
+        logger.info("  Errors: %d", events['errors'])
+        events.summary(logging.DEBUG)
+        logger.info('=' * 100)
 
         return {'buy_signals': all_buy_signals, 'sell_signals': all_sell_signals}
 
     def save_results(self, signals: Dict):
-        """将本次结果追加到固定历史 CSV，并更新最新摘要。"""
-        output_dir = 'results/realtime_scan'
-        os.makedirs(output_dir, exist_ok=True)
-
-        scan_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        history_csv = f'{output_dir}/signals_history.csv'
+        """将本次结果作为一轮扫描写入信号历史库（单个事务）。"""
+        scan_time = datetime.now().isoformat(timespec='seconds')
 
         all_signals = []
-        for signal in signals['buy_signals']:
-            row = dict(signal)
-            row['side'] = 'BUY'
-            row['scan_time'] = scan_time
-            all_signals.append(row)
-
-        for signal in signals['sell_signals']:
-            row = dict(signal)
-            row['side'] = 'SELL'
-            row['scan_time'] = scan_time
-            all_signals.append(row)
-
-        if all_signals:
-            history_df = pd.DataFrame(all_signals)
-            file_exists = os.path.exists(history_csv)
-            history_df.to_csv(
-                history_csv,
-                mode='a',
-                header=not file_exists,
-                index=False,
-                encoding='utf-8-sig',
-            )
-
-        summary = {
-            'scan_time': datetime.now().isoformat(),
+        for side, key in (('BUY', 'buy_signals'), ('SELL', 'sell_signals')):
+            for signal in signals[key]:
+                row = dict(signal)
+                row['side'] = side
+                row['scan_time'] = scan_time
+                all_signals.append(row)
+
+        stats = {
             'total_stocks': len(self.stock_universe),
             'buy_count': len(signals['buy_signals']),
             'sell_count': len(signals['sell_signals']),
-            'buy_signals': signals['buy_signals'],
-            'sell_signals': signals['sell_signals'],
         }
-        with open(f'{output_dir}/summary_latest.json', 'w', encoding='utf-8') as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+        run_id = self.history.record_scan(STRATEGY_NAME, all_signals, scan_time=scan_time, stats=stats)
 
-        print(f"\nResults saved to: {output_dir}/")
-        print(f"  History CSV: {history_csv}")
-        print(f"  Appended rows: {len(all_signals)}")
+        print(f"\nResults saved to: {self.history.path} (strategy={STRATEGY_NAME}, run_id={run_id})")
+        print(f"  Recorded signals: {len(all_signals)}")
 
     def print_summary(self, signals: Dict):
         """在控制台打印简要汇总。"""
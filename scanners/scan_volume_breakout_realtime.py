@@ -5,7 +5,8 @@ Features:
 1. Scan every N minutes during CN trading sessions.
 2. Use minute bars from AkShare + realtime spot price.
 3. Detect buy points and sell points (for existing paper positions).
-4. Persist signal history and paper positions.
+4. Persist scan runs, signal history and paper positions in the signal history
+   database (core/signal_history.py), one transaction per scan cycle.
 
 Usage examples:
     python scanners/scan_volume_breakout_realtime.py --once --period 15
@@ -19,39 +20,34 @@ import argparse
 import json
 import os
 import re
+import sys
 import time
 from dataclasses import asdict, dataclass
-from datetime import datetime, timedelta, time as dtime
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 import akshare as ak
 import pandas as pd
 from zoneinfo import ZoneInfo
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.calendar import load_calendar  # noqa: E402
+from core.signal_history import DEFAULT_PATH, SignalHistory  # noqa: E402
+
 
 CN_TZ = ZoneInfo("Asia/Shanghai")
-TRADING_SESSIONS = (
-    (dtime(9, 30), dtime(11, 30)),
-    (dtime(13, 0), dtime(15, 0)),
-)
+# Trading sessions and exchange holidays come from core/calendar_sessions.json
+# plus data_cache/cn_trade_dates.csv (weekdays only when the file is missing).
+CALENDAR = load_calendar("cn_stock")
+STRATEGY_NAME = "volume_breakout"
 
 
 def now_cn() -> datetime:
     return datetime.now(CN_TZ)
 
 
-def is_weekday(dt: datetime) -> bool:
-    return dt.weekday() < 5
-
-
 def is_trading_time(dt: datetime) -> bool:
-    if not is_weekday(dt):
-        return False
-    t = dt.timetz().replace(tzinfo=None)
-    for start, end in TRADING_SESSIONS:
-        if start <= t < end:
-            return True
-    return False
+    return CALENDAR.is_open(dt)
 
 
 def normalize_symbol(symbol: str) -> Optional[str]:
@@ -83,31 +79,9 @@ def symbol_to_code(symbol: str) -> str:
     return symbol.split(".")[0]
 
 
-def next_weekday_0930(dt: datetime) -> datetime:
-    nxt = dt
-    while True:
-        nxt = (nxt + timedelta(days=1)).replace(hour=9, minute=30, second=0, microsecond=0)
-        if is_weekday(nxt):
-            return nxt
-
-
 def next_market_open(dt: datetime) -> datetime:
-    """Return next CN market open time."""
-    base = dt.replace(second=0, microsecond=0)
-    if not is_weekday(base):
-        return next_weekday_0930(base)
-
-    t = base.timetz().replace(tzinfo=None)
-    morning_open = base.replace(hour=9, minute=30)
-    noon_open = base.replace(hour=13, minute=0)
-    if t < dtime(9, 30):
-        return morning_open
-    if dtime(11, 30) <= t < dtime(13, 0):
-        return noon_open
-    if t >= dtime(15, 0):
-        return next_weekday_0930(base)
-    # already in trading session
-    return base
+    """Return next CN market open time (skips weekends and exchange holidays)."""
+    return CALENDAR.next_open(dt)
 
 
 def sleep_until(target_dt: datetime) -> None:
@@ -165,15 +139,8 @@ def drop_incomplete_last_bar(df: pd.DataFrame, period_min: int, ref_dt: datetime
 
 
 def trading_days_between(start_date: datetime, end_date: datetime) -> int:
-    if end_date.date() <= start_date.date():
-        return 0
-    days = 0
-    d = start_date.date()
-    while d < end_date.date():
-        d = d + timedelta(days=1)
-        if d.weekday() < 5:
-            days += 1
-    return days
+    """Trading days in (start_date, end_date], excluding exchange holidays."""
+    return CALENDAR.trading_days_between(start_date.date(), end_date.date())
 
 
 def get_daily_ma5_rt(minute_df: pd.DataFrame, realtime_price: float) -> Optional[float]:
@@ -354,6 +321,7 @@ class VolumeBreakoutRealtimeScanner:
         output_dir: str = "results/volume_breakout_realtime",
         paper_trade: bool = True,
         fixed_shares: int = 100,
+        history_db: str = DEFAULT_PATH,
     ):
         self.symbols = symbols
         self.period_min = period_min
@@ -370,14 +338,22 @@ class VolumeBreakoutRealtimeScanner:
         self.fixed_shares = fixed_shares
 
         os.makedirs(self.output_dir, exist_ok=True)
+        self.history = SignalHistory(history_db)
         self.positions: Dict[str, PositionState] = self._load_positions()
 
     def _load_positions(self) -> Dict[str, PositionState]:
-        if not os.path.exists(self.positions_file):
+        # positions_file is only read once to migrate pre-database paper positions.
+        if self.history.has_positions(STRATEGY_NAME):
+            raw = self.history.load_positions(STRATEGY_NAME)
+        elif os.path.exists(self.positions_file):
+            try:
+                with open(self.positions_file, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+            except Exception:
+                return {}
+        else:
             return {}
         try:
-            with open(self.positions_file, "r", encoding="utf-8") as f:
-                raw = json.load(f)
             out: Dict[str, PositionState] = {}
             if isinstance(raw, dict):
                 for symbol, p in raw.items():
@@ -396,24 +372,19 @@ class VolumeBreakoutRealtimeScanner:
         except Exception:
             return {}
 
-    def _save_positions(self) -> None:
-        payload = {sym: asdict(pos) for sym, pos in self.positions.items()}
-        os.makedirs(os.path.dirname(self.positions_file), exist_ok=True)
-        with open(self.positions_file, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-
-    def _append_history(self, records: List[Dict]) -> None:
-        if not records:
-            return
-        hist_path = os.path.join(self.output_dir, "signals_history.csv")
-        df = pd.DataFrame(records)
-        exists = os.path.exists(hist_path)
-        df.to_csv(hist_path, mode="a", header=not exists, index=False, encoding="utf-8-sig")
-
-    def _save_latest_summary(self, summary: Dict) -> None:
-        out_path = os.path.join(self.output_dir, "summary_latest.json")
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+    def _record_scan(self, summary: Dict) -> int:
+        """Write the scan run, its signals and (when paper trading) the positions in one transaction."""
+        stats = {k: v for k, v in summary.items() if k not in ("scan_time", "buy_signals", "sell_signals")}
+        positions = (
+            {sym: asdict(pos) for sym, pos in self.positions.items()} if self.paper_trade else None
+        )
+        return self.history.record_scan(
+            STRATEGY_NAME,
+            summary["buy_signals"] + summary["sell_signals"],
+            scan_time=summary["scan_time"],
+            stats=stats,
+            positions=positions,
+        )
 
     def _build_buy_signal(self, symbol: str, bar: pd.Series, realtime_price: float, name: str) -> Dict:
         stop_price = realtime_price * (1 - self.stop_loss_pct)
@@ -553,11 +524,6 @@ class VolumeBreakoutRealtimeScanner:
                 errors += 1
                 print(f"[{i}/{len(self.symbols)}] {symbol} error: {exc}")
 
-        all_records = buy_signals + sell_signals
-        self._append_history(all_records)
-        if self.paper_trade:
-            self._save_positions()
-
         summary = {
             "scan_time": now_cn().isoformat(),
             "period_min": self.period_min,
@@ -569,14 +535,14 @@ class VolumeBreakoutRealtimeScanner:
             "buy_signals": buy_signals,
             "sell_signals": sell_signals,
         }
-        self._save_latest_summary(summary)
+        run_id = self._record_scan(summary)
 
         print("-" * 90)
         print(
             f"Done: buy={len(buy_signals)} sell={len(sell_signals)} "
             f"errors={errors} positions={len(self.positions)}"
         )
-        print(f"Output dir: {self.output_dir}")
+        print(f"History db: {self.history.path} (run_id={run_id})")
         print("=" * 90)
         return summary
 
@@ -630,7 +596,12 @@ def main() -> None:
     parser.add_argument("--tp-trail-retrace", type=float, default=0.07)
     parser.add_argument("--max-holding-days-no-profit", type=int, default=20)
     parser.add_argument("--adjust", choices=["", "qfq", "hfq"], default="qfq")
-    parser.add_argument("--positions-file", default="results/volume_breakout_realtime/positions.json")
+    parser.add_argument(
+        "--positions-file",
+        default="results/volume_breakout_realtime/positions.json",
+        help="legacy positions JSON, imported once when the history db has no volume_breakout runs",
+    )
+    parser.add_argument("--history-db", default=DEFAULT_PATH, help="signal history SQLite database")
     parser.add_argument("--output-dir", default="results/volume_breakout_realtime")
     parser.add_argument("--paper-trade", action="store_true", help="enable paper position management")
     parser.add_argument("--fixed-shares", type=int, default=100, help="shares per paper entry")
@@ -659,6 +630,7 @@ def main() -> None:
         output_dir=args.output_dir,
         paper_trade=args.paper_trade,
         fixed_shares=args.fixed_shares,
+        history_db=args.history_db,
     )
 
     run_once_only = args.once or not args.daemon
@@ -7,14 +7,28 @@ from datetime import timedelta
 from pathlib import Path
 
 import pandas as pd
-import mplfinance as mpf
-import numpy as np
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from indicators import ma_convergence_strategy
 from indicators.ma_convergence_strategy import calculate_indicators, generate_signals
+from core import profiling
+from visualization.chart_farm import (
+    DEFAULT_CACHE_DIR,
+    ChartRequest,
+    ChartSpec,
+    file_stamp,
+    last_years,
+    public_row,
+    render_cached,
+    run_tasks,
+    save_cache_index,
+    source_key,
+    status_counts,
+    worker_context,
+)
 
 
 @dataclass(frozen=True)
@@ -34,62 +48,44 @@ def _load_ohlcv(csv_path: Path) -> pd.DataFrame:
     return df
 
 
-def _select_last_years(df: pd.DataFrame, years: int) -> pd.DataFrame:
-    if df.empty:
-        return df
-    end_ts = df.index.max()
-    start_ts = end_ts - pd.DateOffset(years=years)
-    return df.loc[df.index >= start_ts]
-
-
-def _make_buy_markers(df: pd.DataFrame, signals_df: pd.DataFrame) -> pd.Series:
-    buy_mask = signals_df.get("signal", 0) == 1
-    buy_mask = buy_mask.reindex(df.index, fill_value=False)
-    marker_y = pd.Series(index=df.index, data=np.nan, dtype="float64")
-    if buy_mask.any():
-        marker_y.loc[buy_mask] = (df.loc[buy_mask, "Low"] * 0.99).astype(float)
-    return marker_y
-
-
-def _plot_one(
-    df_5y: pd.DataFrame,
-    signals_5y: pd.DataFrame,
-    symbol: str,
-    out_path: Path,
-    style: str,
-    mav: tuple[int, ...],
-    dpi: int,
-):
-    addplots = []
-    buy_markers = _make_buy_markers(df_5y, signals_5y)
-    if buy_markers.notna().any():
-        addplots.append(
-            mpf.make_addplot(
-                buy_markers,
-                type="scatter",
-                markersize=60,
-                marker="^",
-                color="g",
-                panel=0,
-            )
-        )
-
-    plot_kwargs = dict(
-        type="candle",
-        style=style,
-        volume=True,
-        mav=mav,
-        title=f"{symbol} - MA Convergence Buy Points (Last 5y)",
-        ylabel="Price",
-        ylabel_lower="Volume",
-        addplot=addplots if addplots else None,
-        warn_too_much_data=len(df_5y) + 500,
-        figsize=(16, 10),
-        tight_layout=True,
-        savefig=dict(fname=str(out_path), dpi=dpi, bbox_inches="tight"),
+def _build_chart(job: ChartJob, ctx: dict) -> ChartRequest | None:
+    df = _load_ohlcv(job.csv_path)
+    required_cols = {"Open", "High", "Low", "Close", "Volume"}
+    if not required_cols.issubset(set(df.columns)):
+        return None
+
+    df_5y = last_years(df, ctx["years"])
+    if len(df_5y) < 60:
+        return None
+
+    df_ind = calculate_indicators(df)
+    signals = generate_signals(df_ind)
+    signals_5y = signals.reindex(df_5y.index)
+
+    buy_count = int((signals_5y.get("signal", 0) == 1).sum())
+    return ChartRequest(
+        df_5y[["Open", "High", "Low", "Close", "Volume"]].copy(),
+        signals_5y,
+        f"{job.symbol} - MA Convergence Buy Points (Last 5y)",
+        {
+            "symbol": job.symbol,
+            "rows_5y": int(len(df_5y)),
+            "buy_signals_5y": buy_count,
+            "start": str(df_5y.index.min()),
+            "end": str(df_5y.index.max()),
+        },
     )
 
-    mpf.plot(df_5y, **plot_kwargs)
+
+def _render_one(job: ChartJob) -> dict | None:
+    ctx = worker_context()
+    try:
+        key = source_key(job.csv_path, "ma_convergence_5y", ctx["strategy_stamp"], ctx["years"])
+        out_path = Path(ctx["out_dir"]) / f"{job.symbol}.png"
+        result = render_cached(out_path, key, lambda: _build_chart(job, ctx), ctx["spec"])
+        return result if result is not None else {"symbol": job.symbol, "skipped": True}
+    except Exception as e:
+        return {"symbol": job.symbol, "csv": job.csv_path.name, "error": str(e)}
 
 
 def _build_jobs(data_dir: Path, pattern: str) -> list[ChartJob]:
@@ -114,11 +110,16 @@ def main():
     parser.add_argument("--years", type=int, default=5, help="Number of years to plot from the latest bar.")
     parser.add_argument("--max-symbols", type=int, default=0, help="Limit number of symbols (0 = no limit).")
     parser.add_argument("--a-share-only", action="store_true", help="Only generate for A-share symbols (e.g. 000001.SZ).")
-    parser.add_argument("--overwrite", action="store_true", help="Overwrite existing PNGs.")
+    parser.add_argument("--overwrite", action="store_true", help="Re-render every chart even if its cache key is unchanged.")
     parser.add_argument("--style", default="charles", help="mplfinance style name.")
     parser.add_argument("--mav", default="5,10,20,60", help="Moving averages to draw, comma-separated (e.g. 5,10,20,60).")
     parser.add_argument("--dpi", type=int, default=160, help="PNG DPI.")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel workers for chart rendering.")
+    parser.add_argument("--chart-cache", default=DEFAULT_CACHE_DIR, help="Content-addressed chart cache dir. Empty = disable.")
+    parser.add_argument("--profile", action="store_true", help="Write a per-stage timing report to results/profile/ (worker timings merged).")
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
 
     data_dir = Path(args.data_dir)
     out_dir = Path(args.out_dir)
@@ -135,53 +136,36 @@ def main():
     if not mav:
         raise SystemExit("--mav must contain at least one integer period")
 
-    summary_rows: list[dict] = []
-    failures = 0
-    skipped = 0
-
     print(f"[INFO] jobs={len(jobs)} data_dir={data_dir} out_dir={out_dir}")
 
-    for idx, job in enumerate(jobs, 1):
-        try:
-            df = _load_ohlcv(job.csv_path)
-            required_cols = {"Open", "High", "Low", "Close", "Volume"}
-            if not required_cols.issubset(set(df.columns)):
-                skipped += 1
-                continue
-
-            df_5y = _select_last_years(df, args.years)
-            if len(df_5y) < 60:
-                skipped += 1
-                continue
-
-            df_ind = calculate_indicators(df)
-            signals = generate_signals(df_ind)
-            signals_5y = signals.reindex(df_5y.index)
-
-            out_path = out_dir / f"{job.symbol}.png"
-            if args.overwrite or not out_path.exists():
-                df_5y_plot = df_5y[["Open", "High", "Low", "Close", "Volume"]].copy()
-                _plot_one(df_5y_plot, signals_5y, job.symbol, out_path, args.style, mav, args.dpi)
-
-            buy_count = int((signals_5y.get("signal", 0) == 1).sum())
-            summary_rows.append(
-                {
-                    "symbol": job.symbol,
-                    "rows_5y": int(len(df_5y)),
-                    "buy_signals_5y": buy_count,
-                    "start": str(df_5y.index.min()),
-                    "end": str(df_5y.index.max()),
-                    "png": str(out_path),
-                }
-            )
+    context = {
+        "out_dir": str(out_dir),
+        "years": int(args.years),
+        "strategy_stamp": file_stamp(ma_convergence_strategy.__file__),
+        "spec": ChartSpec(style=args.style, mav=mav, dpi=int(args.dpi), sell_markers=False),
+        "cache_dir": str(args.chart_cache).strip(),
+        "force": bool(args.overwrite),
+    }
+    results = run_tasks(_render_one, jobs, context, workers=int(args.workers), progress_every=20)
+    save_cache_index(context["cache_dir"], results)
+    print(f"[INFO] charts {status_counts(results)}")
+    if args.profile:
+        paths = profiling.write_report(name="ma_convergence_charts_5y")
+        print(profiling.format_report())
+        print(f"[OK] profile: {paths['json']}, {paths['text']}")
 
-            if idx % 20 == 0:
-                print(f"[INFO] progress {idx}/{len(jobs)}")
-        except Exception as e:
+    summary_rows: list[dict] = []
+    failures = 0
+    skipped = 0
+    for result in results:
+        if result.get("skipped"):
+            skipped += 1
+        elif "error" in result:
             failures += 1
             if failures <= 5:
-                print(f"[WARN] failed: {job.symbol} ({job.csv_path.name}): {e}")
-            continue
+                print(f"[WARN] failed: {result['symbol']} ({result['csv']}): {result['error']}")
+        else:
+            summary_rows.append(public_row(result))
 
     if summary_rows:
         summary_path = out_dir / "summary.csv"
@@ -11,6 +11,9 @@ Outputs:
 - charts.csv (enriched)
 - index.html (preview)
 
+Charts go through visualization/chart_farm.py: unchanged symbols are copied from the
+content-addressed cache (--chart-cache) instead of being reloaded and re-rendered.
+
 Example:
     python scripts/generate_ma_convergence_charts_from_scan.py ^
       --scan-csv results/ma_convergence_daily_scan_mv100yi_20260302_144411/ma_convergence_scan_20260302_145754.csv ^
@@ -20,7 +23,6 @@ Example:
 from __future__ import annotations
 
 import argparse
-import concurrent.futures as cf
 import contextlib
 import os
 import re
@@ -30,16 +32,30 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-import mplfinance as mpf
 import numpy as np
 import pandas as pd
-from pandas.tseries.offsets import BDay
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from indicators import ma_convergence_strategy  # noqa: E402
 from indicators.ma_convergence_strategy import calculate_indicators, generate_signals  # noqa: E402
+from core import profiling  # noqa: E402
+from visualization.chart_farm import (  # noqa: E402
+    DEFAULT_CACHE_DIR,
+    ChartRequest,
+    ChartSpec,
+    file_stamp,
+    last_years,
+    public_row,
+    render_cached,
+    run_tasks,
+    save_cache_index,
+    source_key,
+    status_counts,
+    worker_context,
+)
 
 
 def _try_import_akshare():
@@ -69,109 +85,6 @@ def _load_daily(csv_path: Path) -> pd.DataFrame:
     return df[cols].copy()
 
 
-def _last_years(df: pd.DataFrame, years: int) -> pd.DataFrame:
-    if df is None or df.empty:
-        return pd.DataFrame()
-    end_ts = df.index.max()
-    start_ts = end_ts - pd.DateOffset(years=int(years))
-    return df.loc[df.index >= start_ts].copy()
-
-
-def _markers(df_view: pd.DataFrame, signals_view: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
-    buy_mask = (signals_view.get("signal", 0) == 1).reindex(df_view.index, fill_value=False)
-    sell_mask = (signals_view.get("signal", 0) == -1).reindex(df_view.index, fill_value=False)
-
-    buy_y = pd.Series(index=df_view.index, data=np.nan, dtype="float64")
-    sell_y = pd.Series(index=df_view.index, data=np.nan, dtype="float64")
-
-    if buy_mask.any():
-        buy_y.loc[buy_mask] = (df_view.loc[buy_mask, "Low"] * 0.99).astype(float)
-    if sell_mask.any():
-        sell_y.loc[sell_mask] = (df_view.loc[sell_mask, "High"] * 1.01).astype(float)
-
-    return buy_y, sell_y
-
-
-def _pad_plot_right(df_view: pd.DataFrame, bars: int = 2) -> pd.DataFrame:
-    """Append empty bars on the right side to avoid clipping the last candle."""
-    if df_view is None or df_view.empty:
-        return df_view
-
-    n = max(0, int(bars))
-    if n == 0:
-        return df_view
-
-    if not isinstance(df_view.index, pd.DatetimeIndex):
-        return df_view
-
-    out = df_view.copy()
-    idx = out.index
-    last = idx.max()
-
-    # Try to keep original spacing; fallback to business-day bars.
-    inferred_offset = None
-    if len(idx) >= 3:
-        try:
-            freq = pd.infer_freq(idx[-min(len(idx), 20) :])
-            if freq:
-                inferred_offset = pd.tseries.frequencies.to_offset(freq)
-        except Exception:
-            inferred_offset = None
-
-    step = inferred_offset if inferred_offset is not None else BDay(1)
-    future_idx = []
-    current = last
-    for _ in range(n):
-        try:
-            current = current + step
-        except Exception:
-            current = current + pd.Timedelta(days=1)
-        future_idx.append(current)
-
-    pad = pd.DataFrame(index=pd.DatetimeIndex(future_idx), columns=out.columns, dtype="float64")
-    out = pd.concat([out, pad], axis=0)
-    return out
-
-
-def _plot_symbol(
-    symbol: str,
-    df_view: pd.DataFrame,
-    signals_view: pd.DataFrame,
-    out_png: Path,
-    title: str,
-    style: str,
-    mav: tuple[int, ...],
-    dpi: int,
-):
-    df_plot = _pad_plot_right(df_view, bars=2)
-    signals_plot = signals_view.reindex(df_plot.index)
-
-    addplots = []
-    buy_y, sell_y = _markers(df_plot, signals_plot)
-    if buy_y.notna().any():
-        addplots.append(mpf.make_addplot(buy_y, type="scatter", markersize=60, marker="^", color="g", panel=0))
-    if sell_y.notna().any():
-        addplots.append(mpf.make_addplot(sell_y, type="scatter", markersize=60, marker="v", color="r", panel=0))
-
-    plot_kwargs = dict(
-        type="candle",
-        style=style,
-        volume=True,
-        mav=mav,
-        title=title,
-        ylabel="Price",
-        ylabel_lower="Volume",
-        warn_too_much_data=len(df_plot) + 500,
-        figsize=(16, 10),
-        tight_layout=True,
-        savefig=dict(fname=str(out_png), dpi=dpi, bbox_inches="tight", pad_inches=0.2),
-    )
-    if addplots:
-        plot_kwargs["addplot"] = addplots
-
-    mpf.plot(df_plot, **plot_kwargs)
-
-
 @contextlib.contextmanager
 def _temporary_proxy_env(proxy: str | None, inherit: bool):
     """
@@ -381,80 +294,95 @@ def _build_jobs(scan_df: pd.DataFrame, data_dir: Path, data_years: int) -> list[
     return jobs
 
 
-def _worker(args):
-    job, plot_years, style, mav, dpi, signal_params, out_dir, spot_map, scan_df = args
-    try:
-        df = _load_daily(job.data_path)
-        if df.empty or len(df) < 140:
-            return None
+def _scan_hits(scan_df: pd.DataFrame) -> dict[str, tuple[str, int, int]]:
+    """symbol -> (first scan date, BUY hits, SELL hits), computed once in the main process."""
+    hits: dict[str, tuple[str, int, int]] = {}
+    for symbol, scan_sub in scan_df.groupby("symbol", sort=False):
+        last_scan_date = str(scan_sub["date"].iloc[0]) if "date" in scan_sub.columns else ""
+        buy_hits = int((scan_sub["signal"] == "BUY").sum()) if "signal" in scan_sub.columns else 0
+        sell_hits = int((scan_sub["signal"] == "SELL").sum()) if "signal" in scan_sub.columns else 0
+        hits[str(symbol)] = (last_scan_date, buy_hits, sell_hits)
+    return hits
 
-        df_ind = calculate_indicators(df, volume_ma_period=int(signal_params.get("volume_ma_period", 20)))
-        sig = generate_signals(df_ind, **signal_params)
 
-        df_view = _last_years(df, int(plot_years))
-        if df_view.empty or len(df_view) < 60:
-            return None
-        sig_view = sig.reindex(df_view.index)
-
-        # Latest close and date
-        last_dt = df_view.index.max()
-        last_close = float(df_view["Close"].iloc[-1])
-
-        # Scan-window hits
-        scan_sub = scan_df[scan_df["symbol"] == job.symbol]
-        last_scan_date = str(scan_sub["date"].iloc[0]) if ("date" in scan_sub.columns and len(scan_sub) > 0) else ""
-        buy_hits = int((scan_sub.get("signal") == "BUY").sum()) if "signal" in scan_sub.columns else 0
-        sell_hits = int((scan_sub.get("signal") == "SELL").sum()) if "signal" in scan_sub.columns else 0
-
-        code = job.symbol.split(".")[0]
-        spot = spot_map.get(code, {})
-        name = spot.get("name", "")
-
-        total_mv = spot.get("total_mv", np.nan)
-        total_mv_yi = spot.get("total_mv_yi", np.nan)
-        if pd.notna(total_mv) and not pd.notna(total_mv_yi):
-            total_mv_yi = float(total_mv) / 1e8
-        if pd.notna(total_mv_yi) and not pd.notna(total_mv):
-            total_mv = float(total_mv_yi) * 1e8
-
-        pct_chg = spot.get("pct_chg", np.nan)
-        spot_price = spot.get("price", np.nan)
-        meta_asof = spot.get("meta_asof", "")
-
-        out_png = Path(out_dir) / f"{job.symbol}.png"
-
-        # Fallback pct change from last two closes if spot is missing/unavailable.
-        pct_chg_fallback = np.nan
-        if len(df_view) >= 2 and pd.notna(df_view["Close"].iloc[-2]):
-            prev_close = float(df_view["Close"].iloc[-2])
-            if prev_close != 0:
-                pct_chg_fallback = (last_close / prev_close - 1.0) * 100.0
-        pct_chg_out = pct_chg if pd.notna(pct_chg) else pct_chg_fallback
-
-        # Keep title ASCII to avoid font/encoding issues on some Windows setups.
-        title = (
-            f"{job.symbol}  close={last_close:.2f}  "
-            f"pct={pct_chg_out if pd.notna(pct_chg_out) else float('nan'):.2f}%  "
-            f"mvYi={total_mv_yi if pd.notna(total_mv_yi) else float('nan'):.1f}  "
-            f"buyHits={buy_hits} sellHits={sell_hits}"
-        )
-        _plot_symbol(job.symbol, df_view, sig_view, out_png, title, style, mav, dpi)
+def _build_chart(job: Job, ctx: dict, spot: dict, hits: tuple[str, int, int]) -> Optional[ChartRequest]:
+    signal_params = ctx["signal_params"]
+    df = _load_daily(job.data_path)
+    if df.empty or len(df) < 140:
+        return None
 
-        return {
-            "symbol": job.symbol,
-            "name": name,
-            "latest_close": last_close,
-            "latest_date": str(pd.Timestamp(last_dt)),
-            "spot_price": spot_price,
-            "pct_chg": pct_chg_out,
-            "total_mv_rmb": total_mv,
-            "total_mv_yi": total_mv_yi,
-            "meta_asof": meta_asof,
-            "scan_last_date": last_scan_date,
-            "scan_buy_hits": buy_hits,
-            "scan_sell_hits": sell_hits,
-            "png": str(out_png),
-        }
+    df_ind = calculate_indicators(df, volume_ma_period=int(signal_params.get("volume_ma_period", 20)))
+    sig = generate_signals(df_ind, **signal_params)
+
+    df_view = last_years(df, int(ctx["plot_years"]))
+    if df_view.empty or len(df_view) < 60:
+        return None
+    sig_view = sig.reindex(df_view.index)
+
+    # Latest close and date
+    last_dt = df_view.index.max()
+    last_close = float(df_view["Close"].iloc[-1])
+
+    # Scan-window hits
+    last_scan_date, buy_hits, sell_hits = hits
+
+    name = spot.get("name", "")
+
+    total_mv = spot.get("total_mv", np.nan)
+    total_mv_yi = spot.get("total_mv_yi", np.nan)
+    if pd.notna(total_mv) and not pd.notna(total_mv_yi):
+        total_mv_yi = float(total_mv) / 1e8
+    if pd.notna(total_mv_yi) and not pd.notna(total_mv):
+        total_mv = float(total_mv_yi) * 1e8
+
+    pct_chg = spot.get("pct_chg", np.nan)
+    spot_price = spot.get("price", np.nan)
+    meta_asof = spot.get("meta_asof", "")
+
+    # Fallback pct change from last two closes if spot is missing/unavailable.
+    pct_chg_fallback = np.nan
+    if len(df_view) >= 2 and pd.notna(df_view["Close"].iloc[-2]):
+        prev_close = float(df_view["Close"].iloc[-2])
+        if prev_close != 0:
+            pct_chg_fallback = (last_close / prev_close - 1.0) * 100.0
+    pct_chg_out = pct_chg if pd.notna(pct_chg) else pct_chg_fallback
+
+    # Keep title ASCII to avoid font/encoding issues on some Windows setups.
+    title = (
+        f"{job.symbol}  close={last_close:.2f}  "
+        f"pct={pct_chg_out if pd.notna(pct_chg_out) else float('nan'):.2f}%  "
+        f"mvYi={total_mv_yi if pd.notna(total_mv_yi) else float('nan'):.1f}  "
+        f"buyHits={buy_hits} sellHits={sell_hits}"
+    )
+    row = {
+        "symbol": job.symbol,
+        "name": name,
+        "latest_close": last_close,
+        "latest_date": str(pd.Timestamp(last_dt)),
+        "spot_price": spot_price,
+        "pct_chg": pct_chg_out,
+        "total_mv_rmb": total_mv,
+        "total_mv_yi": total_mv_yi,
+        "meta_asof": meta_asof,
+        "scan_last_date": last_scan_date,
+        "scan_buy_hits": buy_hits,
+        "scan_sell_hits": sell_hits,
+    }
+    return ChartRequest(df_view, sig_view, title, row)
+
+
+def _worker(job: Job):
+    """Render one symbol; shared inputs come from the pool initializer context."""
+    ctx = worker_context()
+    try:
+        spot = ctx["info_map"].get(job.symbol.split(".")[0], {})
+        hits = ctx["scan_hits"].get(job.symbol, ("", 0, 0))
+        out_png = Path(ctx["out_dir"]) / f"{job.symbol}.png"
+        key = source_key(
+            job.data_path, "ma_convergence_scan", ctx["strategy_stamp"],
+            ctx["plot_years"], ctx["signal_params"], spot, hits,
+        )
+        return render_cached(out_png, key, lambda: _build_chart(job, ctx, spot, hits), ctx["spec"])
     except Exception as exc:
         return {"symbol": job.symbol, "error": str(exc), "png": ""}
 
@@ -529,6 +457,8 @@ def main() -> int:
     parser.add_argument("--mav", default="5,10,20,60")
     parser.add_argument("--dpi", type=int, default=160)
     parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--chart-cache", default=DEFAULT_CACHE_DIR, help="Content-addressed chart cache dir. Empty = disable.")
+    parser.add_argument("--force", action="store_true", help="Re-render every chart even if its cache key is unchanged.")
     parser.add_argument("--no-stop-loss", action="store_true")
     parser.add_argument("--time-exit-days", type=int, default=0)
     parser.add_argument(
@@ -541,7 +471,10 @@ def main() -> int:
     parser.add_argument("--vol-ratio-min", type=float, default=1.2)
     parser.add_argument("--vol-setup-days", type=int, default=5)
     parser.add_argument("--vol-setup-max", type=float, default=0.8)
+    parser.add_argument("--profile", action="store_true", help="Write a per-stage timing report to results/profile/ (worker timings merged).")
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
 
     scan_csv = _resolve_scan_csv(args.scan_csv, args.scan_dir)
     print(f"[INFO] using scan_csv={scan_csv}")
@@ -595,32 +528,26 @@ def main() -> int:
 
     print(f"[INFO] scan_hits={len(set(scan_df['symbol']))} jobs={len(jobs)} out_dir={out_dir}")
 
-    rows = []
-    errors = 0
-    workers = max(1, int(args.workers))
-    tasks = [(j, int(args.plot_years), args.style, mav, int(args.dpi), signal_params, str(out_dir), info_map, scan_df) for j in jobs]
-    if workers > 1:
-        with cf.ProcessPoolExecutor(max_workers=workers) as ex:
-            futs = [ex.submit(_worker, t) for t in tasks]
-            for idx, fut in enumerate(cf.as_completed(futs), 1):
-                r = fut.result()
-                if r is None:
-                    continue
-                if r.get("error"):
-                    errors += 1
-                rows.append(r)
-                if idx % 10 == 0 or idx == len(futs):
-                    print(f"[INFO] progress {idx}/{len(futs)}")
-    else:
-        for idx, t in enumerate(tasks, 1):
-            r = _worker(t)
-            if r is None:
-                continue
-            if r.get("error"):
-                errors += 1
-            rows.append(r)
-            if idx % 10 == 0 or idx == len(tasks):
-                print(f"[INFO] progress {idx}/{len(tasks)}")
+    context = {
+        "out_dir": str(out_dir),
+        "plot_years": int(args.plot_years),
+        "signal_params": signal_params,
+        "info_map": info_map,
+        "scan_hits": _scan_hits(scan_df),
+        "strategy_stamp": file_stamp(ma_convergence_strategy.__file__),
+        "spec": ChartSpec(style=args.style, mav=mav, dpi=int(args.dpi), pad_right=2, pad_inches=0.2),
+        "cache_dir": str(args.chart_cache).strip(),
+        "force": bool(args.force),
+    }
+    results = [r for r in run_tasks(_worker, jobs, context, workers=int(args.workers)) if r is not None]
+    save_cache_index(context["cache_dir"], results)
+    print(f"[INFO] charts {status_counts(results)}")
+    if args.profile:
+        paths = profiling.write_report(name="ma_convergence_charts_from_scan")
+        print(profiling.format_report())
+        print(f"[OK] profile: {paths['json']}, {paths['text']}")
+    rows = [public_row(r) for r in results]
+    errors = sum(1 for r in rows if r.get("error"))
 
     df_out = pd.DataFrame(rows)
     if df_out.empty:
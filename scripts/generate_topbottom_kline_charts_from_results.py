@@ -1,11 +1,9 @@
 import argparse
-import concurrent.futures as cf
 import importlib
 import inspect
 import sys
 from pathlib import Path
 
-import mplfinance as mpf
 import numpy as np
 import pandas as pd
 
@@ -13,6 +11,21 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from core import profiling  # noqa: E402
+from visualization.chart_farm import (  # noqa: E402
+    DEFAULT_CACHE_DIR,
+    ChartRequest,
+    ChartSpec,
+    file_stamp,
+    last_years,
+    public_row,
+    render_cached,
+    run_tasks,
+    save_cache_index,
+    source_key,
+    status_counts,
+    worker_context,
+)
 
 STRATEGY_MODULES = {
     "ma_convergence": "indicators.ma_convergence_strategy",
@@ -51,82 +64,6 @@ def _load_daily(symbol: str, data_dir: Path, years: int) -> pd.DataFrame:
     return df[cols]
 
 
-def _last_years(df: pd.DataFrame, years: int) -> pd.DataFrame:
-    if df.empty:
-        return df
-    end_ts = df.index.max()
-    start_ts = end_ts - pd.DateOffset(years=years)
-    return df.loc[df.index >= start_ts]
-
-
-def _markers(df: pd.DataFrame, signals: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
-    buy_mask = (signals.get("signal", 0) == 1).reindex(df.index, fill_value=False)
-    sell_mask = (signals.get("signal", 0) == -1).reindex(df.index, fill_value=False)
-
-    buy_y = pd.Series(index=df.index, data=np.nan, dtype="float64")
-    sell_y = pd.Series(index=df.index, data=np.nan, dtype="float64")
-
-    if buy_mask.any():
-        buy_y.loc[buy_mask] = (df.loc[buy_mask, "Low"] * 0.99).astype(float)
-    if sell_mask.any():
-        sell_y.loc[sell_mask] = (df.loc[sell_mask, "High"] * 1.01).astype(float)
-
-    return buy_y, sell_y
-
-
-def _plot_symbol(
-    df_view: pd.DataFrame,
-    signals_view: pd.DataFrame,
-    out_png: Path,
-    title: str,
-    style: str,
-    mav: tuple[int, ...],
-    dpi: int,
-):
-    addplots = []
-    buy_y, sell_y = _markers(df_view, signals_view)
-    if buy_y.notna().any():
-        addplots.append(
-            mpf.make_addplot(
-                buy_y,
-                type="scatter",
-                markersize=60,
-                marker="^",
-                color="g",
-                panel=0,
-            )
-        )
-    if sell_y.notna().any():
-        addplots.append(
-            mpf.make_addplot(
-                sell_y,
-                type="scatter",
-                markersize=60,
-                marker="v",
-                color="r",
-                panel=0,
-            )
-        )
-
-    plot_kwargs = dict(
-        type="candle",
-        style=style,
-        volume=True,
-        mav=mav,
-        title=title,
-        ylabel="Price",
-        ylabel_lower="Volume",
-        warn_too_much_data=len(df_view) + 500,
-        figsize=(16, 10),
-        tight_layout=True,
-        savefig=dict(fname=str(out_png), dpi=dpi, bbox_inches="tight"),
-    )
-    if addplots:
-        plot_kwargs["addplot"] = addplots
-
-    mpf.plot(df_view, **plot_kwargs)
-
-
 def _load_results(results_csv: Path) -> pd.DataFrame:
     df = pd.read_csv(results_csv)
     if "total_trades" in df.columns:
@@ -277,47 +214,54 @@ def _write_index(out_dir: Path, title: str, rows: list[dict]) -> Path:
     return index_path
 
 
-def _render_one(args: tuple[dict, str, int, int, str, tuple[int, ...], int, str, dict, dict]) -> dict | None:
-    row, data_dir_str, data_years, plot_years, style, mav, dpi, strategy_key, indicator_params, signal_params = args
+def _build_chart(row: dict, ctx: dict) -> ChartRequest | None:
     symbol = str(row["symbol"])
-    out_dir = Path(row["_out_dir"])
-    try:
-        calculate_indicators, generate_signals = _resolve_strategy(strategy_key)
-        df = _load_daily(symbol, Path(data_dir_str), data_years)
-        if df.empty or not {"Open", "High", "Low", "Close", "Volume"}.issubset(df.columns):
-            return None
-
-        df_ind = _call_with_supported_kwargs(
-            calculate_indicators,
-            {"df": df, **(indicator_params or {})},
-        )
-        signals = _call_with_supported_kwargs(
-            generate_signals,
-            {"df": df_ind, **(signal_params or {})},
-        )
+    calculate_indicators, generate_signals = _resolve_strategy(ctx["strategy"])
+    df = _load_daily(symbol, Path(ctx["data_dir"]), ctx["data_years"])
+    if df.empty or not {"Open", "High", "Low", "Close", "Volume"}.issubset(df.columns):
+        return None
+
+    df_ind = _call_with_supported_kwargs(
+        calculate_indicators,
+        {"df": df, **(ctx["indicator_params"] or {})},
+    )
+    signals = _call_with_supported_kwargs(
+        generate_signals,
+        {"df": df_ind, **(ctx["signal_params"] or {})},
+    )
 
-        df_view = _last_years(df, plot_years)
-        if len(df_view) < 60:
-            return None
+    df_view = last_years(df, ctx["plot_years"])
+    if len(df_view) < 60:
+        return None
 
-        signals_view = signals.reindex(df_view.index)
-        out_png = out_dir / f"{symbol}.png"
-        title = (
-            f"{symbol}  rank={row.get('rank','')}  total={float(row['total_return_pct']):.1f}%  "
-            f"ann={float(row['annualized_return_pct']):.1f}%  "
-            f"win={float(row['win_rate_pct']):.1f}%  trades={int(row['total_trades'])}"
+    signals_view = signals.reindex(df_view.index)
+    title = (
+        f"{symbol}  rank={row.get('rank','')}  total={float(row['total_return_pct']):.1f}%  "
+        f"ann={float(row['annualized_return_pct']):.1f}%  "
+        f"win={float(row['win_rate_pct']):.1f}%  trades={int(row['total_trades'])}"
+    )
+    return ChartRequest(df_view, signals_view, title, {
+        "symbol": symbol,
+        "rank": str(row.get("rank", "")) or "",
+        "total_return_pct": float(row["total_return_pct"]),
+        "annualized_return_pct": float(row["annualized_return_pct"]),
+        "win_rate_pct": float(row["win_rate_pct"]),
+        "total_trades": int(row["total_trades"]),
+    })
+
+
+def _render_one(row: dict) -> dict | None:
+    ctx = worker_context()
+    symbol = str(row["symbol"])
+    try:
+        csv_path = Path(ctx["data_dir"]) / f"{symbol}_{ctx['data_years']}y_1d_forward.csv"
+        summary = {k: row.get(k) for k in ("rank", "total_return_pct", "annualized_return_pct", "win_rate_pct", "total_trades")}
+        key = source_key(
+            csv_path, "topbottom", ctx["strategy"], ctx["strategy_stamp"], ctx["plot_years"],
+            ctx["indicator_params"], ctx["signal_params"], summary,
         )
-        _plot_symbol(df_view, signals_view, out_png, title, style, mav, dpi)
-
-        return {
-            "symbol": symbol,
-            "rank": str(row.get("rank", "")) or "",
-            "total_return_pct": float(row["total_return_pct"]),
-            "annualized_return_pct": float(row["annualized_return_pct"]),
-            "win_rate_pct": float(row["win_rate_pct"]),
-            "total_trades": int(row["total_trades"]),
-            "png": str(out_png),
-        }
+        out_png = Path(ctx["out_dir"]) / f"{symbol}.png"
+        return render_cached(out_png, key, lambda: _build_chart(row, ctx), ctx["spec"])
     except Exception as e:
         return {"symbol": symbol, "error": str(e)}
 
@@ -348,10 +292,15 @@ def main() -> int:
     parser.add_argument("--mav", default="5,10,20,60", help="MA periods to draw, comma-separated.")
     parser.add_argument("--dpi", type=int, default=160, help="PNG dpi.")
     parser.add_argument("--workers", type=int, default=4, help="Parallel workers for chart rendering.")
+    parser.add_argument("--chart-cache", default=DEFAULT_CACHE_DIR, help="Content-addressed chart cache dir. Empty = disable.")
+    parser.add_argument("--force", action="store_true", help="Re-render every chart even if its cache key is unchanged.")
     parser.add_argument("--no-stop-loss", action="store_true", help="Disable stop-loss in generate_signals.")
     parser.add_argument("--time-exit-days", type=int, default=0, help="Enable time-exit by days (0=disabled).")
     parser.add_argument("--disable-ma60-uptrend", action="store_true", help="Disable MA60 uptrend filter for ma60_pullback.")
+    parser.add_argument("--profile", action="store_true", help="Write a per-stage timing report to results/profile/ (worker timings merged).")
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
 
     results_csv = Path(args.results_csv)
     data_dir = Path(args.data_dir)
@@ -386,57 +335,37 @@ def main() -> int:
             "ma60_uptrend_lookback": 5,
         }
 
+    context = {
+        "out_dir": str(out_dir),
+        "data_dir": str(data_dir),
+        "data_years": int(args.data_years),
+        "plot_years": int(args.plot_years),
+        "strategy": args.strategy,
+        "strategy_stamp": file_stamp(importlib.import_module(STRATEGY_MODULES[args.strategy]).__file__),
+        "indicator_params": indicator_params,
+        "signal_params": signal_params,
+        "spec": ChartSpec(style=args.style, mav=mav, dpi=int(args.dpi)),
+        "cache_dir": str(args.chart_cache).strip(),
+        "force": bool(args.force),
+    }
     rows = picks.to_dict(orient="records")
-    for r in rows:
-        r["_out_dir"] = str(out_dir)
-
-    tasks = [
-        (
-            r,
-            str(data_dir),
-            int(args.data_years),
-            int(args.plot_years),
-            args.style,
-            mav,
-            int(args.dpi),
-            args.strategy,
-            indicator_params,
-            signal_params,
-        )
-        for r in rows
-    ]
+    results = [r for r in run_tasks(_render_one, rows, context, workers=int(args.workers)) if r]
+    save_cache_index(context["cache_dir"], results)
+    print(f"[INFO] charts {status_counts(results)}")
+    if args.profile:
+        paths = profiling.write_report(name="topbottom_kline_charts")
+        print(profiling.format_report())
+        print(f"[OK] profile: {paths['json']}, {paths['text']}")
 
     chart_rows: list[dict] = []
     failures = 0
-    workers = max(1, int(args.workers))
-    if workers > 1:
-        with cf.ProcessPoolExecutor(max_workers=workers) as ex:
-            futs = [ex.submit(_render_one, t) for t in tasks]
-            for idx, fut in enumerate(cf.as_completed(futs), 1):
-                result = fut.result()
-                if not result:
-                    continue
-                if "error" in result:
-                    failures += 1
-                    if failures <= 5:
-                        print(f"[WARN] failed {result.get('symbol','')}: {result['error']}")
-                else:
-                    chart_rows.append(result)
-                if idx % 10 == 0 or idx == len(futs):
-                    print(f"[INFO] progress {idx}/{len(futs)}")
-    else:
-        for idx, t in enumerate(tasks, 1):
-            result = _render_one(t)
-            if not result:
-                continue
-            if "error" in result:
-                failures += 1
-                if failures <= 5:
-                    print(f"[WARN] failed {result.get('symbol','')}: {result['error']}")
-            else:
-                chart_rows.append(result)
-            if idx % 10 == 0 or idx == len(tasks):
-                print(f"[INFO] progress {idx}/{len(tasks)}")
+    for result in results:
+        if "error" in result:
+            failures += 1
+            if failures <= 5:
+                print(f"[WARN] failed {result.get('symbol','')}: {result['error']}")
+        else:
+            chart_rows.append(public_row(result))
 
     if chart_rows:
         charts_df = pd.DataFrame(chart_rows)
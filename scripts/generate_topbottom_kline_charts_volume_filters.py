@@ -3,7 +3,6 @@ import sys
 from dataclasses import dataclass
 from pathlib import Path
 
-import mplfinance as mpf
 import numpy as np
 import pandas as pd
 
@@ -11,7 +10,23 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from indicators import ma_convergence_strategy  # noqa: E402
 from indicators.ma_convergence_strategy import calculate_indicators, generate_signals  # noqa: E402
+from core import profiling  # noqa: E402
+from visualization.chart_farm import (  # noqa: E402
+    DEFAULT_CACHE_DIR,
+    ChartRequest,
+    ChartSpec,
+    file_stamp,
+    last_years,
+    public_row,
+    render_cached,
+    run_tasks,
+    save_cache_index,
+    source_key,
+    status_counts,
+    worker_context,
+)
 
 
 @dataclass(frozen=True)
@@ -28,81 +43,6 @@ def _load_daily(symbol: str, data_dir: Path, years: int) -> pd.DataFrame:
     return df[cols]
 
 
-def _last_years(df: pd.DataFrame, years: int) -> pd.DataFrame:
-    if df.empty:
-        return df
-    end_ts = df.index.max()
-    start_ts = end_ts - pd.DateOffset(years=years)
-    return df.loc[df.index >= start_ts]
-
-
-def _markers(df: pd.DataFrame, signals: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
-    buy_mask = (signals.get("signal", 0) == 1).reindex(df.index, fill_value=False)
-    sell_mask = (signals.get("signal", 0) == -1).reindex(df.index, fill_value=False)
-
-    buy_y = pd.Series(index=df.index, data=np.nan, dtype="float64")
-    sell_y = pd.Series(index=df.index, data=np.nan, dtype="float64")
-
-    if buy_mask.any():
-        buy_y.loc[buy_mask] = (df.loc[buy_mask, "Low"] * 0.99).astype(float)
-    if sell_mask.any():
-        sell_y.loc[sell_mask] = (df.loc[sell_mask, "High"] * 1.01).astype(float)
-
-    return buy_y, sell_y
-
-
-def _plot_symbol(
-    symbol: str,
-    df_view: pd.DataFrame,
-    signals_view: pd.DataFrame,
-    out_png: Path,
-    title: str,
-    style: str,
-    mav: tuple[int, ...],
-    dpi: int,
-):
-    addplots = []
-    buy_y, sell_y = _markers(df_view, signals_view)
-    if buy_y.notna().any():
-        addplots.append(
-            mpf.make_addplot(
-                buy_y,
-                type="scatter",
-                markersize=60,
-                marker="^",
-                color="g",
-                panel=0,
-            )
-        )
-    if sell_y.notna().any():
-        addplots.append(
-            mpf.make_addplot(
-                sell_y,
-                type="scatter",
-                markersize=60,
-                marker="v",
-                color="r",
-                panel=0,
-            )
-        )
-
-    mpf.plot(
-        df_view,
-        type="candle",
-        style=style,
-        volume=True,
-        mav=mav,
-        title=title,
-        ylabel="Price",
-        ylabel_lower="Volume",
-        addplot=addplots if addplots else None,
-        warn_too_much_data=len(df_view) + 500,
-        figsize=(16, 10),
-        tight_layout=True,
-        savefig=dict(fname=str(out_png), dpi=dpi, bbox_inches="tight"),
-    )
-
-
 def _pick_top_bottom(results_csv: Path, top_n: int, bottom_n: int) -> pd.DataFrame:
     df = pd.read_csv(results_csv)
     df["total_trades"] = pd.to_numeric(df.get("total_trades", 0), errors="coerce").fillna(0).astype(int)
@@ -119,6 +59,52 @@ def _pick_top_bottom(results_csv: Path, top_n: int, bottom_n: int) -> pd.DataFra
     return picks
 
 
+def _build_chart(row: dict, ctx: dict) -> ChartRequest | None:
+    symbol = str(row["symbol"])
+    signal_params = ctx["signal_params"]
+    df = _load_daily(symbol, Path(ctx["data_dir"]), ctx["data_years"])
+    if df.empty or not {"Open", "High", "Low", "Close", "Volume"}.issubset(df.columns):
+        return None
+
+    df_ind = calculate_indicators(df, volume_ma_period=int(signal_params.get("volume_ma_period", 20)))
+    signals = generate_signals(df_ind, **signal_params)
+
+    df_view = last_years(df, ctx["plot_years"])
+    if len(df_view) < 60:
+        return None
+
+    signals_view = signals.reindex(df_view.index)
+    title = (
+        f"{symbol}  run={ctx['run_name']}  total={float(row['total_return_pct']):.1f}%  "
+        f"ann={float(row['annualized_return_pct']):.1f}%  "
+        f"win={float(row['win_rate_pct']):.1f}%  trades={int(row['total_trades'])}"
+    )
+    return ChartRequest(df_view, signals_view, title, {
+        "symbol": symbol,
+        "rank": str(row.get("rank", "")) or "",
+        "total_return_pct": float(row["total_return_pct"]),
+        "annualized_return_pct": float(row["annualized_return_pct"]),
+        "win_rate_pct": float(row["win_rate_pct"]),
+        "total_trades": int(row["total_trades"]),
+    })
+
+
+def _render_one(row: dict) -> dict | None:
+    ctx = worker_context()
+    symbol = str(row["symbol"])
+    try:
+        csv_path = Path(ctx["data_dir"]) / f"{symbol}_{ctx['data_years']}y_1d_forward.csv"
+        summary = {k: row.get(k) for k in ("rank", "total_return_pct", "annualized_return_pct", "win_rate_pct", "total_trades")}
+        key = source_key(
+            csv_path, "volume_filter_topbottom", ctx["run_name"], ctx["strategy_stamp"],
+            ctx["plot_years"], ctx["signal_params"], summary,
+        )
+        out_png = Path(ctx["out_dir"]) / f"{symbol}.png"
+        return render_cached(out_png, key, lambda: _build_chart(row, ctx), ctx["spec"])
+    except Exception as e:
+        return {"symbol": symbol, "error": str(e)}
+
+
 def _ensure_dir(p: Path) -> Path:
     p.mkdir(parents=True, exist_ok=True)
     return p
@@ -171,7 +157,13 @@ def main() -> int:
     parser.add_argument("--style", default="charles", help="mplfinance style.")
     parser.add_argument("--mav", default="5,10,20,60", help="MA periods to draw, comma-separated.")
     parser.add_argument("--dpi", type=int, default=160, help="PNG dpi.")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel workers for chart rendering.")
+    parser.add_argument("--chart-cache", default=DEFAULT_CACHE_DIR, help="Content-addressed chart cache dir. Empty = disable.")
+    parser.add_argument("--force", action="store_true", help="Re-render every chart even if its cache key is unchanged.")
+    parser.add_argument("--profile", action="store_true", help="Write a per-stage timing report to results/profile/ (worker timings merged).")
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
 
     data_dir = Path(args.data_dir)
     out_root = Path(args.out_dir)
@@ -240,49 +232,35 @@ def main() -> int:
 
         out_dir = _ensure_dir(out_root / run.name)
 
+        context = {
+            "out_dir": str(out_dir),
+            "data_dir": str(data_dir),
+            "data_years": int(args.data_years),
+            "plot_years": int(args.plot_years),
+            "run_name": run.name,
+            "signal_params": run.signal_params,
+            "strategy_stamp": file_stamp(ma_convergence_strategy.__file__),
+            "spec": ChartSpec(style=args.style, mav=mav, dpi=int(args.dpi)),
+            "cache_dir": str(args.chart_cache).strip(),
+            "force": bool(args.force),
+        }
+        results = [
+            r for r in run_tasks(_render_one, picks.to_dict(orient="records"), context,
+                                 workers=int(args.workers), progress_every=0)
+            if r
+        ]
+        save_cache_index(context["cache_dir"], results)
+        print(f"[INFO] {run.name}: charts {status_counts(results)}")
+
         chart_rows: list[dict] = []
         failures = 0
-
-        for _, r in picks.iterrows():
-            symbol = str(r["symbol"])
-            try:
-                df = _load_daily(symbol, data_dir, args.data_years)
-                if df.empty or not {"Open", "High", "Low", "Close", "Volume"}.issubset(df.columns):
-                    continue
-
-                df_ind = calculate_indicators(df, volume_ma_period=int(run.signal_params.get("volume_ma_period", 20)))
-                signals = generate_signals(df_ind, **run.signal_params)
-
-                df_view = _last_years(df, args.plot_years)
-                if len(df_view) < 60:
-                    continue
-
-                signals_view = signals.reindex(df_view.index)
-
-                out_png = out_dir / f"{symbol}.png"
-                title = (
-                    f"{symbol}  run={run.name}  total={float(r['total_return_pct']):.1f}%  "
-                    f"ann={float(r['annualized_return_pct']):.1f}%  "
-                    f"win={float(r['win_rate_pct']):.1f}%  trades={int(r['total_trades'])}"
-                )
-                _plot_symbol(symbol, df_view, signals_view, out_png, title, args.style, mav, args.dpi)
-
-                chart_rows.append(
-                    {
-                        "symbol": symbol,
-                        "rank": str(r.get("rank", "")) or "",
-                        "total_return_pct": float(r["total_return_pct"]),
-                        "annualized_return_pct": float(r["annualized_return_pct"]),
-                        "win_rate_pct": float(r["win_rate_pct"]),
-                        "total_trades": int(r["total_trades"]),
-                        "png": str(out_png),
-                    }
-                )
-            except Exception as e:
+        for result in results:
+            if "error" in result:
                 failures += 1
                 if failures <= 5:
-                    print(f"[WARN] {run.name} failed {symbol}: {e}")
-                continue
+                    print(f"[WARN] {run.name} failed {result.get('symbol','')}: {result['error']}")
+            else:
+                chart_rows.append(public_row(result))
 
         if chart_rows:
             charts_df = pd.DataFrame(chart_rows).sort_values(["rank", "total_return_pct"], ascending=[True, False])
@@ -309,6 +287,11 @@ def main() -> int:
         (out_root / "index.html").write_text(master_html, encoding="utf-8")
         print(f"[OK] master index: {out_root / 'index.html'}")
 
+    if args.profile:
+        paths = profiling.write_report(name="topbottom_kline_charts_volume_filters")
+        print(profiling.format_report())
+        print(f"[OK] profile: {paths['json']}, {paths['text']}")
+
     return 0
 
 
@@ -4,14 +4,16 @@ import argparse
 import glob
 import os
 import sys
-from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from functools import partial
 
 import numpy as np
 import pandas as pd
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from core import profiling
+from core.universe_runner import UniverseRunner, parse_shard
 from indicators.ma60_pullback_strategy import calculate_indicators, generate_signals
 
 
@@ -153,35 +155,58 @@ def backtest_one(fp: str, initial_capital: float, stop_loss_enabled: bool):
     return summary, trades
 
 
+def backtest_file(fp: str, initial_capital: float, stop_loss_enabled: bool):
+    summary, trades = backtest_one(fp, initial_capital, stop_loss_enabled)
+    return {"summary": summary, "trades": trades}
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run MA60 pullback backtest on cached stocks.")
     parser.add_argument("--pattern", default="data_cache/*_20y_1d_forward.csv")
     parser.add_argument("--capital", type=float, default=100000.0)
     parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 4) - 1))
     parser.add_argument("--no-stop-loss", action="store_true", help="Disable MA10-vs-MA60 stop loss.")
+    parser.add_argument("--shard", default="", help="Run only shard k of N (k/N, 1-based), e.g. 1/4.")
+    parser.add_argument("--merge", action="store_true", help="Merge finished shards from checkpoints without running.")
+    parser.add_argument("--checkpoint-dir", default="results/checkpoints", help="Checkpoint journal directory.")
+    parser.add_argument("--fresh", action="store_true", help="Ignore existing checkpoints and rerun every symbol.")
+    parser.add_argument("--profile", action="store_true", help="Write a per-stage timing report to results/profile/ (worker timings merged).")
     args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
 
     files = sorted(glob.glob(args.pattern))
     if not files:
         raise SystemExit(f"No files matched pattern: {args.pattern}")
 
-    results = []
-    all_trades = []
-
-    with ProcessPoolExecutor(max_workers=args.workers) as ex:
-        futures = {
-            ex.submit(backtest_one, fp, args.capital, (not args.no_stop_loss)): fp
-            for fp in files
-        }
-        total = len(futures)
-        done = 0
-        for fut in as_completed(futures):
-            done += 1
-            summary, trades = fut.result()
-            results.append(summary)
-            all_trades.extend(trades)
-            if done % 20 == 0 or done == total:
-                print(f"progress {done}/{total}", flush=True)
+    stop_loss_enabled = not args.no_stop_loss
+    shard = (1, 1) if args.merge else parse_shard(args.shard)
+    runner = UniverseRunner(
+        "ma60_pullback",
+        partial(backtest_file, initial_capital=args.capital, stop_loss_enabled=stop_loss_enabled),
+        params={"capital": args.capital, "stop_loss_enabled": stop_loss_enabled},
+        code_files=[backtest_one, generate_signals],
+        checkpoint_dir=args.checkpoint_dir,
+        shard=shard,
+        workers=args.workers,
+        fresh=args.fresh,
+    )
+    if args.merge:
+        outputs = runner.collect(files)
+        print(f"merged={len(outputs)} missing={runner.stats['missing']}")
+    else:
+        outputs = runner.run(files)
+        print(
+            f"shard={shard[0]}/{shard[1]} ran={runner.stats['done']} restored={runner.stats['restored']} "
+            f"failed={runner.stats['failed']}"
+        )
+        if args.profile:
+            paths = profiling.write_report(name=f"ma60_pullback_shard{shard[0]}of{shard[1]}")
+            print(profiling.format_report())
+            print(f"profile_json={paths['json']}")
+
+    results = [out["summary"] for out in outputs]
+    all_trades = [trade for out in outputs for trade in out["trades"]]
 
     results_df = pd.DataFrame(results)
     ok_df = results_df[results_df["status"] == "ok"].copy()
@@ -189,6 +214,8 @@ def main():
         ok_df = ok_df.sort_values("total_return_pct", ascending=False)
 
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if shard[1] > 1:
+        now += f"_shard{shard[0]}of{shard[1]}"
     os.makedirs("results", exist_ok=True)
     summary_path = os.path.join("results", f"ma60_pullback_backtest_summary_{now}.csv")
     trades_path = os.path.join("results", f"ma60_pullback_backtest_trades_{now}.csv")
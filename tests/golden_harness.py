@@ -0,0 +1,369 @@
+"""
+黄金输出回归框架
+
+把各策略类 / 缠论变体在固定数据集上的输出（信号列、买卖点、成交记录、绩效指标）冻结为
+tests/golden/<用例>__<数据集>.npz，之后任何性能改写都要与之逐位一致。
+
+存储格式：
+    每个输出先展开为 {键: numpy 数组}，再用 np.savez_compressed 保存。
+    DataFrame 'signals' 展开为 signals/__index__、signals/__columns__、signals/<列名>；
+    嵌套字典的键用 '/' 连接；标量保存为 0 维数组；object 列转为定长字符串。
+
+比较：
+    diff_outputs() 先比键集合，再比 shape / dtype，最后逐数组比值（NaN 视为相等），
+    只报告差异数量与第一个差异位置，全部是向量化运算。
+
+数据集：
+    合成数据（benchmarks.synthetic，确定性）始终可用；
+    data_cache 中存在对应文件时额外使用真实缓存数据，缺文件时跳过。
+
+更新黄金文件（确认输出变化是预期的之后）：
+    python tests/golden_harness.py --update
+    python tests/golden_harness.py --update --filter chan
+    python tests/golden_harness.py               # 只比较，打印差异
+"""
+import argparse
+import glob
+import importlib
+import os
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'indicators', 'chan'))
+from benchmarks.synthetic import daily_bars, minute_bars  # noqa: E402
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+
+# ---------------- 展开 / 保存 / 比较 ----------------
+
+def _column_array(values) -> np.ndarray:
+    array = np.asarray(values)
+    if array.dtype.kind == 'O':
+        array = np.asarray([str(v) for v in array], dtype=str)
+    if array.dtype.kind == 'M':
+        array = array.astype('datetime64[ns]')
+    return array
+
+
+def flatten(value, prefix: str = '') -> Dict[str, np.ndarray]:
+    """把回测/指标输出展开为 {键: 数组}"""
+    out: Dict[str, np.ndarray] = {}
+    key = prefix or 'value'
+    if isinstance(value, pd.Series):
+        value = value.to_frame(name=value.name if value.name is not None else 'value')
+    if isinstance(value, list) and (not value or isinstance(value[0], dict)):
+        value = pd.DataFrame(value)
+    if isinstance(value, pd.DataFrame):
+        out[f'{key}/__index__'] = _column_array(value.index)
+        out[f'{key}/__columns__'] = np.asarray([str(c) for c in value.columns], dtype=str)
+        for column in value.columns:
+            out[f'{key}/{column}'] = _column_array(value[column])
+    elif isinstance(value, dict):
+        for name, item in value.items():
+            out.update(flatten(item, f'{prefix}/{name}' if prefix else str(name)))
+    elif value is None:
+        out[key] = np.asarray('None')
+    else:
+        out[key] = _column_array(value)
+    return out
+
+
+def save_golden(path: str, arrays: Dict[str, np.ndarray]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+
+def load_golden(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def _first_difference(expected: np.ndarray, actual: np.ndarray, rtol: float) -> Tuple[int, Optional[int]]:
+    """返回 (差异个数, 第一个差异的扁平下标)"""
+    if expected.dtype.kind in 'fc' and actual.dtype.kind in 'fc':
+        if rtol:
+            same = np.isclose(expected, actual, rtol=rtol, atol=0.0, equal_nan=True)
+        else:
+            same = (expected == actual) | (np.isnan(expected) & np.isnan(actual))
+    else:
+        same = expected == actual
+    same = np.asarray(same).ravel()
+    mismatched = np.flatnonzero(~same)
+    return len(mismatched), (int(mismatched[0]) if len(mismatched) else None)
+
+
+def diff_outputs(expected: Dict[str, np.ndarray], actual: Dict[str, np.ndarray], rtol: float = 0.0) -> List[str]:
+    """
+    结构化比较两份展开后的输出
+
+    Args:
+        rtol: 浮点相对误差容忍度，默认 0 即逐位一致
+
+    Returns:
+        差异描述列表，空列表表示一致
+    """
+    problems = []
+    missing = sorted(set(expected) - set(actual))
+    extra = sorted(set(actual) - set(expected))
+    if missing:
+        problems.append(f'缺少: {missing}')
+    if extra:
+        problems.append(f'多出: {extra}')
+
+    for key in sorted(set(expected) & set(actual)):
+        want, got = expected[key], actual[key]
+        if want.shape != got.shape:
+            problems.append(f'{key}: shape {want.shape} -> {got.shape}')
+            continue
+        same_kind = want.dtype == got.dtype or (want.dtype.kind == got.dtype.kind == 'U')
+        if not same_kind:
+            problems.append(f'{key}: dtype {want.dtype} -> {got.dtype}')
+            continue
+        count, first = _first_difference(want, got, rtol)
+        if count:
+            position = np.unravel_index(first, want.shape) if want.ndim else ()
+            problems.append(
+                f'{key}: {count}/{max(want.size, 1)} 个值不同，首个位置 {position}: '
+                f'{want[position]!r} -> {got[position]!r}'
+            )
+    return problems
+
+
+# ---------------- 数据集 ----------------
+
+def _cached_daily(symbol: str) -> Optional[pd.DataFrame]:
+    paths = sorted(glob.glob(os.path.join(ROOT, 'data_cache', f'{symbol}_*_1d_*.csv')))
+    if not paths:
+        return None
+    data = pd.read_csv(paths[0], index_col=0, parse_dates=True)
+    return data[['Open', 'High', 'Low', 'Close', 'Volume']].tail(500)
+
+
+def _cached_futures(symbol: str) -> Optional[pd.DataFrame]:
+    path = os.path.join(ROOT, 'data_cache', 'china_futures', f'{symbol}_5min.csv')
+    if not os.path.exists(path):
+        return None
+    from backtests.backtest_futures_minute import load_futures_data
+    return load_futures_data(symbol, os.path.dirname(path)).tail(600)
+
+
+DATASETS: Dict[str, Tuple[str, Callable[[], Optional[pd.DataFrame]]]] = {
+    'syn_daily_a': ('daily', lambda: daily_bars('000001.SZ', days=500)),
+    'syn_daily_b': ('daily', lambda: daily_bars('600519.SS', days=500, volatility=0.03)),
+    'syn_minute': ('minute', lambda: minute_bars('000001.SZ', days=20, period=5)),
+    'syn_futures': ('futures', lambda: minute_bars('RB0', days=4, period=5, profile='cn_futures_2300')),
+    'cache_000001': ('daily', lambda: _cached_daily('000001.SZ')),
+    'cache_600519': ('daily', lambda: _cached_daily('600519.SS')),
+    'cache_rb0': ('futures', lambda: _cached_futures('RB0')),
+}
+
+_dataset_cache: Dict[str, Optional[pd.DataFrame]] = {}
+
+
+def load_dataset(name: str) -> Optional[pd.DataFrame]:
+    if name not in _dataset_cache:
+        _dataset_cache[name] = DATASETS[name][1]()
+    data = _dataset_cache[name]
+    return None if data is None else data.copy()
+
+
+# ---------------- 用例 ----------------
+
+def _chan(module: str, cls: str):
+    def run(data):
+        return getattr(importlib.import_module(module), cls)(k_type='day').analyze(data)
+    return run
+
+
+def _strategy(module: str, cls: str):
+    def run(data):
+        return getattr(importlib.import_module(module), cls)().generate_signals(data)
+    return run
+
+
+def _indicator_functions(module: str):
+    def run(data):
+        strategy = importlib.import_module(module)
+        return strategy.generate_signals(strategy.calculate_indicators(data))
+    return run
+
+
+def _engine(module: str, cls: str):
+    def run(data):
+        from core.backtest_engine import BacktestEngine
+        strategy = getattr(importlib.import_module(module), cls)()
+        return BacktestEngine().run_backtest(data, strategy)
+    return run
+
+
+def _minute_backtest(module: str):
+    def run(data):
+        return importlib.import_module(module).run_backtest(data)
+    return run
+
+
+def _t1_adapter_backtest(data):
+    from backtests.backtest_t1_adapter_hot import ChanTheory15minT1Adapter, T1BacktestEngine
+    from data.bar_store import aggregate_bars
+    strategy = ChanTheory15minT1Adapter()
+    result = T1BacktestEngine().run(strategy, aggregate_bars(data, '15m'), aggregate_bars(data, '1d'))
+    result['trades'] = pd.DataFrame([vars(t) for t in strategy.trades], columns=['date', 'action', 'price', 'reason'])
+    return result
+
+
+def _futures_backtest(data):
+    from backtests.backtest_futures_minute import ChanFuturesStrategy, FuturesBacktestEngine
+    from core.results_store import ResultsStore
+    # 成交写进临时结果库、不画图，不往 results/ 写文件
+    with tempfile.TemporaryDirectory(prefix='golden_futures_') as tmp:
+        with ResultsStore(os.path.join(tmp, 'results.sqlite'), strategy='golden') as store:
+            return FuturesBacktestEngine(ChanFuturesStrategy(), store=store, plot=False).run(data, 'RB0')
+
+
+BOLL_STRATEGIES = [
+    ('indicators.boll.boll_volume_strategy', 'BollVolumeStrategy'),
+    ('indicators.boll.strategies', 'MovingAverageStrategy'),
+    ('indicators.boll.strategies', 'RSIStrategy'),
+    ('indicators.boll.strategies', 'BollingerBandsStrategy'),
+    ('indicators.boll.strategies', 'MACDStrategy'),
+    ('indicators.boll.strategies', 'WeeklyBollingerStrategy'),
+    ('indicators.boll.strict_boll_strategy', 'StrictBollingerStrategy'),
+    ('indicators.boll.improved_strict_boll_strategy', 'ImprovedStrictBollStrategy'),
+    ('indicators.boll.weekly_boll_strategy', 'WeeklyBollingerStrategy'),
+    ('indicators.boll.moderate_boll_strategy', 'ModerateBollStrategy'),
+] + [(f'indicators.boll.moderate_boll_strategy_v{v}', f'ModerateBollStrategyV{v}') for v in range(2, 9)]
+
+CHAN_VARIANTS = [
+    ('chan_theory', 'ChanTheory'),
+    ('chan_theory_realtime', 'ChanTheoryRealtime'),
+    ('chan_theory_delayed', 'ChanTheoryDelayed'),
+    ('chan_theory_improved_a', 'ChanTheoryImprovedA'),
+    ('chan_theory_improved_b', 'ChanTheoryImprovedB'),
+    ('chan_theory_improved_c', 'ChanTheoryImprovedC'),
+]
+
+
+def _strategy_case_name(module: str, cls: str) -> str:
+    return f"{module.rsplit('.', 1)[-1]}.{cls}"
+
+
+# 用例名 -> (适用的数据类型, 执行函数)
+GOLDEN_CASES: Dict[str, Tuple[str, Callable]] = {}
+for _module, _cls in CHAN_VARIANTS:
+    GOLDEN_CASES[f'chan.{_cls}'] = ('daily', _chan(_module, _cls))
+for _module, _cls in BOLL_STRATEGIES:
+    GOLDEN_CASES[f'boll.{_strategy_case_name(_module, _cls)}'] = ('daily', _strategy(_module, _cls))
+    GOLDEN_CASES[f'engine.{_strategy_case_name(_module, _cls)}'] = ('daily', _engine(_module, _cls))
+GOLDEN_CASES.update({
+    'strategy.VolumeBreakoutStrategy': ('daily', _strategy('indicators.volume_breakout_strategy', 'VolumeBreakoutStrategy')),
+    'strategy.VolumeBreakoutStrategyIntraday': (
+        'minute', _strategy('indicators.volume_breakout_strategy', 'VolumeBreakoutStrategyIntraday')),
+    'strategy.ma_convergence': ('daily', _indicator_functions('indicators.ma_convergence_strategy')),
+    'strategy.ma60_pullback': ('daily', _indicator_functions('indicators.ma60_pullback_strategy')),
+    'strategy.millipede': ('minute', _indicator_functions('indicators.millipede_strategy')),
+    'minute.volume_breakout': ('minute', _minute_backtest('backtests.backtest_volume_breakout_minute')),
+    'minute.millipede': ('minute', _minute_backtest('backtests.backtest_millipede_minute')),
+    'minute.t1_adapter': ('minute', _t1_adapter_backtest),
+    'minute.futures': ('futures', _futures_backtest),
+})
+
+
+def case_ids() -> List[Tuple[str, str]]:
+    """全部 (用例, 数据集) 组合"""
+    return [
+        (case, dataset)
+        for case, (kind, _) in GOLDEN_CASES.items()
+        for dataset, (dataset_kind, _) in DATASETS.items()
+        if kind == dataset_kind
+    ]
+
+
+def golden_path(case: str, dataset: str) -> str:
+    return os.path.join(GOLDEN_DIR, f'{case}__{dataset}.npz')
+
+
+class GoldenSkip(Exception):
+    """用例无法运行（模块无法导入或数据集缺失）"""
+
+
+def compute(case: str, dataset: str) -> Dict[str, np.ndarray]:
+    """执行用例并返回展开后的输出"""
+    data = load_dataset(dataset)
+    if data is None:
+        raise GoldenSkip(f'数据集 {dataset} 不存在')
+    try:
+        result = GOLDEN_CASES[case][1](data)
+    except (ImportError, SyntaxError) as e:
+        raise GoldenSkip(f'{type(e).__name__}: {e}') from e
+    return flatten(result)
+
+
+def check(case: str, dataset: str, rtol: float = 0.0) -> List[str]:
+    """与黄金文件比较；黄金文件不存在时抛出 GoldenSkip"""
+    path = golden_path(case, dataset)
+    if not os.path.exists(path):
+        raise GoldenSkip(f'缺少黄金文件 {os.path.relpath(path, ROOT)}，运行 python tests/golden_harness.py --update')
+    return diff_outputs(load_golden(path), compute(case, dataset), rtol)
+
+
+def update(patterns: Optional[List[str]] = None) -> Dict[str, str]:
+    """重新生成黄金文件，返回 {用例__数据集: 状态}"""
+    status = {}
+    for case, dataset in case_ids():
+        if patterns and not any(p in case or p in dataset for p in patterns):
+            continue
+        key = f'{case}__{dataset}'
+        try:
+            save_golden(golden_path(case, dataset), compute(case, dataset))
+            status[key] = 'written'
+        except GoldenSkip as e:
+            status[key] = f'skipped ({e})'
+    return status
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='黄金输出回归检查 / 更新')
+    parser.add_argument('--update', action='store_true', help='重新生成黄金文件')
+    parser.add_argument('--filter', default='', help='逗号分隔的用例名或数据集子串')
+    parser.add_argument('--rtol', type=float, default=0.0, help='浮点相对误差容忍度，默认逐位一致')
+    args = parser.parse_args(argv)
+
+    from core.log import configure_logging
+    configure_logging(level='WARNING')
+    patterns = [p.strip() for p in args.filter.split(',') if p.strip()]
+
+    if args.update:
+        for key, state in update(patterns).items():
+            print(f'{key:<72} {state}')
+        return 0
+
+    failed = 0
+    for case, dataset in case_ids():
+        if patterns and not any(p in case or p in dataset for p in patterns):
+            continue
+        key = f'{case}__{dataset}'
+        try:
+            problems = check(case, dataset, args.rtol)
+        except GoldenSkip as e:
+            print(f'{key:<72} skipped ({e})')
+            continue
+        if problems:
+            failed += 1
+            print(f'{key:<72} DIFF')
+            for problem in problems[:20]:
+                print(f'    {problem}')
+        else:
+            print(f'{key:<72} ok')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
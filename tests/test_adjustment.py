@@ -0,0 +1,104 @@
+"""
+原始价格 + 复权因子存储与按需复权测试
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.adjustment import (
+    ADJ_FACTOR_COL, adjust_prices, attach_adjustment_factor, compute_adjustment_factor,
+    discover_cached_symbols, legacy_cache_path, load_adjusted_cache
+)
+from data.data_fetcher import DataFetcher
+from data.providers import ProviderRegistry
+
+
+def make_raw_with_dividend():
+    """第3根K线除息 1 元（前收盘 20）"""
+    index = pd.date_range('2024-01-01', periods=5, freq='D', name='datetime')
+    close = np.array([20.0, 20.0, 19.0, 19.5, 19.0])
+    return pd.DataFrame({
+        'Open': close, 'High': close + 0.5, 'Low': close - 0.5, 'Close': close,
+        'Volume': 1000.0, 'Dividends': [0, 0, 1.0, 0, 0],
+    }, index=index)
+
+
+def test_factor_from_dividends():
+    factor = compute_adjustment_factor(make_raw_with_dividend())
+    np.testing.assert_allclose(factor.to_numpy(), [1, 1, 20 / 19, 20 / 19, 20 / 19])
+
+
+def test_factor_from_adj_close():
+    raw = make_raw_with_dividend().drop(columns=['Dividends'])
+    raw['Adj Close'] = raw['Close'] * [0.95, 0.95, 1.0, 1.0, 1.0]
+    stored = attach_adjustment_factor(raw)
+    assert 'Adj Close' not in stored.columns
+    np.testing.assert_allclose(stored[ADJ_FACTOR_COL].to_numpy(), [0.95, 0.95, 1, 1, 1])
+
+
+def test_forward_backward_none_views():
+    raw = attach_adjustment_factor(make_raw_with_dividend())
+
+    none = adjust_prices(raw, 'none')
+    assert ADJ_FACTOR_COL not in none.columns
+    pd.testing.assert_series_equal(none['Close'], raw['Close'])
+
+    forward = adjust_prices(raw, 'forward')
+    # 前复权：最新价格不变，除息前价格按 19/20 缩放
+    assert forward['Close'].iloc[-1] == pytest.approx(19.0)
+    assert forward['Close'].iloc[0] == pytest.approx(19.0)
+    assert forward['High'].iloc[1] == pytest.approx(20.5 * 19 / 20)
+
+    backward = adjust_prices(raw, 'backward')
+    # 后复权：最早价格不变，除息后价格按 20/19 放大
+    assert backward['Close'].iloc[0] == pytest.approx(20.0)
+    assert backward['Close'].iloc[2] == pytest.approx(20.0)
+    pd.testing.assert_series_equal(backward['Volume'], raw['Volume'])
+
+    pd.testing.assert_frame_equal(adjust_prices(raw, 'auto'), forward)
+    with pytest.raises(ValueError):
+        adjust_prices(raw, 'qfq')
+
+
+def test_fetcher_stores_one_raw_file_for_all_modes(tmp_path):
+    calls = []
+
+    def provider(symbol, start_date, end_date, period, interval):
+        calls.append(symbol)
+        return make_raw_with_dividend()
+
+    registry = ProviderRegistry()
+    registry.register('stub', provider)
+    fetcher = DataFetcher(cache_dir=str(tmp_path), provider_registry=registry)
+
+    views = {adjust: fetcher.fetch_stock_data('AAA', adjust=adjust) for adjust in ['none', 'forward', 'backward']}
+
+    assert calls == ['AAA']
+    assert os.listdir(tmp_path) == ['AAA_1y_1d_raw.csv']
+    assert views['none']['Close'].iloc[0] == pytest.approx(20.0)
+    assert views['forward']['Close'].iloc[0] == pytest.approx(19.0)
+    assert views['backward']['Close'].iloc[-1] == pytest.approx(20.0)
+
+
+def test_legacy_cache_is_still_readable(tmp_path):
+    legacy = make_raw_with_dividend()[['Open', 'High', 'Low', 'Close', 'Volume']]
+    legacy.to_csv(legacy_cache_path(str(tmp_path), '600000.SS', '20y', '1d', 'forward'))
+
+    assert discover_cached_symbols(str(tmp_path), '20y') == ['600000.SS']
+    loaded = load_adjusted_cache(str(tmp_path), '600000.SS', '20y', '1d', 'forward')
+    np.testing.assert_allclose(loaded['Close'].to_numpy(), legacy['Close'].to_numpy())
+    assert load_adjusted_cache(str(tmp_path), '600000.SS', '20y', '1d', 'backward') is None
+
+    def provider(symbol, start_date, end_date, period, interval):
+        raise AssertionError('legacy cache should be used')
+
+    registry = ProviderRegistry()
+    registry.register('stub', provider)
+    fetcher = DataFetcher(cache_dir=str(tmp_path), provider_registry=registry)
+    data = fetcher.fetch_stock_data('600000.SS', period='20y', adjust='forward')
+    assert len(data) == 5
@@ -0,0 +1,127 @@
+"""
+多周期K线金字塔（按交易时段聚合 + 增量入库）测试
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.calendar import futures_session_profile
+from data.bar_store import BarStore, aggregate_bars, normalize_interval
+
+
+def a_share_5min(days):
+    stamps = []
+    for day in days:
+        stamps += list(pd.date_range(f'{day} 09:35', f'{day} 11:30', freq='5min'))
+        stamps += list(pd.date_range(f'{day} 13:05', f'{day} 15:00', freq='5min'))
+    index = pd.DatetimeIndex(stamps, name='datetime')
+    rng = np.random.default_rng(7)
+    close = 10 + rng.normal(0, 0.05, len(index)).cumsum()
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.01, len(index)),
+        'High': close + 0.05,
+        'Low': close - 0.05,
+        'Close': close,
+        'Volume': rng.integers(100, 1000, len(index)).astype(float),
+    }, index=index)
+
+
+def futures_5min():
+    def day_session(day):
+        return (list(pd.date_range(f'{day} 09:05', f'{day} 10:15', freq='5min'))
+                + list(pd.date_range(f'{day} 10:35', f'{day} 11:30', freq='5min'))
+                + list(pd.date_range(f'{day} 13:35', f'{day} 15:00', freq='5min')))
+
+    stamps = (day_session('2024-01-05')
+              + list(pd.date_range('2024-01-05 21:05', '2024-01-05 23:00', freq='5min'))
+              + day_session('2024-01-08'))
+    index = pd.DatetimeIndex(stamps, name='DateTime')
+    return pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 1.0}, index=index)
+
+
+def test_a_share_intraday_bins_follow_sessions():
+    bars = a_share_5min(['2024-01-05'])
+
+    hourly = aggregate_bars(bars, '60m')
+    assert list(hourly.index.strftime('%H:%M')) == ['10:30', '11:30', '14:00', '15:00']
+    assert hourly['Volume'].sum() == bars['Volume'].sum()
+
+    first = bars.iloc[:12]
+    assert hourly['Open'].iloc[0] == first['Open'].iloc[0]
+    assert hourly['High'].iloc[0] == first['High'].max()
+    assert hourly['Low'].iloc[0] == first['Low'].min()
+    assert hourly['Close'].iloc[0] == first['Close'].iloc[-1]
+
+    quarter = aggregate_bars(bars, '15min')
+    assert quarter.index[0] == pd.Timestamp('2024-01-05 09:45')
+    assert pd.Timestamp('2024-01-05 13:15') in quarter.index
+    assert len(quarter) == 16
+
+
+def test_daily_and_weekly_match_calendar_resample():
+    bars = a_share_5min(['2024-01-04', '2024-01-05', '2024-01-08', '2024-01-09'])
+
+    daily = aggregate_bars(bars, '1d')
+    expected = bars.resample('D').agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+    }).dropna()
+    pd.testing.assert_frame_equal(daily, expected, check_freq=False, check_names=False)
+
+    weekly = aggregate_bars(bars, '1w')
+    assert list(weekly.index) == [pd.Timestamp('2024-01-05'), pd.Timestamp('2024-01-12')]
+    assert weekly['Close'].iloc[0] == bars.loc['2024-01-05', 'Close'].iloc[-1]
+
+
+def test_futures_night_session_belongs_to_next_trading_day():
+    bars = futures_5min()
+    assert futures_session_profile('RB0') == 'cn_futures_2300'
+    assert futures_session_profile('AU2406') == 'cn_futures_0230'
+
+    daily = aggregate_bars(bars, '1d', futures_session_profile('I0'))
+    # 周五夜盘 24 根归属下周一
+    assert list(daily.index) == [pd.Timestamp('2024-01-05'), pd.Timestamp('2024-01-08')]
+    assert daily['Volume'].tolist() == [45.0, 45.0 + 24.0]
+
+    quarter = aggregate_bars(bars, '15m', 'cn_futures_2300')
+    assert quarter.index.name == 'DateTime'
+    assert pd.Timestamp('2024-01-05 21:15') in quarter.index
+    assert pd.Timestamp('2024-01-05 10:45') in quarter.index
+    assert pd.Timestamp('2024-01-05 10:30') not in quarter.index
+
+
+def test_normalize_interval():
+    assert normalize_interval('15min') == '15m'
+    assert normalize_interval('1h') == '60m'
+    assert normalize_interval('W') == '1w'
+    with pytest.raises(ValueError):
+        normalize_interval('7m')
+
+
+def test_incremental_ingest_matches_full_rebuild(tmp_path):
+    bars = a_share_5min(['2024-01-04', '2024-01-05', '2024-01-08', '2024-01-09', '2024-01-15'])
+
+    full = BarStore(root=str(tmp_path / 'full'))
+    full.ingest('600000.SS', bars)
+
+    incremental = BarStore(root=str(tmp_path / 'inc'))
+    incremental.ingest('600000.SS', bars.loc[:'2024-01-08 10:00'])
+    updated = incremental.ingest('600000.SS', bars.loc['2024-01-08 10:00':])
+    # 只重算 2024-01-08 所在交易周的K线
+    assert updated['1d'] == 3
+    assert updated['1w'] == 2
+
+    for interval in full.intervals():
+        pd.testing.assert_frame_equal(
+            incremental.read('600000.SS', interval), full.read('600000.SS', interval), check_freq=False
+        )
+
+    daily = full.read('600000.SS', '1d', start='2024-01-08')
+    assert len(daily) == 3
+    with pytest.raises(ValueError):
+        full.read('600000.SS', '1m')
+    assert full.read('000001.SZ', '1d') is None
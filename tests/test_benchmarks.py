@@ -0,0 +1,70 @@
+"""
+基准套件测试：合成数据确定性、预算比较、smoke 规模用例可运行
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.cases import SCALES
+from benchmarks.run_benchmarks import compare, load_baseline, run_suite, save_baseline
+from benchmarks.synthetic import daily_bars, minute_bars, synthetic_symbols
+
+
+def test_synthetic_data_is_deterministic_and_valid():
+    first = daily_bars('600519.SS', days=300)
+    second = daily_bars('600519.SS', days=300)
+    pd.testing.assert_frame_equal(first, second)
+    assert not first.equals(daily_bars('000001.SZ', days=300))
+
+    assert len(first) == 300
+    assert (first['High'] >= first[['Open', 'Close']].max(axis=1)).all()
+    assert (first['Low'] <= first[['Open', 'Close']].min(axis=1)).all()
+    assert len(set(synthetic_symbols(5000))) == 5000
+
+
+def test_minute_bars_follow_sessions():
+    stock = minute_bars('000001.SZ', days=2, period=60)
+    assert [t.strftime('%H:%M') for t in stock.index[:4]] == ['10:30', '11:30', '14:00', '15:00']
+
+    # 2024-12-30 是周一，夜盘在上周五晚上
+    futures = minute_bars('RB0', days=2, period=30, profile='cn_futures_2300')
+    monday_first = futures.index[futures.index.normalize() >= pd.Timestamp('2024-12-27')][0]
+    assert monday_first == pd.Timestamp('2024-12-27 21:30')
+    assert futures.index.is_monotonic_increasing
+
+
+def test_compare_flags_regressions_and_absolute_budget(tmp_path):
+    scale = SCALES['smoke']
+    results = [
+        {'name': 'a', 'status': 'ok', 'seconds': 1.0},
+        {'name': 'b', 'status': 'ok', 'seconds': 2.0},
+    ]
+    save_baseline(scale, results, str(tmp_path))
+    baseline = load_baseline('smoke', str(tmp_path))
+    assert baseline == {'a': {'seconds': 1.0}, 'b': {'seconds': 2.0}}
+
+    slower = [
+        {'name': 'a', 'status': 'ok', 'seconds': 1.2},
+        {'name': 'b', 'status': 'ok', 'seconds': 2.6},
+        {'name': 'c', 'status': 'ok', 'seconds': 9.0},
+        {'name': 'd', 'status': 'skipped', 'seconds': None},
+    ]
+    regressions = compare(slower, baseline, margin=0.25)
+    assert [r['name'] for r in regressions] == ['b']
+    assert slower[2]['baseline'] is None
+
+    baseline['b']['budget'] = 3.0
+    assert compare(slower, baseline, margin=0.25) == []
+
+
+def test_smoke_suite_runs():
+    results = run_suite(SCALES['smoke'], ['strategy.volume_breakout', 'load.'], verbose=False)
+    by_name = {r['name']: r for r in results}
+    assert by_name['strategy.volume_breakout']['status'] == 'ok'
+    assert by_name['load.csv']['status'] == 'ok'
+    assert by_name['load.npz']['seconds'] > 0
+    assert np.isfinite(by_name['load.pickle']['seconds'])
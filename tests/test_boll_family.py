@@ -0,0 +1,80 @@
+"""
+布林带策略族与特征缓存测试
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import daily_bars
+from indicators.boll.boll_family import (
+    BOLL_VARIANTS, ModerateBollStrategyV5, compare_variants, default_variants,
+)
+from indicators.boll.boll_features import BollFeatureCache
+from indicators.boll.boll_rules import (
+    BandEvents, BollRuleSet, BollStrategy, MaTrend, MaxHoldExit, MiddleRetestEntry,
+)
+
+
+def test_compare_variants_matches_individual_runs():
+    data = daily_bars('BOLL', days=900)
+    results = compare_variants(data)
+
+    assert set(results) == set(BOLL_VARIANTS)
+    for name, strategy in default_variants().items():
+        pd.testing.assert_frame_equal(results[name], strategy.generate_signals(data), check_exact=True)
+
+
+def test_feature_cache_shares_bands_across_variants():
+    data = daily_bars('CACHE', days=400)
+    features = BollFeatureCache(data)
+    strategies = default_variants(['moderate_v2', 'moderate_v5', 'moderate_v8'])
+    for strategy in strategies.values():
+        strategy.generate_signals(data, features=features)
+    misses = features.misses
+
+    # 参数相同的第二轮全部命中缓存
+    for strategy in strategies.values():
+        strategy.generate_signals(data, features=features)
+    assert features.misses == misses
+    assert features.bands(20, 2) is features.bands(20, 2)
+
+
+def test_legacy_modules_reexport_family_classes():
+    from indicators.boll.moderate_boll_strategy_v5 import ModerateBollStrategyV5 as legacy
+    from indicators.boll.strategies import WeeklyBollingerStrategy
+
+    assert legacy is ModerateBollStrategyV5
+    assert WeeklyBollingerStrategy is BOLL_VARIANTS['weekly_regime']
+
+
+def test_custom_rule_set_composes_components():
+    class QuickHold(BollStrategy):
+        def build_rules(self):
+            return BollRuleSet(
+                20, 2,
+                trend=MaTrend(20, 60, 0.5, reset_events=False),
+                events=BandEvents(5, uptrend_only=False),
+                entry=MiddleRetestEntry(5, in_uptrend=False, min_breaks=1, min_crosses=1),
+                exits=[MaxHoldExit(3)],
+            )
+
+    result = QuickHold('quick').generate_signals(daily_bars('RULES', days=900))
+    signals = result['signal'].to_numpy()
+    buys = np.flatnonzero(signals == 1)
+    sells = np.flatnonzero(signals == -1)
+
+    assert len(buys) > 0
+    assert list(result.columns[-3:]) == ['ma_long', 'ma_short', 'signal']
+    for buy, sell in zip(buys, sells):
+        assert sell - buy == 3
+
+
+def test_unknown_variant_name():
+    with pytest.raises(KeyError):
+        default_variants(['moderate_v9'])
@@ -0,0 +1,89 @@
+"""
+交易日历（交易时段表 + 节假日 + K线对齐）测试
+"""
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.calendar import (
+    SESSION_PROFILES, TradingCalendar, futures_session_profile, load_trade_dates, symbol_session_profile
+)
+
+
+# 2024 年元旦 + 春节（2/9 - 2/16 周五休市）
+HOLIDAYS = ['2024-01-01', '2024-02-09', '2024-02-12', '2024-02-13', '2024-02-14', '2024-02-15', '2024-02-16']
+
+
+def test_session_table_from_file():
+    assert SESSION_PROFILES['cn_stock'] == ((570, 690), (780, 900))
+    assert SESSION_PROFILES['cn_futures_0230'][0] == (-180, 150)
+    assert SESSION_PROFILES['cn_futures_2300'][0] == (-180, -60)
+    assert futures_session_profile('CU2405') == 'cn_futures_0100'
+    assert futures_session_profile('IF0') == 'cn_futures_day'
+    assert symbol_session_profile('600519.SS') == 'cn_stock'
+
+
+def test_holiday_aware_trading_day_arithmetic():
+    cal = TradingCalendar('cn_stock', holidays=HOLIDAYS)
+
+    assert not cal.is_trading_day('2024-02-12')[0]
+    assert cal.trading_days_between(datetime(2024, 2, 8), datetime(2024, 2, 19)) == 1
+    assert cal.trading_days_between(datetime(2024, 2, 19), datetime(2024, 2, 8)) == 0
+    assert cal.add_trading_days('2024-02-08', 1)[0] == np.datetime64('2024-02-19')
+    assert cal.previous_trading_day('2024-01-02')[0] == np.datetime64('2023-12-29')
+
+    days = cal.trading_days('2024-02-05', '2024-02-20')
+    assert list(days.strftime('%m-%d')) == ['02-05', '02-06', '02-07', '02-08', '02-19', '02-20']
+
+
+def test_trade_dates_file_defines_holidays(tmp_path):
+    path = tmp_path / 'trade_dates.csv'
+    pd.DataFrame({'trade_date': ['2024-09-27', '2024-09-30', '2024-10-08', '2024-10-09']}).to_csv(path, index=False)
+
+    cal = TradingCalendar('cn_stock', trade_dates=load_trade_dates(str(path)))
+    assert cal.trading_days_between(datetime(2024, 9, 30), datetime(2024, 10, 8)) == 1
+    assert load_trade_dates(str(tmp_path / 'missing.csv')) is None
+
+
+def test_bar_day_ordinals_and_sessions():
+    cal = TradingCalendar('cn_futures_2300', holidays=HOLIDAYS)
+    index = pd.DatetimeIndex(['2024-02-08 14:00', '2024-02-08 21:30', '2024-02-19 09:30', '2024-02-19 10:20'])
+
+    ordinals = cal.bar_day_ordinals(index)
+    # 节前夜盘归属节后第一个交易日
+    assert list(ordinals - ordinals[0]) == [0, 1, 1, 1]
+    assert list(cal.bar_sessions(index)) == [3, 0, 1, -1]
+
+
+def test_bar_close_and_session_close():
+    cal = TradingCalendar('cn_stock')
+    index = pd.DatetimeIndex(['2024-01-05 09:35', '2024-01-05 11:30', '2024-01-05 13:05', '2024-01-05 14:55'])
+
+    closes = pd.DatetimeIndex(cal.bar_close(index, 60))
+    assert list(closes.strftime('%H:%M')) == ['10:30', '11:30', '14:00', '15:00']
+
+    sessions = pd.DatetimeIndex(cal.session_close(index))
+    assert list(sessions.strftime('%H:%M')) == ['11:30', '11:30', '15:00', '15:00']
+
+
+def test_realtime_open_and_next_open():
+    tz = ZoneInfo('Asia/Shanghai')
+    cal = TradingCalendar('cn_stock', holidays=HOLIDAYS)
+
+    assert cal.is_open(datetime(2024, 2, 8, 10, 0, tzinfo=tz))
+    assert not cal.is_open(datetime(2024, 2, 8, 11, 30, tzinfo=tz))
+    assert not cal.is_open(datetime(2024, 2, 13, 10, 0, tzinfo=tz))
+
+    assert cal.next_open(datetime(2024, 2, 8, 12, 0, tzinfo=tz)) == datetime(2024, 2, 8, 13, 0, tzinfo=tz)
+    assert cal.next_open(datetime(2024, 2, 8, 15, 30, tzinfo=tz)) == datetime(2024, 2, 19, 9, 30, tzinfo=tz)
+    assert cal.next_open(datetime(2024, 2, 8, 10, 5, 30, tzinfo=tz)) == datetime(2024, 2, 8, 10, 5, tzinfo=tz)
+
+    futures = TradingCalendar('cn_futures_2300', holidays=HOLIDAYS)
+    assert futures.is_open(datetime(2024, 2, 7, 22, 0))
+    assert futures.next_open(datetime(2024, 2, 7, 16, 0)) == datetime(2024, 2, 7, 21, 0)
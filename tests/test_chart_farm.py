@@ -0,0 +1,88 @@
+"""
+批量K线图渲染服务：内容键与缓存跳过
+"""
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import daily_bars
+from visualization.chart_farm import (
+    ChartRequest,
+    ChartSpec,
+    content_key,
+    init_worker,
+    load_cache_index,
+    render_cached,
+    save_cache_index,
+    source_key,
+)
+
+SPEC = ChartSpec(mav=(5, 10), dpi=40, figsize=(6, 4))
+
+
+def _request(data, title='T'):
+    signals = pd.DataFrame({'signal': 0}, index=data.index)
+    signals.iloc[10, 0] = 1
+    return ChartRequest(data, signals, title, {'symbol': 'T', 'bars': len(data)})
+
+
+def test_content_key_is_stable_and_content_sensitive():
+    data = daily_bars('KEY', days=80)
+    assert content_key(data, 'title', SPEC) == content_key(data.copy(), 'title', SPEC)
+    assert content_key(data, 'title', SPEC) != content_key(data, 'other', SPEC)
+    assert content_key(data, 'title', SPEC) != content_key(data, 'title', ChartSpec(dpi=41))
+
+    changed = data.copy()
+    changed.iloc[-1, changed.columns.get_loc('Close')] += 0.01
+    assert content_key(data) != content_key(changed)
+
+
+def test_render_cached_skips_unchanged_charts(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    csv = tmp_path / 'T.csv'
+    data = daily_bars('FARM', days=80)
+    data.to_csv(csv)
+    calls = []
+
+    def build(frame=data, title='T'):
+        calls.append(title)
+        return _request(frame, title)
+
+    def run(out_png, key, builder):
+        init_worker({'cache_dir': cache_dir, 'cache_index': load_cache_index(cache_dir)})
+        row = render_cached(out_png, key, builder, SPEC)
+        save_cache_index(cache_dir, [row])
+        return row
+
+    key = source_key(csv, 'params')
+    first = run(tmp_path / 'a' / 'T.png', key, build)
+    assert first['_status'] == 'rendered' and os.path.exists(tmp_path / 'a' / 'T.png')
+
+    # 源键不变：不读数据、不渲染，直接从缓存复制
+    second = run(tmp_path / 'b' / 'T.png', key, build)
+    assert second['_status'] == 'cached' and len(calls) == 1
+    assert second['bars'] == 80 and second['png'] == str(tmp_path / 'b' / 'T.png')
+    assert (tmp_path / 'a' / 'T.png').read_bytes() == (tmp_path / 'b' / 'T.png').read_bytes()
+
+    # 参数变了但绘图内容相同：重新计算，不重新渲染
+    third = run(tmp_path / 'c' / 'T.png', source_key(csv, 'other-params'), build)
+    assert third['_status'] == 'unchanged' and len(calls) == 2
+
+    # 绘图内容变化才重新渲染
+    fourth = run(tmp_path / 'd' / 'T.png', source_key(csv, 'new-title'), lambda: build(title='T2'))
+    assert fourth['_status'] == 'rendered'
+    assert fourth['_render_key'] != first['_render_key']
+
+
+def test_render_cached_without_cache_and_skipped_symbols(tmp_path):
+    data = daily_bars('NOCACHE', days=60)
+    init_worker({'cache_dir': ''})
+
+    row = render_cached(tmp_path / 'x.png', 'k', lambda: _request(data), SPEC)
+    assert row['_status'] == 'rendered' and os.path.exists(tmp_path / 'x.png')
+    assert render_cached(tmp_path / 'y.png', 'k', lambda: None, SPEC) is None
+    assert save_cache_index('', [row]) == 0
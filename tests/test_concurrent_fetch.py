@@ -0,0 +1,118 @@
+"""
+并发多股票获取 / 数据源限流测试（本地桩数据源，不访问网络）
+"""
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_fetcher import DataFetcher
+from data.providers import ProviderRegistry, RateLimiter
+
+
+def make_bars(close):
+    index = pd.date_range('2024-01-01', periods=3, freq='D', name='datetime')
+    return pd.DataFrame({
+        'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 100.0
+    }, index=index)
+
+
+class ConcurrencyProbe:
+    """记录同时在途的请求数"""
+
+    def __init__(self, delay=0.05, fail_symbols=()):
+        self.delay = delay
+        self.fail_symbols = set(fail_symbols)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+
+    def __call__(self, symbol, start_date, end_date, period, interval):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.calls.append(symbol)
+        try:
+            time.sleep(self.delay)
+            if symbol in self.fail_symbols:
+                raise ConnectionError('stub down')
+            return make_bars(float(len(symbol)))
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def make_fetcher(tmp_path, probe, **register_kwargs):
+    registry = ProviderRegistry(failure_threshold=1000)
+    registry.register('stub', probe, **register_kwargs)
+    return DataFetcher(cache_dir=str(tmp_path), provider_registry=registry)
+
+
+def test_fetch_multiple_runs_concurrently_and_keeps_order(tmp_path):
+    probe = ConcurrencyProbe()
+    fetcher = make_fetcher(tmp_path, probe)
+    symbols = [f'S{i:02d}' for i in range(12)] + ['S00']
+
+    streamed = []
+    result = fetcher.fetch_multiple_stocks(symbols, max_workers=4, on_result=lambda s, d: streamed.append(s))
+
+    assert list(result) == symbols[:12]
+    assert sorted(streamed) == sorted(symbols[:12])
+    assert sorted(probe.calls) == sorted(symbols[:12])
+    assert 1 < probe.peak <= 4
+    # 每只股票获取后立即写入缓存
+    assert len(os.listdir(tmp_path)) == 12
+
+
+def test_iter_multiple_reports_failures(tmp_path):
+    probe = ConcurrencyProbe(delay=0, fail_symbols={'BAD'})
+    fetcher = make_fetcher(tmp_path, probe)
+
+    outcomes = {symbol: (data, error) for symbol, data, error in
+                fetcher.iter_multiple_stocks(['GOOD', 'BAD'], use_cache=False)}
+
+    assert outcomes['GOOD'][1] is None and len(outcomes['GOOD'][0]) == 3
+    assert outcomes['BAD'][0] is None and isinstance(outcomes['BAD'][1], ValueError)
+    assert fetcher.fetch_multiple_stocks(['BAD'], max_workers=1) == {}
+
+
+def test_rate_limiter_spaces_requests_across_threads():
+    now = [0.0]
+    lock = threading.Lock()
+    waits = []
+
+    def fake_sleep(seconds):
+        with lock:
+            waits.append(seconds)
+
+    limiter = RateLimiter(max_per_minute=6, clock=lambda: now[0], sleep=fake_sleep)
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(waits) == [10.0, 20.0, 30.0]
+
+
+def test_provider_rate_limit_applies_to_calls():
+    registry = ProviderRegistry()
+    registry.register('limited', lambda *args: make_bars(1.0), max_per_minute=600)
+    start = time.monotonic()
+    for _ in range(4):
+        registry.call('limited', 'AAPL', None, None, '1y', '1d')
+    # 4 次请求至少间隔 3 × 0.1 秒
+    assert time.monotonic() - start >= 0.29
+
+
+def test_sessions_are_shared_per_provider(tmp_path):
+    fetcher = DataFetcher(cache_dir=str(tmp_path), pool_size=4)
+    session = fetcher._get_session('stooq')
+    assert fetcher._get_session('stooq') is session
+    assert fetcher._get_session('polygon') is not session
+    assert session.get_adapter('https://stooq.com')._pool_maxsize == 4
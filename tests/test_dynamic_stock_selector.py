@@ -0,0 +1,61 @@
+"""
+动态选股器：面板一次算出的每周得分与逐只 select_stocks 选出的股票一致（含上市较晚、停牌的股票）
+"""
+import importlib
+import os
+import sys
+import types
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import daily_bars, synthetic_symbols
+
+
+@pytest.fixture
+def selector_module(monkeypatch):
+    """模块依赖的 backtests.backtest_boll_volume_strategy 不在仓库中，用只含 load_stock_data 的桩模块代替"""
+    stub = types.ModuleType('backtests.backtest_boll_volume_strategy')
+    stub.load_stock_data = lambda symbol: None
+    monkeypatch.setitem(sys.modules, 'backtests.backtest_boll_volume_strategy', stub)
+    monkeypatch.delitem(sys.modules, 'analysis.y_dynamic_stock_selector', raising=False)
+    yield importlib.import_module('analysis.y_dynamic_stock_selector')
+    sys.modules.pop('analysis.y_dynamic_stock_selector', None)
+
+
+def _universe():
+    symbols = synthetic_symbols(8)
+    data = {sym: daily_bars(sym, days=750, end='2024-12-31') for sym in symbols}
+    data[symbols[0]] = data[symbols[0]].iloc[400:]                  # 上市较晚
+    data[symbols[1]] = data[symbols[1]].iloc[300:]                  # 再平衡期间刚满 52 周
+    late = data[symbols[2]]
+    data[symbols[2]] = late.drop(late.index[500:540])               # 停牌 8 周
+    mid = data[symbols[3]]
+    data[symbols[3]] = mid.drop(mid.index[[600, 601, 602, 604]])    # 周中零星停牌，周五停牌
+    return data
+
+
+def test_panel_picks_match_per_symbol_selection(selector_module):
+    data = _universe()
+    symbols = list(data)
+    rebalance_dates = pd.date_range('2023-06-01', '2024-12-31', freq='4W')
+
+    per_symbol = selector_module.DynamicStockSelector(top_percentile=0.5, min_stocks=2)
+    expected = [per_symbol.select_stocks(symbols, date, data) for date in rebalance_dates]
+
+    panel = selector_module.DynamicStockSelector(top_percentile=0.5, min_stocks=2).fit(data)
+    actual = [panel.select_stocks(symbols, date, data) for date in rebalance_dates]
+
+    assert actual == expected
+    assert len({len(picks) for picks in expected}) > 1             # 候选数随上市满 52 周而变化
+    first, last = rebalance_dates[0], rebalance_dates[-1]
+    assert per_symbol.calculate_trend_score(data[symbols[0]], first) is None
+    assert per_symbol.calculate_trend_score(data[symbols[0]], last) is not None
+
+    candidates = [symbols[2], symbols[3]]
+    assert panel.select_from_scores(panel.scores, rebalance_dates[-1], candidates) == \
+        per_symbol.select_stocks(candidates, rebalance_dates[-1], data)
+    assert panel.select_from_scores(panel.scores, '2020-01-01') == []
@@ -0,0 +1,112 @@
+"""
+多合约期货组合回测（共享保证金 + 数组化盯市）测试
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backtests'))
+sys.path.insert(0, os.path.join(ROOT, 'indicators', 'chan'))
+
+from backtest_futures_minute import (
+    CONTRACT_SPECS, FuturesPortfolioAccount, FuturesPortfolioEngine, build_portfolio_timeline
+)
+
+
+def make_bars(times, closes):
+    index = pd.DatetimeIndex(times, name='DateTime')
+    close = np.asarray(closes, dtype=float)
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1.0}, index=index)
+
+
+def make_signals(data, buy_at=(), sell_at=()):
+    signals = pd.DataFrame({'buy_signal': 0, 'sell_signal': 0}, index=data.index)
+    signals.iloc[list(buy_at), 0] = 1
+    signals.iloc[list(sell_at), 1] = 1
+    return signals
+
+
+def test_timeline_merges_contracts_and_forward_fills_prices():
+    rb = make_bars(['2024-01-05 09:05', '2024-01-05 09:10', '2024-01-05 21:05'], [3900, 3910, 3920])
+    au = make_bars(['2024-01-05 09:10', '2024-01-05 21:05', '2024-01-06 01:05'], [480, 481, 482])
+
+    timeline, close, tradable, buy, sell = build_portfolio_timeline(
+        {'RB0': rb, 'AU0': au}, {'RB0': make_signals(rb, buy_at=[1]), 'AU0': make_signals(au)}
+    )
+    assert len(timeline) == 4
+    assert tradable.tolist() == [[True, False], [True, True], [True, True], [False, True]]
+    assert close[3, 0] == 3920
+    assert np.isnan(close[0, 1])
+    assert buy[:, 0].tolist() == [False, True, False, False]
+
+
+def test_vectorized_mark_to_market_matches_per_position_pnl():
+    account = FuturesPortfolioAccount(['RB0', 'AU0'], 1_000_000, 0.0001)
+    account.open_position(0, 1, 10, 3900, 't0')
+    account.open_position(1, 1, 2, 480, 't0')
+
+    prices = np.array([3950.0, 470.0])
+    expected = (3950 - 3901) * 10 * CONTRACT_SPECS['RB0']['multiplier'] + (470 - 481) * 2 * CONTRACT_SPECS['AU0']['multiplier']
+    assert account.unrealized_pnl(prices).sum() == pytest.approx(expected)
+    assert account.equity(prices) == pytest.approx(account.available_cash + account.total_margin + expected)
+
+    account.close_position(0, 3950, 't1')
+    assert account.quantity[0] == 0
+    assert account.trades[-1]['pnl'] == pytest.approx((3949 - 3901) * 100 - account.trades[-1]['total_commission'])
+
+
+def test_shared_margin_limits_are_enforced():
+    times = pd.date_range('2024-01-05 09:05', periods=6, freq='5min')
+    data = {symbol: make_bars(times, [1000.0] * 6) for symbol in ['RB0', 'HC0', 'TA0', 'MA0']}
+    signals = {symbol: make_signals(bars, buy_at=[1]) for symbol, bars in data.items()}
+
+    engine = FuturesPortfolioEngine(
+        initial_capital=100_000, window_size=0, max_total_margin_pct=0.3, max_contract_margin_pct=0.2
+    )
+    result = engine.run(data, signals)
+
+    curve = result['equity_curve']
+    assert (curve['margin'] <= 0.3 * curve['equity'] + 1e-6).all()
+    per_contract_margin = engine.account.margin
+    assert (per_contract_margin <= 0.2 * 100_000 + 1e-6).all()
+    # 前两个合约用满单合约额度后，第三个合约只能用剩余的组合额度，第四个无额度
+    assert result['open_positions'] == 3
+    assert engine.account.quantity[3] == 0
+
+
+def test_stop_loss_and_signal_exit_per_contract():
+    times = pd.date_range('2024-01-05 09:05', periods=5, freq='5min')
+    rb = make_bars(times, [1000, 1000, 970, 970, 970])
+    ma = make_bars(times, [2000, 2000, 2010, 2020, 2030])
+    data = {'RB0': rb, 'MA0': ma}
+    signals = {'RB0': make_signals(rb, buy_at=[1]), 'MA0': make_signals(ma, buy_at=[1], sell_at=[3])}
+
+    engine = FuturesPortfolioEngine(initial_capital=1_000_000, window_size=0)
+    result = engine.run(data, signals)
+
+    closes = result['trades'][result['trades']['direction'] == 'CLOSE_LONG']
+    assert closes[['symbol', 'reason']].values.tolist() == [['RB0', 'stop_loss'], ['MA0', 'signal']]
+    assert result['open_positions'] == 0
+    assert result['final_equity'] == pytest.approx(1_000_000 + result['total_pnl'])
+
+
+def test_bar_with_both_signals_only_exits():
+    times = pd.date_range('2024-01-05 09:05', periods=6, freq='5min')
+    rb = make_bars(times, [1000, 1000, 1005, 1010, 1010, 1010])
+    ma = make_bars(times, [2000] * 6)
+    data = {'RB0': rb, 'MA0': ma}
+    signals = {'RB0': make_signals(rb, buy_at=[1, 3], sell_at=[3]),      # 第 3 根同时有买卖信号
+               'MA0': make_signals(ma, buy_at=[2], sell_at=[2])}         # 空仓时同时出现：不开仓
+
+    engine = FuturesPortfolioEngine(initial_capital=1_000_000, window_size=0)
+    result = engine.run(data, signals)
+
+    trades = result['trades']
+    assert trades[['symbol', 'direction']].values.tolist() == [['RB0', 'OPEN_LONG'], ['RB0', 'CLOSE_LONG']]
+    assert trades['reason'].iloc[-1] == 'signal'
+    assert result['open_positions'] == 0
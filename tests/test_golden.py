@@ -0,0 +1,42 @@
+"""
+黄金输出回归：策略信号、缠论买卖点、成交记录与绩效指标必须与 tests/golden/ 逐位一致
+
+输出变化是预期的（修改了策略逻辑）时，运行 python tests/golden_harness.py --update 重新生成。
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from golden_harness import GoldenSkip, case_ids, check, diff_outputs, flatten
+
+
+@pytest.mark.parametrize('case,dataset', case_ids(), ids=[f'{c}__{d}' for c, d in case_ids()])
+def test_matches_golden(case, dataset):
+    try:
+        problems = check(case, dataset)
+    except GoldenSkip as e:
+        pytest.skip(str(e))
+    assert not problems, '\n'.join(problems)
+
+
+def test_diff_reports_structure_and_value_changes():
+    frame = pd.DataFrame({'signal': [0, 1, 0], 'price': [1.0, np.nan, 3.0]},
+                         index=pd.date_range('2024-01-01', periods=3))
+    expected = flatten({'signals': frame, 'metrics': {'sharpe': 1.5}, 'trades': []})
+    assert diff_outputs(expected, flatten({'signals': frame, 'metrics': {'sharpe': 1.5}, 'trades': []})) == []
+
+    changed = frame.copy()
+    changed.loc[changed.index[2], 'price'] = 3.0000001
+    changed['extra'] = 1
+    problems = diff_outputs(expected, flatten({'signals': changed, 'metrics': {'sharpe': 1.5}, 'trades': []}))
+    assert any(p.startswith('多出') for p in problems)
+    assert any(p.startswith('signals/price: 1/3') for p in problems)
+    assert any(p.startswith('signals/__columns__: shape') for p in problems)
+
+    relaxed = flatten({'signals': changed.drop(columns='extra'), 'metrics': {'sharpe': 1.5}, 'trades': []})
+    assert diff_outputs(expected, relaxed, rtol=1e-6) == []
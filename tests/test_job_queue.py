@@ -0,0 +1,136 @@
+"""
+SQLite 任务队列：多进程 worker、租约过期重领、幂等提交与协调报告
+"""
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.job_queue import Coordinator, JobQueue, run_local, run_worker
+
+
+def _square(payload):
+    time.sleep(0.01)
+    return {'x': payload['x'], 'y': payload['x'] ** 2, 'pid': os.getpid()}
+
+
+def test_local_workers_drain_queue(tmp_path):
+    queue = JobQueue(str(tmp_path / 'q.sqlite'), name='sq')
+    assert queue.submit((f'job{i}', {'x': i}) for i in range(40)) == 40
+    assert queue.submit((f'job{i}', {'x': -1}) for i in range(45)) == 5   # 已存在的不重复入队
+
+    report = run_local(queue, _square, workers=3, report_every=0.2)
+    assert report['done'] == 45 and report['pending'] == report['leased'] == report['failed'] == 0
+    assert report['workers'] == 3 and sum(report['per_worker_done'].values()) == 45
+
+    results = queue.results()
+    assert list(results)[:3] == ['job0', 'job1', 'job2']
+    assert results['job7']['y'] == 49 and results['job42']['x'] == -1
+    assert len({r['pid'] for r in results.values()}) > 1
+
+
+def test_expired_lease_is_retaken_and_commit_is_idempotent(tmp_path):
+    queue = JobQueue(str(tmp_path / 'q.sqlite'), name='lease', lease_seconds=0.2)
+    queue.submit([('a', 1)])
+
+    first = queue.lease('w1')
+    assert first.job_id == 'a' and queue.lease('w2') is None
+    time.sleep(0.3)                                   # w1 没有心跳，租约过期
+
+    report = Coordinator(queue).report()
+    assert [s['job_id'] for s in report['stragglers']] == ['a'] and report['stragglers'][0]['lease_expired']
+
+    second = queue.lease('w2')
+    assert second.job_id == 'a' and second.attempts == 2
+    assert queue.complete('a', 'w2', {'by': 'w2'})
+    assert not queue.complete('a', 'w1', {'by': 'w1'})
+    assert queue.results() == {'a': {'by': 'w2'}}
+
+
+def test_failures_retry_then_give_up(tmp_path):
+    path = str(tmp_path / 'q.sqlite')
+    queue = JobQueue(path, name='flaky', max_attempts=2)
+    queue.submit([('ok', 1), ('bad', 2)])
+    seen = []
+
+    def flaky(payload):
+        seen.append(payload)
+        if payload == 2 or seen.count(1) == 1:
+            raise ValueError(payload)
+        return payload * 10
+
+    assert run_worker(path, 'flaky', flaky, worker_id='w', lease_seconds=5, max_attempts=2, poll=0.01) == 1
+    assert queue.results() == {'ok': 10}
+    assert set(queue.failures()) == {'bad'}
+    assert seen.count(1) == 2 and seen.count(2) == 2
+    assert queue.is_finished()
+
+
+def test_coordinator_flags_slow_running_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / 'q.sqlite'), name='slow', lease_seconds=60)
+    queue.submit((str(i), i) for i in range(4))
+    for _ in range(3):
+        job = queue.lease('fast')
+        queue.complete(job.job_id, 'fast', job.payload)
+    slow = queue.lease('slow')
+    time.sleep(0.05)
+
+    coordinator = Coordinator(queue, straggler_factor=3.0)
+    report = coordinator.report()
+    assert report['done'] == 3 and report['leased'] == 1
+    assert [s['job_id'] for s in report['stragglers']] == [slow.job_id]
+    assert report['throughput_per_s'] > 0 and report['eta_s'] is not None
+    assert '慢任务' in coordinator.format(report)
+
+
+def _killed(payload):
+    os.kill(os.getpid(), signal.SIGKILL)          # 模拟 worker 被 OOM 杀掉，租约留在库里
+
+
+def test_watch_returns_when_local_workers_die_holding_leases(tmp_path):
+    queue = JobQueue(str(tmp_path / 'q.sqlite'), name='killed', lease_seconds=300, max_attempts=2)
+    queue.submit([('a', 1), ('b', 2)])
+
+    start = time.time()
+    report = run_local(queue, _killed, workers=1, report_every=0.2)
+    assert time.time() - start < 30
+    assert report['leased'] == 0 and report['pending'] == 2 and report['done'] == 0
+    jobs = [queue.lease('w2'), queue.lease('w2')]                   # 收回的任务可被重新领取
+    assert {job.job_id: job.attempts for job in jobs} == {'a': 2, 'b': 1}
+
+    orphan = JobQueue(str(tmp_path / 'q.sqlite'), name='orphan', lease_seconds=300)
+    orphan.submit([('c', 3)])
+    orphan.lease('crashed-worker')                                 # 从未心跳的持有者
+    dead = multiprocessing.Process(target=time.sleep, args=(0,))
+    dead.start()
+    dead.join()
+    report = Coordinator(orphan).watch(interval=0.2, workers=[dead])
+    assert report['leased'] == 0 and report['pending'] == 1
+
+
+def _flaky(payload):
+    if payload == 'bad':
+        raise ValueError('bad payload')
+    return payload
+
+
+def test_local_worker_logs_reach_coordinator(tmp_path):
+    from core.log import configure_logging
+
+    jsonl = tmp_path / 'run.jsonl'
+    configure_logging(level='WARNING', jsonl_path=str(jsonl))
+    try:
+        queue = JobQueue(str(tmp_path / 'q.sqlite'), name='logs', max_attempts=1)
+        queue.submit([('ok', 'ok'), ('bad', 'bad')])
+        report = run_local(queue, _flaky, workers=1, report_every=0.2)
+    finally:
+        configure_logging(jsonl_path='')
+
+    assert report['done'] == 1 and report['failed'] == 1
+    entries = [json.loads(line) for line in jsonl.read_text(encoding='utf-8').splitlines()]
+    assert any('bad payload' in e['message'] for e in entries if e['logger'] == 'quant.core.job_queue')
@@ -0,0 +1,63 @@
+"""
+批量K线渲染器：figure 复用、输出格式与耗时记录
+"""
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import daily_bars, minute_bars
+from visualization.kline_batch import BatchKLineRenderer, boll_bands, rsi
+
+
+def test_renders_reuse_one_figure_and_record_latency(tmp_path):
+    renderer = BatchKLineRenderer(show_rsi=True)
+    fig = renderer.fig
+
+    minute = minute_bars('BATCH', days=5)
+    buy = pd.Series(0.0, index=minute.index)
+    buy.iloc[[10, 100]] = minute['Low'].iloc[[10, 100]]
+    renderer.render(minute, tmp_path / 'a.png', title='A', buy_signals=buy)
+    assert len(renderer.bodies.get_paths()) == len(minute)
+    assert len(renderer.buy_scatter.get_offsets()) == 2
+
+    daily = daily_bars('BATCH', days=120)
+    sell = daily['Close'] > daily['Close'].shift()
+    renderer.render(daily, tmp_path / 'b.png', title='B', sell_signals=sell)
+    assert renderer.fig is fig
+    assert len(renderer.bodies.get_paths()) == len(daily)
+    assert len(renderer.buy_scatter.get_offsets()) == 0
+    assert len(renderer.sell_scatter.get_offsets()) == int(sell.sum())
+
+    assert (tmp_path / 'a.png').read_bytes()[:8] == b'\x89PNG\r\n\x1a\n'
+    report = renderer.latency_report()
+    assert report['charts'] == 2 and report['max_ms'] >= report['p50_ms'] > 0
+
+
+def test_webp_output(tmp_path):
+    pytest.importorskip('PIL.WebPImagePlugin')
+    renderer = BatchKLineRenderer()
+    renderer.render(daily_bars('WEBP', days=60), tmp_path / 'c.webp')
+    data = (tmp_path / 'c.webp').read_bytes()
+    assert data[:4] == b'RIFF' and data[8:12] == b'WEBP'
+
+
+def test_indicators_match_kline_plotter_formulas():
+    close = daily_bars('IND', days=80)['Close']
+    bands = boll_bands(close, 20, 2)
+    middle = close.rolling(20).mean()
+    np.testing.assert_allclose(bands['BB_Middle'], middle.to_numpy())
+    np.testing.assert_allclose(bands['BB_Upper'], (middle + 2 * close.rolling(20).std()).to_numpy())
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    np.testing.assert_allclose(rsi(close, 14), (100 - 100 / (1 + gain / loss)).to_numpy())
@@ -0,0 +1,71 @@
+"""
+K线 LOD 金字塔与交互查看器的像素预算
+"""
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import minute_bars
+from visualization.kline_lod import OHLCVPyramid
+
+
+def test_levels_match_groupby_aggregation():
+    data = minute_bars('LOD', days=7)  # 336 根，逐级出现奇数尾桶
+    pyramid = OHLCVPyramid(data, min_bars=8)
+
+    for level, lv in enumerate(pyramid.levels):
+        bucket = np.arange(len(data)) // pyramid.factor(level)
+        expected = data.groupby(bucket).agg(
+            {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'})
+        for col in ('Open', 'High', 'Low', 'Close'):
+            np.testing.assert_array_equal(lv[col.lower()], expected[col].to_numpy())
+        np.testing.assert_allclose(lv['volume'], expected['Volume'].to_numpy())
+        np.testing.assert_array_equal(lv['start'], np.flatnonzero(np.diff(bucket, prepend=-1)))
+    assert len(pyramid.levels[-1]['start']) <= 8
+
+
+def test_level_for_respects_budget_and_span_covers_window():
+    pyramid = OHLCVPyramid(minute_bars('LOD', days=100))
+    for visible, budget in [(50, 400), (4800, 400), (4800, 37), (10 ** 6, 10)]:
+        level = pyramid.level_for(visible, budget)
+        if level + 1 < len(pyramid.levels):
+            assert -(-visible // pyramid.factor(level)) <= budget
+        assert level == 0 or -(-visible // pyramid.factor(level - 1)) > budget
+
+    level = 3
+    lo, hi = pyramid.span(level, 1001, 2999)
+    lv = pyramid.levels[level]
+    assert lv['start'][lo] <= 1001 < lv['end'][lo]
+    assert lv['start'][hi - 1] < 2999 <= lv['end'][hi - 1]
+
+    geo = pyramid.geometry(level, lo, hi)
+    assert geo['body'].shape == (hi - lo, 4, 2) and geo['wick'].shape == (hi - lo, 2, 2)
+    np.testing.assert_array_equal(geo['wick'][:, 1, 1], lv['high'][lo:hi])
+
+
+def test_viewer_draws_at_most_budget_candles():
+    from visualization.interactive_kline import InteractiveKLineViewer
+
+    data = minute_bars('VIEW', days=400)
+    signals = pd.DataFrame({'signal': np.where(np.arange(len(data)) % 300 < 60, 1, 0)}, index=data.index)
+    viewer = InteractiveKLineViewer(data, signals=signals)
+    budget = viewer._candle_budget()
+
+    for window, pos in [(len(data), 0), (5000, 7000), (100, 12345)]:
+        viewer.window_size, viewer.current_pos = window, pos
+        viewer._update_plot()
+        drawn = len(viewer.candle_collection.get_paths())
+        assert 0 < drawn <= budget + 1
+        assert viewer.axes[0].get_xlim() == (pos - 0.5, pos + window - 0.5)
+        buy_x = viewer.signal_scatters['buy'].get_offsets()[:, 0]
+        assert ((buy_x >= pos) & (buy_x < pos + window)).all()
+    assert viewer.lod_level == 0
+    matplotlib.pyplot.close(viewer.fig)
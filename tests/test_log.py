@@ -0,0 +1,103 @@
+"""
+项目日志（延迟格式化、按模块级别、JSONL、计数汇总、多进程队列）测试
+"""
+import json
+import logging
+import os
+import queue
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.log import (EventCounter, configure_logging, configure_worker, get_logger, start_queue_listener,
+                      worker_logging)
+
+
+class Expensive:
+    calls = 0
+
+    def __str__(self):
+        Expensive.calls += 1
+        return 'expensive'
+
+
+def test_module_levels_and_lazy_formatting(capsys):
+    configure_logging(level='INFO', module_levels={'noisy': 'WARNING'}, jsonl_path='')
+    Expensive.calls = 0
+
+    get_logger('noisy').info('hidden %s', Expensive())
+    get_logger('quiet.child').debug('hidden %s', Expensive())
+    get_logger('quiet.child').info('shown %s', 1)
+
+    out = capsys.readouterr().out
+    assert out == 'shown 1\n'
+    assert Expensive.calls == 0
+
+
+def test_jsonl_sink_and_counter(tmp_path, capsys):
+    path = tmp_path / 'logs' / 'run.jsonl'
+    configure_logging(level='INFO', jsonl_path=str(path), console=False)
+
+    logger = get_logger('backtests.demo')
+    counter = EventCounter(logger, 'trades')
+    for _ in range(3):
+        counter.incr('open')
+    counter.incr('stop_loss')
+    counter.summary()
+    logger.info('saved %s', 'x.csv', extra={'symbol': 'RB0'})
+
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert lines[0]['message'] == 'trades: open 3, stop_loss 1'
+    assert lines[0]['counts'] == {'open': 3, 'stop_loss': 1}
+    assert lines[1]['logger'] == 'quant.backtests.demo'
+    assert lines[1]['symbol'] == 'RB0'
+    assert capsys.readouterr().out == ''
+    configure_logging(jsonl_path='')
+
+
+def test_buffered_console_flushes_on_error(capsys):
+    configure_logging(level='INFO', buffer_size=100, jsonl_path='')
+    logger = get_logger('buffered')
+    logger.info('first')
+    assert capsys.readouterr().out == ''
+    logger.error('boom')
+    assert capsys.readouterr().out == 'first\nboom\n'
+
+
+def test_worker_logs_go_through_queue(capsys):
+    configure_logging(level='INFO', jsonl_path='')
+    log_queue, listener = start_queue_listener(queue.Queue())
+    try:
+        configure_worker(log_queue)
+        get_logger('worker').info('from worker %d', 7)
+        assert log_queue.qsize() in (0, 1)
+    finally:
+        listener.stop()
+    # listener 持有主进程的处理器，停止前已写出
+    assert 'from worker 7' in capsys.readouterr().out
+    configure_logging(jsonl_path='')
+
+
+def _pool_task(n):
+    logger = get_logger('pool')
+    logger.debug('debug %d', n)
+    logger.warning('task %d in %d', n, os.getpid())
+    return os.getpid()
+
+
+def test_pool_workers_log_through_parent(capsys, tmp_path):
+    jsonl = tmp_path / 'run.jsonl'
+    configure_logging(level='WARNING', jsonl_path=str(jsonl))
+    with worker_logging() as log_args, ProcessPoolExecutor(
+        max_workers=2, initializer=configure_worker, initargs=log_args
+    ) as pool:
+        pids = list(pool.map(_pool_task, range(4)))
+
+    out = capsys.readouterr().out
+    assert sorted(line.split()[1] for line in out.splitlines()) == ['0', '1', '2', '3']
+    assert 'debug' not in out                                   # 子进程沿用主进程级别
+    assert os.getpid() not in pids
+    logged = [json.loads(line) for line in jsonl.read_text(encoding='utf-8').splitlines()]
+    assert {entry['logger'] for entry in logged} == {'quant.pool'}
+    configure_logging(jsonl_path='')
@@ -0,0 +1,93 @@
+"""
+多周期特征对齐测试（无未来数据）
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import daily_bars, minute_bars
+from core.mtf import align, available_times, broadcast, infer_freq
+from data.bar_store import aggregate_bars
+
+
+def test_daily_feature_on_minute_bars_uses_completed_days():
+    minute = minute_bars('MTF', days=6)
+    daily = aggregate_bars(minute, '1d')
+    feature = pd.Series(np.arange(len(daily), dtype=float), index=daily.index)
+
+    aligned = align(feature, minute.index, freq='1d')
+
+    days = minute.index.normalize()
+    last_bar = minute.index.hour == 15
+    first_day = days == daily.index[0]
+    # 当日最后一根K线收盘时才看到当日，其余K线看到前一交易日，首日盘中看不到任何日线
+    assert aligned[first_day & ~last_bar].isna().all()
+    expected = pd.Series(days.map(lambda d: daily.index.get_loc(d)), index=minute.index).astype(float)
+    expected[~last_bar] -= 1
+    expected[expected < 0] = np.nan
+    pd.testing.assert_series_equal(aligned, expected, check_names=False)
+
+
+def test_weekly_feature_matches_ffill_on_daily_bars():
+    data = daily_bars('WEEK', days=300)
+    weekly = data['Close'].resample('W-FRI').last().rolling(4).mean()
+
+    aligned = align(weekly, data.index, freq='1w')
+
+    pd.testing.assert_series_equal(aligned, weekly.reindex(data.index, method='ffill'), check_exact=True)
+
+
+def test_weekly_feature_hidden_until_week_closes_intraday():
+    minute = minute_bars('WEEKM', days=15)
+    aligned = broadcast(minute, '1w', lambda w: w['Close'])
+    weekly_close = aggregate_bars(minute, '1w')['Close']
+
+    friday_close = minute.index[(minute.index.weekday == 4) & (minute.index.hour == 15)][0]
+    friday_open = minute.index[(minute.index.weekday == 4) & (minute.index.hour == 9)][0]
+    week = weekly_close.index[weekly_close.index.normalize() == friday_close.normalize()][0]
+    assert aligned[friday_close] == weekly_close[week]
+    assert aligned[friday_open] != weekly_close[week]
+
+
+def test_open_known_flags_visible_from_session_open():
+    minute = minute_bars('GAP', days=4)
+    days = aggregate_bars(minute, '1d').index
+    flags = pd.Series([False, True, False, True], index=days)
+
+    aligned = align(flags, minute.index, freq='1d', known='open', fill_value=False)
+
+    assert aligned.dtype == bool
+    expected = minute.index.normalize().map(flags).to_numpy(dtype=bool)
+    np.testing.assert_array_equal(aligned.to_numpy(), expected)
+
+
+def test_dataframe_feature_and_fill_value():
+    data = daily_bars('FRAME', days=30)
+    weekly = aggregate_bars(data, '1w')[['Close', 'Volume']]
+
+    aligned = align(weekly, data.index, freq='1w', fill_value=0.0)
+
+    assert list(aligned.columns) == ['Close', 'Volume']
+    assert aligned.index.equals(data.index)
+    first_friday = data.index[data.index.weekday == 4][0]
+    assert (aligned[aligned.index < first_friday] == 0.0).all().all()
+    pd.testing.assert_series_equal(aligned.loc[first_friday], weekly.iloc[0], check_names=False)
+
+
+def test_infer_freq_and_unsorted_index():
+    assert infer_freq(minute_bars('F', days=1).index) == 'intraday'
+    assert infer_freq(daily_bars('F', days=20).index) == '1d'
+    assert infer_freq(daily_bars('F', days=60).resample('W-FRI').last().index) == '1w'
+
+    times = available_times(pd.DatetimeIndex(['2024-01-05', '2024-01-07']), freq='1w')
+    assert times[0] == times[1] == np.datetime64('2024-01-05T15:00')
+
+    feature = pd.Series([1.0, 2.0], index=pd.DatetimeIndex(['2024-01-09', '2024-01-08']))
+    with pytest.raises(ValueError):
+        align(feature, daily_bars('F', days=5).index, freq='1d')
@@ -0,0 +1,108 @@
+"""
+截面面板：与逐只 pandas 计算的结果一致（含上市时间不同、停牌缺口与 NaN）
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import daily_bars, synthetic_symbols
+from indicators import ma60_pullback_strategy, millipede_strategy
+from indicators.ma_convergence_strategy import calculate_indicators
+from indicators.panel import (Panel, ewm_mean, ma60_pullback_features, ma_convergence_features, millipede_features,
+                              rolling_quantile, rolling_std)
+
+
+def _universe(n=12, days=300):
+    rng = np.random.default_rng(7)
+    frames = {}
+    for i, symbol in enumerate(synthetic_symbols(n)):
+        df = daily_bars(symbol, days=days)
+        df = df.iloc[int(rng.integers(0, 80)):]                     # 上市时间不同
+        if i % 3 == 0:
+            df = df.drop(df.index[rng.choice(len(df), 15, replace=False)])  # 停牌缺口
+        if i % 4 == 1:
+            df.iloc[rng.choice(len(df), 5, replace=False), df.columns.get_loc('Volume')] = np.nan
+        frames[symbol] = df
+    return frames
+
+
+def _assert_close(actual, expected, rtol=2e-5, atol=1e-5):
+    actual, expected = np.asarray(actual, dtype=np.float64), np.asarray(expected, dtype=np.float64)
+    assert np.array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True)
+
+
+def test_features_match_per_symbol_calculate_indicators():
+    frames = _universe()
+    panel = Panel.from_frames(frames)
+    panel.update(ma_convergence_features(panel))
+
+    for symbol, df in frames.items():
+        expected = calculate_indicators(df)
+        actual = panel.symbol_frame(symbol)
+        assert actual.index.equals(df.index)
+        for column in expected.columns:
+            _assert_close(actual[column], expected[column])
+
+
+@pytest.mark.parametrize('strategy, build, kwargs', [
+    (ma60_pullback_strategy, ma60_pullback_features, {'ma60_uptrend_lookback': 3}),
+    (millipede_strategy, millipede_features, {'trend_ma_period': 30, 'volume_ratio': 1.2}),
+])
+def test_strategy_features_match_per_symbol_calculate_indicators(strategy, build, kwargs):
+    frames = _universe(days=400)
+    panel = Panel.from_frames(frames, dtype=np.float64)           # 布尔列是阈值判断，用 float64 避免临界翻转
+    panel.update(build(panel, **kwargs))
+
+    for symbol, df in frames.items():
+        expected = strategy.calculate_indicators(df, **kwargs)
+        actual = panel.symbol_frame(symbol)
+        assert set(expected.columns) <= set(actual.columns)
+        for column in expected.columns:
+            _assert_close(actual[column], expected[column].astype(np.float64), rtol=1e-9, atol=1e-9)
+
+
+def test_column_functions_match_pandas():
+    rng = np.random.default_rng(3)
+    values = rng.normal(100, 5, (200, 6))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    values[:30, 2] = np.nan
+    df = pd.DataFrame(values)
+
+    _assert_close(rolling_std(values, 20), df.rolling(20).std())
+    _assert_close(rolling_std(values, 20, min_periods=5), df.rolling(20, min_periods=5).std())
+    _assert_close(rolling_quantile(values, 30, 0.35), df.rolling(30).quantile(0.35), rtol=1e-12)
+    _assert_close(rolling_quantile(values, 30, 0.8, min_periods=3, block_elements=100),
+                  df.rolling(30, min_periods=3).quantile(0.8), rtol=1e-12)
+    _assert_close(ewm_mean(values, 12), df.ewm(span=12, adjust=False).mean(), rtol=1e-12)
+
+
+def test_own_bar_windows_and_weekly_resample():
+    frames = _universe(6, 200)
+    panel = Panel.from_frames(frames, fields=('Close', 'Volume'))
+    symbol = synthetic_symbols(6)[0]                                # 有停牌缺口
+    df = frames[symbol]
+    j = panel.column(symbol)
+
+    quantile = panel.rolling_quantile('Close', 15, 0.35)[panel.present[:, j], j]
+    _assert_close(quantile, df['Close'].rolling(15).quantile(0.35))
+    ema = panel.ewm_mean('Close', 20)[panel.present[:, j], j]
+    _assert_close(ema, df['Close'].ewm(span=20, adjust=False).mean())
+
+    weekly = panel.resample_last('W-FRI')
+    expected = df[['Close', 'Volume']].resample('W-FRI').last().dropna(how='all')
+    actual = weekly.symbol_frame(symbol, ['Close', 'Volume'])
+    assert actual.index.equals(expected.index)
+    _assert_close(actual, expected)
+
+    row = panel.row_of(df.index[-1] + pd.Timedelta(days=2))
+    section = panel.cross_section(df.index[-1] + pd.Timedelta(days=2), ['Close'])
+    assert panel.dates[row] == panel.dates[-1]
+    assert section.loc[symbol, 'Close'] == pytest.approx(df['Close'].iloc[-1], rel=1e-6)
+    assert panel.row_of(panel.dates[0] - pd.Timedelta(days=1)) == -1
@@ -0,0 +1,81 @@
+"""
+再平衡组合回测：持仓跨期延续、落选卖出（停牌顺延）、信号只算一次且可并行
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import daily_bars, synthetic_symbols
+from core.backtest_engine import BaseStrategy
+from core.portfolio_backtest import RebalancingPortfolioEngine, compute_signals
+from indicators.boll.boll_volume_strategy import BollVolumeStrategy
+
+
+class FixedSignals(BaseStrategy):
+    """signal 直接取数据里的 sig 列"""
+
+    def generate_signals(self, data):
+        df = data.copy()
+        df['signal'] = df['sig']
+        return df
+
+
+def _bars(dates, closes, buy=(), sell=(), drop=()):
+    df = pd.DataFrame({'Close': np.asarray(closes, dtype=float), 'sig': 0}, index=dates)
+    df.iloc[list(buy), 1] = 1
+    df.iloc[list(sell), 1] = -1
+    return df.drop(df.index[list(drop)])
+
+
+def test_positions_carry_across_rebalances_and_deselected_exit_waits_for_resumption():
+    dates = pd.bdate_range('2024-01-01', periods=10)
+    data = {
+        'A': _bars(dates, np.arange(10, 20), buy=[0, 1], sell=[8]),
+        'B': _bars(dates, [20] * 5 + [20, 22, 22, 22, 22], buy=[2], drop=[5]),   # B 第 5 天停牌
+    }
+    schedule = [(dates[1], ['A', 'B']), (dates[5], ['A'])]
+    engine = RebalancingPortfolioEngine(initial_capital=1000, commission=0, slippage=0)
+    result = engine.run(data, FixedSignals(), schedule)
+
+    trades = result['trades'].set_index('symbol')
+    curve = result['equity_curve']
+    assert curve.index[0] == dates[1]                     # 第 0 天的买入信号在区间外，不成交
+    assert trades.loc['A', 'entry_date'] == dates[1] and trades.loc['A', 'exit_date'] == dates[8]
+    assert trades.loc['A', 'exit_reason'] == 'signal'     # 仍被选中，再平衡时不动
+    assert trades.loc['B', 'exit_date'] == dates[6] and trades.loc['B', 'exit_reason'] == 'deselected'
+    assert trades.loc['B', 'exit_price'] == 22
+
+    a_shares, b_shares = 500 / 11, 500 / 20
+    assert trades.loc['A', 'shares'] == pytest.approx(a_shares)
+    assert curve.loc[dates[5], 'equity'] == pytest.approx(a_shares * 15 + b_shares * 20)   # 停牌按前收盘
+    assert result['final_capital'] == pytest.approx(a_shares * 18 + b_shares * 22)
+    assert [p['symbols'] for p in result['periods']] == [['A', 'B'], ['A']]
+    assert result['periods'][0]['end_equity'] == pytest.approx(curve['equity'].iloc[3])
+
+
+def test_parallel_signals_match_serial_and_cash_reconciles():
+    data = {symbol: daily_bars(symbol, days=400) for symbol in synthetic_symbols(4)}
+    strategy = BollVolumeStrategy()
+    serial = compute_signals(data, strategy, workers=1)
+    parallel = compute_signals(data, strategy, workers=2)
+    for symbol in data:
+        pd.testing.assert_series_equal(serial[symbol], parallel[symbol])
+        expected = strategy.generate_signals(data[symbol])['signal']
+        assert (serial[symbol].to_numpy() == expected.to_numpy()).all()
+
+    dates = data[synthetic_symbols(4)[0]].index
+    symbols = list(data)
+    schedule = [(dates[i], symbols[k % 4:k % 4 + 2]) for k, i in enumerate(range(100, 400, 20))]
+    engine = RebalancingPortfolioEngine(initial_capital=100000)
+    result = engine.run(data, strategy, schedule, signals_by_symbol=serial)
+
+    assert len(result['trades']) > 0
+    assert result['final_capital'] == pytest.approx(100000 + result['trades']['pnl'].sum())
+    assert (result['equity_curve']['cash'] >= -1e-6).all()
+    assert (result['equity_curve']['positions'] <= 4).all()
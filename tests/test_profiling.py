@@ -0,0 +1,105 @@
+"""
+分阶段耗时统计测试
+"""
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import profiling
+from core.profiling import count, stage, timed
+
+
+@pytest.fixture(autouse=True)
+def clean_profiler():
+    profiling.reset()
+    yield
+    profiling.enable(False)
+    profiling.reset()
+
+
+@timed('work.inner')
+def inner():
+    return sum(range(1000))
+
+
+def work(n):
+    with stage('work'):
+        for _ in range(n):
+            inner()
+        count('work.items', n)
+    return n
+
+
+def test_disabled_records_nothing():
+    profiling.enable(False)
+    assert work(3) == 3
+    assert profiling.snapshot() == {'stages': {}, 'counters': {}}
+
+
+def test_nested_stages_and_counters():
+    profiling.enable(True)
+    work(4)
+    work(1)
+
+    data = profiling.snapshot()
+    assert data['stages']['work'][0] == 2
+    assert data['stages']['work;work.inner'][0] == 5
+    assert data['counters'] == {'work.items': 5}
+
+    calls, total, child = data['stages']['work']
+    assert child == pytest.approx(data['stages']['work;work.inner'][1])
+    assert total >= child
+
+    tree = profiling.profile_tree(data)
+    assert tree['children']['work']['children']['work.inner']['calls'] == 5
+    report = profiling.format_report(data, min_share=0)
+    assert report.splitlines()[1].startswith('work ')
+    assert report.splitlines()[2].startswith('  work.inner')
+
+
+def test_pool_workers_are_merged(tmp_path):
+    profiling.enable(True)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(profiling.run_profiled, work, n) for n in (2, 3)]
+        for future in futures:
+            result, data = future.result()
+            profiling.merge(data)
+
+    data = profiling.snapshot()
+    assert data['stages']['work;work.inner'][0] == 5
+    assert data['counters']['work.items'] == 5
+
+    paths = profiling.write_report(str(tmp_path), name='run')
+    saved = json.loads(open(paths['json'], encoding='utf-8').read())
+    assert saved['counters']['work.items'] == 5
+    assert 'work.inner' in open(paths['text'], encoding='utf-8').read()
+
+
+@pytest.mark.parametrize('enabled', [False, True])
+def test_pool_submit_merges_only_when_enabled(enabled):
+    profiling.enable(enabled)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = [profiling.pool_submit(executor, work, n) for n in (2, 3)]
+        assert [profiling.pool_result(f) for f in futures] == [2, 3]
+
+    data = profiling.snapshot()
+    if enabled:
+        assert data['stages']['work;work.inner'][0] == 5
+        assert data['counters'] == {'work.items': 5}
+    else:
+        assert data == {'stages': {}, 'counters': {}}
+
+
+def test_universe_runner_pool_timings_reach_parent(tmp_path):
+    from core.universe_runner import UniverseRunner
+
+    profiling.enable(True)
+    runner = UniverseRunner('p', work, checkpoint_dir=str(tmp_path), workers=2,
+                            symbol_of=str, data_key=str)
+    assert sorted(runner.run([1, 2, 3])) == [1, 2, 3]
+    assert profiling.snapshot()['counters']['work.items'] == 6
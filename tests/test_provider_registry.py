@@ -0,0 +1,148 @@
+"""
+数据源注册表 / 熔断器测试（使用本地桩数据源，不访问网络）
+"""
+import os
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_fetcher import DataFetcher
+from data.providers import ProviderRegistry, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_bars(close=10.0):
+    index = pd.date_range('2024-01-01', periods=5, freq='D', name='datetime')
+    return pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000
+    }, index=index)
+
+
+class StubProvider:
+    def __init__(self, fail=False, latency=0.0, clock=None):
+        self.fail = fail
+        self.latency = latency
+        self.clock = clock
+        self.calls = 0
+
+    def __call__(self, symbol, start_date, end_date, period, interval):
+        self.calls += 1
+        if self.clock is not None:
+            self.clock.now += self.latency
+        if self.fail:
+            raise ConnectionError('stub down')
+        return make_bars()
+
+
+def test_breaker_opens_and_half_open_probe():
+    clock = FakeClock()
+    registry = ProviderRegistry(failure_threshold=2, reset_timeout=30, clock=clock)
+    down = StubProvider(fail=True)
+    registry.register('down', down)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            registry.call('down', 'AAPL', None, None, '1y', '1d')
+    assert registry.stats()['down']['state'] == STATE_OPEN
+    assert registry.ordered() == []
+    with pytest.raises(RuntimeError):
+        registry.call('down', 'AAPL', None, None, '1y', '1d')
+    assert down.calls == 2
+
+    clock.now += 30
+    assert registry.stats()['down']['state'] == STATE_HALF_OPEN
+    assert registry.acquire('down')
+    assert not registry.acquire('down')
+
+    down.fail = False
+    registry.record_success('down', 0.1)
+    assert registry.stats()['down']['state'] == STATE_CLOSED
+
+
+def test_half_open_failure_reopens():
+    clock = FakeClock()
+    registry = ProviderRegistry(failure_threshold=1, reset_timeout=10, clock=clock)
+    registry.register('flaky', StubProvider(fail=True))
+    with pytest.raises(ConnectionError):
+        registry.call('flaky', 'AAPL', None, None, '1y', '1d')
+    clock.now += 10
+    with pytest.raises(ConnectionError):
+        registry.call('flaky', 'AAPL', None, None, '1y', '1d')
+    assert registry.stats()['flaky']['state'] == STATE_OPEN
+
+
+def test_ordering_by_success_rate_and_latency():
+    clock = FakeClock()
+    registry = ProviderRegistry(failure_threshold=10, clock=clock)
+    registry.register('slow', StubProvider(latency=2.0, clock=clock))
+    registry.register('fast', StubProvider(latency=0.1, clock=clock))
+    registry.register('unused', StubProvider())
+    assert [p.name for p in registry.ordered()] == ['slow', 'fast', 'unused']
+
+    registry.call('slow', 'AAPL', None, None, '1y', '1d')
+    registry.call('fast', 'AAPL', None, None, '1y', '1d')
+    assert [p.name for p in registry.ordered()] == ['fast', 'slow', 'unused']
+
+    registry.record_failure('fast')
+    assert [p.name for p in registry.ordered()] == ['slow', 'unused', 'fast']
+
+
+def test_fetcher_skips_open_provider_without_sleeping(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr('data.data_fetcher.time.sleep', lambda seconds: sleeps.append(seconds))
+
+    registry = ProviderRegistry(failure_threshold=3)
+    primary = StubProvider(fail=True)
+    backup = StubProvider()
+    registry.register('primary', primary, max_attempts=3)
+    registry.register('backup', backup)
+    fetcher = DataFetcher(cache_dir=str(tmp_path), provider_registry=registry)
+
+    for symbol in ['AAA', 'BBB', 'CCC']:
+        data = fetcher.fetch_stock_data(symbol, use_cache=False, adjust='none')
+        assert len(data) == 5
+
+    # 第一只股票耗尽重试后熔断，后续股票直接跳过 primary
+    assert primary.calls == 3
+    assert backup.calls == 3
+    assert sleeps == [2.0, 4.0]
+
+
+def test_fetcher_raises_when_all_providers_fail(tmp_path):
+    registry = ProviderRegistry()
+    registry.register('a', StubProvider(fail=True))
+    registry.register('b', StubProvider(fail=True))
+    fetcher = DataFetcher(cache_dir=str(tmp_path), provider_registry=registry)
+    with pytest.raises(ValueError):
+        fetcher.fetch_stock_data('AAPL', use_cache=False)
+
+
+def test_registry_shared_across_threads():
+    registry = ProviderRegistry(failure_threshold=1000)
+    stub = StubProvider()
+    registry.register('stub', stub)
+
+    def worker():
+        for _ in range(50):
+            registry.call('stub', 'AAPL', None, None, '1y', '1d')
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert stub.calls == 400
+    assert registry.stats()['stub']['samples'] == registry.window
+    assert registry.stats()['stub']['success_rate'] == 1.0
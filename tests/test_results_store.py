@@ -0,0 +1,79 @@
+"""
+结果库：后台写入、汇总查询、权益降采样与信号开关
+"""
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import minute_bars
+from core.results_store import ResultsStore, list_runs, load_frame, load_summaries
+
+
+def _result(symbol: str):
+    data = minute_bars(symbol, days=10)
+    equity = pd.DataFrame({'equity': data['Close'] * 1000, 'cash': 0.0}, index=data.index)
+    equity.index.name = 'date'
+    trades = pd.DataFrame({
+        'entry_time': data.index[[5, 50]].astype(str),
+        'pnl': [np.float64(12.5), -3.0],
+    })
+    return data, equity, trades
+
+
+def test_run_roundtrip_with_downsampled_equity(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    with ResultsStore(path, strategy='vb', params={'ratio': np.float64(2.0)}, equity_rule='1D') as store:
+        for i, symbol in enumerate(['AAA', 'BBB']):
+            data, equity, trades = _result(symbol)
+            store.add(symbol, {'symbol': symbol, 'total_return_pct': float(i), 'total_trades': np.int64(2)},
+                      trades=trades, equity=equity, signals=data)
+
+    runs = list_runs(path)
+    assert runs['run_id'].tolist() == [store.run_id]
+    assert runs['symbols'].iloc[0] == 2 and runs['finished_at'].notna().all()
+
+    summary = load_summaries(path, run_id=store.run_id)
+    assert summary['symbol'].tolist() == ['AAA', 'BBB']
+    assert summary['total_return_pct'].tolist() == [0.0, 1.0]
+
+    data, equity, trades = _result('AAA')
+    stored = load_frame(path, store.run_id, 'AAA', 'equity')
+    expected = equity.resample('1D').last().dropna(how='all')
+    assert len(stored) == 10
+    np.testing.assert_allclose(stored['equity'].to_numpy(), expected['equity'].to_numpy())
+    assert isinstance(stored.index, pd.DatetimeIndex) and stored.index.name == 'date'
+    pd.testing.assert_frame_equal(load_frame(path, store.run_id, 'AAA', 'trades'), trades)
+    assert load_frame(path, store.run_id, 'AAA', 'signals') is None
+
+
+def test_signals_stored_on_request_and_runs_are_separate(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    data, equity, trades = _result('AAA')
+    for keep in (False, True):
+        with ResultsStore(path, strategy='vb', keep_signals=keep) as store:
+            store.add('AAA', {'total_trades': 2}, trades=trades, equity=equity, signals=data)
+
+    assert len(list_runs(path, strategy='vb')) == 2
+    signals = load_frame(path, store.run_id, 'AAA', 'signals')
+    np.testing.assert_allclose(signals['Close'].to_numpy(), data['Close'].to_numpy())
+    assert len(load_frame(path, store.run_id, 'AAA', 'equity')) == len(data)
+
+    with sqlite3.connect(path) as conn:
+        count = conn.execute("SELECT COUNT(*) FROM summaries WHERE json_extract(metrics, '$.total_trades') = 2")
+        assert count.fetchone()[0] == 2
+
+
+def test_writer_error_surfaces_in_caller(tmp_path):
+    store = ResultsStore(str(tmp_path / 'results.sqlite'), strategy='vb')
+    store.add('BAD', {'x': 1}, trades=pd.DataFrame({'a': [1]}), equity='not a frame')
+    with pytest.raises(RuntimeError):
+        store.flush()
+    with pytest.raises(RuntimeError):
+        store.close()
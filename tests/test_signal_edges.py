@@ -0,0 +1,56 @@
+"""
+缠论买卖点上升沿检测测试
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backtests'))
+sys.path.insert(0, os.path.join(ROOT, 'indicators', 'chan'))
+
+from indicators.chan.signal_edges import chan_edge_prices, chan_signal_edges, rising_edges
+
+
+def loop_edges(points, types):
+    """原逐行实现，作为对照"""
+    edges = np.zeros(len(points), dtype=bool)
+    for i in range(1, len(points)):
+        if points[i] in types and points[i - 1] == 0:
+            edges[i] = True
+    return edges
+
+
+def test_rising_edges_match_row_loop():
+    rng = np.random.default_rng(3)
+    points = rng.choice([0, 0, 0, 1, 2, 3], size=500)
+
+    np.testing.assert_array_equal(rising_edges(points, (1, 2)), loop_edges(points, (1, 2)))
+    np.testing.assert_array_equal(rising_edges(points, None), loop_edges(points, (1, 2, 3)))
+    assert not rising_edges(np.array([2, 2, 0]), (2,))[0]
+
+
+def test_edge_prices_for_plotting():
+    index = pd.date_range('2024-01-05 09:05', periods=5, freq='5min')
+    data = pd.DataFrame({'Close': [10.0, 11.0, 12.0, 13.0, 14.0]}, index=index)
+    result = pd.DataFrame({'buy_point': [0, 1, 1, 0, 3], 'sell_point': [0, 0, 0, 2, 0]}, index=index)
+
+    buy, sell = chan_edge_prices(result, data)
+    assert buy.tolist() == [0.0, 11.0, 0.0, 0.0, 0.0]
+    assert sell.tolist() == [0.0, 0.0, 0.0, 13.0, 0.0]
+
+    buy_any, _ = chan_signal_edges(result, None)
+    assert buy_any.tolist() == [False, True, False, False, True]
+
+
+def test_futures_get_signal_uses_last_edge():
+    from backtest_futures_minute import ChanFuturesStrategy
+
+    strategy = ChanFuturesStrategy.__new__(ChanFuturesStrategy)
+    rising = pd.DataFrame({'buy_point': [0, 3], 'sell_point': [0, 0]})
+    assert strategy.get_signal(rising) == {'signal': 1, 'type': 3, 'desc': '买点'}
+    held = pd.DataFrame({'buy_point': [3, 3], 'sell_point': [0, 0]})
+    assert strategy.get_signal(held)['signal'] == 0
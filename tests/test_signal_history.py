@@ -0,0 +1,86 @@
+"""
+信号历史库：一轮扫描单事务写入、持仓整体替换、SQL 聚合与旧 summary JSON 导入
+"""
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.signal_history import SignalHistory
+
+
+def _chan(symbol, side, date, price, kind='1买'):
+    return {'symbol': symbol, 'name': symbol, 'side': side, 'signal_date': date, 'signal_type': kind,
+            'signal_price': price, 'current_price': price}
+
+
+def test_record_scan_aggregates_and_latest_run(tmp_path):
+    history = SignalHistory(str(tmp_path / 'h.sqlite'))
+    history.record_scan('chan', [_chan('A', 'BUY', '2026-01-02', 10), _chan('B', 'SELL', '2026-01-02', 20, '1卖')],
+                        scan_time='2026-01-05T10:00:00', stats={'total_stocks': 3})
+    history.record_scan('chan', [_chan('A', 'BUY', '2026-01-02', 12), _chan('B', 'BUY', '2026-01-06', 18)],
+                        scan_time='2026-01-06T10:00:00')
+    history.record_scan('other', [_chan('A', 'BUY', '2026-01-06', 99)], scan_time='2026-01-06T11:00:00')
+
+    freq = history.signal_frequency('chan', side='buy')
+    assert list(freq['symbol']) == ['A', 'B'] and list(freq['count']) == [2, 1]
+    assert freq.loc[0, 'avg_price'] == pytest.approx(11)
+    assert freq.loc[0, 'first_scan'] == '2026-01-05T10:00:00'
+    assert history.signal_frequency(side='BUY').loc[0, 'count'] == 3
+
+    daily = history.daily_counts('chan')
+    assert list(daily['date']) == ['2026-01-05', '2026-01-06']
+    assert list(daily['BUY']) == [1, 2] and list(daily['SELL']) == [1, 0]
+    assert history.overview('chan') == {'buy_signals': 3, 'buy_symbols': 2, 'sell_signals': 1,
+                                        'sell_symbols': 1, 'both_symbols': 1}
+    assert history.scan_count('chan', since='2026-01-06') == 1
+    assert list(history.signals('chan', symbol='A')['price']) == [10, 12]
+
+    latest = history.latest_run('chan')
+    assert latest['scan_time'] == '2026-01-06T10:00:00'
+    assert [s['symbol'] for s in latest['signals']] == ['A', 'B']
+    assert history.latest_run('missing') is None
+
+
+def test_positions_replaced_per_cycle_and_failed_cycle_rolls_back(tmp_path):
+    history = SignalHistory(str(tmp_path / 'h.sqlite'))
+    assert not history.has_positions('vb')
+    history.record_scan('vb', [], positions=None)
+    assert not history.has_positions('vb')
+
+    position = {'shares': 100, 'entry_price': 10.0, 'entry_time': '2026-01-05T10:00:00+08:00',
+                'peak_price': 11.0, 'peak_profit_pct': 0.1}
+    history.record_scan('vb', [{'symbol': 'A', 'side': 'BUY', 'signal_time': '2026-01-05 09:45:00',
+                                'signal_price': 10.0, 'reason': 'bullish_volume_breakout'}],
+                        positions={'A': position, 'B': dict(position, entry_price=5.0)})
+    assert set(history.load_positions('vb')) == {'A', 'B'}
+    history.record_scan('vb', [{'symbol': 'B', 'side': 'SELL', 'realtime_price': 4.7, 'reason': 'stop_loss'}],
+                        positions={'A': position})
+    assert history.load_positions('vb') == {'A': position} and history.has_positions('vb')
+
+    with pytest.raises(KeyError):                   # 缺 symbol 的记录让整轮回滚
+        history.record_scan('vb', [{'side': 'BUY'}], positions={})
+    assert history.load_positions('vb') == {'A': position}
+    assert history.scan_count('vb') == 3
+
+    rows = history.signals('vb')
+    assert list(rows['signal_date']) == ['2026-01-05', rows['scan_time'].iloc[1][:10]]
+    assert list(rows['signal_type']) == ['bullish_volume_breakout', 'stop_loss']
+    assert list(rows['price']) == [10.0, 4.7]
+
+
+def test_legacy_summary_json_import(tmp_path):
+    from analysis.analyze_scan_history import import_scan_results, load_scan_results
+
+    for stamp, price in (('20260105_100000', 10), ('20260106_100000', 11), ('latest', 11)):
+        with open(tmp_path / f'summary_{stamp}.json', 'w', encoding='utf-8') as f:
+            json.dump({'buy_signals': [_chan('A', 'BUY', '2026-01-02', price)], 'sell_signals': []}, f)
+
+    history = SignalHistory(str(tmp_path / 'h.sqlite'))
+    assert import_scan_results(history, load_scan_results(str(tmp_path))) == 2
+    assert list(history.daily_counts('chan_realtime')['date']) == ['2026-01-05', '2026-01-06']
+    assert history.signal_frequency('chan_realtime').loc[0, 'recent'] == '0106@11.0, 0105@10.0'
@@ -0,0 +1,54 @@
+"""
+存储共用工具：事务提交 / 回滚与 JSON default
+"""
+import json
+import os
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.storage import connect, json_default, transaction
+
+
+def test_transaction_commits_or_rolls_back(tmp_path):
+    path = str(tmp_path / 'db.sqlite')
+    transaction(path, lambda conn: conn.execute('CREATE TABLE t (x INTEGER)'))
+    assert transaction(path, lambda conn: conn.execute('INSERT INTO t VALUES (1)').rowcount) == 1
+
+    def broken(conn):
+        conn.execute('INSERT INTO t VALUES (2)')
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        transaction(path, broken)
+    conn = connect(path)
+    try:
+        assert conn.execute('SELECT x FROM t').fetchall() == [(1,)]
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    finally:
+        conn.close()
+
+
+@dataclass
+class Spec:
+    dpi: int = 160
+
+
+def test_json_default_types_and_strict_mode():
+    value = {'n': np.int64(3), 'f': np.float32(0.5), 'a': np.arange(3), 'ts': pd.Timestamp('2024-01-02'),
+             'dt': datetime(2024, 1, 2, 9, 30), 'p': Path('a/b.png'), 'spec': Spec()}
+    assert json.loads(json.dumps(value, default=json_default)) == {
+        'n': 3, 'f': 0.5, 'a': [0, 1, 2], 'ts': '2024-01-02T00:00:00', 'dt': '2024-01-02T09:30:00',
+        'p': 'a/b.png', 'spec': {'dpi': 160}}
+
+    assert json.dumps(object, default=json_default) == json.dumps(str(object))
+    with pytest.raises(TypeError):
+        json.dumps(object(), default=lambda v: json_default(v, strict=True))
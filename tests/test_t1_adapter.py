@@ -0,0 +1,39 @@
+"""
+15分钟 T+1 适配器：位置区间窗口与逐日布尔筛选一致
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backtests.backtest_t1_adapter_hot import ChanTheory15minT1Adapter
+from benchmarks.synthetic import minute_bars
+from data.bar_store import aggregate_bars
+
+
+def _bars(days=30):
+    data = minute_bars('T1ADP', days=days)
+    return aggregate_bars(data, '15m'), aggregate_bars(data, '1d')
+
+
+def test_window_positions_match_boolean_masks():
+    m15, daily = _bars()
+    adapter = ChanTheory15minT1Adapter()
+    starts, ends = adapter.window_positions(m15.index, daily.index)
+
+    for day, start, end in zip(daily.index, starts, ends):
+        mask = (m15.index >= day - adapter.WINDOW_BACK) & (m15.index <= day + adapter.WINDOW_FORWARD)
+        assert np.array_equal(np.flatnonzero(mask), np.arange(start, end))
+
+
+def test_window_signal_matches_standalone_analysis():
+    m15, daily = _bars()
+    adapter = ChanTheory15minT1Adapter()
+    adapter._prepare_15min(m15)
+    starts, ends = adapter.window_positions(m15.index, daily.index)
+
+    for start, end in zip(starts, ends):
+        assert adapter._window_signal(start, end) == adapter.analyze_15min_signal(m15.iloc[start:end])
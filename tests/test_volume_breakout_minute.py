@@ -0,0 +1,32 @@
+"""
+分钟量能突破回测：时间止损按数据中实际出现的交易日计数（停牌、节假日不计入持仓天数）
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backtests.backtest_volume_breakout_minute import run_backtest
+
+
+def test_time_stop_skips_days_without_bars():
+    days = pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05',
+                           '2024-01-15', '2024-01-16', '2024-01-17', '2024-01-18'])   # 1月8日-12日停牌
+    index = pd.DatetimeIndex([d + pd.Timedelta(hours=9, minutes=35 + 5 * k) for d in days for k in range(10)])
+    close = np.full(len(index), 10.0)
+    open_ = close.copy()
+    volume = np.full(len(index), 1000.0)
+    entry = 3 * 10 + 9                              # 1月5日最后一根：放量阳线
+    open_[entry] = 9.9
+    volume[entry] = 10000
+    close[entry + 1:] = open_[entry + 1:] = 9.9     # 之后小幅亏损，不触发止损
+    df = pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close), 'Low': np.minimum(open_, close),
+                       'Close': close, 'Volume': volume}, index=index)
+
+    trades = pd.DataFrame(run_backtest(df, max_holding_days_no_profit=2)['trades'])
+    assert list(trades['reason']) == ['long_entry', 'time_stop_loss']
+    assert trades['date'].iloc[1] == pd.Timestamp('2024-01-17 09:35')   # 复牌后第 3 个有数据的交易日
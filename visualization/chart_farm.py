@@ -0,0 +1,403 @@
+"""
+批量K线图渲染服务（generate_*_charts 脚本共用）
+
+- 共享上下文：进程池 initializer 把只读上下文（行情快照、扫描命中、参数）每个子进程只传一次，
+  任务本身只带单只股票的轻量描述
+- 内容寻址缓存：PNG 按渲染键（绘图数据、信号、标题、样式的哈希）存放在缓存目录，
+  另以源键（数据文件大小/修改时间 + 参数 + 标题输入）索引，数据文件没变时连 CSV 都不读
+- 未变化的图直接从缓存复制到输出目录，日常扫描后刷新只重画数据有更新的股票
+
+用法（脚本侧）：
+    def _render_one(job):
+        ctx = worker_context()
+        key = source_key(job.path, 'kind', ctx['params'])
+        return render_cached(out_png, key, lambda: build(job, ctx), ctx['spec'])
+
+    rows = run_tasks(_render_one, jobs, context={'spec': ChartSpec(), 'params': ...}, workers=4)
+    save_cache_index(cache_dir, rows)
+
+figure 每张图新建、保存后立即关闭：复用同一 figure 需要走 mplfinance 的外部 axes 模式，
+会改变标题与坐标轴布局且实测没有提速，因此不复用。
+"""
+import concurrent.futures as cf
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import mplfinance as mpf  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from pandas.tseries.offsets import BDay  # noqa: E402
+
+from core import profiling  # noqa: E402
+from core.log import configure_worker, worker_logging  # noqa: E402
+from core.storage import json_default  # noqa: E402
+
+
+# 绘图逻辑变化时递增，使旧缓存整体失效
+RENDER_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join('results', 'chart_cache')
+INDEX_FILE = 'index.json'
+
+# 缓存元数据键（随结果行返回主进程，写 CSV 前用 public_row 去掉）
+META_KEYS = ('_source_key', '_render_key', '_status')
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """图表样式（参与渲染键）"""
+    style: str = 'charles'
+    mav: Tuple[int, ...] = (5, 10, 20, 60)
+    dpi: int = 160
+    figsize: Tuple[float, float] = (16, 10)
+    pad_right: int = 0                    # 右侧留空K线数，避免最后一根被裁切
+    sell_markers: bool = True
+    pad_inches: Optional[float] = None
+
+
+@dataclass
+class ChartRequest:
+    """一张待渲染的图：绘图区间数据、对齐后的信号、标题和结果行"""
+    data: pd.DataFrame
+    signals: Optional[pd.DataFrame]
+    title: str
+    row: Dict[str, Any]
+
+
+# ---------------- 哈希 ----------------
+
+def _json_default(value):
+    # 时间保持 str() 格式：缓存命中时结果行取自索引 JSON，须与新渲染的行写出 CSV 时一致
+    if isinstance(value, pd.Timestamp):
+        return str(value)
+    return json_default(value, strict=True)
+
+
+def _update_hash(h, part) -> None:
+    if isinstance(part, pd.DataFrame):
+        h.update(repr(list(part.columns)).encode())
+        _update_hash(h, part.index)
+        for col in part.columns:
+            _update_hash(h, part[col])
+    elif isinstance(part, pd.Series):
+        h.update(str(part.dtype).encode())
+        h.update(np.ascontiguousarray(pd.to_numeric(part, errors='coerce').to_numpy(dtype=float)).tobytes())
+    elif isinstance(part, pd.Index):
+        values = part.asi8 if isinstance(part, pd.DatetimeIndex) else np.asarray(part.astype(str), dtype=object)
+        h.update(np.asarray(values).tobytes() if values.dtype != object else '\x1f'.join(values).encode())
+    else:
+        h.update(json.dumps(part, sort_keys=True, default=_json_default).encode())
+    h.update(b'\x1e')
+
+
+def content_key(*parts) -> str:
+    """任意 DataFrame / Series / 可 JSON 化对象组合的内容哈希"""
+    h = hashlib.sha1(f'v{RENDER_VERSION}'.encode())
+    for part in parts:
+        _update_hash(h, part)
+    return h.hexdigest()
+
+
+def file_stamp(path) -> Optional[Tuple[str, int, int]]:
+    """文件的 (绝对路径, 大小, 修改时间)，不存在时为 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(str(path)), stat.st_size, stat.st_mtime_ns
+
+
+def source_key(path, *parts) -> str:
+    """
+    数据文件与参数的廉价键（不读文件内容），文件不存在时返回空串（不走缓存）
+
+    parts 应包含影响结果行或标题的全部输入，策略代码可用 file_stamp(module.__file__) 参与，
+    改动策略后旧图自动失效。
+    """
+    stamp = file_stamp(path)
+    if stamp is None:
+        return ''
+    return content_key(stamp, *parts)
+
+
+# ---------------- 绘图 ----------------
+
+def markers(df: pd.DataFrame, signals: Optional[pd.DataFrame]) -> Tuple[pd.Series, pd.Series]:
+    """signal==1 / -1 的位置分别在最低价下方 / 最高价上方放标记"""
+    signal = signals.get('signal', 0) if signals is not None else 0
+    buy_mask = (signal == 1).reindex(df.index, fill_value=False) if isinstance(signal, pd.Series) \
+        else pd.Series(False, index=df.index)
+    sell_mask = (signal == -1).reindex(df.index, fill_value=False) if isinstance(signal, pd.Series) \
+        else pd.Series(False, index=df.index)
+
+    buy_y = pd.Series(index=df.index, data=np.nan, dtype='float64')
+    sell_y = pd.Series(index=df.index, data=np.nan, dtype='float64')
+    if buy_mask.any():
+        buy_y.loc[buy_mask] = (df.loc[buy_mask, 'Low'] * 0.99).astype(float)
+    if sell_mask.any():
+        sell_y.loc[sell_mask] = (df.loc[sell_mask, 'High'] * 1.01).astype(float)
+    return buy_y, sell_y
+
+
+def pad_plot_right(df_view: pd.DataFrame, bars: int = 2) -> pd.DataFrame:
+    """右侧追加空K线，尽量沿用原有间隔，推断不出时按工作日"""
+    n = max(0, int(bars))
+    if df_view is None or df_view.empty or n == 0 or not isinstance(df_view.index, pd.DatetimeIndex):
+        return df_view
+
+    idx = df_view.index
+    step = None
+    if len(idx) >= 3:
+        try:
+            freq = pd.infer_freq(idx[-min(len(idx), 20):])
+            if freq:
+                step = pd.tseries.frequencies.to_offset(freq)
+        except Exception:
+            step = None
+    step = step if step is not None else BDay(1)
+
+    future_idx = []
+    current = idx.max()
+    for _ in range(n):
+        try:
+            current = current + step
+        except Exception:
+            current = current + pd.Timedelta(days=1)
+        future_idx.append(current)
+
+    pad = pd.DataFrame(index=pd.DatetimeIndex(future_idx), columns=df_view.columns, dtype='float64')
+    return pd.concat([df_view, pad], axis=0)
+
+
+def last_years(df: pd.DataFrame, years: int) -> pd.DataFrame:
+    """截取最后 years 年（按最后一根K线往前推）"""
+    if df is None or df.empty:
+        return df if df is not None else pd.DataFrame()
+    start_ts = df.index.max() - pd.DateOffset(years=int(years))
+    return df.loc[df.index >= start_ts]
+
+
+@profiling.timed('chart_farm.render')
+def render_chart(df_view: pd.DataFrame, signals_view: Optional[pd.DataFrame], out_png, title: str, spec: ChartSpec):
+    """蜡烛图 + 成交量 + 均线 + 买卖点，保存后立即关闭 figure"""
+    df_plot = pad_plot_right(df_view, spec.pad_right) if spec.pad_right else df_view
+    signals_plot = signals_view.reindex(df_plot.index) if signals_view is not None else None
+
+    addplots = []
+    buy_y, sell_y = markers(df_plot, signals_plot)
+    if buy_y.notna().any():
+        addplots.append(mpf.make_addplot(buy_y, type='scatter', markersize=60, marker='^', color='g', panel=0))
+    if spec.sell_markers and sell_y.notna().any():
+        addplots.append(mpf.make_addplot(sell_y, type='scatter', markersize=60, marker='v', color='r', panel=0))
+
+    savefig = dict(fname=str(out_png), dpi=spec.dpi, bbox_inches='tight')
+    if spec.pad_inches is not None:
+        savefig['pad_inches'] = spec.pad_inches
+    plot_kwargs = dict(
+        type='candle',
+        style=spec.style,
+        volume=True,
+        mav=tuple(spec.mav),
+        title=title,
+        ylabel='Price',
+        ylabel_lower='Volume',
+        warn_too_much_data=len(df_plot) + 500,
+        figsize=tuple(spec.figsize),
+        tight_layout=True,
+        returnfig=True,
+    )
+    if addplots:
+        plot_kwargs['addplot'] = addplots
+
+    fig, _ = mpf.plot(df_plot, **plot_kwargs)
+    try:
+        fig.savefig(**savefig)
+    finally:
+        plt.close(fig)
+
+
+# ---------------- 缓存 ----------------
+
+def load_cache_index(cache_dir: str) -> Dict[str, Dict]:
+    """源键 -> {'render': 渲染键, 'row': 结果行}；缓存目录为空串时禁用"""
+    if not cache_dir:
+        return {}
+    path = os.path.join(cache_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache_index(cache_dir: str, rows: Iterable[Optional[Dict]]) -> int:
+    """把本次结果行里的缓存键合并进索引（只在主进程调用），返回新增/更新条数"""
+    if not cache_dir:
+        return 0
+    index = load_cache_index(cache_dir)
+    updated = 0
+    for row in rows:
+        if not row or not row.get('_source_key') or not row.get('_render_key'):
+            continue
+        entry = {'render': row['_render_key'], 'row': public_row(row)}
+        if index.get(row['_source_key']) != entry:
+            index[row['_source_key']] = entry
+            updated += 1
+    if updated:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, INDEX_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp, path)
+    return updated
+
+
+def public_row(row: Dict) -> Dict:
+    """去掉缓存元数据键"""
+    return {k: v for k, v in row.items() if k not in META_KEYS}
+
+
+def _cache_png(cache_dir: str, render_key: str) -> str:
+    return os.path.join(cache_dir, 'png', render_key[:2], f'{render_key}.png')
+
+
+def _publish(src: str, out_png) -> None:
+    out_png = str(out_png)
+    if os.path.abspath(src) == os.path.abspath(out_png):
+        return
+    os.makedirs(os.path.dirname(out_png) or '.', exist_ok=True)
+    shutil.copyfile(src, out_png)
+
+
+def render_cached(
+    out_png,
+    src_key: str,
+    build: Callable[[], Optional[ChartRequest]],
+    spec: ChartSpec,
+    cache_dir: Optional[str] = None,
+    force: bool = False
+) -> Optional[Dict]:
+    """
+    带缓存地产出一张图
+
+    1. 源键命中且缓存 PNG 存在：直接复制，不读数据、不算信号（_status='cached'）
+    2. 否则调用 build() 得到 ChartRequest（返回 None 表示跳过该股票），按渲染键查缓存，
+       命中则复制（'unchanged'），未命中才真正渲染（'rendered'）
+
+    Returns:
+        结果行（含 png 路径和缓存元数据键），build() 返回 None 时为 None
+    """
+    ctx = _context
+    cache_dir = ctx.get('cache_dir', '') if cache_dir is None else cache_dir
+    force = force or bool(ctx.get('force', False))
+    index = ctx.get('cache_index', {})
+    src_key = content_key(src_key, spec) if src_key else ''
+
+    if cache_dir and src_key and not force:
+        entry = index.get(src_key)
+        if entry:
+            cached = _cache_png(cache_dir, entry['render'])
+            if os.path.exists(cached):
+                _publish(cached, out_png)
+                return {**entry['row'], 'png': str(out_png),
+                        '_source_key': src_key, '_render_key': entry['render'], '_status': 'cached'}
+
+    with profiling.stage('chart_farm.build'):
+        request = build()
+    if request is None:
+        return None
+
+    signal = request.signals['signal'] if request.signals is not None and 'signal' in request.signals else None
+    render_key = content_key(request.data, signal, request.title, spec)
+    row = {**request.row, 'png': str(out_png), '_source_key': src_key, '_render_key': render_key}
+
+    if not cache_dir:
+        render_chart(request.data, request.signals, out_png, request.title, spec)
+        row['_status'] = 'rendered'
+        return row
+
+    cached = _cache_png(cache_dir, render_key)
+    if os.path.exists(cached) and not force:
+        row['_status'] = 'unchanged'
+    else:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        tmp = f'{cached}.{os.getpid()}.tmp.png'
+        render_chart(request.data, request.signals, tmp, request.title, spec)
+        os.replace(tmp, cached)
+        row['_status'] = 'rendered'
+    _publish(cached, out_png)
+    return row
+
+
+# ---------------- 进程池 ----------------
+
+_context: Dict[str, Any] = {}
+
+
+def init_worker(context: Dict[str, Any], log_args: Tuple = ()) -> None:
+    """进程池 initializer：每个子进程只接收一次共享只读上下文；log_args 非空时日志经队列交主进程输出"""
+    if log_args:
+        configure_worker(*log_args)
+    _context.clear()
+    _context.update(context)
+
+
+def worker_context() -> Dict[str, Any]:
+    return _context
+
+
+def run_tasks(
+    fn: Callable[[Any], Optional[Dict]],
+    tasks: List[Any],
+    context: Dict[str, Any],
+    workers: int = 1,
+    progress_every: int = 10
+) -> List[Optional[Dict]]:
+    """
+    执行渲染任务，返回结果列表（完成顺序）
+
+    context 中的 cache_dir 会自动补充 cache_index（源键索引），workers<=1 时在当前进程执行。
+    """
+    context = dict(context)
+    context.setdefault('cache_dir', DEFAULT_CACHE_DIR)
+    context.setdefault('cache_index', load_cache_index(context['cache_dir']))
+
+    results: List[Optional[Dict]] = []
+    total = len(tasks)
+    workers = max(1, int(workers))
+    if workers > 1 and total > 1:
+        with worker_logging() as log_args, cf.ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(context, log_args)
+        ) as ex:
+            futs = [profiling.pool_submit(ex, fn, t) for t in tasks]
+            for idx, fut in enumerate(cf.as_completed(futs), 1):
+                results.append(profiling.pool_result(fut))
+                if progress_every and (idx % progress_every == 0 or idx == total):
+                    print(f"[INFO] progress {idx}/{total}")
+    else:
+        init_worker(context)
+        for idx, task in enumerate(tasks, 1):
+            results.append(fn(task))
+            if progress_every and (idx % progress_every == 0 or idx == total):
+                print(f"[INFO] progress {idx}/{total}")
+    return results
+
+
+def status_counts(rows: Iterable[Optional[Dict]]) -> Dict[str, int]:
+    """按 _status 统计 rendered / unchanged / cached"""
+    counts: Dict[str, int] = {}
+    for row in rows:
+        if row and row.get('_status'):
+            counts[row['_status']] = counts.get(row['_status'], 0) + 1
+    return counts
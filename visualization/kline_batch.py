@@ -0,0 +1,279 @@
+"""
+批量K线图渲染器（同一进程连续输出多只股票/合约的K线图）
+
+KLinePlotter 每次调用都要重算指标、构造 make_addplot、由 mplfinance 新建 figure，
+批量出图时这些固定开销占了大头。这里改为：
+- 字体/样式只设置一次，figure 与坐标轴只创建一次（Agg 画布，不经过 pyplot）
+- K线实体/成交量用 PolyCollection、影线用 LineCollection，每张图只替换顶点
+- 指标数组可由调用方预先算好传入，未传时按与 KLinePlotter 相同的公式计算
+- 输出格式按扩展名选择（.png / .webp，webp 需要 Pillow 支持）
+- 记录每张图的渲染耗时，latency_report() 汇总；开启 core.profiling 时计入 'kline_batch.render'
+
+用法：
+    renderer = BatchKLineRenderer(show_rsi=False)
+    for symbol, data in items:
+        renderer.render(data, f'{symbol}.png', title=symbol, buy_signals=buy, sell_signals=sell)
+    print(renderer.latency_report())
+    renderer.close()
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+
+from core.profiling import stage
+from visualization.kline_lod import rect_vertices
+
+
+# 与 mplfinance 'charles' 样式一致的配色
+CHARLES_COLORS = {
+    'up': '#006340', 'down': '#a02128',
+    'volume_up': '#007a00', 'volume_down': '#d50d18',
+}
+
+_fonts_ready = False
+
+
+def setup_fonts():
+    """设置中文字体（进程内只做一次）"""
+    global _fonts_ready
+    if _fonts_ready:
+        return
+    rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'Arial Unicode MS', 'DejaVu Sans']
+    rcParams['axes.unicode_minus'] = False
+    _fonts_ready = True
+
+
+def boll_bands(close, period: int = 20, num_std: float = 2) -> Dict[str, np.ndarray]:
+    """布林带（与 KLinePlotter 相同口径：滚动均值 ± num_std × 样本标准差）"""
+    close = pd.Series(np.asarray(close, dtype=float))
+    middle = close.rolling(window=period).mean()
+    std = close.rolling(window=period).std()
+    return {
+        'BB_Upper': (middle + std * num_std).to_numpy(),
+        'BB_Middle': middle.to_numpy(),
+        'BB_Lower': (middle - std * num_std).to_numpy(),
+    }
+
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    """RSI（与 KLinePlotter 相同口径：简单移动平均）"""
+    delta = pd.Series(np.asarray(close, dtype=float)).diff()
+    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    return (100 - (100 / (1 + gain / loss))).to_numpy()
+
+
+def _marker_points(signals, data: pd.DataFrame, default_col: str, factor: float) -> np.ndarray:
+    """
+    信号 -> (n, 2) 散点坐标
+
+    数值序列（如 chan_edge_prices 的结果）：非 0 且有效处，以该值为纵坐标；
+    布尔序列：True 处画在最低价下方 / 最高价上方。
+    """
+    if signals is None:
+        return np.empty((0, 2))
+    values = signals.reindex(data.index) if isinstance(signals, pd.Series) else pd.Series(signals, index=data.index)
+    if values.dtype == bool:
+        mask = values.to_numpy()
+        y = data[default_col].to_numpy(dtype=float) * factor
+    else:
+        y = values.to_numpy(dtype=float)
+        mask = np.isfinite(y) & (y != 0)
+    pos = np.flatnonzero(mask)
+    return np.column_stack([pos, y[pos]])
+
+
+class BatchKLineRenderer:
+    """复用同一个 figure 的批量K线图渲染器"""
+
+    def __init__(
+        self,
+        show_boll: bool = True,
+        show_rsi: bool = False,
+        show_volume: bool = True,
+        figsize: tuple = (16, 12),
+        dpi: int = 100,
+        colors: Optional[Dict[str, str]] = None,
+        max_ticks: int = 10
+    ):
+        """
+        Args:
+            show_boll: 是否显示布林带
+            show_rsi: 是否显示RSI面板
+            show_volume: 是否显示成交量面板
+            figsize: 图表大小
+            dpi: 输出分辨率
+            colors: 涨跌配色，默认 CHARLES_COLORS
+            max_ticks: x轴日期标签数量上限
+        """
+        setup_fonts()
+        self.show_boll = show_boll
+        self.show_rsi = show_rsi
+        self.show_volume = show_volume
+        self.dpi = dpi
+        self.max_ticks = max_ticks
+        palette = {**CHARLES_COLORS, **(colors or {})}
+        self._colors = {k: np.array(to_rgba(v)) for k, v in palette.items()}
+        self.timings: List[Tuple[str, float]] = []
+
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        ratios = [3] + [1] * int(show_volume) + [1] * int(show_rsi)
+        axes = self.fig.subplots(len(ratios), 1, sharex=True, squeeze=False,
+                                 gridspec_kw={'height_ratios': ratios})[:, 0]
+        self.fig.subplots_adjust(left=0.07, right=0.97, top=0.94, bottom=0.09, hspace=0.08)
+        self.title = self.fig.suptitle('', fontsize=14)
+
+        self.ax_price = axes[0]
+        self.ax_volume = axes[1] if show_volume else None
+        self.ax_rsi = axes[-1] if show_rsi else None
+
+        self.wicks = LineCollection([], linewidths=0.8)
+        self.bodies = PolyCollection([], linewidths=0.5)
+        self.ax_price.add_collection(self.wicks, autolim=False)
+        self.ax_price.add_collection(self.bodies, autolim=False)
+        self.ax_price.set_ylabel('价格')
+        self.bb_lines = {
+            'BB_Upper': self.ax_price.plot([], [], color='orange', alpha=0.5, linewidth=1)[0],
+            'BB_Middle': self.ax_price.plot([], [], color='blue', alpha=0.5, linewidth=1)[0],
+            'BB_Lower': self.ax_price.plot([], [], color='orange', alpha=0.5, linewidth=1)[0],
+        }
+        self.buy_scatter = self.ax_price.scatter([], [], marker='^', s=100, color='g', zorder=5)
+        self.sell_scatter = self.ax_price.scatter([], [], marker='v', s=100, color='r', zorder=5)
+
+        if self.ax_volume is not None:
+            self.volume_bars = PolyCollection([], linewidths=0)
+            self.ax_volume.add_collection(self.volume_bars, autolim=False)
+            self.ax_volume.set_ylabel('成交量')
+        if self.ax_rsi is not None:
+            self.rsi_line, = self.ax_rsi.plot([], [], color='purple', linewidth=1)
+            self.ax_rsi.set_ylim(0, 100)
+            self.ax_rsi.set_ylabel('RSI')
+        for ax in axes:
+            ax.grid(True, alpha=0.3)
+
+    def render(
+        self,
+        data: pd.DataFrame,
+        save_path: str,
+        title: str = '',
+        buy_signals=None,
+        sell_signals=None,
+        indicators: Optional[Dict[str, np.ndarray]] = None,
+        boll_period: int = 20,
+        boll_std: float = 2,
+        rsi_period: int = 14
+    ) -> float:
+        """
+        渲染一张图并保存
+
+        Args:
+            data: 包含OHLCV数据的DataFrame
+            save_path: 输出路径，扩展名决定格式（.png / .webp / .jpg ...）
+            title: 图表标题
+            buy_signals / sell_signals: 买卖点序列（价格序列或布尔序列，与 data 对齐）
+            indicators: 预先算好的指标数组（BB_Upper/BB_Middle/BB_Lower/RSI），缺的按参数现算
+
+        Returns:
+            本张图的渲染耗时（秒）
+        """
+        start = time.perf_counter()
+        with stage('kline_batch.render'):
+            self._update(data, title, buy_signals, sell_signals, indicators or {},
+                         boll_period, boll_std, rsi_period)
+            self.fig.savefig(save_path, dpi=self.dpi)
+        elapsed = time.perf_counter() - start
+        self.timings.append((str(save_path), elapsed))
+        return elapsed
+
+    def _update(self, data, title, buy_signals, sell_signals, indicators, boll_period, boll_std, rsi_period):
+        n = len(data)
+        opens = data['Open'].to_numpy(dtype=float)
+        highs = data['High'].to_numpy(dtype=float)
+        lows = data['Low'].to_numpy(dtype=float)
+        closes = data['Close'].to_numpy(dtype=float)
+        x = np.arange(n, dtype=float)
+        up = closes >= opens
+        colors = np.where(up[:, None], self._colors['up'], self._colors['down'])
+
+        self.title.set_text(title)
+        self.wicks.set_segments(np.stack([np.column_stack([x, lows]), np.column_stack([x, highs])], axis=1))
+        self.wicks.set_color(colors)
+        self.bodies.set_verts(rect_vertices(x - 0.3, x + 0.3, np.minimum(opens, closes), np.maximum(opens, closes)))
+        self.bodies.set_facecolor(colors)
+        self.bodies.set_edgecolor(colors)
+
+        y_low, y_high = np.nanmin(lows) if n else 0.0, np.nanmax(highs) if n else 1.0
+        if self.show_boll:
+            bands = indicators if all(k in indicators for k in self.bb_lines) else boll_bands(closes, boll_period, boll_std)
+            for key, line in self.bb_lines.items():
+                line.set_data(x, bands[key])
+            if n:
+                y_low = np.nanmin([y_low, np.nanmin(np.append(bands['BB_Lower'], y_low))])
+                y_high = np.nanmax([y_high, np.nanmax(np.append(bands['BB_Upper'], y_high))])
+        for line in self.bb_lines.values():
+            line.set_visible(self.show_boll)
+
+        buy = _marker_points(buy_signals, data, 'Low', 0.99)
+        sell = _marker_points(sell_signals, data, 'High', 1.01)
+        self.buy_scatter.set_offsets(buy)
+        self.sell_scatter.set_offsets(sell)
+        if len(buy):
+            y_low = min(y_low, np.nanmin(buy[:, 1]))
+        if len(sell):
+            y_high = max(y_high, np.nanmax(sell[:, 1]))
+        pad = (y_high - y_low) * 0.03 or abs(y_high) * 0.01 or 1.0
+        self.ax_price.set_ylim(y_low - pad, y_high + pad)
+        self.ax_price.set_xlim(-1, max(n, 1))
+
+        if self.ax_volume is not None:
+            volumes = data['Volume'].to_numpy(dtype=float)
+            # 与 mplfinance 一致：成交量颜色按收盘价相对前收
+            vol_up = np.concatenate([[True], closes[1:] >= closes[:-1]]) if n else np.empty(0, dtype=bool)
+            self.volume_bars.set_verts(rect_vertices(x - 0.4, x + 0.4, np.zeros(n), volumes))
+            self.volume_bars.set_facecolor(np.where(vol_up[:, None], self._colors['volume_up'], self._colors['volume_down']))
+            v_max = np.nanmax(volumes) if n else 0.0
+            self.ax_volume.set_ylim(0, v_max * 1.05 if v_max > 0 else 1.0)
+
+        if self.ax_rsi is not None:
+            rsi_values = indicators['RSI'] if 'RSI' in indicators else rsi(closes, rsi_period)
+            self.rsi_line.set_data(x, rsi_values)
+
+        self._set_date_ticks(data.index)
+
+    def _set_date_ticks(self, index):
+        n = len(index)
+        ax_bottom = self.ax_rsi or self.ax_volume or self.ax_price
+        if n == 0:
+            ax_bottom.set_xticks([])
+            return
+        dates = pd.DatetimeIndex(index)
+        fmt = '%Y-%m-%d %H:%M' if bool((dates != dates.normalize()).any()) else '%Y-%m-%d'
+        ticks = np.unique(np.linspace(0, n - 1, min(self.max_ticks, n), dtype=int))
+        ax_bottom.set_xticks(ticks)
+        ax_bottom.set_xticklabels([dates[i].strftime(fmt) for i in ticks], rotation=30, ha='right', fontsize=8)
+
+    def latency_report(self) -> Dict[str, float]:
+        """每张图渲染耗时统计（毫秒）"""
+        if not self.timings:
+            return {'charts': 0}
+        ms = np.array([t for _, t in self.timings]) * 1000
+        return {
+            'charts': len(ms),
+            'total_ms': float(ms.sum()),
+            'mean_ms': float(ms.mean()),
+            'p50_ms': float(np.percentile(ms, 50)),
+            'p95_ms': float(np.percentile(ms, 95)),
+            'max_ms': float(ms.max()),
+        }
+
+    def close(self):
+        """释放 figure"""
+        self.fig.clear()
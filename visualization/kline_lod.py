@@ -0,0 +1,117 @@
+"""
+K线多级细节（LOD）金字塔
+
+把 OHLCV 逐级两两合并成 2×、4×、8×… 的粗粒度K线，交互查看时按像素预算选择层级，
+保证可见K线数量有上限，平移/缩放的开销与总历史长度无关。
+
+- 第 k 层每根K线覆盖原始位置 [start, end)，宽度 2^k（最后一根可能不足）
+- 合并规则：开=首、高=最大、低=最小、收=末、量=求和，指标列取末值（与收盘同口径）
+- 横坐标统一用原始K线序号，切换层级时坐标轴不变
+- 绘图几何只为可见切片生成（长度受像素预算限制），直接交给集合对象替换顶点
+"""
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+OHLCV = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class OHLCVPyramid:
+    """OHLCV 多级聚合金字塔"""
+
+    def __init__(self, data: pd.DataFrame, extra_columns: Sequence[str] = (), min_bars: int = 64):
+        """
+        Args:
+            data: 含 OHLCV 列的 DataFrame（按时间升序）
+            extra_columns: 额外随K线聚合的列（取桶内末值），如 BB_Upper、RSI
+            min_bars: 最粗一层至少保留的K线数
+        """
+        self.index = data.index
+        self.n = len(data)
+        self.extra_columns = tuple(c for c in extra_columns if c in data.columns)
+
+        base = {col.lower(): data[col].to_numpy(dtype=float) for col in OHLCV}
+        for col in self.extra_columns:
+            base[col] = data[col].to_numpy(dtype=float)
+        base['start'] = np.arange(self.n, dtype=np.int64)
+        base['end'] = base['start'] + 1
+        self.levels: List[Dict[str, np.ndarray]] = [base]
+
+        while len(self.levels[-1]['start']) > max(1, int(min_bars)):
+            self.levels.append(self._merge(self.levels[-1]))
+
+    def _merge(self, level: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """相邻两根合并成一根"""
+        m = len(level['start'])
+        starts = np.arange(0, m, 2)
+        ends = np.minimum(starts + 2, m) - 1
+        merged = {
+            'open': level['open'][starts],
+            'high': np.maximum.reduceat(level['high'], starts),
+            'low': np.minimum.reduceat(level['low'], starts),
+            'close': level['close'][ends],
+            'volume': np.add.reduceat(level['volume'], starts),
+            'start': level['start'][starts],
+            'end': level['end'][ends],
+        }
+        for col in self.extra_columns:
+            merged[col] = level[col][ends]
+        return merged
+
+    @staticmethod
+    def factor(level: int) -> int:
+        return 1 << int(level)
+
+    def level_for(self, visible_bars: int, max_bars: int) -> int:
+        """可见原始K线数为 visible_bars 时，满足像素预算 max_bars 的最细层级"""
+        level = 0
+        max_bars = max(1, int(max_bars))
+        while level + 1 < len(self.levels) and -(-int(visible_bars) // self.factor(level)) > max_bars:
+            level += 1
+        return level
+
+    def span(self, level: int, start: int, end: int) -> Tuple[int, int]:
+        """原始区间 [start, end) 在第 level 层对应的K线位置区间 [lo, hi)"""
+        f = self.factor(level)
+        count = len(self.levels[level]['start'])
+        lo = min(max(0, int(start)) // f, count)
+        hi = min(-(-max(0, int(end)) // f), count)
+        return lo, max(lo, hi)
+
+    def geometry(self, level: int, lo: int, hi: int, body_width: float = 0.6) -> Dict[str, np.ndarray]:
+        """
+        第 level 层 [lo, hi) 区间K线的绘图几何
+
+        Returns:
+            x: 中心横坐标（原始序号）
+            body: (n, 4, 2) 实体矩形顶点
+            wick: (n, 2, 2) 影线线段
+            volume: (n, 4, 2) 成交量柱顶点
+            up: 收盘 >= 开盘
+        """
+        lv = {k: v[lo:hi] for k, v in self.levels[level].items()}
+        x = (lv['start'] + lv['end'] - 1) / 2.0
+        half = (lv['end'] - lv['start']) * body_width / 2.0
+        left, right = x - half, x + half
+        bottom = np.minimum(lv['open'], lv['close'])
+        top = np.maximum(lv['open'], lv['close'])
+
+        return {
+            'x': x,
+            'body': rect_vertices(left, right, bottom, top),
+            'wick': np.stack([np.column_stack([x, lv['low']]), np.column_stack([x, lv['high']])], axis=1),
+            'volume': rect_vertices(left, right, np.zeros_like(x), lv['volume']),
+            'up': lv['close'] >= lv['open'],
+        }
+
+
+def rect_vertices(left: np.ndarray, right: np.ndarray, bottom: np.ndarray, top: np.ndarray) -> np.ndarray:
+    """(n, 4, 2) 矩形顶点数组"""
+    return np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([left, top]),
+        np.column_stack([right, top]),
+        np.column_stack([right, bottom]),
+    ], axis=1)
@@ -11,6 +11,9 @@ warnings.filterwarnings('ignore')
 from chan_theory_realtime import ChanTheoryRealtime
 from kline_plotter import KLinePlotter
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators.chan.signal_edges import chan_edge_prices
+
 
 # 期货合约配置
 CONTRACT_SPECS = {
@@ -63,23 +66,8 @@ def analyze_and_plot(symbol: str, output_dir: str = 'results/futures_signals'):
     chan = ChanTheoryRealtime(k_type='minute')
     result_df = chan.analyze(df)
     
-    # 生成买卖信号 - 使用float类型避免类型错误
-    buy_signals = pd.Series(0.0, index=df.index, dtype=float)
-    sell_signals = pd.Series(0.0, index=df.index, dtype=float)
-    
-    for i in range(1, len(result_df)):
-        current = result_df.iloc[i]
-        previous = result_df.iloc[i-1]
-        
-        # 只取最后一个时间点对应的原始数据索引
-        if i < len(df):
-            idx = df.index[i]
-            
-            if current['buy_point'] > 0 and previous['buy_point'] == 0:
-                buy_signals.loc[idx] = float(df.loc[idx, 'Close'])
-            
-            if current['sell_point'] > 0 and previous['sell_point'] == 0:
-                sell_signals.loc[idx] = float(df.loc[idx, 'Close'])
+    # 生成买卖信号：买卖点由 0 变为非零的K线标记收盘价
+    buy_signals, sell_signals = chan_edge_prices(result_df, df, types=None)
     
     # 统计信号数量
     buy_count = int((buy_signals > 0).sum())